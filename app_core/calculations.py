@@ -7,11 +7,22 @@ import logging
 import math
 import re
 import warnings
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd  # Needed for buscar_valores_tabela
-from scipy.fftpack import fft, fftfreq, ifft
-from scipy.optimize import OptimizeWarning, curve_fit
+from scipy.optimize import OptimizeWarning
+
+from app_core import impulse_kernels
+from app_core.impulse_batch import front_tail_times_batch
+from app_core.impulse_fit import (
+    filter_residual_batch,
+    filter_residual_on_grid,
+    fit_double_exp_base,
+    fit_double_exp_base_batch,
+)
+from app_core.param_cache import memoized_params
+from app_core.sim_workspace import SimulationWorkspace
 
 # Importar constantes definidas centralmente
 from utils import constants
@@ -153,8 +164,15 @@ def parse_resistor_expression(expression: str) -> tuple:
                     return float("inf"), special_components
 
             try:
-                # Avalia a parte no ambiente seguro
-                part_value = eval(part, {"__builtins__": {}}, safe_dict)
+                # Avalia a parte no ambiente seguro; '||' (__parallel__) tem
+                # precedência sobre '+', então cada parte em série pode ser um paralelo
+                if "__parallel__" in part:
+                    branches = [b.strip() for b in part.split("__parallel__") if b.strip()]
+                    part_value = calculate_parallel(
+                        *(eval(b, {"__builtins__": {}}, safe_dict) for b in branches)
+                    )
+                else:
+                    part_value = eval(part, {"__builtins__": {}}, safe_dict)
                 if (
                     not isinstance(part_value, (int, float))
                     or part_value < 0
@@ -190,6 +208,7 @@ def parse_resistor_expression(expression: str) -> tuple:
 # === Funções Relacionadas ao Gerador de Impulso (de impulse.py) ===
 
 
+@memoized_params()
 def get_generator_params(config_value: str) -> tuple[int, int, float, float]:
     """Obtém os parâmetros (estágios, paralelo, Vmax, Energia) de uma configuração."""
     config = next(
@@ -225,6 +244,7 @@ def get_generator_params(config_value: str) -> tuple[int, int, float, float]:
     )
 
 
+@memoized_params()
 def get_divider_capacitance(generator_max_voltage_kv: float) -> float:
     """Retorna a capacitância do divisor baseada na tensão MÁXIMA da configuração."""
     try:
@@ -240,6 +260,7 @@ def get_divider_capacitance(generator_max_voltage_kv: float) -> float:
         return constants.C_DIVIDER_HIGH_VOLTAGE_F  # Fallback seguro
 
 
+@memoized_params()
 def calculate_effective_gen_params(n_stages: int, n_parallel: int) -> tuple[float, float]:
     """Calcula a capacitância e indutância efetivas do gerador."""
     if n_stages <= 0 or n_parallel <= 0:
@@ -258,6 +279,7 @@ def calculate_effective_gen_params(n_stages: int, n_parallel: int) -> tuple[floa
 # === Funções de Cálculo de Carga (de impulse.py) ===
 
 
+@memoized_params()
 def calculate_transformer_inductance(
     voltage_kv: float | None,
     power_mva: float | None,
@@ -308,6 +330,7 @@ def calculate_transformer_inductance(
         return default_inductance
 
 
+@memoized_params()
 def calculate_total_load_capacitance(
     c_dut_pf: float | None,
     c_stray_pf: float | None,
@@ -330,6 +353,7 @@ def calculate_total_load_capacitance(
 # === Funções de Cálculo de Eficiência e Energia (de impulse.py) ===
 
 
+@memoized_params()
 def calculate_circuit_efficiency(
     c_gen_effective_f: float, c_load_total_f: float, impulse_type: str
 ) -> tuple[float, float, float]:
@@ -381,9 +405,98 @@ def calculate_energy_requirements(
         return 0.0
 
 
+GENERATOR_ENERGY_FIELDS = (
+    ("config", "U16"),
+    ("stages", "i4"),
+    ("parallel", "i4"),
+    ("max_voltage_kv", "f8"),
+    ("energy_available_kj", "f8"),
+    ("c_gen_f", "f8"),
+    ("c_load_f", "f8"),
+    ("efficiency", "f8"),
+    ("circuit_efficiency", "f8"),
+    ("charging_voltage_kv", "f8"),
+    ("max_test_voltage_kv", "f8"),
+    ("energy_required_kj", "f8"),
+    ("energy_margin", "f8"),
+    ("voltage_ok", "?"),
+    ("energy_ok", "?"),
+    ("feasible", "?"),
+)
+
+
+@lru_cache(maxsize=1)
+def _generator_config_arrays() -> tuple[np.ndarray, ...]:
+    """Colunas (valor, estágios, paralelo, Vmax, energia) de GENERATOR_CONFIGURATIONS, lidas uma vez."""
+    configs = constants.GENERATOR_CONFIGURATIONS
+    arrays = (
+        np.array([c["value"] for c in configs]),
+        np.array([int(c["stages"]) for c in configs]),
+        np.array([int(c["parallel"]) for c in configs]),
+        np.array([float(c["max_voltage_kv"]) for c in configs]),
+        np.array([float(c.get("energy_kj", 0.0)) for c in configs]),
+    )
+    for arr in arrays:
+        arr.flags.writeable = False
+    return arrays
+
+
+def generator_energy_table(
+    test_voltage_kv: float, c_dut_pf: float | None, c_stray_pf: float | None, impulse_type: str
+) -> np.ndarray:
+    """
+    Energia, eficiência e tensão máxima de todas as configurações do gerador de uma vez.
+
+    Mesmas definições de calculate_effective_gen_params, calculate_total_load_capacitance,
+    calculate_circuit_efficiency e calculate_energy_requirements, avaliadas em
+    vetores sobre GENERATOR_CONFIGURATIONS.
+
+    Returns:
+        Array estruturado (uma linha por configuração) com os campos de
+        GENERATOR_ENERGY_FIELDS. feasible indica tensão de carga <= Vmax e energia
+        requerida <= energia disponível.
+    """
+    values, stages, parallel, vmax_kv, energy_kj = _generator_config_arrays()
+    c_gen = constants.C_PER_STAGE_F * parallel / stages
+    c_divider = np.where(vmax_kv <= 1200, constants.C_DIVIDER_LOW_VOLTAGE_F, constants.C_DIVIDER_HIGH_VOLTAGE_F)
+    c_extra = constants.C_CHOPPING_GAP_F if impulse_type == "chopped" else 0.0
+    c_load = float(c_dut_pf or 0.0) * 1e-12 + float(c_stray_pf or 0.0) * 1e-12 + c_extra + c_divider
+
+    circuit_eff = c_gen / (c_gen + c_load)
+    shape_eff = 0.95 if impulse_type in ["lightning", "chopped"] else 0.85
+    efficiency = circuit_eff * shape_eff
+    test_voltage_kv = max(float(test_voltage_kv or 0.0), 0.0)
+    energy_required = 0.5 * c_load * (test_voltage_kv * 1000) ** 2 / 1000
+
+    table = np.empty(values.size, dtype=list(GENERATOR_ENERGY_FIELDS))
+    table["config"] = values
+    table["stages"] = stages
+    table["parallel"] = parallel
+    table["max_voltage_kv"] = vmax_kv
+    table["energy_available_kj"] = energy_kj
+    table["c_gen_f"] = c_gen
+    table["c_load_f"] = c_load
+    table["efficiency"] = efficiency
+    table["circuit_efficiency"] = circuit_eff
+    table["charging_voltage_kv"] = test_voltage_kv / efficiency
+    table["max_test_voltage_kv"] = vmax_kv * efficiency
+    table["energy_required_kj"] = energy_required
+    with np.errstate(divide="ignore"):
+        table["energy_margin"] = np.where(energy_required > 1e-9, energy_kj / energy_required, np.inf)
+    table["voltage_ok"] = table["charging_voltage_kv"] <= vmax_kv
+    table["energy_ok"] = energy_required <= energy_kj
+    table["feasible"] = table["voltage_ok"] & table["energy_ok"]
+    log.debug(
+        f"Tabela de energia: {int(table['feasible'].sum())} de {values.size} configurações viáveis "
+        f"para {test_voltage_kv:.0f} kV ({impulse_type})"
+    )
+    return table
+
+
 # === Funções de Cálculo de Parâmetros de Circuito (de impulse.py) ===
 
 
+@memoized_params()
 def calculate_rlc_equivalent_params(
     n_stages: int,
     n_parallel: int,
@@ -698,134 +811,30 @@ def calculate_k_factor_transform(
         )
 
     # --- 1. Ajuste da Curva Base (Dupla Exponencial) ---
-    try:
-        t_sec = t_us * 1e-6
-        peak_idx = np.argmax(v_kv)
-        t_peak_sec = t_sec[peak_idx]
-
-        # Find t_half (time to 50% on the tail) - more robustly
-        v_half_target = 0.5 * peak_value_orig
-        indices_after_peak = np.where(t_sec >= t_peak_sec)[0]
-        if len(indices_after_peak) < 2:  # Need at least two points for interpolation
-            raise ValueError("Not enough data points after peak to find t_half.")
-
-        v_after_peak = v_kv[indices_after_peak]
-        t_after_peak = t_sec[indices_after_peak]
-
-        # Find where voltage drops below 50% target
-        # Handle cases where voltage might oscillate around 50%
-        crossed_indices = np.where(np.diff(np.sign(v_after_peak - v_half_target)))[0]
-        t_half_sec = t_sec[-1]  # Default to last time if it never drops below 50%
-        if len(crossed_indices) > 0:
-            # Find the first crossing index after the peak
-            first_cross_idx = crossed_indices[0]
-            idx1 = first_cross_idx
-            idx2 = first_cross_idx + 1
-            if idx1 < len(t_after_peak) and idx2 < len(t_after_peak):
-                t1_tail, v1_tail = t_after_peak[idx1], v_after_peak[idx1]
-                t2_tail, v2_tail = t_after_peak[idx2], v_after_peak[idx2]
-                if abs(v2_tail - v1_tail) > 1e-9:  # Avoid division by zero
-                    t_half_sec = t1_tail + (v_half_target - v1_tail) * (t2_tail - t1_tail) / (
-                        v2_tail - v1_tail
-                    )
-                elif v1_tail >= v_half_target:  # If already at or above the point
-                    t_half_sec = t1_tail
-                else:  # If v2_tail is the point or below
-                    t_half_sec = t2_tail
-            else:
-                log.warning("Indices for t_half interpolation out of bounds.")
-        elif np.all(v_after_peak > v_half_target):
-            log.warning("Voltage never dropped below 50% on tail.")
-            t_half_sec = t_sec[-1]  # Use last time point
-
-        # Estimate initial parameters
-        T2_approx_sec = max(1.4 * t_half_sec, 5e-6)
-        T1_approx_sec = max(t_peak_sec, 0.5e-6) if t_peak_sec > 0 else 1e-6
-        alpha_est = 1.0 / T2_approx_sec
-        beta_est = 2.0 / T1_approx_sec
-        if beta_est <= alpha_est:
-            beta_est = alpha_est * 5
-        A_est = peak_value_orig
-
-        def _double_exp_fit_func(t, A_norm, alpha, beta):
-            try:
-                if alpha <= 0 or beta <= 0 or beta <= alpha + 1e-9 * alpha:
-                    return np.full_like(t, 1e12)
-                t_peak = math.log(beta / alpha) / (beta - alpha)
-                val_at_peak = math.exp(-alpha * t_peak) - math.exp(-beta * t_peak)
-                if abs(val_at_peak) < 1e-12:
-                    return np.zeros_like(t)
-                k_norm = A_norm / val_at_peak
-                t_safe = np.maximum(t, 0)
-                res = k_norm * (np.exp(-alpha * t_safe) - np.exp(-beta * t_safe))
-                return res
-            except (ValueError, OverflowError, ZeroDivisionError):
-                return np.full_like(t, 1e12)
-
-        # Adjust bounds based on sign of A_est
-        if A_est > 0:
-            lower_bounds = [A_est * 0.5, alpha_est * 0.1, beta_est * 0.1]
-            upper_bounds = [A_est * 1.5, alpha_est * 10, beta_est * 10]
-        else:  # Negative pulse
-            lower_bounds = [A_est * 1.5, alpha_est * 0.1, beta_est * 0.1]  # A_est is negative
-            upper_bounds = [A_est * 0.5, alpha_est * 10, beta_est * 10]  # A_est is negative
-
-        p0 = [A_est, alpha_est, beta_est]
-
-        popt, pcov = curve_fit(
-            _double_exp_fit_func,
-            t_sec,
-            v_kv,
-            p0=p0,
-            bounds=(lower_bounds, upper_bounds),
-            maxfev=5000,
-            method="trf",
-        )
-
-        A_fit, alpha_fit, beta_fit = popt
-        log.debug(
-            f"Ajuste Curva Base K-Factor: A={A_fit:.2f}, alpha={alpha_fit:.2e}, beta={beta_fit:.2e}"
-        )
-        v_base = _double_exp_fit_func(t_sec, A_fit, alpha_fit, beta_fit)
+    # Estimativa analítica de alpha/beta + least_squares com Jacobiano (ver impulse_fit)
+    fit = fit_double_exp_base(t_us, v_kv)
+    if fit is not None:
+        v_base = fit["v_base"]
+        alpha_fit, beta_fit = fit["alpha"], fit["beta"]
         fit_success = True
-
-    except (RuntimeError, ValueError, OptimizeWarning, Exception) as e:
-        log.warning(
-            f"Ajuste da curva base para K-Factor falhou: {e}. Usando onda original como base."
+        log.debug(
+            f"Ajuste Curva Base K-Factor: A={fit['amplitude']:.2f}, alpha={alpha_fit:.2e}, "
+            f"beta={beta_fit:.2e}, convergiu={fit['converged']}, nfev={fit['nfev']}"
         )
-        v_base = np.copy(v_kv)  # Use original as base if fit fails
-        alpha_fit, beta_fit = None, None
-        fit_success = False
+    else:
+        log.warning("Ajuste da curva base para K-Factor falhou. Usando onda original como base.")
 
     # --- 2. Cálculo do Resíduo ---
     v_residual = v_kv - v_base  # This is kV
 
     # --- 3. Filtragem do Resíduo (Filtro K) ---
     if fit_success and len(t_us) > 1:
-        dt_us = np.mean(np.diff(t_us))
+        # Menor passo: a grade pode ser não uniforme (impulse_grid.adaptive_time_grid)
+        dt_us = np.min(np.diff(t_us))
         if dt_us > 1e-9:
-            dt_sec = dt_us * 1e-6
             try:
-                frequencies = fftfreq(len(t_us), dt_sec)
-                v_residual_fft = fft(v_residual)
-
-                # IEC 61083-2 filter K(f) = 1 / (1 + (f / fc)^2)^n
-                # Parameters: fc = 0.2 MHz, n = 1.1
-                fc_mhz = 0.2
-                n_filter = 1.1
-                f_mhz = np.abs(frequencies) * 1e-6
-
-                # Calculate |K(f)|^2 = 1 / (1 + (f/fc)^2)^(2n)
-                filter_power = np.ones_like(frequencies, dtype=float)
-                non_zero_freq_mask = f_mhz > 1e-12
-                denominator = 1.0 + (f_mhz[non_zero_freq_mask] / fc_mhz) ** 2
-                # Add small epsilon to avoid issues with denominator near 1 if needed
-                filter_power[non_zero_freq_mask] = 1.0 / (denominator ** (2 * n_filter) + 1e-18)
-
-                # Apply the amplitude filter K(f) = sqrt(|K(f)|^2)
-                k_filter_amplitude = np.sqrt(filter_power + 0j)
-                v_residual_filtered_fft = v_residual_fft * k_filter_amplitude
-                v_residual_filtered = np.real(ifft(v_residual_filtered_fft))
+                # Filtro K(f) = 1 / (1 + (f / fc)^2)^n, fc = 0.2 MHz, n = 1.1
+                v_residual_filtered = filter_residual_on_grid(t_us, v_residual, kind="power")
 
             except Exception as e_fft:
                 log.error(
@@ -928,81 +937,44 @@ def analyze_lightning_impulse(t_us: np.ndarray, v_kv: np.ndarray) -> dict:
             v_test_kv = v_kv
             results["overshoot_percent"] = 0.0  # Assume zero overshoot if K-factor failed
 
-        # 2. Encontra Pico de Vt
-        test_peak_idx = np.argmax(v_test_kv)
-        results["peak_time_test_us"] = t_us[test_peak_idx]
-        results["peak_value_test"] = v_test_kv[test_peak_idx]
+        # 2. Pico de Vt e instantes característicos (uma varredura, ver impulse_kernels)
+        timing = impulse_kernels.waveform_timing(t_us, v_test_kv)
+        results["peak_time_test_us"] = timing["t_peak"]
+        results["peak_value_test"] = timing["peak"]
 
         # 3. Análise da Frente (T1 e O1) baseada em Vt
         t_0_virtual_us = 0.0
         if results["peak_value_test"] > 1e-6:
             v_30_target = 0.3 * results["peak_value_test"]
             v_90_target = 0.9 * results["peak_value_test"]
-            mask_before_peak = t_us <= results["peak_time_test_us"]
-            t_before_us = t_us[mask_before_peak]
-            v_before_kv = v_test_kv[mask_before_peak]
-
-            if len(v_before_kv) > 1:
-                v_min_b, v_max_b = np.min(v_before_kv), np.max(v_before_kv)
-                if v_max_b >= v_90_target and v_min_b <= v_30_target:
-                    try:
-                        t_30 = np.interp(
-                            v_30_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
-                        )
-                        t_90 = np.interp(
-                            v_90_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
-                        )
-                        results["t_30_us"] = t_30
-                        results["t_90_us"] = t_90
-                        if not np.isnan(t_30) and not np.isnan(t_90) and t_90 > t_30:
-                            delta_t_front = t_90 - t_30
-                            results["t_front_us"] = 1.67 * delta_t_front
-                            if delta_t_front > 1e-9:
-                                slope = (v_90_target - v_30_target) / delta_t_front
-                                if abs(slope) > 1e-9:
-                                    t_0_virtual_us = t_30 - (v_30_target / slope)
-                                else:
-                                    t_0_virtual_us = t_30
-                            results["t_0_virtual_us"] = t_0_virtual_us
-                        else:
-                            log.warning("t30 ou t90 inválidos ou não crescentes.")
-                    except Exception as e_interp_front:
-                        log.error(f"Erro interpolação frente LI: {e_interp_front}")
+            if timing["peak_idx"] > 0:
+                t_30, t_90 = timing["t_30"], timing["t_90"]
+                if not np.isnan(t_30) and not np.isnan(t_90):
+                    results["t_30_us"] = t_30
+                    results["t_90_us"] = t_90
+                    if t_90 > t_30:
+                        delta_t_front = t_90 - t_30
+                        results["t_front_us"] = 1.67 * delta_t_front
+                        if delta_t_front > 1e-9:
+                            slope = (v_90_target - v_30_target) / delta_t_front
+                            if abs(slope) > 1e-9:
+                                t_0_virtual_us = t_30 - (v_30_target / slope)
+                            else:
+                                t_0_virtual_us = t_30
+                        results["t_0_virtual_us"] = t_0_virtual_us
+                    else:
+                        log.warning("t30 ou t90 inválidos ou não crescentes.")
                 else:
-                    log.warning(f"Níveis 30%/90% fora do range ({v_min_b:.2f}-{v_max_b:.2f}).")
+                    log.warning("Níveis 30%/90% fora do range da frente.")
             else:
                 log.warning("Dados insuficientes antes do pico.")
         else:
             log.warning("Pico de Vt muito baixo.")
 
         # 4. Análise da Cauda (T2) baseada em Vt
-        v_50_target = 0.5 * results["peak_value_test"]
-        mask_after_peak = t_us >= results["peak_time_test_us"]
-        t_after_us = t_us[mask_after_peak]
-        v_after_kv = v_test_kv[mask_after_peak]
-
-        if len(v_after_kv) > 1 and np.min(v_after_kv) <= v_50_target + 1e-6:
-            try:
-                # Robust interpolation for t_50
-                indices_below_50 = np.where(v_after_kv <= v_50_target)[0]
-                if len(indices_below_50) > 0:
-                    idx2 = indices_below_50[0]
-                    idx1 = idx2 - 1 if idx2 > 0 else 0
-                    t1_tail, v1_tail = t_after_us[idx1], v_after_kv[idx1]
-                    t2_tail, v2_tail = t_after_us[idx2], v_after_kv[idx2]
-                    if abs(v2_tail - v1_tail) > 1e-9:
-                        t_50 = t1_tail + (v_50_target - v1_tail) * (t2_tail - t1_tail) / (
-                            v2_tail - v1_tail
-                        )
-                    elif v1_tail >= v_50_target:
-                        t_50 = t1_tail
-                    else:
-                        t_50 = t2_tail  # Should ideally not happen if search is correct
-                    if not np.isnan(t_50):
-                        results["t_50_us"] = t_50
-                        results["t_tail_us"] = t_50 - t_0_virtual_us
-            except Exception as e_interp_tail:
-                log.error(f"Erro interpolação cauda LI: {e_interp_tail}")
+        if not np.isnan(timing["t_50"]):
+            results["t_50_us"] = timing["t_50"]
+            results["t_tail_us"] = timing["t_50"] - t_0_virtual_us
         else:
             log.warning("Dados insuficientes ou tensão não caiu para 50% na cauda.")
 
@@ -1087,102 +1059,41 @@ def analyze_switching_impulse(t_us: np.ndarray, v_kv: np.ndarray) -> dict:
             results["status_geral"] = "Erro"
             return results
 
-        peak_index = np.argmax(v_kv)
-        results["peak_time_us"] = t_us[peak_index]
-        results["peak_value_measured"] = v_kv[peak_index]
+        # Pico, cruzamentos e intervalo acima de 90% em uma varredura (ver impulse_kernels)
+        timing = impulse_kernels.waveform_timing(t_us, v_kv)
+        results["peak_time_us"] = timing["t_peak"]
+        results["peak_value_measured"] = timing["peak"]
         t_origin_us = t_us[0]
 
         # --- Cálculo de Td ---
-        v_90_target = 0.9 * results["peak_value_measured"]
-        indices_above_90 = np.where(v_kv >= v_90_target)[0]
-        if len(indices_above_90) > 1:
-            first_idx, last_idx = indices_above_90[0], indices_above_90[-1]
-            if 0 <= first_idx < len(t_us) and 0 <= last_idx < len(t_us):
-                results["td_us"] = t_us[last_idx] - t_us[first_idx]
-            else:
-                log.warning("Índices Td fora dos limites.")
+        if not np.isnan(timing["t_90_first"]):
+            results["td_us"] = timing["t_90_last"] - timing["t_90_first"]
         else:
             log.warning("Não foi possível calcular Td (pontos >= 90%).")
 
         # --- Cálculo de T2 ---
-        v_50_target = 0.5 * results["peak_value_measured"]
-        mask_after_peak = t_us >= results["peak_time_us"]
-        t_after_us = t_us[mask_after_peak]
-        v_after_kv = v_kv[mask_after_peak]
-        if len(v_after_kv) > 1 and np.min(v_after_kv) <= v_50_target + 1e-6:
-            try:
-                indices_below_50 = np.where(v_after_kv <= v_50_target)[0]
-                if len(indices_below_50) > 0:
-                    idx2 = indices_below_50[0]
-                    idx1 = max(0, idx2 - 1)
-                    t1_tail, v1_tail = t_after_us[idx1], v_after_kv[idx1]
-                    t2_tail, v2_tail = t_after_us[idx2], v_after_kv[idx2]
-                    if abs(v2_tail - v1_tail) > 1e-9:
-                        t_half = t1_tail + (v_50_target - v1_tail) * (t2_tail - t1_tail) / (
-                            v2_tail - v1_tail
-                        )
-                    elif v1_tail >= v_50_target:
-                        t_half = t1_tail
-                    else:
-                        t_half = t2_tail
-                    if not np.isnan(t_half):
-                        results["t_half_us"] = t_half
-                        results["t_2_us"] = t_half - t_origin_us
-            except Exception as e:
-                log.error(f"Erro interpolação T2 SI: {e}")
+        if not np.isnan(timing["t_50"]):
+            results["t_half_us"] = timing["t_50"]
+            results["t_2_us"] = timing["t_50"] - t_origin_us
         else:
             log.warning("Tensão não caiu para 50% para cálculo T2.")
 
         # --- Cálculo de Tz ---
-        if len(v_after_kv) > 0 and np.min(v_after_kv) <= 1e-6:
-            try:
-                zero_cross_indices = np.where(v_after_kv <= 0)[0]
-                if len(zero_cross_indices) > 0:
-                    first_zero_idx_rel = zero_cross_indices[0]
-                    first_zero_idx_abs = np.where(t_us == t_after_us[first_zero_idx_rel])[0][0]
-                    if first_zero_idx_abs > 0:
-                        idx1_z, idx2_z = first_zero_idx_abs - 1, first_zero_idx_abs
-                        t1_z, v1_z = t_us[idx1_z], v_kv[idx1_z]
-                        t2_z, v2_z = t_us[idx2_z], v_kv[idx2_z]
-                        if v1_z > 0 and v2_z <= 0 and abs(v2_z - v1_z) > 1e-9:
-                            t_z = t1_z - v1_z * (t2_z - t1_z) / (v2_z - v1_z)
-                        elif v2_z <= 0:
-                            t_z = t2_z
-                        else:
-                            t_z = np.nan  # Should not happen if logic is correct
-                        if not np.isnan(t_z):
-                            results["t_z_us"] = t_z
-                            results["t_zero_us"] = t_z - t_origin_us
-            except Exception as e:
-                log.error(f"Erro interpolação Tz SI: {e}")
+        if not np.isnan(timing["t_zero"]):
+            results["t_z_us"] = timing["t_zero"]
+            results["t_zero_us"] = timing["t_zero"] - t_origin_us
         else:
             log.warning("Tensão não cruzou zero para cálculo Tz.")
 
         # --- Cálculo de Tp ---
-        v_30_target = 0.3 * results["peak_value_measured"]
-        v_90_target_tp = 0.9 * results["peak_value_measured"]
-        mask_before_peak = t_us <= results["peak_time_us"]
-        t_before_us = t_us[mask_before_peak]
-        v_before_kv = v_kv[mask_before_peak]
-        t_30, t_90 = np.nan, np.nan
-        if len(v_before_kv) > 1:
-            v_min_b, v_max_b = np.min(v_before_kv), np.max(v_before_kv)
-            if v_max_b >= v_90_target_tp and v_min_b <= v_30_target:
-                try:
-                    t_30 = np.interp(
-                        v_30_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
-                    )
-                    t_90 = np.interp(
-                        v_90_target_tp, v_before_kv, t_before_us, left=np.nan, right=np.nan
-                    )
-                    results["t_30_us"] = t_30
-                    results["t_90_us"] = t_90
-                    if not np.isnan(t_30) and not np.isnan(t_90) and t_90 > t_30:
-                        results["t_ab_us"] = t_90 - t_30
-                except Exception as e:
-                    log.error(f"Erro interpolação T_AB SI: {e}")
-            else:
-                log.warning("Níveis 30%/90% fora do range T_AB.")
+        t_30, t_90 = timing["t_30"], timing["t_90"]
+        if not np.isnan(t_30) and not np.isnan(t_90):
+            results["t_30_us"] = t_30
+            results["t_90_us"] = t_90
+            if t_90 > t_30:
+                results["t_ab_us"] = t_90 - t_30
+        else:
+            log.warning("Níveis 30%/90% fora do range T_AB.")
 
         if results.get("t_ab_us") is not None and results.get("t_2_us") is not None:
             try:
@@ -1232,8 +1143,11 @@ def analyze_switching_impulse(t_us: np.ndarray, v_kv: np.ndarray) -> dict:
         else:
             results["status_geral"] = "Não Conforme"
 
+        tp_txt, t2_txt, td_txt, tz_txt = (
+            f"{x:.1f}" if x is not None else "N/A" for x in (tp, t2, td, tz)
+        )
         log.info(
-            f"Análise SI Concluída: Vp={results['peak_value_measured']:.1f}kV, Tp={tp:.1f}µs, T2={t2:.1f}µs, Td={td:.1f}µs, Tz={tz:.1f}µs, Status={results['status_geral']}"
+            f"Análise SI Concluída: Vp={results['peak_value_measured']:.1f}kV, Tp={tp_txt}µs, T2={t2_txt}µs, Td={td_txt}µs, Tz={tz_txt}µs, Status={results['status_geral']}"
         )
         return results
 
@@ -1244,6 +1158,118 @@ def analyze_switching_impulse(t_us: np.ndarray, v_kv: np.ndarray) -> dict:
         return results
 
 
+# --- Análise em lote (matriz de disparos n x m) ---
+# Só LI: o custo está no ajuste da curva base, que o lote divide entre as linhas. A
+# análise SI é uma varredura por onda (impulse_kernels); um laço sobre as linhas é
+# mais rápido que máscaras (n, m) sobre a matriz inteira.
+
+LI_BATCH_FIELDS = (
+    ("peak_value_measured", "f8"),
+    ("peak_value_base", "f8"),
+    ("peak_value_test", "f8"),
+    ("peak_time_test_us", "f8"),
+    ("t_30_us", "f8"),
+    ("t_90_us", "f8"),
+    ("t_0_virtual_us", "f8"),
+    ("t_front_us", "f8"),
+    ("t_50_us", "f8"),
+    ("t_tail_us", "f8"),
+    ("overshoot_percent", "f8"),
+    ("params_base_alpha", "f8"),
+    ("params_base_beta", "f8"),
+    ("conforme_frente", "?"),
+    ("conforme_cauda", "?"),
+    ("conforme_overshoot", "?"),
+    ("conforme", "?"),
+    ("valid", "?"),
+)
+def _within_tolerance(values: np.ndarray, nominal: float, tolerance: float) -> np.ndarray:
+    """nominal·(1 ± tolerance) por elemento; NaN conta como fora."""
+    return (values >= nominal * (1 - tolerance)) & (values <= nominal * (1 + tolerance))
+
+
+def _batch_input(t_us: np.ndarray, v_kv: np.ndarray, kind: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Valida a matriz de disparos; retorna (t, v 2-D, linhas válidas como na análise escalar)."""
+    t_us = np.asarray(t_us, dtype=float)
+    v_kv = np.atleast_2d(np.asarray(v_kv, dtype=float))
+    if t_us.ndim != 1 or v_kv.shape[1] != t_us.size or t_us.size < 10:
+        raise ValueError(
+            f"Análise {kind} em lote: esperado v (n_disparos, {t_us.size}) com ao menos 10 amostras, "
+            f"recebido {v_kv.shape}"
+        )
+    valid = np.all(np.isfinite(v_kv), axis=1) & (np.std(v_kv, axis=1) >= 1e-9)
+    return t_us, v_kv, valid
+
+
+def analyze_lightning_impulse_batch(t_us: np.ndarray, v_kv: np.ndarray) -> np.ndarray:
+    """
+    Versão em lote de analyze_lightning_impulse para uma matriz (n_disparos, n_amostras).
+
+    Mesmo procedimento (K-factor, T1 pela reta 30-90%, T2 pela origem virtual,
+    overshoot pelo resíduo máximo sobre o pico da base), com o ajuste da curva
+    base e o filtro K executados sobre todas as linhas de uma vez. Linhas sem
+    ajuste usam a própria onda como base (resíduo nulo), como na versão escalar.
+
+    Returns:
+        Array estruturado (n,) com os campos de LI_BATCH_FIELDS (pd.DataFrame(result)
+        dá a tabela). Linhas inválidas (constantes ou com NaN) têm valid False e NaN.
+    """
+    t_us, v_kv, valid = _batch_input(t_us, v_kv, "LI")
+    n = v_kv.shape[0]
+    log.info(f"Analisando Impulso Atmosférico (LI) em lote: {n} disparo(s) x {t_us.size} amostras")
+
+    fit = fit_double_exp_base_batch(t_us, v_kv)
+    fitted = np.isfinite(fit["amplitude"])
+    v_base = fit["v_base"]
+    v_base[~fitted] = v_kv[~fitted]
+    residual = v_kv - v_base
+    if fitted.all():
+        v_test = v_base + filter_residual_batch(t_us, residual, kind="power")
+    else:
+        v_test = v_base.copy()
+        if np.any(fitted):
+            v_test[fitted] += filter_residual_batch(t_us, residual[fitted], kind="power")
+    times = front_tail_times_batch(t_us, v_test)
+
+    result = np.zeros(n, dtype=list(LI_BATCH_FIELDS))
+    peak_base = np.maximum(v_base.max(axis=1), -v_base.min(axis=1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        overshoot = np.where(peak_base > 1e-9, np.maximum(residual.max(axis=1) / peak_base, 0.0) * 100.0, 0.0)
+    result["peak_value_measured"] = v_kv.max(axis=1)
+    result["peak_value_base"] = v_base.max(axis=1)
+    result["peak_value_test"] = times["peak"]
+    result["peak_time_test_us"] = times["t_peak_us"]
+    result["t_30_us"] = times["t_30_us"]
+    result["t_90_us"] = times["t_90_us"]
+    result["t_0_virtual_us"] = times["t_0_virtual_us"]
+    result["t_front_us"] = times["t_front_us"]
+    result["t_50_us"] = times["t_50_us"]
+    result["t_tail_us"] = times["t_tail_us"]
+    result["overshoot_percent"] = overshoot
+    result["params_base_alpha"] = fit["alpha"]
+    result["params_base_beta"] = fit["beta"]
+    result["conforme_frente"] = _within_tolerance(
+        result["t_front_us"], constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM, constants.LIGHTNING_FRONT_TOLERANCE
+    )
+    result["conforme_cauda"] = _within_tolerance(
+        result["t_tail_us"], constants.LIGHTNING_IMPULSE_TAIL_TIME_NOM, constants.LIGHTNING_TAIL_TOLERANCE
+    )
+    result["conforme_overshoot"] = overshoot <= constants.LIGHTNING_OVERSHOOT_MAX * 100.0
+    result["valid"] = valid
+    for name, kind in LI_BATCH_FIELDS:
+        if kind == "f8":
+            result[name][~valid] = np.nan
+        else:
+            result[name][~valid] = False
+    result["conforme"] = result["conforme_frente"] & result["conforme_cauda"] & result["conforme_overshoot"]
+
+    log.info(
+        f"Análise LI em lote concluída: {np.count_nonzero(result['conforme'])} de {n} disparo(s) conforme(s), "
+        f"{np.count_nonzero(~valid)} inválido(s)"
+    )
+    return result
+
+
 def analyze_chopped_impulse(
     t_us: np.ndarray, v_kv: np.ndarray, chop_time_actual_us: float | None
 ) -> dict:
@@ -1292,7 +1318,7 @@ def analyze_chopped_impulse(
             return results
 
         results["chop_time_absolute_us"] = chop_time_actual_us
-        chop_start_index = np.argmin(np.abs(t_us - chop_time_actual_us))
+        chop_start_index = impulse_kernels.nearest_index(t_us, chop_time_actual_us)
         if chop_start_index < 10:
             results["error"] = f"Tempo de corte ({chop_time_actual_us}µs) muito próximo do início."
             log.error(results["error"])
@@ -1301,7 +1327,7 @@ def analyze_chopped_impulse(
 
         t_before_chop_us = t_us[: chop_start_index + 1]
         v_before_chop_kv = v_kv[: chop_start_index + 1]
-        v_test_before_chop, _, _, _, _ = calculate_k_factor_transform(
+        v_test_before_chop, _, _, _ = calculate_k_factor_transform(
             v_before_chop_kv, t_before_chop_us, return_params=False
         )
         if v_test_before_chop is None or len(v_test_before_chop) < 5:
@@ -1913,6 +1939,7 @@ def simulate_hybrid_impulse(
     c_load: float,
     impulse_type: str,
     gap_distance_cm: float = None,
+    workspace: SimulationWorkspace | None = None,
 ) -> tuple:
     """
     Simula o circuito de impulso usando a abordagem híbrida RLC + K-Factor + Dupla Exponencial.
@@ -1927,9 +1954,12 @@ def simulate_hybrid_impulse(
         c_load: Capacitância da carga em Farads
         impulse_type: Tipo de impulso ("lightning", "chopped", "switching")
         gap_distance_cm: Distância do gap em cm (apenas para impulso cortado)
+        workspace: Área de buffers pré-alocados (sim_workspace) para simulações
+            repetidas; os arrays devolvidos são então visões desses buffers,
+            sobrescritas na próxima simulação com a mesma área.
 
     Returns:
-        Tupla contendo (v_rlc, v_final, i_load, alpha, beta, chop_time_sec)
+        Tupla contendo (v_rlc, v_final, i_load, alpha, beta, chop_time_sec).
     """
     # Validação de parâmetros de entrada
     if t_sec is None or len(t_sec) < 2:
@@ -1976,9 +2006,18 @@ def simulate_hybrid_impulse(
         log.debug(f"Simulando RLC: R={r_rlc:.1f}, L={l_total:.2e}, Ceq={c_eq:.2e}")
 
         # Solução RLC
-        v_rlc = rlc_solution(t_sec, v0_charge, r_rlc, l_total, c_eq)
-        v_rlc_kv = v_rlc / 1000  # Converte para kV para K-factor
-        t_us = t_sec * 1e6  # Converte para µs para K-factor
+        if workspace is not None:
+            workspace.bind_grid(t_sec)
+            v_rlc = workspace.rlc(v0_charge, r_rlc, l_total, c_eq, out=workspace.v_rlc)
+            if v_rlc is None:  # Casos especiais ficam com a solução geral
+                v_rlc = workspace.v_rlc
+                v_rlc[:] = rlc_solution(t_sec, v0_charge, r_rlc, l_total, c_eq)
+            v_rlc_kv = np.divide(v_rlc, 1000, out=workspace.v_rlc_kv)
+            t_us = workspace.t_us
+        else:
+            v_rlc = rlc_solution(t_sec, v0_charge, r_rlc, l_total, c_eq)
+            v_rlc_kv = v_rlc / 1000  # Converte para kV para K-factor
+            t_us = t_sec * 1e6  # Converte para µs para K-factor
 
         # Transformação K-factor
         v_test, v_base, _, overshoot, (alpha_fit, beta_fit) = calculate_k_factor_transform(
@@ -2004,7 +2043,11 @@ def simulate_hybrid_impulse(
             log.info(f"Parâmetros K-factor: alpha={alpha:.2e}, beta={beta:.2e}")
 
         # Gera forma de onda final usando dupla exponencial
-        v_final = double_exp_func(t_sec, v0_charge, alpha, beta)
+        v_final = None
+        if workspace is not None:
+            v_final = workspace.double_exp(v0_charge, alpha, beta, out=workspace.v_final)
+        if v_final is None:
+            v_final = double_exp_func(t_sec, v0_charge, alpha, beta)
 
         # Processamento especial para impulso cortado
         chop_time_sec = None
@@ -2076,7 +2119,11 @@ def simulate_hybrid_impulse(
                 )
 
         # Calcula corrente na carga (derivada da tensão)
-        i_load = c_load * np.gradient(v_final, t_sec)
+        if workspace is not None:
+            i_load = workspace.gradient(v_final, out=workspace.i_load)
+            i_load *= c_load
+        else:
+            i_load = c_load * np.gradient(v_final, t_sec)
 
         return v_rlc, v_final, i_load, alpha, beta, chop_time_sec
 
@@ -0,0 +1,250 @@
+# app_core/capacitor_bank.py
+"""
+Índice das potências do banco de capacitores e sugestão das chaves CS/Q.
+
+A busca anterior (callbacks/losses.py) regerava todas as combinações das chaves
+Q com itertools a cada chamada, recalculava a potência de cada uma para cada
+tap e condição de ensaio e só admitia exatamente 5 chaves.
+
+Aqui as potências atingíveis são calculadas uma vez por (tensão do banco, só
+grupo 1, tipo de circuito) por um knapsack de soma de subconjuntos sobre as
+chaves: estados com a mesma potência parcial são equivalentes para as chaves
+seguintes, então só o melhor (menos chaves, depois a menor combinação em ordem
+lexicográfica) é mantido. Funciona para qualquer número de chaves e perfis de
+potência por unidade. O índice fica ordenado e cada consulta é uma busca
+binária; suggest_bank_configs resolve todas as condições de ensaio de uma vez.
+"""
+import logging
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Sequence
+from functools import lru_cache
+
+import numpy as np
+
+from utils import constants
+
+log = logging.getLogger(__name__)
+
+CAP_BANK_EPSILON = 1e-6  # Tolerância de potência/tensão (a mesma dos callbacks de perdas)
+CAP_BANK_POWER_DECIMALS = 9  # Potências iguais até esta casa são o mesmo estado do knapsack
+CAP_BANK_FACTOR_MARGIN = 1.1  # Banco "com fator": tensão de ensaio até 1.1 × nominal
+CAP_BANK_DEFAULT_PROFILE = "generic_cp"  # Perfil de Q_SWITCH_POWERS das unidades sem entrada com o próprio nome
+CAP_BANK_VOLTAGE_KEYS = tuple(constants.CAPACITORS_BY_VOLTAGE)
+CAP_BANK_VOLTAGES_KV = np.array([float(v) for v in CAP_BANK_VOLTAGE_KEYS])
+_SORTED_KV = tuple(sorted(float(v) for v in CAP_BANK_VOLTAGE_KEYS))
+_THRESHOLDS_CF = tuple(v * CAP_BANK_FACTOR_MARGIN + CAP_BANK_EPSILON for v in _SORTED_KV)
+_THRESHOLDS_SF = tuple(v + CAP_BANK_EPSILON for v in _SORTED_KV)
+
+
+def _is_group1(name: str) -> bool:
+    """Unidades e chaves do grupo 1 terminam em '1' (CP2A1, CS1A1); as do grupo 2 em '2'."""
+    return len(name) > 4 and name.endswith("1")
+
+
+def _is_group2(name: str) -> bool:
+    return len(name) > 4 and name.endswith("2")
+
+
+def solve_q_switches(unit_profiles: Sequence[Sequence[float]]) -> tuple[np.ndarray, tuple[tuple[int, ...], ...]]:
+    """
+    Potências atingíveis de um banco e a melhor combinação de chaves Q para cada uma.
+
+    Todas as unidades recebem as mesmas chaves; a potência de uma combinação é a
+    soma, sobre as unidades, das potências das chaves fechadas no perfil de cada
+    unidade.
+
+    Args:
+        unit_profiles: Perfil (MVAr por chave Q1..Qn) de cada unidade; mesmo n para todas.
+
+    Returns:
+        (potências em ordem crescente, combinações de chaves 1-based correspondentes)
+    """
+    groups = Counter(tuple(float(p) for p in profile) for profile in unit_profiles)
+    if not groups:
+        return np.empty(0), ()
+    n_switches = {len(profile) for profile in groups}
+    if len(n_switches) != 1:
+        raise ValueError("Perfis de potência das unidades com números de chaves diferentes.")
+
+    def power(combination: tuple[int, ...]) -> float:
+        return sum(sum(profile[q - 1] for q in combination) * count for profile, count in groups.items())
+
+    # Knapsack: potência arredondada -> melhor combinação com essa potência
+    states: dict[float, tuple[int, ...]] = {0.0: ()}
+    for q in range(1, n_switches.pop() + 1):
+        for combination in list(states.values()):
+            candidate = combination + (q,)
+            key = round(power(candidate), CAP_BANK_POWER_DECIMALS)
+            current = states.get(key)
+            if current is None or (len(candidate), candidate) < (len(current), current):
+                states[key] = candidate
+    combinations = sorted((c for c in states.values() if c), key=power)
+    return np.array([power(c) for c in combinations]), tuple(combinations)
+
+
+class QSwitchIndex:
+    """Potências atingíveis (ordenadas) e configuração CS de uma tensão de banco."""
+
+    def __init__(self, voltage_key: str, use_group1_only: bool, circuit_type: str, units: Sequence[str]):
+        self.voltage_key = voltage_key
+        self.use_group1_only = use_group1_only
+        self.circuit_type = circuit_type
+        self.units = tuple(units)
+        profiles = constants.Q_SWITCH_POWERS
+        self.powers, combinations = solve_q_switches(
+            [profiles.get(unit, profiles[CAP_BANK_DEFAULT_PROFILE]) for unit in self.units]
+        )
+        self.powers.flags.writeable = False
+        self._powers = tuple(self.powers.tolist())  # bisect em tupla: mais rápido que NumPy para um escalar
+        self.labels = tuple(", ".join(f"Q{q}" for q in combination) for combination in combinations)
+        self.label_array = np.array(self.labels, dtype=object)
+        self.max_power = float(self.powers[-1]) if self.powers.size else 0.0
+        self.cs_config = get_cs_configuration(voltage_key, use_group1_only, circuit_type)
+
+    def best(self, required_mvar: float) -> tuple[str, float]:
+        """Menor potência ≥ requerida: (chaves "Q1, Q3", potência fornecida) ou (motivo "N/A (...)", máxima)."""
+        if required_mvar is None or required_mvar <= CAP_BANK_EPSILON:
+            return "N/A", 0.0
+        if not self.units:
+            return f"N/A (Sem capacitores para {self.voltage_key}kV)", 0.0
+        k = bisect_left(self._powers, required_mvar - CAP_BANK_EPSILON)
+        if k < len(self._powers):
+            return self.labels[k], self._powers[k]
+        log.warning(
+            f"Could not find suitable Q config for {self.voltage_key}kV, {required_mvar:.2f} MVAr. "
+            f"Max possible: {self.max_power:.2f} MVAr"
+        )
+        return f"N/A (Req: {required_mvar:.1f} MVAr > Max: {self.max_power:.1f} MVAr)", self.max_power
+
+
+@lru_cache(maxsize=None)
+def q_switch_index(voltage_key: str, use_group1_only: bool, circuit_type: str) -> QSwitchIndex:
+    """Índice (em cache) das unidades disponíveis na tensão; sem unidades do grupo 1, usa todas."""
+    units = constants.CAPACITORS_BY_VOLTAGE.get(str(voltage_key), [])
+    if use_group1_only:
+        group1 = [unit for unit in units if _is_group1(unit)]
+        if not group1 and units:
+            log.warning(f"No Group 1 (ending in '1') capacitors found for {voltage_key}kV, trying all.")
+        units = group1 or units
+    return QSwitchIndex(str(voltage_key), use_group1_only, circuit_type, units)
+
+
+@lru_cache(maxsize=None)
+def group1_max_power(voltage_key: str) -> float:
+    """Potência máxima (todas as chaves Q) só com as unidades do grupo 1; 0 sem unidades do grupo 1."""
+    units = constants.CAPACITORS_BY_VOLTAGE.get(str(voltage_key), [])
+    if not any(_is_group1(unit) for unit in units):
+        return 0.0
+    return q_switch_index(str(voltage_key), True, "Trifásico").max_power
+
+
+def select_target_bank_voltage(max_test_voltage_kv: float) -> tuple[str | None, str | None]:
+    """Tensões de banco (chaves de CAPACITORS_BY_VOLTAGE) com fator (≤ 1.1 × V) e sem fator (≤ V)."""
+    if not _SORTED_KV:
+        return None, None
+    targets = []
+    for label, thresholds in (("110% of ", _THRESHOLDS_CF), ("", _THRESHOLDS_SF)):
+        k = bisect_left(thresholds, max_test_voltage_kv)
+        if k >= len(_SORTED_KV):
+            k = len(_SORTED_KV) - 1
+            log.warning(
+                f"Max test voltage {max_test_voltage_kv:.2f}kV exceeds {label}highest bank ({_SORTED_KV[-1]}kV). "
+                "Using highest bank."
+            )
+        targets.append(str(_SORTED_KV[k]))
+    return targets[0], targets[1]
+
+
+def get_cs_configuration(target_bank_voltage_key, use_group1_only: bool, circuit_type: str) -> str:
+    """Chaves CS da tensão de banco; no trifásico só com o grupo 1, as chaves do grupo 2 ficam abertas."""
+    if target_bank_voltage_key is None:
+        return "N/A (Tensão alvo inválida)"
+    cs_switch_dict = (
+        constants.CS_SWITCHES_BY_VOLTAGE_TRI if circuit_type == "Trifásico" else constants.CS_SWITCHES_BY_VOLTAGE_MONO
+    )
+    available_switches = cs_switch_dict.get(str(target_bank_voltage_key))
+    if not available_switches:
+        log.warning(
+            f"No CS switches found for key '{target_bank_voltage_key}' (Type: {circuit_type}). "
+            f"Available keys: {list(cs_switch_dict.keys())}"
+        )
+        return f"N/A (Sem chaves CS para {target_bank_voltage_key}kV)"
+    skip_group2 = use_group1_only and circuit_type == "Trifásico"
+    cs_config_list = [name for name in available_switches if not (skip_group2 and _is_group2(name))]
+    return ", ".join(sorted(cs_config_list)) if cs_config_list else "N/A"
+
+
+def find_best_q_configuration(target_bank_voltage_key, required_power_mvar, use_group1_only: bool) -> tuple[str, float]:
+    """Melhor combinação de chaves Q (menor potência ≥ requerida) na tensão de banco."""
+    if target_bank_voltage_key is None:
+        return "N/A", 0.0
+    return q_switch_index(str(target_bank_voltage_key), bool(use_group1_only), "Trifásico").best(required_power_mvar)
+
+
+def suggest_capacitor_bank_config(max_voltage_kv, max_power_mvar, circuit_type: str) -> tuple[str, str, float]:
+    """Configuração CS/Q geral (com fator) para a maior tensão e potência requeridas."""
+    log.info(
+        f"Suggesting config for Max V: {max_voltage_kv:.2f} kV, Max Q Req: {max_power_mvar:.2f} MVAr, Type: {circuit_type}"
+    )
+    if max_voltage_kv is None or max_voltage_kv <= CAP_BANK_EPSILON or max_power_mvar is None or max_power_mvar <= CAP_BANK_EPSILON:
+        return "N/A (Dados insuficientes)", "N/A", 0.0
+    target_v_cf_key, _ = select_target_bank_voltage(max_voltage_kv)
+    if target_v_cf_key is None:
+        log.error("Could not determine target bank voltage.")
+        return "N/A (Erro Tensão)", "N/A", 0.0
+    use_group1_only = max_power_mvar <= group1_max_power(target_v_cf_key) + CAP_BANK_EPSILON
+    index = q_switch_index(target_v_cf_key, use_group1_only, circuit_type)
+    q_config_str, q_power_mvar_provided = index.best(max_power_mvar)
+    return index.cs_config, q_config_str, q_power_mvar_provided
+
+
+def suggest_bank_configs(bank_voltages_kv, required_mvar, circuit_type: str) -> dict:
+    """
+    Configuração CS/Q de cada condição de ensaio de uma vez.
+
+    Cada tensão de banco é levada à chave de CAPACITORS_BY_VOLTAGE mais próxima;
+    o grupo 1 basta quando a potência requerida não passa da máxima do grupo 1.
+
+    Args:
+        bank_voltages_kv: Tensões nominais de banco (array de qualquer forma; NaN = sem banco).
+        required_mvar: Potências requeridas (mesma forma; NaN/inf/≤0 = sem banco).
+        circuit_type: "Trifásico" ou "Monofásico".
+
+    Returns:
+        {"valid": bool, "cs_config": str (object), "q_config": str (object),
+        "q_power_mvar": float}, todos com a forma da entrada; fora de "valid" as
+        configurações são "N/A" e a potência 0.
+    """
+    voltages = np.asarray(bank_voltages_kv, dtype=float)
+    required = np.asarray(required_mvar, dtype=float)
+    valid = np.isfinite(voltages) & np.isfinite(required) & (required > 0)
+    key_idx = np.argmin(np.abs(np.where(valid, voltages, 0.0)[..., None] - CAP_BANK_VOLTAGES_KV), axis=-1)
+    use_group1 = required <= _group1_max_array()[key_idx] + CAP_BANK_EPSILON
+
+    cs_config = np.full(voltages.shape, "N/A", dtype=object)
+    q_config = np.full(voltages.shape, "N/A", dtype=object)
+    q_power = np.zeros(voltages.shape)
+    # Uma busca binária vetorizada por índice (tensão, grupo) presente nas condições
+    group = np.where(valid, key_idx * 2 + use_group1, -1)
+    for code in np.unique(group[valid]):
+        members = group == code
+        index = q_switch_index(CAP_BANK_VOLTAGE_KEYS[code // 2], bool(code % 2), circuit_type)
+        cs_config[members] = index.cs_config
+        req = required[members]
+        k = np.searchsorted(index.powers, req - CAP_BANK_EPSILON, side="left")
+        found = (k < index.powers.size) & (req > CAP_BANK_EPSILON)
+        if found.all():
+            q_config[members] = index.label_array[k]
+            q_power[members] = index.powers[k]
+        else:
+            q_config[members], q_power[members] = zip(*(index.best(float(r)) for r in req))
+    return {"valid": valid, "cs_config": cs_config, "q_config": q_config, "q_power_mvar": q_power}
+
+
+@lru_cache(maxsize=1)
+def _group1_max_array() -> np.ndarray:
+    """group1_max_power de cada chave de CAP_BANK_VOLTAGE_KEYS (somente leitura)."""
+    values = np.array([group1_max_power(key) for key in CAP_BANK_VOLTAGE_KEYS])
+    values.flags.writeable = False
+    return values
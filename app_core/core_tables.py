@@ -0,0 +1,169 @@
+# app_core/core_tables.py
+"""
+Tabelas do aço M4 (perdas W/kg e potência magnetizante VAR/kg) em grades NumPy.
+
+As tabelas de utils.constants são dicionários {(B, f): valor}. Antes, cada
+módulo montava um DataFrame com MultiIndex na importação: as perdas em vazio
+faziam um .loc exato depois de arredondar B a 0.1 T e levar f à frequência
+mais próxima da tabela, e a tensão induzida interpolava com quatro .loc por
+ponto (além de manter uma cópia própria das tabelas, só até 240 Hz).
+
+Aqui cada tabela é compilada uma vez em uma grade densa 2-D com eixos
+ordenados (indução × frequência). A interpolação bilinear é vetorizada e
+aceita arrays de (B, f) com broadcasting; a bicúbica usa um spline
+(RectBivariateSpline) montado sob demanda sobre a mesma grade.
+"""
+import logging
+from bisect import bisect_left
+from functools import lru_cache
+
+import numpy as np
+from scipy.interpolate import RectBivariateSpline
+
+from utils import constants
+
+log = logging.getLogger(__name__)
+
+CORE_TABLE_METHODS = ("bilinear", "bicubic")  # Métodos de interpolação aceitos por CoreTableGrid.interpolate
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class CoreTableGrid:
+    """Tabela {(B, f): valor} como grade densa com eixos ordenados e interpolação vetorizada."""
+
+    def __init__(self, table: dict[tuple[float, float], float], name: str = "tabela"):
+        self.name = name
+        inducoes = sorted({float(b) for b, _ in table})
+        frequencias = sorted({float(f) for _, f in table})
+        if len(inducoes) < 2 or len(frequencias) < 2:
+            raise ValueError(f"Tabela '{name}' precisa de ao menos 2 induções e 2 frequências.")
+
+        grid = np.full((len(inducoes), len(frequencias)), np.nan)
+        ind_pos = {b: i for i, b in enumerate(inducoes)}
+        freq_pos = {f: j for j, f in enumerate(frequencias)}
+        for (b, f), valor in table.items():
+            grid[ind_pos[float(b)], freq_pos[float(f)]] = float(valor)
+        if np.isnan(grid).any():
+            faltando = int(np.isnan(grid).sum())
+            raise ValueError(f"Tabela '{name}' incompleta: {faltando} pontos (B, f) ausentes da grade.")
+
+        self.inducoes = _readonly(np.array(inducoes))
+        self.frequencias = _readonly(np.array(frequencias))
+        self.values = _readonly(grid)
+        # Cópias em tuplas para a consulta escalar (bisect evita o custo fixo do NumPy por ponto)
+        self._inducoes_t = tuple(inducoes)
+        self._frequencias_t = tuple(frequencias)
+        self._values_t = tuple(tuple(row) for row in grid.tolist())
+        self._spline: RectBivariateSpline | None = None
+
+    @property
+    def inducao_range(self) -> tuple[float, float]:
+        return float(self.inducoes[0]), float(self.inducoes[-1])
+
+    @property
+    def frequencia_range(self) -> tuple[float, float]:
+        return float(self.frequencias[0]), float(self.frequencias[-1])
+
+    def clip(self, inducao, frequencia) -> tuple[np.ndarray, np.ndarray]:
+        """Leva (B, f) para dentro da grade, com aviso quando algum ponto é limitado."""
+        b = np.asarray(inducao, dtype=float)
+        f = np.asarray(frequencia, dtype=float)
+        b_clip = np.clip(b, self.inducoes[0], self.inducoes[-1])
+        f_clip = np.clip(f, self.frequencias[0], self.frequencias[-1])
+
+        n_b = int(np.count_nonzero(b_clip != b))
+        if n_b:
+            log.warning(
+                f"[{self.name}] {n_b} indução(ões) fora do range da tabela {list(self.inducao_range)} T; "
+                f"usando o limite mais próximo (ex.: {float(b[b_clip != b].flat[0]):.3f}T)."
+            )
+        n_f = int(np.count_nonzero(f_clip != f))
+        if n_f:
+            log.warning(
+                f"[{self.name}] {n_f} frequência(s) fora do range da tabela {list(self.frequencia_range)} Hz; "
+                f"usando o limite mais próximo (ex.: {float(f[f_clip != f].flat[0]):.1f}Hz)."
+            )
+        return b_clip, f_clip
+
+    def interpolate(self, inducao, frequencia, method: str = "bilinear") -> np.ndarray:
+        """
+        Valor da tabela em (B, f), limitado à faixa da grade.
+
+        Args:
+            inducao: Indução (T), escalar ou array.
+            frequencia: Frequência (Hz), escalar ou array; faz broadcasting com a indução.
+            method: "bilinear" (o mesmo resultado da interpolação anterior) ou "bicubic".
+
+        Returns:
+            Array com a forma do broadcasting de (inducao, frequencia).
+        """
+        if method not in CORE_TABLE_METHODS:
+            raise ValueError(f"Método de interpolação '{method}' inválido. Use um de {CORE_TABLE_METHODS}.")
+        if method == "bilinear" and np.isscalar(inducao) and np.isscalar(frequencia):
+            return np.float64(self._bilinear_scalar(float(inducao), float(frequencia)))
+        b, f = np.broadcast_arrays(*self.clip(inducao, frequencia))
+
+        if method == "bicubic":
+            if self._spline is None:
+                self._spline = RectBivariateSpline(self.inducoes, self.frequencias, self.values, kx=3, ky=3)
+            return self._spline.ev(b, f).reshape(b.shape)
+
+        # Célula da grade: mesmo critério de antes (searchsorted à esquerda limitado a [1, n-1]),
+        # então pontos exatamente sobre a grade caem na borda superior da célula com peso 1.
+        i = np.clip(np.searchsorted(self.inducoes, b), 1, self.inducoes.size - 1)
+        j = np.clip(np.searchsorted(self.frequencias, f), 1, self.frequencias.size - 1)
+        b_low, b_high = self.inducoes[i - 1], self.inducoes[i]
+        f_low, f_high = self.frequencias[j - 1], self.frequencias[j]
+        x = (b - b_low) / (b_high - b_low)
+        y = (f - f_low) / (f_high - f_low)
+
+        q11 = self.values[i - 1, j - 1]
+        q12 = self.values[i - 1, j]
+        q21 = self.values[i, j - 1]
+        q22 = self.values[i, j]
+        return (1 - x) * (1 - y) * q11 + x * (1 - y) * q21 + (1 - x) * y * q12 + x * y * q22
+
+    def _bilinear_scalar(self, inducao: float, frequencia: float) -> float:
+        """Mesma interpolação de interpolate para um único ponto, em aritmética escalar."""
+        b_axis, f_axis = self._inducoes_t, self._frequencias_t
+        b = min(max(inducao, b_axis[0]), b_axis[-1])
+        f = min(max(frequencia, f_axis[0]), f_axis[-1])
+        if b != inducao or f != frequencia:
+            self.clip(inducao, frequencia)  # Só para os avisos
+        i = min(max(bisect_left(b_axis, b), 1), len(b_axis) - 1)
+        j = min(max(bisect_left(f_axis, f), 1), len(f_axis) - 1)
+        x = (b - b_axis[i - 1]) / (b_axis[i] - b_axis[i - 1])
+        y = (f - f_axis[j - 1]) / (f_axis[j] - f_axis[j - 1])
+        row_low, row_high = self._values_t[i - 1], self._values_t[i]
+        q11, q12 = row_low[j - 1], row_low[j]
+        q21, q22 = row_high[j - 1], row_high[j]
+        return (1 - x) * (1 - y) * q11 + x * (1 - y) * q21 + (1 - x) * y * q12 + x * y * q22
+
+
+@lru_cache(maxsize=1)
+def core_loss_grid() -> CoreTableGrid:
+    """Perdas do aço M4 (W/kg) de constants.perdas_nucleo_data."""
+    return CoreTableGrid(constants.perdas_nucleo_data, name="Perdas do núcleo")
+
+
+@lru_cache(maxsize=1)
+def magnetizing_power_grid() -> CoreTableGrid:
+    """Potência magnetizante do aço M4 (VAR/kg) de constants.potencia_magnet_data."""
+    return CoreTableGrid(constants.potencia_magnet_data, name="Potência magnetizante")
+
+
+def interpolate_core_factors(inducao, frequencia, method: str = "bilinear") -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fatores do aço M4 em (B, f): (perdas W/kg, potência magnetizante VAR/kg).
+
+    Aceita escalares ou arrays (com broadcasting); uma varredura de muitos pontos
+    de indução/frequência é resolvida em uma única chamada.
+    """
+    return (
+        core_loss_grid().interpolate(inducao, frequencia, method),
+        magnetizing_power_grid().interpolate(inducao, frequencia, method),
+    )
@@ -0,0 +1,871 @@
+# app_core/impulse_batch.py
+"""
+Simulação vetorizada do circuito de impulso.
+
+Versões em lote (NumPy broadcasting) das rotinas de simulate_hybrid_impulse:
+cada linha das matrizes retornadas corresponde a um candidato (Rf, Rt, L, Cg, Cload),
+todas avaliadas sobre o mesmo vetor de tempo em uma única chamada.
+"""
+import logging
+import math
+
+import numpy as np
+
+from formulas.impulse_math import gap_chopping_distance_cm
+from utils import constants
+
+log = logging.getLogger(__name__)
+
+# Parâmetros do corte (mesmos valores usados em simulate_hybrid_impulse)
+CHOP_BREAKDOWN_KV_PER_CM = 30.0  # Gradiente de ruptura do gap (kV/cm)
+CHOP_COLLAPSE_TIME_S = 0.1e-6  # Tempo de colapso do gap (s)
+CHOP_OSC_FREQ_HZ = 5e6  # Frequência da oscilação pós-corte (Hz)
+CHOP_OSC_DAMPING = 1.5  # Fator de amortecimento (por µs)
+CHOP_UNDERSHOOT_RATIO = 0.25  # Amplitude relativa da oscilação
+CHOP_UNDERSHOOT_CLIP = 0.3  # Undershoot máximo relativo à tensão de corte
+
+VALID_IMPULSE_TYPES = ("lightning", "chopped", "switching")
+
+BATCH_CHUNK_ROWS = 2048  # Linhas por bloco no avanço dos modos do circuito com L
+BATCH_TILE_SAMPLES = 64  # Instantes por bloco na transposição para (linhas, amostras)
+BATCH_STEP_KEY_DIGITS = 9  # Passos iguais até 9 dígitos significativos compartilham e^(s·dt)
+BATCH_MAX_EIGVEC_COND = 1e12  # Autovetores quase dependentes (amortecimento crítico) invalidam a linha
+BATCH_GRID_STEP_RTOL = 1e-9  # Passos consecutivos mais próximos que isso pertencem ao mesmo trecho
+BATCH_GRID_UNIFORM_RTOL = 1e-12  # Desvio máximo (relativo ao trecho) para tratar a grade como uniforme
+BATCH_GRID_MIN_SAMPLES = 64  # Trechos uniformes mais curtos são avaliados diretamente
+BATCH_FLUSH_LOG = -345.0  # e^(x) com x abaixo disso (~1e-150) vira zero: o produto de dois fatores não cai em subnormais
+
+
+def _as_row_vector(value, n: int) -> np.ndarray:
+    """Converte escalar ou array em vetor float de tamanho n (broadcast)."""
+    return np.broadcast_to(np.asarray(value, dtype=float), (n,)).astype(float)
+
+
+def circuit_double_exp_constants(
+    rf: np.ndarray, rt: np.ndarray, c_gen: np.ndarray, c_load: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula alpha e beta da dupla exponencial a partir do circuito Cg-Rf-Cl-Rt.
+
+    Raízes exatas da equação característica s² + a·s + b = 0 do gerador com Rt
+    no lado do gerador:
+        a = 1/(Rf·Cg) + 1/(Rf·Cl) + 1/(Rt·Cg),  b = 1/(Rf·Rt·Cg·Cl)
+    Para Rt >> Rf reduzem-se às aproximações usuais alpha ≈ 1/(Rt·(Cg+Cl)) e
+    beta ≈ 1/(Rf·Ceq).
+
+    Args:
+        rf, rt: Resistências totais de frente e cauda (Ohm), escalares ou arrays.
+        c_gen, c_load: Capacitâncias do gerador e da carga (F), escalares ou arrays.
+
+    Returns:
+        Tupla (alpha, beta) em s⁻¹ com a forma do broadcast das entradas.
+        Candidatos inválidos retornam alpha = beta = 0.
+    """
+    rf, rt, c_gen, c_load = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (rf, rt, c_gen, c_load))
+    )
+    valid = (rf > 0) & (rt > 0) & (c_gen > 0) & (c_load > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = 1.0 / (rf * c_gen) + 1.0 / (rf * c_load) + 1.0 / (rt * c_gen)
+        b = 1.0 / (rf * rt * c_gen * c_load)
+        disc = np.sqrt(np.maximum(0.25 * a * a - b, 0.0))
+        beta = 0.5 * a + disc
+        # alpha = b / beta evita cancelamento numérico quando alpha << beta
+        alpha = b / beta
+    alpha = np.where(valid & np.isfinite(alpha), alpha, 0.0)
+    beta = np.where(valid & np.isfinite(beta), beta, 0.0)
+    return alpha, beta
+
+
+class _TimeGrid:
+    """
+    Vetor de tempo decomposto em blocos t[início + j·B + i] = t_outer[j] + t_inner[i].
+
+    Em trechos de passo uniforme e^(s·t) = e^(s·t_outer)·e^(s·t_inner): as
+    exponenciais saem de J + B ≈ 2·√m pontos por linha em vez de m, e a matriz
+    (linhas, m) é montada por produtos de posto baixo (matmul). Grades de dois
+    passos ou adaptativas viram um bloco por trecho uniforme; trechos curtos ou
+    irregulares ficam em blocos diretos (t_outer = 0, t_inner = t).
+    """
+
+    def __init__(self, t: np.ndarray):
+        self.t = t
+        self.size = t.size
+        self.blocks = []  # (início, fim, fatia de t_outer, fatia de t_inner)
+        # Progressões aritméticas de t_outer/t_inner: (fatia, primeiro, passo); passo None = tempos avulsos
+        self._outer, self._inner = [], []
+        self._n_outer = self._n_inner = 0
+        if self.size:
+            self._split(t)
+        self.t_outer = np.concatenate([times for _, times in self._outer]) if self._outer else np.zeros(0)
+        self.t_inner = np.concatenate([times for _, times in self._inner]) if self._inner else np.zeros(0)
+        # Colunas fora do interior de um trecho uniforme: a diferença centrada não sai dos fatores
+        edges = [
+            np.arange(start, stop) if step is None else np.array([start, stop - 1])
+            for (start, stop, _, _), (step, _) in zip(self.blocks, self._inner)
+        ]
+        self.edge_columns = np.unique(np.concatenate(edges)) if edges else np.zeros(0, dtype=int)
+
+    def _add(self, start: int, outer: tuple, inner: tuple) -> None:
+        """Registra um bloco; outer/inner são pares (passo ou None, tempos)."""
+        n_outer, n_inner = outer[1].size, inner[1].size
+        self.blocks.append(
+            (
+                start,
+                start + n_outer * n_inner,
+                slice(self._n_outer, self._n_outer + n_outer),
+                slice(self._n_inner, self._n_inner + n_inner),
+            )
+        )
+        self._outer.append(outer)
+        self._inner.append(inner)
+        self._n_outer += n_outer
+        self._n_inner += n_inner
+
+    def _add_direct(self, t: np.ndarray, start: int, stop: int) -> None:
+        if stop > start:
+            self._add(start, (None, np.zeros(1)), (None, t[start:stop]))
+
+    def _split(self, t: np.ndarray) -> None:
+        # Trechos de passo constante: um novo trecho começa após cada mudança de passo
+        dt = np.diff(t)
+        changed = np.abs(np.diff(dt)) > BATCH_GRID_STEP_RTOL * np.abs(dt[1:])
+        starts = np.concatenate(([0], np.flatnonzero(changed) + 2))
+        stops = np.append(starts[1:], self.size)
+        pos = 0
+        for k in np.flatnonzero(stops - starts >= BATCH_GRID_MIN_SAMPLES):
+            start, stop = int(starts[k]), int(stops[k])
+            seg = t[start:stop]
+            size, span = seg.size, seg[-1] - seg[0]
+            step = span / (size - 1)
+            if span <= 0 or np.max(np.abs(seg - (seg[0] + step * np.arange(size)))) > BATCH_GRID_UNIFORM_RTOL * span:
+                continue
+            self._add_direct(t, pos, start)
+            root = math.isqrt(size)
+            inner = next((b for b in range(root, 2 * root + 1) if size % b == 0), root)
+            n_outer = size // inner
+            self._add(
+                start,
+                (step * inner, seg[0] + step * inner * np.arange(n_outer)),
+                (step, step * np.arange(inner)),
+            )
+            rest = start + n_outer * inner
+            if stop - rest > 1:
+                # Sobra do trecho: um bloco de uma linha, ainda com passo uniforme
+                self._add(rest, (None, seg[n_outer * inner : n_outer * inner + 1]), (step, step * np.arange(stop - rest)))
+            else:
+                self._add_direct(t, rest, stop)
+            pos = stop
+        self._add_direct(t, pos, self.size)
+
+    def exp_factors(self, rate: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(e^(rate·t_outer), e^(rate·t_inner)) para rate (n, 1), real ou complexo."""
+        return _exp_series(rate, self.t_outer, self._outer), _exp_series(rate, self.t_inner, self._inner)
+
+    def central_difference(self, rate: np.ndarray) -> np.ndarray:
+        """
+        Multiplicador (n, ΣJ) que leva e^(rate·t) à sua diferença centrada na grade.
+
+        No interior de um trecho de passo h, (e^(s·(t+h)) - e^(s·(t-h)))/(2h) =
+        e^(s·t)·sinh(s·h)/h: basta escalar o fator externo do bloco. Nas colunas de
+        edge_columns o valor é refeito a partir da própria forma de onda.
+        """
+        out = np.ones((rate.shape[0], self.t_outer.size))
+        for (_, _, outer_sl, _), (step, _) in zip(self.blocks, self._inner):
+            if step is not None:
+                out[:, outer_sl] = np.sinh(rate * step) / step
+        return out
+
+    def matmul(self, left: np.ndarray, right: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Monta (n, m) a partir dos fatores (n, ΣJ, K) e (n, K, ΣB), um produto por bloco."""
+        n = left.shape[0]
+        if out is None:
+            out = np.empty((n, self.size))
+        for start, stop, outer_sl, inner_sl in self.blocks:
+            np.matmul(
+                left[:, outer_sl],
+                right[:, :, inner_sl],
+                out=out[:, start:stop].reshape(n, outer_sl.stop - outer_sl.start, inner_sl.stop - inner_sl.start),
+            )
+        return out
+
+
+_last_grid: _TimeGrid | None = None  # rlc e dupla exponencial da mesma simulação compartilham a grade
+
+
+def _time_grid(t_sec: np.ndarray) -> _TimeGrid:
+    """_TimeGrid de max(t, 0), reaproveitando o último montado quando o vetor de tempo é o mesmo."""
+    global _last_grid
+    t = np.maximum(t_sec, 0.0)
+    grid = _last_grid
+    if grid is None or grid.t.shape != t.shape or not np.array_equal(grid.t, t):
+        grid = _last_grid = _TimeGrid(t)
+    return grid
+
+
+def _exp_series(rate: np.ndarray, t: np.ndarray, series: list) -> np.ndarray:
+    """
+    e^(rate·t) para rate (n, 1) e os tempos t de uma lista de progressões (passo, tempos).
+
+    O decaimento e^(Re(rate)·t) sai da exponencial real; expoentes abaixo de
+    BATCH_FLUSH_LOG viram zero. Com rate complexo, a rotação e^(i·Im(rate)·t) das
+    progressões aritméticas sai por potências da razão, dobrando o trecho
+    preenchido a cada produto (~log2(B) operações por bloco em vez de seno e
+    cosseno por elemento); por ter módulo 1 ela não cai em subnormais.
+    """
+    is_complex = np.iscomplexobj(rate)
+    exponent = (np.ascontiguousarray(rate.real) if is_complex else rate) * t
+    flushed = exponent < BATCH_FLUSH_LOG
+    # Expoente limitado antes da exp: argumentos muito negativos caem no caminho lento de underflow
+    decay = np.exp(np.maximum(exponent, BATCH_FLUSH_LOG, out=exponent), out=exponent)
+    np.copyto(decay, 0.0, where=flushed)
+    if not is_complex:
+        return decay
+    omega = np.ascontiguousarray(rate.imag)
+    rotation = np.empty(decay.shape, dtype=complex)
+    pos = 0
+    for step, times in series:
+        block = rotation[:, pos : pos + times.size]
+        pos += times.size
+        if step is None or times.size < 2:
+            _phasor(omega * times, block)
+            continue
+        _phasor(omega * times[0], block[:, :1])
+        ratio = _phasor(omega * step, np.empty(omega.shape, dtype=complex))
+        filled = 1
+        while filled < times.size:
+            count = min(filled, times.size - filled)
+            np.multiply(block[:, :count], ratio, out=block[:, filled : filled + count])
+            filled += count
+            if filled < times.size:
+                ratio = ratio * ratio
+    rotation *= decay
+    return rotation
+
+
+def _phasor(phase: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """e^(i·phase) gravado em out (complexo): cosseno e seno reais custam menos que a exp complexa."""
+    np.cos(phase, out=out.real)
+    np.sin(phase, out=out.imag)
+    return out
+
+
+def _gradient(v: np.ndarray, t: np.ndarray, out: np.ndarray, columns: np.ndarray | None = None) -> np.ndarray:
+    """
+    np.gradient(v, t, axis=1) (2ª ordem no interior, 1ª nas pontas) gravado em out.
+
+    Com columns, só essas colunas são calculadas; o restante de out fica intacto.
+    """
+    m = t.size
+    dt = np.diff(t)
+    cols = np.arange(m) if columns is None else np.asarray(columns, dtype=int)
+    mid = cols[(cols > 0) & (cols < m - 1)]
+    h1, h2 = dt[mid - 1], dt[mid]
+    out[:, mid] = (
+        (-h2 / (h1 * (h1 + h2))) * v[:, mid - 1]
+        + ((h2 - h1) / (h1 * h2)) * v[:, mid]
+        + (h1 / (h2 * (h1 + h2))) * v[:, mid + 1]
+    )
+    if cols.size and cols[0] == 0:
+        out[:, 0] = (v[:, 1] - v[:, 0]) / dt[0]
+    if cols.size and cols[-1] == m - 1:
+        out[:, -1] = (v[:, -1] - v[:, -2]) / dt[-1]
+    return out
+
+
+def rlc_solution_batch(
+    t_sec: np.ndarray, v0, r_total, l_total, c_eq, out: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Versão vetorizada de rlc_solution: resposta do RLC série para vários circuitos.
+
+    As raízes s = -a ± √(a² - ω0²) saem por broadcast para todas as linhas; cada
+    regime (sub, super e criticamente amortecido) preenche só as suas linhas dos
+    fatores de _TimeGrid, e a matriz (n, m) sai inteira de um produto de posto 2
+    por bloco, sem cópias mascaradas nem exponenciais por amostra.
+
+    Args:
+        t_sec: Vetor de tempo (s) comum a todos os candidatos, shape (m,).
+        v0, r_total, l_total, c_eq: Escalares ou arrays shape (n,).
+        out: Matriz (n, m) pré-alocada para o resultado (opcional).
+
+    Returns:
+        Matriz (n, m) com a tensão de cada candidato. Linhas com parâmetros
+        inválidos ficam zeradas, como na versão escalar.
+    """
+    t_sec = np.asarray(t_sec, dtype=float)
+    n = np.broadcast(np.asarray(v0), np.asarray(r_total), np.asarray(l_total), np.asarray(c_eq)).size
+    v0 = _as_row_vector(v0, n)
+    r_total = _as_row_vector(r_total, n)
+    l_total = _as_row_vector(l_total, n)
+    c_eq = _as_row_vector(c_eq, n)
+
+    valid = (l_total > 1e-12) & (c_eq > 1e-15) & (r_total >= 0)
+    if not np.all(valid):
+        log.warning(f"RLC em lote: {np.count_nonzero(~valid)} candidato(s) com L/Ceq/R inválidos.")
+    if not np.any(valid):
+        if out is None:
+            return np.zeros((n, t_sec.size))
+        out.fill(0.0)
+        return out
+
+    grid = _time_grid(t_sec)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        omega0_sq = np.where(valid, 1.0 / (l_total * c_eq), 1.0)
+        a = np.where(valid, r_total / (2.0 * l_total), 0.0)[:, None]
+        delta = a * a - omega0_sq[:, None]
+        critical = (valid[:, None] & (np.abs(delta / omega0_sq[:, None]) < 1e-6))
+        under = delta < 0
+        # Raízes por broadcast: no subamortecido s = -a ± i·ωd, no superamortecido s1 e s2 reais
+        root = np.sqrt(np.abs(delta))
+        s1 = np.where(under, -a + 1j * root, -a + root)
+        s2 = -a - root
+        amp = v0[:, None]
+        ratio = a / root
+        c1 = -amp * s2 / (s1.real - s2)
+        c2 = amp * s1.real / (s1.real - s2)
+
+        # Cada regime monta só as suas linhas dos fatores (n, J) e (n, B); a matriz (n, m) sai inteira do matmul
+        left = np.empty((n, grid.t_outer.size, 2))
+        right = np.empty((n, 2, grid.t_inner.size))
+        rows = np.flatnonzero(under[:, 0])
+        if rows.size:
+            # Subamortecido: Re(v0·(1 - i·a/ωd)·e^(s1·t_outer)·e^(s1·t_inner)) em posto 2
+            e1_outer, e1_inner = grid.exp_factors(s1[rows])
+            amp_u, ratio_u = amp[rows], ratio[rows]
+            left[rows, :, 0] = amp_u * (e1_outer.real + ratio_u * e1_outer.imag)
+            left[rows, :, 1] = amp_u * (ratio_u * e1_outer.real - e1_outer.imag)
+            right[rows, 0] = e1_inner.real
+            right[rows, 1] = e1_inner.imag
+        rows = np.flatnonzero(~under[:, 0])
+        if rows.size:
+            # Superamortecido: c1·e^(s1·t) + c2·e^(s2·t), as duas raízes numa única chamada
+            e_outer, e_inner = grid.exp_factors(np.concatenate((s1[rows].real, s2[rows])))
+            left[rows, :, 0] = c1[rows] * e_outer[: rows.size]
+            left[rows, :, 1] = c2[rows] * e_outer[rows.size :]
+            right[rows, 0] = e_inner[: rows.size]
+            right[rows, 1] = e_inner[rows.size :]
+
+        rows = np.flatnonzero(critical[:, 0])
+        if rows.size:
+            # Crítico: v0·e^(-a·t)·(1 + a·t_outer + a·t_inner)
+            a_c = a[rows]
+            decay_outer, decay_inner = grid.exp_factors(-a_c)
+            left[rows, :, 0] = amp[rows] * decay_outer * (1 + a_c * grid.t_outer)
+            left[rows, :, 1] = amp[rows] * a_c * decay_outer
+            right[rows, 0] = decay_inner
+            right[rows, 1] = grid.t_inner * decay_inner
+    left[~valid] = 0.0
+    v_out = grid.matmul(left, right, out)
+    if t_sec.size and t_sec[0] < 0:
+        v_out[:, t_sec < 0] = 0.0
+
+    # Só o subamortecido sai de [-0.3·|v0|, 1.1·|v0|]: mínimo -v0·e^(-a·π/ωd) em t = π/ωd
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        undershoot = np.exp(-np.pi * ratio[:, 0])
+    clip_rows = np.flatnonzero(valid & ~critical[:, 0] & (under[:, 0] & (undershoot > 0.3) | (v0 < 0)))
+    if clip_rows.size:
+        bound = np.abs(v0[clip_rows])[:, None]
+        v_out[clip_rows] = np.clip(v_out[clip_rows], -0.3 * bound, 1.1 * bound)
+    return v_out
+
+
+def double_exp_batch(
+    t_sec: np.ndarray, v0_norm, alpha, beta, gradient: bool = False, gradient_scale=None, out=None
+):
+    """
+    Versão vetorizada de double_exp_func (pico normalizado para v0_norm).
+
+    Args:
+        gradient: Se True, devolve também np.gradient(v, t, axis=1) (V/s), como na
+            corrente da versão escalar, calculado nos fatores de tempo.
+        gradient_scale: Fator por linha aplicado ao gradiente (ex.: C_load para obter
+            a corrente na carga), sem passada extra na matriz.
+        out: Matriz (n, m) pré-alocada para v, ou par (v, gradiente) com gradient=True.
+
+    Returns:
+        Matriz (n, m), ou tupla (v, gradiente) com gradient=True; linhas com
+        alpha/beta inválidos (beta <= alpha) ficam zeradas.
+    """
+    t_sec = np.asarray(t_sec, dtype=float)
+    n = np.broadcast(np.asarray(v0_norm), np.asarray(alpha), np.asarray(beta)).size
+    v0_norm = _as_row_vector(v0_norm, n)
+    alpha = _as_row_vector(alpha, n)
+    beta = _as_row_vector(beta, n)
+
+    valid = (alpha > 0) & (beta > 0) & (beta > alpha * (1 + 1e-9))
+    a = np.where(valid, alpha, 1.0)[:, None]
+    b = np.where(valid, beta, 2.0)[:, None]
+    t_peak = np.log(b / a) / (b - a)
+    k_norm = np.where(valid[:, None], v0_norm[:, None] / (np.exp(-a * t_peak) - np.exp(-b * t_peak)), 0.0)
+
+    grid = _time_grid(t_sec)
+    # As duas exponenciais numa única chamada; left (n, J, 2) e right (n, 2, B) são vistas dos fatores
+    rates = np.concatenate((-a, -b))
+    exp_outer, exp_inner = grid.exp_factors(rates)
+    exp_outer[:n] *= k_norm
+    exp_outer[n:] *= -k_norm
+    left = exp_outer.reshape(2, n, -1).transpose(1, 2, 0)
+    right = exp_inner.reshape(2, n, -1).transpose(1, 0, 2)
+    v_out, dv_out = out if gradient and out is not None else (out, None)
+    v_out = grid.matmul(left, right, v_out)
+    if not gradient:
+        return v_out
+    exp_outer *= grid.central_difference(rates)
+    scale = None if gradient_scale is None else _as_row_vector(gradient_scale, n)[:, None]
+    if scale is not None:
+        exp_outer *= np.concatenate((scale, scale))
+    dv_dt = grid.matmul(left, right, dv_out)
+    edges = grid.edge_columns
+    if t_sec.size and t_sec[0] < 0:
+        edges = np.union1d(edges, np.flatnonzero(t_sec <= 0))
+    _gradient(v_out, t_sec, dv_dt, edges)
+    if scale is not None:
+        dv_dt[:, edges] *= scale
+    return v_out, dv_dt
+
+
+def circuit_load_voltage_batch(
+    t_sec: np.ndarray,
+    v0_charge,
+    rf,
+    rt,
+    l_total,
+    c_gen,
+    c_load,
+    r_parasitic=constants.R_PARASITIC_OHM,
+) -> np.ndarray:
+    """
+    Tensão na carga do circuito Cg‖Rt → Rf + R_parasita + L → Cl, exata e em lote.
+
+    Diferente de simulate_hybrid_impulse_batch (dupla exponencial sem L), inclui a
+    indutância do laço, que produz o atraso de frente e o overshoot. Cada
+    candidato é um sistema linear de 3ª ordem (vCg, i, vCl); as raízes e
+    autovetores saem de um único np.linalg.eig sobre a pilha (n, 3, 3) e a
+    resposta é a soma dos três modos, avançados passo a passo para todas as
+    linhas de um bloco de BATCH_CHUNK_ROWS de uma vez.
+
+    Returns:
+        Matriz (n, m) com a tensão na carga; linhas inválidas ficam com NaN.
+    """
+    t_sec = np.asarray(t_sec, dtype=float)
+    params = [np.asarray(p, dtype=float) for p in (v0_charge, rf, rt, l_total, c_gen, c_load, r_parasitic)]
+    n = np.broadcast(*params).size
+    v0_charge, rf, rt, l_total, c_gen, c_load, r_parasitic = (_as_row_vector(p, n) for p in params)
+
+    valid = (rf > 0) & (rt > 0) & (l_total > 0) & (c_gen > 0) & (c_load > 0) & (r_parasitic >= 0)
+    ones = np.ones(n)
+    rt, l_total, c_gen, c_load = (np.where(valid, p, ones) for p in (rt, l_total, c_gen, c_load))
+    a = np.zeros((n, 3, 3))
+    a[:, 0, 0] = -1.0 / (rt * c_gen)
+    a[:, 0, 1] = -1.0 / c_gen
+    a[:, 1, 0] = 1.0 / l_total
+    a[:, 1, 1] = -(rf + r_parasitic) / l_total
+    a[:, 1, 2] = -1.0 / l_total
+    a[:, 2, 1] = 1.0 / c_load
+
+    roots, vectors = np.linalg.eig(a)
+    well_posed = np.linalg.cond(vectors) < BATCH_MAX_EIGVEC_COND
+    valid &= well_posed
+    vectors[~well_posed] = np.eye(3)
+    # x(0) = [V0, 0, 0]: coeficientes modais c = V⁻¹·x(0); vCl(t) = Σ V[2,k]·c_k·e^(s_k·t)
+    coef = np.linalg.solve(vectors, np.broadcast_to(np.array([1.0, 0.0, 0.0]), (n, 3))[..., None])[..., 0]
+    weights = vectors[:, 2, :] * coef * v0_charge[:, None]
+
+    # Os modos avançam por z(t + dt) = z(t)·e^(s·dt): só há uma exponencial complexa
+    # por passo distinto, em vez de uma por amostra (grades uniformes por trechos são ideais)
+    t = np.maximum(t_sec, 0.0)
+    dt = np.diff(t)
+    if np.any(dt <= 0):
+        raise ValueError("Vetor de tempo deve ser estritamente crescente.")
+    decimals = BATCH_STEP_KEY_DIGITS - int(np.floor(np.log10(dt.min())))
+    steps, step_idx = np.unique(np.round(dt, decimals), return_inverse=True)
+    # (3, n) contíguo: a soma dos modos corre ao longo do primeiro eixo sem saltos de memória
+    roots_t = np.ascontiguousarray(roots.T)
+    weights_t = np.ascontiguousarray(weights.T)
+    v_out = np.empty((n, t.size))
+    for start in range(0, n, BATCH_CHUNK_ROWS):
+        rows = slice(start, start + BATCH_CHUNK_ROWS)
+        transitions = np.exp(steps[:, None, None] * roots_t[None, :, rows])
+        modes = weights_t[:, rows] * np.exp(roots_t[:, rows] * t[0])
+        # As amostras saem por instante (m, linhas) e vão para v_out (linhas, m) em
+        # blocos de BATCH_TILE_SAMPLES, que cabem no cache durante a transposição
+        tile = np.empty((BATCH_TILE_SAMPLES, modes.shape[1]))
+        np.sum(modes.real, axis=0, out=tile[0])
+        filled, tile_start = 1, 0
+        for s in step_idx:
+            if filled == BATCH_TILE_SAMPLES:
+                v_out[rows, tile_start : tile_start + filled] = tile.T
+                tile_start += filled
+                filled = 0
+            modes *= transitions[s]
+            np.sum(modes.real, axis=0, out=tile[filled])
+            filled += 1
+        v_out[rows, tile_start : tile_start + filled] = tile[:filled].T
+    v_out[~valid] = np.nan
+    n_invalid = np.count_nonzero(~valid)
+    if n_invalid:
+        log.warning(f"Circuito com L em lote: {n_invalid} de {n} candidato(s) inválido(s) ou degenerado(s).")
+    return v_out
+
+
+def apply_chop_batch(
+    t_sec: np.ndarray, v_final: np.ndarray, gap_distance_cm
+) -> np.ndarray:
+    """
+    Aplica o corte do gap (colapso linear + oscilação amortecida) a cada linha.
+
+    Modifica v_final in-place, com o mesmo modelo de simulate_hybrid_impulse.
+
+    Returns:
+        Vetor (n,) com o instante de corte em segundos (NaN quando não há corte).
+    """
+    n = v_final.shape[0]
+    gap = _as_row_vector(gap_distance_cm if gap_distance_cm is not None else 0.0, n)
+    breakdown_v = CHOP_BREAKDOWN_KV_PER_CM * gap * 1000.0
+    above = (v_final >= breakdown_v[:, None]) & (gap[:, None] > 0)
+    has_chop = above.any(axis=1)
+    chop_time = np.full(n, np.nan)
+    if not np.any(has_chop):
+        return chop_time
+
+    rows = np.flatnonzero(has_chop)
+    chop_idx = above[rows].argmax(axis=1)
+    chop_time[rows] = t_sec[chop_idx]
+    chop_v = v_final[rows, chop_idx][:, None]
+
+    dt = t_sec[None, :] - chop_time[rows][:, None]
+    collapse = (dt >= 0) & (dt <= CHOP_COLLAPSE_TIME_S)
+    tac = dt - CHOP_COLLAPSE_TIME_S
+    osc_mask = tac > 0
+
+    sub = v_final[rows]
+    sub = np.where(collapse, chop_v * (1 - dt / CHOP_COLLAPSE_TIME_S), sub)
+    with np.errstate(over="ignore", invalid="ignore"):
+        osc = (
+            -chop_v
+            * CHOP_UNDERSHOOT_RATIO
+            * np.exp(-CHOP_OSC_DAMPING * np.maximum(tac, 0.0) * 1e6)
+            * np.cos(2 * np.pi * CHOP_OSC_FREQ_HZ * tac)
+        )
+    osc = np.maximum(osc, -CHOP_UNDERSHOOT_CLIP * np.abs(chop_v))
+    osc[tac > 3 / CHOP_OSC_FREQ_HZ] = 0.0
+    sub = np.where(osc_mask, osc, sub)
+    v_final[rows] = sub
+
+    missed = np.count_nonzero(~has_chop & (gap > 0))
+    if missed:
+        log.warning(f"Corte em lote: {missed} candidato(s) não atingiram a tensão de ruptura.")
+    return chop_time
+
+
+def chop_gap_sweep(
+    t_sec: np.ndarray, v_full: np.ndarray, gap_distances_cm, polarity: str = "positiva"
+) -> dict:
+    """
+    Varre distâncias de gap contra uma única onda plena (sem corte), em uma passada.
+
+    Usa o mesmo modelo de apply_chop_batch / simulate_hybrid_impulse: corte na
+    primeira amostra com v ≥ 30 kV/cm·gap, colapso linear e oscilação amortecida
+    limitada. O instante de corte de todos os gaps sai de um searchsorted sobre o
+    máximo acumulado da onda; o undershoot é avaliado só na janela da oscilação
+    (3 períodos) de cada gap, sem máscaras (gaps, amostras) sobre a onda inteira.
+
+    Cada corte é conferido com formulas.impulse_math.gap_chopping_distance_cm:
+    o gap que a fórmula do manual indicaria para a tensão de pico da onda e o
+    tempo de corte simulado.
+
+    Args:
+        t_sec: Vetor de tempo (s), uniforme ou não.
+        v_full: Onda plena (V), por exemplo v_final de simulate_hybrid_impulse com "lightning".
+        gap_distances_cm: Distâncias de gap (cm), escalar ou array.
+        polarity: "positiva" ou "negativa" (apenas para a fórmula de conferência).
+
+    Returns:
+        Dicionário de vetores (k,): gap_cm, breakdown_kv, chop_time_us, chop_voltage_kv,
+        undershoot_percent, gap_formula_cm e gap_formula_deviation_percent (NaN onde a
+        onda não atinge a tensão de ruptura).
+    """
+    t_sec = np.asarray(t_sec, dtype=float)
+    v_full = np.asarray(v_full, dtype=float)
+    gap = np.atleast_1d(np.asarray(gap_distances_cm, dtype=float))
+    k = gap.size
+    breakdown_v = CHOP_BREAKDOWN_KV_PER_CM * gap * 1000.0
+
+    # Primeira amostra com v >= ruptura = primeira posição do máximo acumulado >= ruptura
+    running_max = np.maximum.accumulate(v_full)
+    chop_idx = np.searchsorted(running_max, breakdown_v, side="left")
+    has_chop = (gap > 0) & (chop_idx < v_full.size)
+    chop_idx = np.where(has_chop, chop_idx, 0)
+    chop_time = np.where(has_chop, t_sec[chop_idx], np.nan)
+    chop_v = np.where(has_chop, v_full[chop_idx], np.nan)
+
+    # Janela da oscilação: tac ∈ (0, 3/f]; antes dela o colapso é ≥ 0 e depois a onda é zerada.
+    # tac é calculado como na versão escalar ((t - t_corte) - t_colapso) para decidir as mesmas amostras
+    undershoot = np.full(k, np.nan)
+    rows = np.flatnonzero(has_chop)
+    if rows.size:
+        start = chop_idx[rows]
+        stop = np.searchsorted(t_sec, chop_time[rows] + CHOP_COLLAPSE_TIME_S + 3 / CHOP_OSC_FREQ_HZ, side="right") + 1
+        idx = start[:, None] + np.arange(max(int(np.max(stop - start)), 1))[None, :]
+        in_range = idx < t_sec.size
+        idx = np.minimum(idx, t_sec.size - 1)
+        tac = (t_sec[idx] - chop_time[rows][:, None]) - CHOP_COLLAPSE_TIME_S
+        vc = chop_v[rows][:, None]
+        with np.errstate(over="ignore", invalid="ignore"):
+            osc = -vc * CHOP_UNDERSHOOT_RATIO * np.exp(-CHOP_OSC_DAMPING * tac * 1e6) * np.cos(
+                2 * np.pi * CHOP_OSC_FREQ_HZ * tac
+            )
+        osc = np.maximum(osc, -CHOP_UNDERSHOOT_CLIP * np.abs(vc))
+        in_osc = in_range & (tac > 0) & (tac <= 3 / CHOP_OSC_FREQ_HZ)
+        lowest = np.minimum(np.where(in_osc, osc, 0.0).min(axis=1), 0.0)
+        undershoot[rows] = np.abs(lowest) / np.abs(chop_v[rows]) * 100.0
+
+    peak_kv = float(np.max(v_full)) / 1000.0
+    gap_formula = np.full(k, np.nan)
+    gap_formula[rows] = gap_chopping_distance_cm(peak_kv, polarity, chop_time[rows] * 1e6)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deviation = (gap / gap_formula - 1.0) * 100.0
+
+    missed = np.count_nonzero(~has_chop & (gap > 0))
+    if missed:
+        log.debug(f"Varredura de gap: {missed} de {k} gap(s) acima da tensão de pico ({peak_kv:.1f} kV).")
+    return {
+        "gap_cm": gap,
+        "breakdown_kv": breakdown_v / 1000.0,
+        "chop_time_us": chop_time * 1e6,
+        "chop_voltage_kv": chop_v / 1000.0,
+        "undershoot_percent": undershoot,
+        "gap_formula_cm": gap_formula,
+        "gap_formula_deviation_percent": deviation,
+    }
+
+
+def simulate_hybrid_impulse_batch(
+    t_sec: np.ndarray,
+    v0_charge,
+    rf,
+    rt,
+    l_total,
+    c_gen,
+    c_load,
+    impulse_type: str,
+    gap_distance_cm=None,
+) -> tuple:
+    """
+    Simula vários circuitos de impulso de uma só vez (versão em lote de simulate_hybrid_impulse).
+
+    Os parâmetros de circuito aceitam escalares ou arrays 1-D e são combinados por
+    broadcasting; cada posição do broadcast é um candidato. Diferente da versão
+    escalar, alpha/beta não vêm do ajuste K-factor (curve_fit por onda, não
+    vetorizável) e sim das raízes exatas do circuito (circuit_double_exp_constants),
+    que são o valor físico que o ajuste aproxima.
+
+    Args:
+        t_sec: Vetor de tempo (s), shape (m,), comum a todos os candidatos.
+        v0_charge: Tensão de carga (V).
+        rf, rt: Resistências de frente e cauda (Ohm).
+        l_total: Indutância total (H).
+        c_gen, c_load: Capacitâncias do gerador e da carga (F).
+        impulse_type: "lightning", "chopped" ou "switching" (único para o lote).
+        gap_distance_cm: Distância do gap (cm), escalar ou array (apenas "chopped").
+
+    Returns:
+        Tupla (v_rlc, v_final, i_load, alpha, beta, chop_time_sec):
+        - v_rlc, v_final, i_load: matrizes (n, m).
+        - alpha, beta: vetores (n,) em s⁻¹ (0 para candidatos inválidos).
+        - chop_time_sec: vetor (n,) em s (NaN quando não há corte).
+    """
+    t_sec = np.asarray(t_sec, dtype=float)
+    params = [np.asarray(p, dtype=float) for p in (v0_charge, rf, rt, l_total, c_gen, c_load)]
+    if gap_distance_cm is not None:
+        params.append(np.asarray(gap_distance_cm, dtype=float))
+    try:
+        n = np.broadcast(*params).size
+    except ValueError as e:
+        raise ValueError(f"Parâmetros de circuito com formas incompatíveis: {e}") from e
+    v0_charge, rf, rt, l_total, c_gen, c_load = (_as_row_vector(p, n) for p in params[:6])
+
+    def empty():
+        return (*np.zeros((3, n, t_sec.size)), np.zeros(n), np.zeros(n), np.full(n, np.nan))
+
+    if t_sec.ndim != 1 or t_sec.size < 2:
+        log.error("Vetor de tempo inválido ou muito curto para simulação em lote")
+        return empty()
+    if impulse_type not in VALID_IMPULSE_TYPES:
+        log.error(f"Tipo de impulso inválido: {impulse_type}")
+        return empty()
+
+    valid = (v0_charge > 0) & (rf > 0) & (rt > 0) & (l_total > 0) & (c_gen > 0) & (c_load > 0)
+    n_invalid = np.count_nonzero(~valid)
+    if n_invalid:
+        log.warning(f"Simulação em lote: {n_invalid} de {n} candidato(s) com parâmetros inválidos.")
+    log.info(f"Simulando Híbrido em lote: Tipo={impulse_type}, {n} candidato(s) x {t_sec.size} pontos")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        c_eq = np.where(valid, c_gen * c_load / (c_gen + c_load), 0.0)
+    r_rlc = rf + constants.R_PARASITIC_OHM
+    # Uma única alocação para as três matrizes: blocos grandes evitam as falhas de
+    # página de três buffers novos, que custam mais que o cálculo em grades curtas
+    waves = np.empty((3, n, t_sec.size))
+    v_rlc = rlc_solution_batch(t_sec, np.where(valid, v0_charge, 0.0), r_rlc, l_total, c_eq, out=waves[0])
+
+    alpha, beta = circuit_double_exp_constants(rf, rt, c_gen, c_load)
+    alpha = np.where(valid, alpha, 0.0)
+    beta = np.where(valid, beta, 0.0)
+    chop_time_sec = np.full(n, np.nan)
+    if impulse_type == "chopped" and gap_distance_cm is not None:
+        v_final = double_exp_batch(t_sec, v0_charge, alpha, beta, out=waves[1])
+        chop_time_sec = apply_chop_batch(t_sec, v_final, gap_distance_cm)
+        i_load = _gradient(v_final, t_sec, waves[2])
+        i_load *= c_load[:, None]
+    else:
+        # Sem corte a corrente (C_load·dv/dt, como np.gradient na versão escalar) sai dos mesmos fatores
+        v_final, i_load = double_exp_batch(
+            t_sec, v0_charge, alpha, beta, gradient=True, gradient_scale=c_load, out=(waves[1], waves[2])
+        )
+    return v_rlc, v_final, i_load, alpha, beta, chop_time_sec
+
+
+# === Medição vetorizada de instantes da forma de onda ===
+
+
+def first_crossing_batch(
+    t: np.ndarray, v: np.ndarray, level: np.ndarray, peak_idx: np.ndarray, after_peak: bool
+) -> np.ndarray:
+    """
+    Instante (interpolado linearmente) do primeiro cruzamento de `level` em cada linha.
+
+    Args:
+        t: Vetor de tempo comum, shape (m,).
+        v: Matriz de formas de onda, shape (n, m).
+        level: Nível absoluto por linha, shape (n,).
+        peak_idx: Índice do pico de cada linha, shape (n,).
+        after_peak: False busca a subida (v >= level) até o pico;
+            True busca a descida (v <= level) a partir do pico.
+
+    Returns:
+        Vetor (n,) com o instante do cruzamento (NaN quando não há cruzamento).
+    """
+    n, m = v.shape
+    j = np.arange(m)[None, :]
+    if after_peak:
+        mask = (v <= level[:, None]) & (j >= peak_idx[:, None])
+    else:
+        mask = (v >= level[:, None]) & (j <= peak_idx[:, None])
+    found = mask.any(axis=1)
+    i1 = mask.argmax(axis=1)
+    i0 = np.maximum(i1 - 1, 0)
+    rows = np.arange(n)
+    v0, v1 = v[rows, i0], v[rows, i1]
+    t0, t1 = t[i0], t[i1]
+    dv = v1 - v0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_cross = np.where(np.abs(dv) > 1e-12, t0 + (level - v0) * (t1 - t0) / dv, t1)
+    return np.where(found, t_cross, np.nan)
+
+
+def front_tail_times_batch(t_us: np.ndarray, v: np.ndarray) -> dict:
+    """
+    Mede pico, t30/t90 (frente) e t50 (cauda) de cada linha, sem K-factor.
+
+    Aplica as mesmas definições de analyze_lightning_impulse / analyze_switching_impulse
+    (T1 = 1.67·(t90 - t30), origem virtual pela reta 30-90%, T2 = t50 - t0).
+
+    Returns:
+        Dicionário de vetores (n,): peak, t_peak_us, t_30_us, t_90_us, t_50_us,
+        t_0_virtual_us, t_front_us, t_tail_us.
+    """
+    n = v.shape[0]
+    peak_idx = v.argmax(axis=1)
+    peak = v[np.arange(n), peak_idx]
+    t30 = first_crossing_batch(t_us, v, 0.3 * peak, peak_idx, after_peak=False)
+    t90 = first_crossing_batch(t_us, v, 0.9 * peak, peak_idx, after_peak=False)
+    t50 = first_crossing_batch(t_us, v, 0.5 * peak, peak_idx, after_peak=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dt_front = t90 - t30
+        valid_front = dt_front > 1e-9
+        # Origem virtual: reta 30%-90% cruza zero em t30 - 0.3·Δt/0.6
+        t0 = np.where(valid_front, t30 - 0.5 * dt_front, 0.0)
+        t_front = np.where(valid_front, 1.67 * dt_front, np.nan)
+    return {
+        "peak": peak,
+        "t_peak_us": t_us[peak_idx],
+        "t_30_us": t30,
+        "t_90_us": t90,
+        "t_50_us": t50,
+        "t_0_virtual_us": t0,
+        "t_front_us": t_front,
+        "t_tail_us": t50 - t0,
+    }
+
+
+def double_exp_level_times(
+    alpha: np.ndarray, beta: np.ndarray, fraction: float, after_peak: bool, iterations: int = 60
+) -> np.ndarray:
+    """
+    Instante exato (s) em que a dupla exponencial atinge `fraction` do pico.
+
+    Resolve e^(-alpha·t) - e^(-beta·t) = fraction·pico por bisseção vetorizada,
+    na subida (0 → t_pico) ou na descida (t_pico → ∞). Equivale a medir a onda
+    de double_exp_batch sem erro de amostragem.
+
+    Returns:
+        Vetor com a forma do broadcast de alpha/beta (NaN para pares inválidos).
+    """
+    alpha, beta = np.broadcast_arrays(np.asarray(alpha, dtype=float), np.asarray(beta, dtype=float))
+    valid = (alpha > 0) & (beta > alpha * (1 + 1e-9))
+    a = np.where(valid, alpha, 1.0)
+    b = np.where(valid, beta, 2.0)
+    t_peak = np.log(b / a) / (b - a)
+    target = fraction * (np.exp(-a * t_peak) - np.exp(-b * t_peak))
+
+    if after_peak:
+        lo = t_peak.copy()
+        # Na cauda e^(-beta·t) é desprezível: ln(1/target)/alpha limita o cruzamento
+        hi = np.maximum(np.log(1.0 / target) / a, t_peak) * 2.0
+    else:
+        lo = np.zeros_like(t_peak)
+        hi = t_peak.copy()
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        above = (np.exp(-a * mid) - np.exp(-b * mid)) >= target
+        # Subida: acima do alvo => cruzamento está antes; descida: acima => depois
+        if after_peak:
+            lo = np.where(above, mid, lo)
+            hi = np.where(above, hi, mid)
+        else:
+            hi = np.where(above, mid, hi)
+            lo = np.where(above, lo, mid)
+    return np.where(valid, 0.5 * (lo + hi), np.nan)
+
+
+def double_exp_waveform_times(alpha: np.ndarray, beta: np.ndarray) -> dict:
+    """
+    Parâmetros de tempo normativos (µs) da dupla exponencial definida por alpha/beta.
+
+    Usa as mesmas definições de analyze_lightning_impulse (T1, T2 pela origem
+    virtual) e analyze_switching_impulse (Tp pela fórmula K, T2 a partir de t=0).
+
+    Returns:
+        Dicionário de vetores: t_30_us, t_90_us, t_50_us, t_peak_us, t_front_us,
+        t_tail_us, t_p_us, t_2_us.
+    """
+    alpha, beta = np.broadcast_arrays(np.asarray(alpha, dtype=float), np.asarray(beta, dtype=float))
+    t30 = double_exp_level_times(alpha, beta, 0.3, after_peak=False) * 1e6
+    t90 = double_exp_level_times(alpha, beta, 0.9, after_peak=False) * 1e6
+    t50 = double_exp_level_times(alpha, beta, 0.5, after_peak=True) * 1e6
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_peak = np.log(beta / alpha) / (beta - alpha) * 1e6
+    t_ab = t90 - t30
+    t0 = t30 - 0.5 * t_ab
+    return {
+        "t_30_us": t30,
+        "t_90_us": t90,
+        "t_50_us": t50,
+        "t_peak_us": t_peak,
+        "t_front_us": 1.67 * t_ab,
+        "t_tail_us": t50 - t0,
+        "t_p_us": (2.42 - 3.08e-3 * t_ab + 1.51e-6 * t50**2) * t_ab,
+        "t_2_us": t50,
+    }
@@ -0,0 +1,155 @@
+# app_core/impulse_grid.py
+"""
+Grade de tempo adaptativa (não uniforme) para a simulação de impulso.
+
+A grade é densa e uniforme da origem até além do pico (onde ficam os níveis de
+30/90% e a oscilação de crista), cresce geometricamente na cauda até um passo
+máximo e volta a ser densa em torno do instante de corte (LIC). As funções de
+análise interpolam sobre os vetores de tempo, então aceitam a grade diretamente.
+"""
+import logging
+
+import numpy as np
+
+from app_core.impulse_batch import (
+    CHOP_BREAKDOWN_KV_PER_CM,
+    circuit_double_exp_constants,
+    double_exp_level_times,
+)
+
+log = logging.getLogger(__name__)
+
+GRID_POINTS_PER_PEAK = 200  # Pontos entre t=0 e o pico
+GRID_DENSE_PEAKS = 2.5  # Região densa cobre até 2.5x o tempo de pico
+GRID_TAIL_GROWTH = 1.03  # Razão entre passos consecutivos na cauda
+GRID_MIN_TAIL_POINTS = 400  # Passo máximo = tempo simulado / GRID_MIN_TAIL_POINTS
+GRID_CHOP_DT_S = 1e-9  # Passo em torno do corte (instante detectado por amostra; oscilação de ~5 MHz)
+GRID_CHOP_BEFORE_S = 0.5e-6
+GRID_CHOP_AFTER_S = 3e-6  # Oscilação pós-corte praticamente extinta
+
+
+def adaptive_time_grid(
+    sim_time_s: float,
+    peak_time_s: float,
+    chop_time_s: float | None = None,
+    points_per_peak: int = GRID_POINTS_PER_PEAK,
+    tail_growth: float = GRID_TAIL_GROWTH,
+) -> np.ndarray:
+    """
+    Gera o vetor de tempo (s) de 0 a sim_time_s, denso na frente/pico e esparso na cauda.
+
+    Args:
+        sim_time_s: Duração simulada (s).
+        peak_time_s: Tempo de pico esperado (s); define o passo da região densa.
+        chop_time_s: Instante de corte (s), se houver, refinado com passo GRID_CHOP_DT_S.
+        points_per_peak: Pontos entre a origem e o pico.
+        tail_growth: Razão entre passos consecutivos na cauda (> 1).
+
+    Returns:
+        Vetor de tempo estritamente crescente, começando em 0 e terminando em sim_time_s.
+    """
+    if sim_time_s <= 0:
+        raise ValueError(f"Tempo de simulação inválido: {sim_time_s}")
+    if peak_time_s <= 0 or peak_time_s >= sim_time_s:
+        log.warning(f"Tempo de pico ({peak_time_s:.2e} s) fora da janela; usando 1% do tempo simulado.")
+        peak_time_s = 0.01 * sim_time_s
+
+    dt_dense = peak_time_s / points_per_peak
+    dt_max = max(sim_time_s / GRID_MIN_TAIL_POINTS, dt_dense)
+    dense_end = min(GRID_DENSE_PEAKS * peak_time_s, sim_time_s)
+    dense = np.arange(0.0, dense_end, dt_dense)
+
+    # Cauda: passos geométricos dt_dense·growth^k até dt_max, depois uniformes
+    n_growth = int(np.ceil(np.log(dt_max / dt_dense) / np.log(tail_growth))) if dt_max > dt_dense else 0
+    steps = np.minimum(dt_dense * tail_growth ** np.arange(1, n_growth + 1), dt_max)
+    growth_times = dense_end + np.cumsum(steps)
+    last = growth_times[-1] if n_growth else dense_end
+    uniform_times = np.arange(last + dt_max, sim_time_s, dt_max)
+    grid = np.concatenate((dense, [dense_end], growth_times, uniform_times))
+    grid = grid[grid < sim_time_s]
+
+    if chop_time_s is not None and 0 < chop_time_s < sim_time_s:
+        dt_chop = min(GRID_CHOP_DT_S, dt_dense)
+        chop_start = max(chop_time_s - GRID_CHOP_BEFORE_S, 0.0)
+        chop_end = min(chop_time_s + GRID_CHOP_AFTER_S, sim_time_s)
+        chop_window = np.arange(chop_start, chop_end, dt_chop)
+        # Substitui os pontos esparsos da janela pela malha fina (inclui o instante exato)
+        grid = np.concatenate((grid[(grid < chop_start) | (grid >= chop_end)], chop_window, [chop_time_s]))
+
+    grid = np.unique(np.append(grid, sim_time_s))
+    # Remove pontos quase coincidentes das emendas entre regiões
+    keep = np.concatenate(([True], np.diff(grid) > 1e-3 * dt_dense))
+    grid = grid[keep]
+    grid[-1] = sim_time_s
+    log.debug(f"Grade adaptativa: {len(grid)} pontos (passo denso {dt_dense:.2e} s, máximo {dt_max:.2e} s)")
+    return grid
+
+
+def two_step_time_grid(
+    sim_time_s: float,
+    peak_time_s: float,
+    points_per_peak: int = GRID_POINTS_PER_PEAK,
+    dense_peaks: float = GRID_DENSE_PEAKS,
+) -> np.ndarray:
+    """
+    Grade com apenas dois passos: uniforme e densa até dense_peaks·t_pico, uniforme na cauda.
+
+    Os kernels em lote (circuit_load_voltage_batch) calculam uma exponencial por
+    passo distinto para todas as linhas; com dois passos esse custo some e a
+    grade continua fina na frente e no pico, como em adaptive_time_grid.
+    """
+    if sim_time_s <= 0:
+        raise ValueError(f"Tempo de simulação inválido: {sim_time_s}")
+    if peak_time_s <= 0 or peak_time_s >= sim_time_s:
+        log.warning(f"Tempo de pico ({peak_time_s:.2e} s) fora da janela; usando 1% do tempo simulado.")
+        peak_time_s = 0.01 * sim_time_s
+    dt_dense = peak_time_s / points_per_peak
+    n_dense = int(np.ceil(min(dense_peaks * peak_time_s, sim_time_s) / dt_dense))
+    dense_end = n_dense * dt_dense
+    n_tail = max(int(np.ceil((sim_time_s - dense_end) / (sim_time_s / GRID_MIN_TAIL_POINTS))), 0)
+    dt_tail = (sim_time_s - dense_end) / n_tail if n_tail else dt_dense
+    grid = np.concatenate(
+        (np.arange(n_dense + 1) * dt_dense, dense_end + np.arange(1, n_tail + 1) * dt_tail)
+    )
+    log.debug(f"Grade de dois passos: {len(grid)} pontos (passos {dt_dense:.2e} s e {dt_tail:.2e} s)")
+    return grid
+
+
+def hybrid_impulse_time_grid(
+    sim_time_s: float,
+    rf: float,
+    rt: float,
+    c_gen: float,
+    c_load: float,
+    v0_charge: float | None = None,
+    gap_distance_cm: float | None = None,
+    points_per_peak: int = GRID_POINTS_PER_PEAK,
+) -> np.ndarray:
+    """
+    Grade adaptativa para simulate_hybrid_impulse a partir dos parâmetros do circuito.
+
+    O tempo de pico vem das raízes exatas do circuito (circuit_double_exp_constants);
+    com gap informado, o instante em que a dupla exponencial atinge a tensão de
+    ruptura é refinado como instante de corte.
+    """
+    alpha, beta = circuit_double_exp_constants(rf, rt, c_gen, c_load)
+    alpha, beta = float(alpha), float(beta)
+    if not beta > alpha > 0:
+        log.warning("Circuito sem dupla exponencial válida; grade adaptativa com pico estimado.")
+        return adaptive_time_grid(sim_time_s, 0.01 * sim_time_s, points_per_peak=points_per_peak)
+    peak_time_s = np.log(beta / alpha) / (beta - alpha)
+
+    chop_time_s = None
+    if gap_distance_cm and v0_charge:
+        fraction = CHOP_BREAKDOWN_KV_PER_CM * gap_distance_cm * 1000 / v0_charge
+        if fraction < 1:
+            chop_time_s = float(double_exp_level_times(alpha, beta, fraction, after_peak=False))
+    return adaptive_time_grid(sim_time_s, peak_time_s, chop_time_s, points_per_peak=points_per_peak)
+
+
+def is_uniform_grid(t: np.ndarray, rtol: float = 1e-6) -> bool:
+    """True se o vetor de tempo tiver passo constante (dentro de rtol)."""
+    if len(t) < 3:
+        return True
+    dt = np.diff(t)
+    return bool(np.all(np.abs(dt - dt[0]) <= rtol * abs(dt[0])))
@@ -0,0 +1,181 @@
+# app_core/impulse_kernels.py
+"""
+Kernels de medição de instantes da forma de onda de impulso.
+
+analyze_lightning_impulse / analyze_switching_impulse precisam do pico, dos
+cruzamentos de 30/90% na frente, do cruzamento de 50% e de zero na cauda e do
+intervalo acima de 90% (Td). Feitos com máscaras, cada nível custa alguns
+arrays booleanos e recortes do tamanho do registro; em registros medidos de
+milhões de amostras isso domina a análise.
+
+waveform_timing localiza todos os índices em uma varredura após o pico: com
+Numba instalado o laço é compilado (njit); sem Numba usa um caminho NumPy que
+só avalia comparações nos trechos necessários. As interpolações (poucos
+escalares) são comuns aos dois caminhos. Os dois caminhos aplicam exatamente as
+mesmas definições:
+
+- frente: primeiro índice até o pico com v >= nível, interpolado com a amostra
+  anterior (igual a np.interp sobre a frente quando ela é monótona);
+- cauda (50% e zero): primeiro índice a partir do pico com v <= nível;
+- Td: primeiro e último índices com v >= 90%, com os cruzamentos interpolados.
+"""
+import logging
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # Numba é opcional: o caminho NumPy dá os mesmos resultados
+    numba = None
+
+log = logging.getLogger(__name__)
+
+NUMBA_AVAILABLE = numba is not None
+KERNEL_MIN_DV = 1e-9  # Abaixo disso o trecho é plano: usa a amostra em vez de interpolar
+
+TIMING_KEYS = (
+    "peak_idx",
+    "peak",
+    "t_peak",
+    "t_30",
+    "t_90",
+    "t_50",
+    "t_zero",
+    "t_90_first",
+    "t_90_last",
+)
+
+
+def _scan_loop(v, peak_idx):
+    """
+    Varredura única (compilada com njit quando há Numba) pelos índices dos níveis do pico.
+
+    Returns:
+        (i30, i90, i50, iz, i90_last): primeiro índice até o pico com v >= 30% / 90%,
+        primeiro a partir do pico com v <= 50% / v <= 0 e último com v >= 90% (-1 se não há).
+    """
+    m = v.shape[0]
+    peak = v[peak_idx]
+    l30, l50, l90 = 0.3 * peak, 0.5 * peak, 0.9 * peak
+    i30, i90 = -1, -1
+    for i in range(peak_idx + 1):
+        if i30 < 0 and v[i] >= l30:
+            i30 = i
+        if v[i] >= l90:
+            i90 = i
+            break
+    i50, iz, i90_last = -1, -1, i90
+    for i in range(peak_idx, m):
+        vi = v[i]
+        if i50 < 0 and vi <= l50:
+            i50 = i
+        if iz < 0 and vi <= 0.0:
+            iz = i
+        if vi >= l90:
+            i90_last = i
+    return i30, i90, i50, iz, i90_last
+
+
+def _first_index(mask: np.ndarray, offset: int = 0) -> int:
+    """Primeiro índice True de mask (somado a offset) ou -1."""
+    i = int(mask.argmax())
+    return offset + i if mask[i] else -1
+
+
+def _scan_numpy(v: np.ndarray, peak_idx: int) -> tuple:
+    """Mesmos índices de _scan_loop, com comparações só nos trechos necessários."""
+    peak = v[peak_idx]
+    l30, l50, l90 = 0.3 * peak, 0.5 * peak, 0.9 * peak
+    front = v[: peak_idx + 1]
+    tail = v[peak_idx:]
+    i90 = _first_index(front >= l90)
+    i30 = _first_index(front[: i90 + 1] >= l30) if i90 >= 0 else _first_index(front >= l30)
+    i50 = _first_index(tail <= l50, peak_idx)
+    iz = _first_index(tail <= 0.0, peak_idx)
+    i90_last = i90
+    if i90 >= 0:
+        # Último índice >= 90%: primeiro True na cauda invertida
+        i90_last = v.shape[0] - 1 - _first_index(tail[::-1] >= l90)
+    return i30, i90, i50, iz, i90_last
+
+
+_scan_jit = numba.njit(cache=True)(_scan_loop) if NUMBA_AVAILABLE else None
+
+
+def _interp_rising(t: np.ndarray, v: np.ndarray, i: int, level: float) -> float:
+    """Cruzamento de subida em [i-1, i] (v[i] >= level); NaN se a onda já começa acima."""
+    if i < 0 or (i == 0 and v[0] != level):
+        return np.nan
+    if i == 0:
+        return float(t[0])
+    v0, v1 = v[i - 1], v[i]
+    if v1 - v0 > KERNEL_MIN_DV:
+        return float(t[i - 1] + (level - v0) * (t[i] - t[i - 1]) / (v1 - v0))
+    return float(t[i])
+
+
+def _interp_falling(t: np.ndarray, v: np.ndarray, i0: int, i1: int, level: float) -> float:
+    """Cruzamento de descida em [i0, i1] (v[i1] <= level), como a análise de cauda."""
+    v0, v1 = v[i0], v[i1]
+    if abs(v1 - v0) > KERNEL_MIN_DV:
+        return float(t[i0] + (level - v0) * (t[i1] - t[i0]) / (v1 - v0))
+    return float(t[i0] if v0 >= level else t[i1])
+
+
+def waveform_timing(t: np.ndarray, v: np.ndarray, use_jit: bool | None = None) -> dict:
+    """
+    Mede pico e instantes característicos de uma forma de onda de impulso.
+
+    Args:
+        t: Vetor de tempo estritamente crescente (qualquer unidade).
+        v: Tensão nas mesmas amostras.
+        use_jit: None usa Numba se disponível; False força o caminho NumPy.
+
+    Returns:
+        Dicionário com peak_idx, peak, t_peak, t_30, t_90 (frente), t_50 e t_zero
+        (cauda) e t_90_first / t_90_last (intervalo acima de 90%). Instantes sem
+        cruzamento são NaN.
+    """
+    t = np.ascontiguousarray(t, dtype=float)
+    v = np.ascontiguousarray(v, dtype=float)
+    peak_idx = int(np.argmax(v))
+    if use_jit is None:
+        use_jit = NUMBA_AVAILABLE
+    elif use_jit and not NUMBA_AVAILABLE:
+        log.warning("Numba não instalado: usando o kernel NumPy.")
+        use_jit = False
+    scan = _scan_jit if use_jit else _scan_numpy
+    i30, i90, i50, iz, i90_last = (int(i) for i in scan(v, peak_idx))
+
+    peak = float(v[peak_idx])
+    result = dict.fromkeys(TIMING_KEYS, np.nan)
+    result.update(peak_idx=peak_idx, peak=peak, t_peak=float(t[peak_idx]))
+    result["t_30"] = _interp_rising(t, v, i30, 0.3 * peak)
+    result["t_90"] = _interp_rising(t, v, i90, 0.9 * peak)
+    if i50 >= 0:
+        result["t_50"] = _interp_falling(t, v, max(i50 - 1, peak_idx), i50, 0.5 * peak)
+    if iz > 0:
+        v1, v2 = v[iz - 1], v[iz]
+        if v1 > 0.0 and abs(v2 - v1) > KERNEL_MIN_DV:
+            result["t_zero"] = float(t[iz - 1] - v1 * (t[iz] - t[iz - 1]) / (v2 - v1))
+        else:
+            result["t_zero"] = float(t[iz])
+    if i90 >= 0 and i90_last > i90:
+        # Intervalo acima de 90% (Td): cruzamentos interpolados nas duas bordas
+        result["t_90_first"] = _interp_rising(t, v, i90, 0.9 * peak) if i90 > 0 else float(t[0])
+        result["t_90_last"] = (
+            _interp_falling(t, v, i90_last, i90_last + 1, 0.9 * peak)
+            if i90_last < v.shape[0] - 1
+            else float(t[-1])
+        )
+    return result
+
+
+def nearest_index(t: np.ndarray, x: float) -> int:
+    """Índice da amostra mais próxima de x em t crescente (empate: a anterior), como argmin(|t - x|)."""
+    i = int(np.searchsorted(t, x))
+    if i <= 0:
+        return 0
+    if i >= t.shape[0]:
+        return t.shape[0] - 1
+    return i - 1 if x - t[i - 1] <= t[i] - x else i
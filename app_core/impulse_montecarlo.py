@@ -0,0 +1,347 @@
+# app_core/impulse_montecarlo.py
+"""
+Análise de Monte Carlo das tolerâncias do circuito de impulso.
+
+Os componentes do circuito (resistores de frente/cauda, capacitâncias,
+indutância do transformador, parasitas) têm valores incertos. Em vez de um
+único conforme/não conforme, sorteia milhares de conjuntos de parâmetros com
+distribuições definidas pelo usuário, simula todos em lote com o circuito
+exato com L (circuit_load_voltage_batch), aplica a análise normativa (K-factor
+em lote para LI; no SI a varredura de impulse_kernels por onda) e retorna a probabilidade de conformidade de cada
+critério e o ranking de sensibilidade (correlação de Spearman).
+
+Os parâmetros são os totais do circuito, em unidades SI:
+    rf, rt: resistências de frente e cauda totais (Ohm)
+    c_gen: capacitância efetiva do gerador (F)
+    c_load: carga sem parasitas (objeto + divisor + gap) (F)
+    c_stray: capacitância parasita (F)
+    l_gen, l_transformer, l_extra: indutâncias do laço (H)
+    r_parasitic: resistência parasita do laço (Ohm)
+"""
+import logging
+import time
+
+import numpy as np
+from scipy.stats import rankdata
+
+from app_core import calculations, impulse_kernels
+from app_core.impulse_batch import (
+    circuit_double_exp_constants,
+    circuit_load_voltage_batch,
+    double_exp_waveform_times,
+)
+from app_core.impulse_grid import two_step_time_grid
+from utils import constants
+
+log = logging.getLogger(__name__)
+
+MC_PARAMETERS = (
+    "rf",
+    "rt",
+    "c_gen",
+    "c_load",
+    "c_stray",
+    "l_gen",
+    "l_transformer",
+    "l_extra",
+    "r_parasitic",
+)
+MC_DISTRIBUTIONS = ("normal", "uniform", "triangular", "lognormal")
+MC_IMPULSE_TYPES = ("lightning", "switching")
+MC_DEFAULT_SAMPLES = 10_000
+MC_CHUNK_SAMPLES = 2000  # Linhas simuladas/analisadas por vez (limita a memória a ~100 MB)
+MC_POINTS_PER_PEAK = 100
+MC_DENSE_PEAKS = 4.0  # Região densa da grade até 4x o tempo de pico nominal
+MC_TAIL_SPAN = 3.0  # Janela simulada = 3x o tempo de cauda nominal
+MC_PERCENTILES = (5, 50, 95)
+
+
+def nominal_circuit_parameters(
+    n_stages: int,
+    n_parallel: int,
+    rf_per_column: float,
+    rt_per_column: float,
+    impulse_type: str,
+    generator_max_voltage_kv: float,
+    c_dut_pf: float = 0.0,
+    c_stray_pf: float = 0.0,
+    l_extra_h: float = 0.0,
+    l_transformer_h: float = 0.0,
+) -> dict:
+    """Parâmetros nominais (MC_PARAMETERS) a partir das entradas da tela de impulso."""
+    c_gen, l_gen = calculations.calculate_effective_gen_params(n_stages, n_parallel)
+    c_load = calculations.calculate_total_load_capacitance(
+        c_dut_pf, 0.0, impulse_type, generator_max_voltage_kv
+    )
+    return {
+        "rf": rf_per_column * n_stages / n_parallel,
+        "rt": rt_per_column * n_stages / n_parallel,
+        "c_gen": c_gen,
+        "c_load": c_load,
+        "c_stray": float(c_stray_pf or 0.0) * 1e-12,
+        "l_gen": l_gen,
+        "l_transformer": float(l_transformer_h or 0.0),
+        "l_extra": float(l_extra_h or 0.0),
+        "r_parasitic": constants.R_PARASITIC_OHM,
+    }
+
+
+def sample_parameters(
+    nominal: dict, distributions: dict, n_samples: int, rng: np.random.Generator
+) -> dict[str, np.ndarray]:
+    """
+    Sorteia n_samples conjuntos de parâmetros em torno dos valores nominais.
+
+    Args:
+        nominal: Valor nominal de cada nome de MC_PARAMETERS.
+        distributions: {nome: {"dist": tipo, "rel": r}} para os parâmetros incertos;
+            os demais ficam fixos no nominal. Para "normal", r é o desvio padrão
+            relativo; "uniform" e "triangular" variam ±r (moda no nominal);
+            "lognormal" tem mediana no nominal e σ(ln) = r.
+
+    Returns:
+        Dicionário nome → vetor (n_samples,); valores negativos são limitados a zero.
+    """
+    unknown = set(nominal).symmetric_difference(MC_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Parâmetros nominais inválidos ou ausentes: {sorted(unknown)}")
+    samples = {}
+    for name in MC_PARAMETERS:
+        value = float(nominal[name])
+        spec = distributions.get(name)
+        if not spec:
+            samples[name] = np.full(n_samples, value)
+            continue
+        kind = spec.get("dist", "normal")
+        rel = float(spec.get("rel", 0.0))
+        if rel < 0:
+            raise ValueError(f"Tolerância relativa negativa para {name}: {rel}")
+        if kind == "normal":
+            drawn = value * (1.0 + rel * rng.standard_normal(n_samples))
+        elif kind == "uniform":
+            drawn = value * rng.uniform(1.0 - rel, 1.0 + rel, n_samples)
+        elif kind == "triangular":
+            drawn = value * rng.triangular(1.0 - rel, 1.0, 1.0 + rel, n_samples)
+        elif kind == "lognormal":
+            drawn = value * rng.lognormal(0.0, rel, n_samples)
+        else:
+            raise ValueError(f"Distribuição inválida para {name}: {kind} (use {MC_DISTRIBUTIONS})")
+        samples[name] = np.maximum(drawn, 0.0)
+    return samples
+
+
+def _lightning_metrics(t_us: np.ndarray, v: np.ndarray) -> dict:
+    """T1, T2, overshoot e eficiência (pico de Vt) de cada linha (analyze_lightning_impulse_batch)."""
+    result = calculations.analyze_lightning_impulse_batch(t_us, v)
+    return {
+        "t_front_us": result["t_front_us"],
+        "t_tail_us": result["t_tail_us"],
+        "overshoot_percent": result["overshoot_percent"],
+        "efficiency": result["peak_value_test"],
+    }
+
+
+def _switching_metrics(t_us: np.ndarray, v: np.ndarray) -> dict:
+    """
+    Tp (fórmula K), T2 e Td de cada linha, com as definições de analyze_switching_impulse.
+
+    A análise SI é uma única varredura por onda (impulse_kernels.waveform_timing);
+    o laço sobre as linhas é mais rápido que máscaras (n, m) sobre a matriz inteira.
+    """
+    n = v.shape[0]
+    t_p, t_2, t_d, peak = (np.full(n, np.nan) for _ in range(4))
+    t_origin = t_us[0]
+    for i, row in enumerate(v):
+        if not np.all(np.isfinite(row)) or np.std(row) < 1e-9:
+            continue  # Linha inválida, como na análise escalar
+        timing = impulse_kernels.waveform_timing(t_us, row)
+        peak[i] = timing["peak"]
+        t_2[i] = timing["t_50"] - t_origin
+        t_d[i] = timing["t_90_last"] - timing["t_90_first"]
+        t_ab = timing["t_90"] - timing["t_30"]
+        if t_ab > 0 and np.isfinite(t_2[i]):
+            t_p[i] = (2.42 - 3.08e-3 * t_ab + 1.51e-6 * t_2[i] ** 2) * t_ab  # Fórmula K aproximada
+        else:
+            t_p[i] = timing["t_peak"] - t_origin
+    return {"t_p_us": t_p, "t_2_us": t_2, "t_d_us": t_d, "efficiency": peak}
+
+
+def _within(values: np.ndarray, nominal: float, tolerance: float) -> np.ndarray:
+    return (values >= nominal * (1 - tolerance)) & (values <= nominal * (1 + tolerance))
+
+
+def compliance_criteria(impulse_type: str, metrics: dict) -> dict[str, np.ndarray]:
+    """Conformidade (bool por amostra) de cada critério normativo; NaN conta como não conforme."""
+    if impulse_type == "switching":
+        return {
+            "t_p": _within(
+                metrics["t_p_us"],
+                constants.SWITCHING_IMPULSE_PEAK_TIME_NOM,
+                constants.SWITCHING_PEAK_TIME_TOLERANCE,
+            ),
+            "t_2": _within(
+                metrics["t_2_us"],
+                constants.SWITCHING_IMPULSE_TAIL_TIME_NOM,
+                constants.SWITCHING_TAIL_TOLERANCE,
+            ),
+            "t_d": metrics["t_d_us"] >= constants.SWITCHING_TIME_ABOVE_90_MIN,
+        }
+    return {
+        "t_front": _within(
+            metrics["t_front_us"],
+            constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM,
+            constants.LIGHTNING_FRONT_TOLERANCE,
+        ),
+        "t_tail": _within(
+            metrics["t_tail_us"],
+            constants.LIGHTNING_IMPULSE_TAIL_TIME_NOM,
+            constants.LIGHTNING_TAIL_TOLERANCE,
+        ),
+        "overshoot": metrics["overshoot_percent"] <= constants.LIGHTNING_OVERSHOOT_MAX * 100.0,
+    }
+
+
+def spearman_sensitivity(samples: dict[str, np.ndarray], metrics: dict[str, np.ndarray]) -> dict:
+    """
+    Correlação de Spearman entre cada parâmetro variado e cada métrica.
+
+    Amostras com métrica NaN são ignoradas naquela métrica.
+
+    Returns:
+        {métrica: [(parâmetro, rho), ...] ordenado por |rho| decrescente}.
+    """
+    varied = [name for name, x in samples.items() if np.ptp(x) > 0]
+    result = {}
+    for metric, y in metrics.items():
+        ok = np.isfinite(y)
+        if np.count_nonzero(ok) < 3 or not varied:
+            result[metric] = []
+            continue
+        ranks = rankdata(np.vstack([samples[name][ok] for name in varied] + [y[ok]]), axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rho = np.corrcoef(ranks)[-1, :-1]
+        pairs = [(name, float(r)) for name, r in zip(varied, np.nan_to_num(rho))]
+        result[metric] = sorted(pairs, key=lambda p: -abs(p[1]))
+    return result
+
+
+def run_monte_carlo(
+    nominal: dict,
+    distributions: dict,
+    impulse_type: str = "lightning",
+    n_samples: int = MC_DEFAULT_SAMPLES,
+    seed: int | None = None,
+    return_samples: bool = False,
+) -> dict:
+    """
+    Probabilidade de conformidade do impulso sob as tolerâncias dos componentes.
+
+    Args:
+        nominal: Parâmetros nominais (ver MC_PARAMETERS e nominal_circuit_parameters).
+        distributions: Distribuição de cada parâmetro incerto (ver sample_parameters).
+        impulse_type: "lightning" (T1, T2, overshoot) ou "switching" (Tp, T2, Td).
+        n_samples: Número de conjuntos sorteados.
+        seed: Semente do gerador aleatório (reprodutibilidade).
+        return_samples: Inclui os vetores sorteados e as métricas por amostra.
+
+    Returns:
+        Dicionário com p_pass (todos os critérios) e seu erro padrão, criteria
+        (probabilidade de cada critério), stats (média, desvio e percentis de cada
+        métrica), sensitivity (Spearman por métrica), ranking (parâmetros por maior
+        |rho| entre as métricas), n_samples, n_valid e elapsed_s.
+    """
+    if impulse_type not in MC_IMPULSE_TYPES:
+        raise ValueError(f"Tipo de impulso inválido para Monte Carlo: {impulse_type}")
+    if n_samples < 2:
+        raise ValueError(f"Número de amostras inválido: {n_samples}")
+
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    samples = sample_parameters(nominal, distributions, n_samples, rng)
+
+    # Grade comum: tempos nominais da dupla exponencial (sem L) definem densidade e janela
+    alpha, beta = circuit_double_exp_constants(
+        nominal["rf"] + nominal["r_parasitic"],
+        nominal["rt"],
+        nominal["c_gen"],
+        nominal["c_load"] + nominal["c_stray"],
+    )
+    nominal_times = double_exp_waveform_times(alpha, beta)
+    tail_key = "t_2_us" if impulse_type == "switching" else "t_tail_us"
+    t_peak_s = float(nominal_times["t_peak_us"]) * 1e-6
+    sim_time_s = MC_TAIL_SPAN * float(nominal_times[tail_key]) * 1e-6
+    if not (np.isfinite(t_peak_s) and np.isfinite(sim_time_s) and t_peak_s > 0):
+        raise ValueError("Circuito nominal sem forma de onda de impulso válida.")
+    t_sec = two_step_time_grid(sim_time_s, t_peak_s, MC_POINTS_PER_PEAK, MC_DENSE_PEAKS)
+    t_us = t_sec * 1e6
+    log.info(
+        f"Monte Carlo de impulso ({impulse_type}): {n_samples} amostras, {len(t_sec)} pontos, "
+        f"{len(distributions)} parâmetro(s) incerto(s)"
+    )
+
+    analyze = _switching_metrics if impulse_type == "switching" else _lightning_metrics
+    chunks = []
+    for lo in range(0, n_samples, MC_CHUNK_SAMPLES):
+        part = {name: x[lo : lo + MC_CHUNK_SAMPLES] for name, x in samples.items()}
+        v = circuit_load_voltage_batch(
+            t_sec,
+            1.0,
+            part["rf"],
+            part["rt"],
+            part["l_gen"] + part["l_transformer"] + part["l_extra"],
+            part["c_gen"],
+            part["c_load"] + part["c_stray"],
+            part["r_parasitic"],
+        )
+        chunks.append(analyze(t_us, v))
+    metrics = {key: np.concatenate([c[key] for c in chunks]) for key in chunks[0]}
+
+    criteria = compliance_criteria(impulse_type, metrics)
+    passed = np.logical_and.reduce(list(criteria.values()))
+    valid = np.logical_and.reduce([np.isfinite(x) for x in metrics.values()])
+    p_pass = float(np.mean(passed))
+
+    stats = {}
+    for key, values in metrics.items():
+        finite = values[np.isfinite(values)]
+        if finite.size == 0:
+            stats[key] = None
+            continue
+        p05, p50, p95 = np.percentile(finite, MC_PERCENTILES)
+        stats[key] = {
+            "mean": float(finite.mean()),
+            "std": float(finite.std()),
+            "p05": float(p05),
+            "p50": float(p50),
+            "p95": float(p95),
+        }
+
+    sensitivity = spearman_sensitivity(samples, metrics)
+    strength: dict[str, float] = {}
+    for pairs in sensitivity.values():
+        for name, rho in pairs:
+            strength[name] = max(strength.get(name, 0.0), abs(rho))
+    ranking = sorted(strength.items(), key=lambda p: -p[1])
+
+    elapsed = time.perf_counter() - start
+    log.info(
+        f"Monte Carlo concluído: P(conforme)={p_pass:.1%} ({np.count_nonzero(valid)}/{n_samples} "
+        f"amostras válidas) em {elapsed:.2f} s"
+    )
+    result = {
+        "impulse_type": impulse_type,
+        "n_samples": n_samples,
+        "n_valid": int(np.count_nonzero(valid)),
+        "p_pass": p_pass,
+        "p_pass_stderr": float(np.sqrt(p_pass * (1.0 - p_pass) / n_samples)),
+        "criteria": {name: float(np.mean(ok)) for name, ok in criteria.items()},
+        "stats": stats,
+        "sensitivity": sensitivity,
+        "ranking": ranking,
+        "elapsed_s": elapsed,
+    }
+    if return_samples:
+        result["samples"] = samples
+        result["metrics"] = metrics
+        result["passed"] = passed
+    return result
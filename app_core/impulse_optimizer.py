@@ -0,0 +1,331 @@
+# app_core/impulse_optimizer.py
+"""
+Dimensionamento contínuo de Rf/Rt para a forma de onda nominal, com ajuste ao inventário.
+
+Em vez de percorrer as expressões de resistores à mão, optimize_resistors:
+
+1. Resolve alpha/beta da dupla exponencial com T1 = 1.2 µs e T2 = 50 µs (LI/LIC)
+   ou Tp/T2 (SI). O alvo vira o intervalo 30-90% (t_ab) e T2, cuja razão
+   depende só de beta/alpha: uma tabela (em cache) dessa razão dá beta/alpha
+   por interpolação, e alpha sai da escala (os tempos são proporcionais a 1/alpha).
+2. Inverte analiticamente as raízes do circuito (circuit_double_exp_constants)
+   para obter Rf_total/Rt_total contínuos: com x = 1/Rf,
+   (1/Cg + 1/Cl)·x² - (alpha + beta)·x + alpha·beta·Cl = 0 (raiz maior, Rf < Rt).
+3. Refina Rf/Rt com poucas simulações do circuito completo com L
+   (circuit_load_voltage_batch): passos de Newton em log(Rf), log(Rt), com o
+   jacobiano simulado no mesmo lote do ponto atual.
+4. Converte para valores por coluna e ajusta às combinações série/paralelo do
+   inventário: os valores realizáveis ficam ordenados em cache por tipo de
+   impulso e os vizinhos saem de np.searchsorted; os pares vizinhos são
+   simulados em um único lote e o de maior margem (time_margins) é escolhido.
+"""
+import logging
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from app_core import calculations
+from app_core.impulse_batch import circuit_load_voltage_batch, double_exp_waveform_times, front_tail_times_batch
+from app_core.impulse_grid import two_step_time_grid
+from app_core.impulse_search import resistor_combinations, resistor_inventory, time_margins
+from utils import constants
+
+log = logging.getLogger(__name__)
+
+OPTIMIZER_RATIO_GRID = np.geomspace(1.05, 1e4, 2000)  # beta/alpha tabelados para a inversão dos tempos
+OPTIMIZER_REFINE_ITERATIONS = 6  # Máximo de simulações (em lote de 3) do refinamento com L
+OPTIMIZER_TIME_RTOL = 2e-3  # Tolerância relativa dos tempos no refinamento
+OPTIMIZER_JACOBIAN_STEP = 0.01  # Perturbação relativa de Rf/Rt no jacobiano
+OPTIMIZER_MAX_LOG_STEP = 0.7  # Passo máximo do Newton (fator ~2 em Rf/Rt)
+OPTIMIZER_SNAP_NEIGHBORS = 2  # Valores do inventário avaliados de cada lado do contínuo
+OPTIMIZER_POINTS_PER_PEAK = 200  # Resolução da grade das simulações de refinamento
+OPTIMIZER_SIM_TAILS = 3.0  # Tempo simulado = OPTIMIZER_SIM_TAILS · T2 nominal
+
+
+def target_times(impulse_type: str) -> tuple[float, float]:
+    """Tempos nominais (µs): (T1, T2) para LI/LIC ou (Tp, T2) para SI."""
+    if impulse_type == "switching":
+        return constants.SWITCHING_IMPULSE_PEAK_TIME_NOM, constants.SWITCHING_IMPULSE_TAIL_TIME_NOM
+    return constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM, constants.LIGHTNING_IMPULSE_TAIL_TIME_NOM
+
+
+@lru_cache(maxsize=2)
+def _ratio_table(switching: bool) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tempos da dupla exponencial com alpha = 1 1/s para OPTIMIZER_RATIO_GRID (somente leitura).
+
+    Usa grandezas proporcionais a 1/alpha: o intervalo 30-90% (t_ab) e T2 (pela
+    origem virtual para LI, a partir de t=0 para SI). Tp não serve diretamente,
+    pois a fórmula K não é invariante à escala.
+
+    Returns:
+        (beta/alpha, t_ab (µs), t2 (µs)), com t_ab/t2 crescente.
+    """
+    ratio = OPTIMIZER_RATIO_GRID
+    times = double_exp_waveform_times(1.0, ratio)
+    t_ab = times["t_90_us"] - times["t_30_us"]
+    t2 = times["t_2_us"] if switching else times["t_tail_us"]
+    ok = np.isfinite(t_ab) & np.isfinite(t2)
+    ratio, t_ab, t2 = ratio[ok], t_ab[ok], t2[ok]
+    # t_ab/t2 decresce com beta/alpha; invertido para np.interp
+    order = np.argsort(t_ab / t2)
+    table = (ratio[order], t_ab[order], t2[order])
+    for arr in table:
+        arr.flags.writeable = False
+    return table
+
+
+def front_interval_for_time(impulse_type: str, t1_us: float, t2_us: float) -> float:
+    """
+    Intervalo 30-90% (µs) que produz T1 (LI/LIC) ou Tp (SI, com T2 dado).
+
+    Para SI inverte Tp = (2.42 - 3.08e-3·t_ab + 1.51e-6·T2²)·t_ab (raiz menor).
+    """
+    if impulse_type != "switching":
+        return t1_us / 1.67
+    b = 2.42 + 1.51e-6 * t2_us**2
+    disc = b * b - 4.0 * 3.08e-3 * t1_us
+    if disc < 0:
+        raise ValueError(f"Tp={t1_us:g} µs inalcançável com T2={t2_us:g} µs.")
+    return (b - np.sqrt(disc)) / (2.0 * 3.08e-3)
+
+
+def double_exp_params_for_times(impulse_type: str, t1_us: float, t2_us: float) -> tuple[float, float]:
+    """
+    Alpha e beta (1/s) da dupla exponencial com os tempos normativos pedidos.
+
+    Raises:
+        ValueError: Se a razão dos tempos estiver fora da faixa tabelada.
+    """
+    ratio, t_ab_unit, t2_unit = _ratio_table(impulse_type == "switching")
+    target = front_interval_for_time(impulse_type, t1_us, t2_us) / t2_us
+    shape = t_ab_unit / t2_unit
+    if not shape[0] <= target <= shape[-1]:
+        raise ValueError(f"Razão de tempos {t1_us:g}/{t2_us:g} µs fora da faixa da dupla exponencial.")
+    beta_over_alpha = float(np.exp(np.interp(target, shape, np.log(ratio))))
+    alpha = float(np.interp(target, shape, t2_unit)) / t2_us
+    return alpha, beta_over_alpha * alpha
+
+
+def resistors_for_double_exp(alpha: float, beta: float, c_gen: float, c_load: float) -> tuple[float, float]:
+    """
+    Rf_total e Rt_total (Ohm) cujas raízes do circuito sem L são -alpha e -beta.
+
+    Raises:
+        ValueError: Se nenhum par real de resistores produz essas constantes
+            (carga grande demais para o gerador).
+    """
+    k = 1.0 / c_gen + 1.0 / c_load
+    s, p = alpha + beta, alpha * beta
+    disc = s * s - 4.0 * k * p * c_load
+    if disc < 0:
+        raise ValueError(
+            f"Constantes alpha={alpha:.3g}, beta={beta:.3g} inalcançáveis com Cg={c_gen * 1e9:.1f} nF "
+            f"e Cl={c_load * 1e9:.2f} nF."
+        )
+    x = (s + np.sqrt(disc)) / (2.0 * k)  # 1/Rf
+    y = p * c_gen * c_load / x  # 1/Rt
+    return 1.0 / x, 1.0 / y
+
+
+@lru_cache(maxsize=4)
+def _combination_index(impulse_type: str) -> tuple[np.ndarray, tuple[str, ...], np.ndarray, tuple[str, ...]]:
+    """Combinações do inventário por coluna, ordenadas: (Rf, expressões, Rt, expressões)."""
+    front, tail, _ = resistor_inventory(impulse_type)
+    rf_values, rf_exprs = resistor_combinations(front)
+    rt_values, rt_exprs = resistor_combinations(tail)
+    rf_values.flags.writeable = False
+    rt_values.flags.writeable = False
+    return rf_values, tuple(rf_exprs), rt_values, tuple(rt_exprs)
+
+
+def _neighbours(values: np.ndarray, target: float) -> np.ndarray:
+    """Índices dos OPTIMIZER_SNAP_NEIGHBORS valores de cada lado de target."""
+    idx = int(np.searchsorted(values, target))
+    lo = max(idx - OPTIMIZER_SNAP_NEIGHBORS, 0)
+    hi = min(idx + OPTIMIZER_SNAP_NEIGHBORS, values.size)
+    return np.arange(lo, hi)
+
+
+def _simulated_times(
+    impulse_type: str, t_sec: np.ndarray, rf, rt, l_total: float, c_gen: float, c_load: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """(T1, T2) ou (Tp, T2) medidos na simulação com L de cada par (rf, rt)."""
+    v = circuit_load_voltage_batch(t_sec, 1.0, rf, rt, l_total, c_gen, c_load)
+    timing = front_tail_times_batch(t_sec * 1e6, v)
+    if impulse_type == "switching":
+        t_ab = timing["t_90_us"] - timing["t_30_us"]
+        t50 = timing["t_50_us"]
+        return (2.42 - 3.08e-3 * t_ab + 1.51e-6 * t50**2) * t_ab, t50
+    return timing["t_front_us"], timing["t_tail_us"]
+
+
+def _refine_with_inductance(
+    impulse_type: str,
+    t_sec: np.ndarray,
+    rf: float,
+    rt: float,
+    l_total: float,
+    c_gen: float,
+    c_load: float,
+    t1_target: float,
+    t2_target: float,
+) -> tuple[float, float, float, float, int, bool]:
+    """
+    Ajusta Rf/Rt para os tempos alvo na simulação com L (Newton em log(Rf), log(Rt)).
+
+    Cada iteração simula em um só lote o ponto atual e as duas perturbações do
+    jacobiano. Passos ficam limitados a OPTIMIZER_MAX_LOG_STEP; se o ponto novo
+    não tiver tempos mensuráveis (p.ex. frente limitada pela indutância, onda
+    oscilatória) a iteração termina; vale o ponto de menor desvio dos tempos.
+
+    Returns:
+        (rf, rt, t1, t2, simulações, convergiu)
+    """
+    target = np.log([t1_target, t2_target])
+    h = OPTIMIZER_JACOBIAN_STEP
+    best = None
+    for iteration in range(1, OPTIMIZER_REFINE_ITERATIONS + 1):
+        rf_rows = rf * np.array([1.0, np.exp(h), 1.0])
+        rt_rows = rt * np.array([1.0, 1.0, np.exp(h)])
+        t1, t2 = _simulated_times(impulse_type, t_sec, rf_rows, rt_rows, l_total, c_gen, c_load)
+        valid = np.isfinite(t1) & np.isfinite(t2) & (t1 > 0) & (t2 > 2.0 * t1)
+        if not valid[0]:
+            log.warning(f"Otimizador de resistores: tempos não mensuráveis com Rf={rf:.3g} Ω, Rt={rt:.3g} Ω")
+            break
+        residual = np.log([t1[0], t2[0]]) - target
+        error = float(np.max(np.abs(residual)))
+        if best is None or error < best[4]:
+            best = (rf, rt, float(t1[0]), float(t2[0]), error)
+        if error < OPTIMIZER_TIME_RTOL or not valid.all():
+            break
+        jacobian = (np.log(np.vstack((t1[1:], t2[1:]))) - np.log([[t1[0]], [t2[0]]])) / h
+        try:
+            step = np.linalg.solve(jacobian, -residual)
+        except np.linalg.LinAlgError:
+            break
+        step = np.clip(step, -OPTIMIZER_MAX_LOG_STEP, OPTIMIZER_MAX_LOG_STEP)
+        rf, rt = rf * np.exp(step[0]), rt * np.exp(step[1])
+    if best is None:
+        return rf, rt, np.nan, np.nan, iteration, False
+    rf, rt, t1_best, t2_best, error = best
+    return rf, rt, t1_best, t2_best, iteration, error < OPTIMIZER_TIME_RTOL
+
+
+def optimize_resistors(
+    generator_config: str,
+    impulse_type: str,
+    c_dut_pf: float,
+    c_stray_pf: float = 0.0,
+    l_extra_h: float = 0.0,
+    l_transformer_h: float = 0.0,
+    inductor_h: float = 0.0,
+) -> dict:
+    """
+    Rf/Rt contínuos para os tempos nominais e a combinação de inventário mais próxima.
+
+    Args:
+        generator_config: Valor da configuração do gerador (ex: "6S-1P").
+        impulse_type: "lightning", "chopped" ou "switching".
+        c_dut_pf: Capacitância do objeto sob ensaio (pF).
+        c_stray_pf: Capacitância parasita (pF).
+        l_extra_h: Indutância externa/conexões (H).
+        l_transformer_h: Indutância do transformador em série (H).
+        inductor_h: Indutor adicional selecionado (H).
+
+    Returns:
+        Dicionário com:
+        - "generator_config", "stages", "parallel", "c_gen_f", "c_load_f", "l_total_h";
+        - "target_t1_us", "target_t2_us", "alpha", "beta" (dupla exponencial alvo);
+        - "rf_total_analytic", "rt_total_analytic": inversão sem L;
+        - "rf_total_continuous", "rt_total_continuous", "t1_us_continuous",
+          "t2_us_continuous", "iterations", "converged": após o refinamento com L
+          (converged=False quando os tempos nominais não são alcançáveis, p.ex.
+          frente limitada pela indutância);
+        - "front_resistor_expression", "tail_resistor_expression", "rf_per_column",
+          "rt_per_column", "rf_total_ohm", "rt_total_ohm", "t1_us", "t2_us", "margin",
+          "compliant": combinação do inventário escolhida;
+        - "n_candidates", "elapsed_s".
+
+    Raises:
+        ValueError: Tipo de impulso ou configuração inválidos, ou tempos inalcançáveis.
+    """
+    if impulse_type not in ("lightning", "chopped", "switching"):
+        raise ValueError(f"Tipo de impulso inválido: {impulse_type}")
+    gen_config = next((c for c in constants.GENERATOR_CONFIGURATIONS if c["value"] == generator_config), None)
+    if gen_config is None:
+        raise ValueError(f"Configuração do gerador desconhecida: {generator_config}")
+
+    start = time.perf_counter()
+    stages, parallel = int(gen_config["stages"]), int(gen_config["parallel"])
+    c_gen, l_gen = calculations.calculate_effective_gen_params(stages, parallel)
+    c_load = calculations.calculate_total_load_capacitance(
+        c_dut_pf, c_stray_pf, impulse_type, float(gen_config["max_voltage_kv"])
+    )
+    l_total = l_gen + float(l_extra_h or 0.0) + float(l_transformer_h or 0.0) + float(inductor_h or 0.0)
+
+    t1_target, t2_target = target_times(impulse_type)
+    alpha, beta = double_exp_params_for_times(impulse_type, t1_target, t2_target)
+    rf_analytic, rt_analytic = resistors_for_double_exp(alpha, beta, c_gen, c_load)
+
+    t_peak_s = np.log(beta / alpha) / (beta - alpha)
+    t_sec = two_step_time_grid(
+        OPTIMIZER_SIM_TAILS * t2_target * 1e-6, t_peak_s, points_per_peak=OPTIMIZER_POINTS_PER_PEAK
+    )
+
+    rf, rt, t1, t2, iterations, converged = _refine_with_inductance(
+        impulse_type, t_sec, rf_analytic, rt_analytic, l_total, c_gen, c_load, t1_target, t2_target
+    )
+
+    # Ajuste ao inventário: vizinhos por coluna simulados em um único lote
+    rf_values, rf_exprs, rt_values, rt_exprs = _combination_index(impulse_type)
+    to_column = parallel / stages
+    i_idx = _neighbours(rf_values, rf * to_column)
+    j_idx = _neighbours(rt_values, rt * to_column)
+    ii, jj = (g.ravel() for g in np.meshgrid(i_idx, j_idx, indexing="ij"))
+    rf_total = rf_values[ii] / to_column
+    rt_total = rt_values[jj] / to_column
+    t1_c, t2_c = _simulated_times(impulse_type, t_sec, rf_total, rt_total, l_total, c_gen, c_load)
+    margin = time_margins(impulse_type, t1_c, t2_c)
+    distance = np.abs(np.log(rf_total / rf)) + np.abs(np.log(rt_total / rt))
+    best = int(np.lexsort((distance, -margin))[0])
+
+    elapsed = time.perf_counter() - start
+    log.info(
+        f"Otimizador de resistores {generator_config}/{impulse_type}: contínuo Rf={rf:.1f} Ω, Rt={rt:.1f} Ω "
+        f"({iterations} simulações); inventário Rf={rf_exprs[ii[best]]}, Rt={rt_exprs[jj[best]]} "
+        f"(margem {margin[best]:.2f}) em {elapsed * 1000:.0f} ms"
+    )
+    return {
+        "generator_config": generator_config,
+        "stages": stages,
+        "parallel": parallel,
+        "c_gen_f": c_gen,
+        "c_load_f": c_load,
+        "l_total_h": l_total,
+        "target_t1_us": t1_target,
+        "target_t2_us": t2_target,
+        "alpha": alpha,
+        "beta": beta,
+        "rf_total_analytic": rf_analytic,
+        "rt_total_analytic": rt_analytic,
+        "rf_total_continuous": rf,
+        "rt_total_continuous": rt,
+        "t1_us_continuous": t1,
+        "t2_us_continuous": t2,
+        "iterations": iterations,
+        "converged": converged,
+        "front_resistor_expression": rf_exprs[ii[best]],
+        "tail_resistor_expression": rt_exprs[jj[best]],
+        "rf_per_column": float(rf_values[ii[best]]),
+        "rt_per_column": float(rt_values[jj[best]]),
+        "rf_total_ohm": float(rf_total[best]),
+        "rt_total_ohm": float(rt_total[best]),
+        "t1_us": float(t1_c[best]),
+        "t2_us": float(t2_c[best]),
+        "margin": float(margin[best]),
+        "compliant": bool(margin[best] >= 0),
+        "n_candidates": int(ii.size),
+        "elapsed_s": elapsed,
+    }
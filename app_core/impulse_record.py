@@ -0,0 +1,390 @@
+# app_core/impulse_record.py
+"""
+Importação e análise de registros medidos de digitalizadores de impulso.
+
+Formatos aceitos: CSV/TXT (coluna de tempo opcional), .npy e binário bruto
+(inteiros ou floats sem cabeçalho, ou com cabeçalho fixo a pular). Arquivos
+binários são mapeados em memória (np.memmap) e CSVs lidos em blocos com pandas;
+nenhum dos caminhos passa as amostras por listas Python.
+
+A detecção de disparos percorre o registro em blocos: o desvio em relação à
+linha de base acima de RECORD_TRIGGER_FRACTION do máximo marca trechos ativos,
+trechos próximos são unidos em um disparo e cada disparo recebe sua própria
+correção de linha de base (pré-disparo) e polaridade. Somente a janela de cada
+disparo é copiada para a memória e analisada (K-factor) pelas funções
+analyze_*_impulse, em série por padrão; o pool de processos só compensa em
+registros com muitos disparos e a pedido (max_workers > 1).
+"""
+import logging
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app_core import calculations
+from app_core.impulse_batch import VALID_IMPULSE_TYPES
+
+log = logging.getLogger(__name__)
+
+RECORD_CSV_SUFFIXES = (".csv", ".txt")
+RECORD_CSV_CHUNK_ROWS = 1 << 18
+RECORD_CSV_MAX_HEADER_LINES = 100
+RECORD_RAW_DTYPE = "<i2"  # Digitalizadores gravam tipicamente inteiros de 16 bits
+RECORD_CHUNK_SAMPLES = 1 << 20  # Bloco da varredura de disparos
+
+RECORD_TRIGGER_FRACTION = 0.1  # Limiar de atividade (fração do desvio máximo do registro)
+RECORD_SHOT_MIN_GAP_S = 1e-3  # Trechos ativos mais próximos que isso pertencem ao mesmo disparo
+RECORD_MIN_SHOT_SAMPLES = 8  # Trechos menores são tratados como ruído
+RECORD_PRETRIGGER_FRACTION = 0.05  # Pré-disparo (fração da duração ativa) antes da linha de base
+RECORD_POSTTRIGGER_FRACTION = 0.2  # Margem após o fim do trecho ativo
+RECORD_BASELINE_SAMPLES = 1000
+RECORD_MIN_BASELINE_SAMPLES = 16
+RECORD_ORIGIN_FRACTION = 0.02  # Origem real: última amostra abaixo de 2% do pico antes do disparo
+RECORD_MAX_ANALYSIS_SAMPLES = 200_000  # Janelas maiores são reduzidas por média em blocos
+RECORD_FULL_SHOT_LEVEL = 0.9  # Disparos abaixo de 90% do maior pico são reduzidos
+RECORD_CHOP_WINDOW_S = 0.2e-6  # Colapso do corte: queda de mais de 50% do pico em até 0.2 µs
+RECORD_CHOP_DROP_FRACTION = 0.5
+RECORD_POOL_MIN_SAMPLES = 2_000_000  # Pool só com max_workers > 1 e pelo menos isso nas janelas somadas
+
+
+def _sniff_csv(path: Path) -> tuple[int, str, str, int]:
+    """
+    Identifica o formato do CSV pela primeira linha numérica.
+
+    Returns:
+        (linhas a pular, separador, separador decimal, número de colunas)
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for skip, line in enumerate(f):
+            if skip >= RECORD_CSV_MAX_HEADER_LINES:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            if ";" in line:
+                sep = ";"
+            elif "\t" in line:
+                sep = "\t"
+            elif "," in line:
+                sep = ","
+            else:
+                sep = r"\s+"
+            decimal = "," if sep != "," and "," in line else "."
+            fields = [f for f in re.split(sep, line) if f.strip()]
+            try:
+                for field in fields:
+                    float(field.replace(decimal, "."))
+            except ValueError:
+                continue  # Linha de cabeçalho
+            return skip, sep, decimal, len(fields)
+    raise ValueError(f"Nenhuma linha numérica nas primeiras {RECORD_CSV_MAX_HEADER_LINES} linhas de {path}")
+
+
+def _read_csv_record(
+    path: Path, voltage_column: int | None, time_column: int | None
+) -> tuple[np.ndarray, float | None, float]:
+    """
+    Lê a coluna de tensão de um CSV em blocos (float32).
+
+    Sem colunas indicadas: uma coluna = tensão; duas ou mais = tempo (0) e tensão (1).
+    Da coluna de tempo só se guardam o primeiro e o último valor (passo uniforme).
+
+    Returns:
+        (amostras, passo em s ou None, tempo inicial em s)
+    """
+    skip, sep, decimal, n_cols = _sniff_csv(path)
+    if voltage_column is None:
+        voltage_column = 1 if n_cols >= 2 else 0
+        if time_column is None and n_cols >= 2:
+            time_column = 0
+    columns = [c for c in (time_column, voltage_column) if c is not None]
+
+    chunks = []
+    t_first = t_last = None
+    reader = pd.read_csv(
+        path,
+        sep=sep,
+        decimal=decimal,
+        header=None,
+        skiprows=skip,
+        usecols=columns,
+        dtype=np.float64,
+        chunksize=RECORD_CSV_CHUNK_ROWS,
+    )
+    for chunk in reader:
+        chunks.append(chunk[voltage_column].to_numpy(dtype=np.float32))
+        if time_column is not None and len(chunk):
+            if t_first is None:
+                t_first = float(chunk[time_column].iloc[0])
+            t_last = float(chunk[time_column].iloc[-1])
+    samples = np.concatenate(chunks) if chunks else np.array([], dtype=np.float32)
+
+    dt_s = None
+    if t_first is not None and len(samples) > 1:
+        dt_s = (t_last - t_first) / (len(samples) - 1)
+    return samples, dt_s, t_first or 0.0
+
+
+def open_record(
+    path: str | Path,
+    sample_rate_hz: float | None = None,
+    kv_per_unit: float = 1.0,
+    raw_dtype: str = RECORD_RAW_DTYPE,
+    header_bytes: int = 0,
+    voltage_column: int | None = None,
+    time_column: int | None = None,
+) -> dict:
+    """
+    Abre um registro de digitalizador sem carregar binários na memória.
+
+    Args:
+        path: Arquivo .csv/.txt, .npy ou binário bruto (qualquer outra extensão).
+        sample_rate_hz: Taxa de amostragem; obrigatória sem coluna de tempo (sobrepõe a do CSV).
+        kv_per_unit: Fator de escala das amostras para kV (relação do divisor × V/LSB / 1000).
+        raw_dtype: Tipo das amostras do binário bruto (ex.: "<i2", "<f4").
+        header_bytes: Bytes de cabeçalho a pular no binário bruto.
+        voltage_column, time_column: Colunas do CSV (índices a partir de 0).
+
+    Returns:
+        Dicionário com "path", "samples" (memmap ou ndarray 1-D em unidades do arquivo),
+        "dt_s", "t0_s", "kv_per_unit" e "n_samples".
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    dt_s, t0_s = None, 0.0
+    if suffix in RECORD_CSV_SUFFIXES:
+        samples, dt_s, t0_s = _read_csv_record(path, voltage_column, time_column)
+    elif suffix == ".npy":
+        samples = np.load(path, mmap_mode="r")
+    else:
+        samples = np.memmap(path, dtype=np.dtype(raw_dtype), mode="r", offset=header_bytes)
+
+    if samples.ndim != 1:
+        raise ValueError(f"Registro deve ser unidimensional; {path.name} tem forma {samples.shape}")
+    if sample_rate_hz:
+        dt_s = 1.0 / sample_rate_hz
+    if not dt_s or dt_s <= 0:
+        raise ValueError(f"Taxa de amostragem não informada para {path.name}")
+
+    log.info(f"Registro aberto: {path.name}, {len(samples)} amostras, dt={dt_s:.3e} s")
+    return {
+        "path": str(path),
+        "samples": samples,
+        "dt_s": float(dt_s),
+        "t0_s": float(t0_s),
+        "kv_per_unit": float(kv_per_unit),
+        "n_samples": len(samples),
+    }
+
+
+def _active_segments(samples: np.ndarray, baseline: float, threshold: float) -> list[list[int]]:
+    """Trechos [início, fim) com |amostra - linha de base| > threshold, varrendo em blocos."""
+    n = len(samples)
+    edges = []
+    previous = False
+    for i in range(0, n, RECORD_CHUNK_SAMPLES):
+        active = np.abs(samples[i : i + RECORD_CHUNK_SAMPLES] - baseline) > threshold
+        changes = np.flatnonzero(np.diff(active.astype(np.int8), prepend=np.int8(previous)))
+        edges.extend((i + changes).tolist())
+        previous = bool(active[-1])
+    if previous:
+        edges.append(n)
+    return [list(pair) for pair in zip(edges[0::2], edges[1::2])]
+
+
+def find_shots(record: dict) -> list[dict]:
+    """
+    Localiza os disparos do registro e calcula linha de base e polaridade de cada um.
+
+    Returns:
+        Lista de disparos com índices "trigger"/"active_end" (trecho ativo),
+        "window_start"/"window_end" (pré-disparo e margem), "baseline" (unidades
+        do arquivo), "polarity" (+1/-1, sinal do disparo nas unidades do arquivo) e "peak_kv".
+    """
+    samples = record["samples"]
+    n = len(samples)
+    if n < RECORD_MIN_SHOT_SAMPLES:
+        return []
+    baseline0 = float(np.median(samples[:RECORD_BASELINE_SAMPLES]))
+    max_dev = max(
+        float(np.max(np.abs(samples[i : i + RECORD_CHUNK_SAMPLES] - baseline0)))
+        for i in range(0, n, RECORD_CHUNK_SAMPLES)
+    )
+    if max_dev <= 0:
+        log.warning(f"Registro {record['path']} sem sinal acima da linha de base.")
+        return []
+
+    gap = int(RECORD_SHOT_MIN_GAP_S / record["dt_s"])
+    merged: list[list[int]] = []
+    for start, end in _active_segments(samples, baseline0, RECORD_TRIGGER_FRACTION * max_dev):
+        if merged and start - merged[-1][1] < gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    merged = [seg for seg in merged if seg[1] - seg[0] >= RECORD_MIN_SHOT_SAMPLES]
+
+    shots = []
+    for k, (start, end) in enumerate(merged):
+        lower = merged[k - 1][1] if k > 0 else 0
+        upper = merged[k + 1][0] if k + 1 < len(merged) else n
+        duration = end - start
+        window_start = max(start - max(int(RECORD_PRETRIGGER_FRACTION * duration), RECORD_MIN_BASELINE_SAMPLES), lower)
+        window_end = min(end + int(RECORD_POSTTRIGGER_FRACTION * duration), upper)
+
+        pre = samples[max(window_start - RECORD_BASELINE_SAMPLES, lower) : window_start]
+        baseline = float(np.median(pre)) if len(pre) >= RECORD_MIN_BASELINE_SAMPLES else baseline0
+        active = samples[start:end]
+        high, low = float(np.max(active)) - baseline, float(np.min(active)) - baseline
+        polarity = 1 if high >= -low else -1
+        shots.append(
+            {
+                "index": k,
+                "trigger": int(start),
+                "active_end": int(end),
+                "window_start": int(window_start),
+                "window_end": int(window_end),
+                "baseline": baseline,
+                "polarity": polarity,
+                "peak_kv": max(high, -low) * abs(record["kv_per_unit"]),
+            }
+        )
+    log.info(f"{len(shots)} disparo(s) encontrado(s) em {record['path']}")
+    return shots
+
+
+def shot_waveform(record: dict, shot: dict) -> tuple[np.ndarray, np.ndarray, float]:
+    """
+    Janela de um disparo corrigida (linha de base, polaridade positiva, kV).
+
+    O tempo começa na origem real do impulso (última amostra abaixo de
+    RECORD_ORIGIN_FRACTION do pico antes do disparo), referência das definições
+    de Tp/T2 do impulso de manobra. Janelas acima de RECORD_MAX_ANALYSIS_SAMPLES
+    são reduzidas por média em blocos.
+
+    Returns:
+        (t_us, v_kv, instante absoluto da origem em s)
+    """
+    dt_s = record["dt_s"]
+    segment = np.asarray(record["samples"][shot["window_start"] : shot["window_end"]], dtype=float)
+    v_kv = (segment - shot["baseline"]) * (shot["polarity"] * abs(record["kv_per_unit"]))
+
+    trigger = shot["trigger"] - shot["window_start"]
+    below = np.flatnonzero(v_kv[: trigger + 1] <= RECORD_ORIGIN_FRACTION * shot["peak_kv"])
+    origin = int(below[-1]) if len(below) else 0
+    v_kv = v_kv[origin:]
+
+    factor = int(np.ceil(len(v_kv) / RECORD_MAX_ANALYSIS_SAMPLES))
+    if factor > 1:
+        usable = len(v_kv) // factor * factor
+        v_kv = v_kv[:usable].reshape(-1, factor).mean(axis=1)
+    t_us = np.arange(len(v_kv)) * (dt_s * max(factor, 1) * 1e6)
+    t_origin_s = record["t0_s"] + (shot["window_start"] + origin) * dt_s
+    return t_us, v_kv, t_origin_s
+
+
+def detect_chop_time(t_us: np.ndarray, v_kv: np.ndarray) -> float | None:
+    """
+    Instante de corte (µs): início da primeira queda de mais de RECORD_CHOP_DROP_FRACTION
+    do pico dentro de RECORD_CHOP_WINDOW_S após o pico; None se a onda não foi cortada.
+    """
+    if len(v_kv) < 3:
+        return None
+    dt_us = t_us[1] - t_us[0]
+    w = max(1, int(round(RECORD_CHOP_WINDOW_S * 1e6 / dt_us)))
+    peak_idx = int(np.argmax(v_kv))
+    peak = v_kv[peak_idx]
+    drop = v_kv[peak_idx:-w] - v_kv[peak_idx + w :]
+    collapse = np.flatnonzero(drop > RECORD_CHOP_DROP_FRACTION * peak)
+    if not len(collapse):
+        return None
+    i = peak_idx + int(collapse[0])
+    # O colapso começa no último máximo local antes da queda
+    chop_idx = i + int(np.argmax(v_kv[i : i + w + 1]))
+    return float(t_us[chop_idx])
+
+
+def _analyze_shot(t_us: np.ndarray, v_kv: np.ndarray, impulse_type: str, chop_time_us: float | None) -> dict:
+    """Tarefa de um disparo (executada no pool de processos)."""
+    if impulse_type == "switching":
+        return calculations.analyze_switching_impulse(t_us, v_kv)
+    if impulse_type == "chopped" and chop_time_us is not None:
+        return calculations.analyze_chopped_impulse(t_us, v_kv, chop_time_us)
+    return calculations.analyze_lightning_impulse(t_us, v_kv)
+
+
+def analyze_record(
+    source: str | Path | dict,
+    impulse_type: str = "lightning",
+    max_workers: int = 1,
+    **open_kwargs,
+) -> dict:
+    """
+    Importa um registro medido, separa os disparos e analisa cada um.
+
+    Args:
+        source: Caminho do arquivo ou registro já aberto por open_record.
+        impulse_type: "lightning", "chopped" ou "switching". Em "chopped", disparos sem
+            corte detectado são analisados como impulso pleno.
+        max_workers: Número de processos. O padrão é a análise serial: cada janela tem no
+            máximo RECORD_MAX_ANALYSIS_SAMPLES amostras (dezenas de ms), e criar o pool e
+            copiar as janelas custa mais do que isso. Com max_workers > 1 o pool só é usado
+            a partir de RECORD_POOL_MIN_SAMPLES amostras somadas nas janelas.
+        **open_kwargs: Argumentos de open_record (sample_rate_hz, kv_per_unit, ...).
+
+    Returns:
+        Dicionário com "path", "n_samples", "dt_s", "elapsed_s" e "shots": lista com
+        índice, instante de origem (s), pico (kV), nível relativo ao maior pico (%),
+        "kind" ("pleno"/"reduzido"), polaridade, instante de corte (µs) e "analysis".
+    """
+    if impulse_type not in VALID_IMPULSE_TYPES:
+        raise ValueError(f"Tipo de impulso inválido: {impulse_type}")
+    start = time.perf_counter()
+    record = source if isinstance(source, dict) else open_record(source, **open_kwargs)
+    shots = find_shots(record)
+
+    waves = [shot_waveform(record, shot) for shot in shots]
+    chop_times = [detect_chop_time(t_us, v_kv) if impulse_type == "chopped" else None for t_us, v_kv, _ in waves]
+    args = (
+        [t_us for t_us, _, _ in waves],
+        [v_kv for _, v_kv, _ in waves],
+        [impulse_type] * len(waves),
+        chop_times,
+    )
+    n_analysis = sum(len(t_us) for t_us in args[0])
+    use_pool = max_workers > 1 and len(shots) > 1 and n_analysis >= RECORD_POOL_MIN_SAMPLES
+    if use_pool:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            analyses = list(pool.map(_analyze_shot, *args))
+    else:
+        analyses = [_analyze_shot(*a) for a in zip(*args)]
+
+    max_peak = max((shot["peak_kv"] for shot in shots), default=0.0)
+    unit_sign = 1 if record["kv_per_unit"] >= 0 else -1
+    results = []
+    for shot, (_, _, t_origin_s), chop_time_us, analysis in zip(shots, waves, chop_times, analyses):
+        level = shot["peak_kv"] / max_peak if max_peak > 0 else 0.0
+        results.append(
+            {
+                "index": shot["index"],
+                "t_origin_s": t_origin_s,
+                "peak_kv": shot["peak_kv"],
+                "level_percent": 100.0 * level,
+                "kind": "pleno" if level >= RECORD_FULL_SHOT_LEVEL else "reduzido",
+                "polarity": "positiva" if shot["polarity"] * unit_sign > 0 else "negativa",
+                "chop_time_us": chop_time_us,
+                "analysis": analysis,
+            }
+        )
+
+    elapsed = time.perf_counter() - start
+    log.info(f"Registro {record['path']}: {len(results)} disparo(s) analisado(s) em {elapsed:.2f} s")
+    return {
+        "path": record["path"],
+        "n_samples": record["n_samples"],
+        "dt_s": record["dt_s"],
+        "elapsed_s": elapsed,
+        "shots": results,
+    }
@@ -0,0 +1,359 @@
+# app_core/impulse_search.py
+"""
+Busca automática de configuração do gerador de impulso.
+
+Enumera todas as combinações de configuração do gerador (estágios/paralelo),
+resistores de frente/cauda realizáveis com o inventário (valores isolados e
+pares em série/paralelo) e indutores adicionais, avalia a forma de onda de
+cada combinação e retorna o conjunto conforme, ordenado pela margem de T1/T2
+(ou Tp/T2) e pela eficiência do circuito.
+
+A avaliação tem duas etapas: os tempos exatos da dupla exponencial (sem L)
+(cauda) descartam os pares (Rf, Rt) que nenhum indutor torna conformes, e os pares
+restantes são simulados com cada indutor no circuito completo
+(circuit_load_voltage_batch), que dá os tempos e o overshoot com L.
+"""
+import itertools
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app_core import calculations
+from app_core.impulse_batch import (
+    circuit_double_exp_constants,
+    circuit_load_voltage_batch,
+    double_exp_waveform_times,
+    front_tail_times_batch,
+)
+from app_core.impulse_grid import two_step_time_grid
+from utils import constants
+
+log = logging.getLogger(__name__)
+
+# Abaixo deste tamanho de espaço de busca o custo de criar o pool de processos
+# supera o ganho: a avaliação de uma configuração leva poucos milissegundos.
+SEARCH_POOL_MIN_COMBINATIONS = 2_000_000
+SEARCH_TAIL_SCREEN_SLACK = 1.5  # Folga (em tolerâncias) de T2 sem L na triagem: L altera pouco a cauda
+SEARCH_CHUNK_ROWS = 2000  # Combinações simuladas com L por vez (limita a memória)
+SEARCH_POINTS_PER_PEAK = 100  # Resolução da grade das simulações com L
+SEARCH_SIM_TAILS = 3.0  # Tempo simulado = SEARCH_SIM_TAILS · T2 nominal
+
+
+def _format_ohm(value: float) -> str:
+    """Formata um valor de resistor para uso em expressões (ex: 100, 1.5k)."""
+    if value >= 1000:
+        return f"{value / 1000:g}k"
+    return f"{value:g}"
+
+
+def resistor_combinations(values: list[float], max_elements: int = 2) -> tuple[np.ndarray, list[str]]:
+    """
+    Valores realizáveis por coluna com até `max_elements` resistores do inventário.
+
+    Inclui cada valor isolado e as associações em série ('+') e em paralelo ('||')
+    de pares (com repetição), no formato aceito por parse_resistor_expression.
+
+    Returns:
+        Tupla (valores em Ohm ordenados, expressões correspondentes). Valores
+        repetidos mantêm a expressão com menos elementos.
+    """
+    combos: dict[float, str] = {}
+    for value in sorted(values):
+        combos.setdefault(round(value, 6), _format_ohm(value))
+    if max_elements >= 2:
+        for r1, r2 in itertools.combinations_with_replacement(sorted(values), 2):
+            parallel = r1 * r2 / (r1 + r2)
+            combos.setdefault(round(parallel, 6), f"{_format_ohm(r1)} || {_format_ohm(r2)}")
+            combos.setdefault(round(r1 + r2, 6), f"{_format_ohm(r1)} + {_format_ohm(r2)}")
+    ordered = sorted(combos)
+    return np.array(ordered, dtype=float), [combos[v] for v in ordered]
+
+
+def resistor_inventory(impulse_type: str) -> tuple[list[float], list[float], list[float]]:
+    """Retorna (Rf disponíveis, Rt disponíveis, indutores) por coluna para o tipo de impulso."""
+    if impulse_type == "switching":
+        front = [float(r["value"]) for r in constants.RESISTORS_SI_FRONT_AVAILABLE]
+        tail = [float(r["value"]) for r in constants.RESISTORS_SI_TAIL_AVAILABLE]
+        inductors = [0.0]  # SI não usa indutor adicional
+    else:
+        front = [float(r["value"]) for r in constants.RESISTORS_LI_FRONT_AVAILABLE]
+        tail = [float(r["value"]) for r in constants.RESISTORS_LI_TAIL_AVAILABLE]
+        inductors = [float(opt["value"]) for opt in constants.INDUCTORS_OPTIONS]
+    return front, tail, inductors
+
+
+def count_search_space(impulse_type: str) -> int:
+    """Número de combinações avaliadas pela busca para o tipo de impulso."""
+    front, tail, inductors = resistor_inventory(impulse_type)
+    n_front = resistor_combinations(front)[0].size
+    n_tail = resistor_combinations(tail)[0].size
+    return len(constants.GENERATOR_CONFIGURATIONS) * n_front * n_tail * len(inductors)
+
+
+def _time_limits(impulse_type: str) -> tuple[float, float, float, float]:
+    """(nominal, tolerância) de T1/Tp e de T2 para o tipo de impulso."""
+    if impulse_type == "switching":
+        return (
+            constants.SWITCHING_IMPULSE_PEAK_TIME_NOM,
+            constants.SWITCHING_PEAK_TIME_TOLERANCE,
+            constants.SWITCHING_IMPULSE_TAIL_TIME_NOM,
+            constants.SWITCHING_TAIL_TOLERANCE,
+        )
+    front_tol = (
+        constants.CHOPPED_FRONT_TOLERANCE if impulse_type == "chopped" else constants.LIGHTNING_FRONT_TOLERANCE
+    )
+    return (
+        constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM,
+        front_tol,
+        constants.LIGHTNING_IMPULSE_TAIL_TIME_NOM,
+        constants.LIGHTNING_TAIL_TOLERANCE,
+    )
+
+
+def time_margins(impulse_type: str, t1_us: np.ndarray, t2_us: np.ndarray) -> np.ndarray:
+    """
+    Margem normalizada de conformidade dos tempos (1 = nominal, 0 = limite, < 0 = fora).
+
+    Para LI/LIC t1 é T1 e t2 é T2; para SI t1 é Tp e t2 é T2. Retorna a menor
+    das duas margens (NaN vira -inf).
+    """
+    nom_1, tol_1, nom_2, tol_2 = _time_limits(impulse_type)
+    margin_1 = 1.0 - np.abs(t1_us - nom_1) / (nom_1 * tol_1)
+    margin_2 = 1.0 - np.abs(t2_us - nom_2) / (nom_2 * tol_2)
+    return np.nan_to_num(np.minimum(margin_1, margin_2), nan=-np.inf)
+
+
+def _measured_times(
+    impulse_type: str, t_sec: np.ndarray, rf, rt, l_total, c_gen: float, c_load: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (T1, T2, pico) ou (Tp, T2, pico) da simulação com L de cada combinação (V0 = 1).
+
+    Simula em blocos de SEARCH_CHUNK_ROWS linhas; combinações sem tempos
+    mensuráveis ficam com NaN.
+    """
+    rf, rt, l_total = np.broadcast_arrays(rf, rt, l_total)
+    t_us = t_sec * 1e6
+    t1, t2, peak = (np.empty(rf.size) for _ in range(3))
+    for lo in range(0, rf.size, SEARCH_CHUNK_ROWS):
+        rows = slice(lo, lo + SEARCH_CHUNK_ROWS)
+        v = circuit_load_voltage_batch(t_sec, 1.0, rf[rows], rt[rows], l_total[rows], c_gen, c_load)
+        timing = front_tail_times_batch(t_us, v)
+        if impulse_type == "switching":
+            t_ab = timing["t_90_us"] - timing["t_30_us"]
+            t50 = timing["t_50_us"]
+            t1[rows] = (2.42 - 3.08e-3 * t_ab + 1.51e-6 * t50**2) * t_ab
+            t2[rows] = t50
+        else:
+            t1[rows] = timing["t_front_us"]
+            t2[rows] = timing["t_tail_us"]
+        peak[rows] = timing["peak"]
+    return t1, t2, peak
+
+
+def _evaluate_configuration(
+    gen_config: dict,
+    impulse_type: str,
+    test_voltage_kv: float,
+    c_dut_pf: float,
+    c_stray_pf: float,
+    l_extra_h: float,
+    l_transformer_h: float,
+) -> tuple[int, int, list[dict]]:
+    """
+    Avalia todas as combinações de resistores/indutores de uma configuração do gerador.
+
+    Triagem sem L: a indutância muda bastante a frente (atraso, overshoot) mas
+    pouco a cauda, então os pares (Rf, Rt) cujo T2 da dupla exponencial fica fora
+    de SEARCH_TAIL_SCREEN_SLACK tolerâncias não são conformes com nenhum indutor.
+    Cada par restante é simulado com cada indutor (circuit_load_voltage_batch):
+    os tempos vêm da onda com L e, para LI/LIC, o overshoot (pico com L sobre o
+    pico da mesma malha sem L) é limitado a LIGHTNING_OVERSHOOT_MAX, o que
+    elimina as combinações subamortecidas.
+
+    Executado tanto no processo principal quanto nos workers do pool, por isso
+    recebe e retorna apenas tipos serializáveis.
+
+    Returns:
+        Tupla (nº de combinações avaliadas, nº de combinações simuladas com L,
+        lista das combinações conformes).
+    """
+    stages = int(gen_config["stages"])
+    parallel = int(gen_config["parallel"])
+    max_voltage_kv = float(gen_config["max_voltage_kv"])
+    energy_kj = float(gen_config.get("energy_kj", 0.0))
+
+    front, tail, inductors = resistor_inventory(impulse_type)
+    rf_values, rf_exprs = resistor_combinations(front)
+    rt_values, rt_exprs = resistor_combinations(tail)
+    n_evaluated = rf_values.size * rt_values.size * len(inductors)
+
+    c_gen, l_gen = calculations.calculate_effective_gen_params(stages, parallel)
+    c_load = calculations.calculate_total_load_capacitance(
+        c_dut_pf, c_stray_pf, impulse_type, max_voltage_kv
+    )
+    efficiency, circuit_eff, _ = calculations.calculate_circuit_efficiency(
+        c_gen, c_load, impulse_type
+    )
+    charging_kv = test_voltage_kv / efficiency if efficiency > 0 else float("inf")
+    energy_required_kj = calculations.calculate_energy_requirements(test_voltage_kv, c_load)
+    if charging_kv > max_voltage_kv or energy_required_kj > energy_kj:
+        # Configuração não alcança a tensão/energia: nenhuma combinação pode ser conforme
+        return n_evaluated, 0, []
+
+    rf_total = rf_values[:, None] * stages / parallel
+    rt_total = rt_values[None, :] * stages / parallel
+    alpha, beta = circuit_double_exp_constants(rf_total, rt_total, c_gen, c_load)
+    times = double_exp_waveform_times(alpha, beta)
+    t2_ideal = times["t_2_us"] if impulse_type == "switching" else times["t_tail_us"]
+    _, _, nom_2, tol_2 = _time_limits(impulse_type)
+    screened = np.abs(t2_ideal - nom_2) <= nom_2 * tol_2 * SEARCH_TAIL_SCREEN_SLACK
+    pair_i, pair_j = np.nonzero(screened)
+    if pair_i.size == 0:
+        return n_evaluated, 0, []
+
+    # Uma linha por (par, indutor), na ordem par-major
+    inductor_h = np.tile(np.asarray(inductors, dtype=float), pair_i.size)
+    idx_i = np.repeat(pair_i, len(inductors))
+    idx_j = np.repeat(pair_j, len(inductors))
+    rf_rows = rf_total[idx_i, 0]
+    rt_rows = rt_total[0, idx_j]
+    l_total = l_gen + l_extra_h + l_transformer_h + inductor_h
+
+    t_peak_s = float(np.nanmin(times["t_peak_us"][screened])) * 1e-6
+    t_sec = two_step_time_grid(SEARCH_SIM_TAILS * nom_2 * 1e-6, t_peak_s, SEARCH_POINTS_PER_PEAK)
+    t1, t2, peak = _measured_times(impulse_type, t_sec, rf_rows, rt_rows, l_total, c_gen, c_load)
+    margin = time_margins(impulse_type, t1, t2)
+
+    # Pico da mesma malha sem L (V0 = 1): K·(e^(-a·tp) - e^(-b·tp)), K = 1/(R·Cl·(b - a))
+    r_damping = rf_rows + constants.R_PARASITIC_OHM
+    a, b = circuit_double_exp_constants(r_damping, rt_rows, c_gen, c_load)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tp = np.log(b / a) / (b - a)
+        peak_ideal = (np.exp(-a * tp) - np.exp(-b * tp)) / (r_damping * c_load * (b - a))
+        overshoot = np.maximum(peak / peak_ideal - 1.0, 0.0) * 100.0
+    compliant = margin >= 0
+    if impulse_type != "switching":
+        compliant &= overshoot <= constants.LIGHTNING_OVERSHOOT_MAX * 100.0
+
+    c_eq = c_gen * c_load / (c_gen + c_load)
+    zeta = r_damping / (2.0 * np.sqrt(l_total / c_eq))
+    results = []
+    for k in np.flatnonzero(compliant):
+        i, j = idx_i[k], idx_j[k]
+        results.append(
+            {
+                "generator_config": gen_config["value"],
+                "stages": stages,
+                "parallel": parallel,
+                "front_resistor_expression": rf_exprs[i],
+                "tail_resistor_expression": rt_exprs[j],
+                "rf_per_column": float(rf_values[i]),
+                "rt_per_column": float(rt_values[j]),
+                "inductor_h": float(inductor_h[k]),
+                "rf_total_ohm": float(rf_rows[k]),
+                "rt_total_ohm": float(rt_rows[k]),
+                "l_total_h": float(l_total[k]),
+                "alpha": float(alpha[i, j]),
+                "beta": float(beta[i, j]),
+                "t1_us": float(t1[k]),
+                "t2_us": float(t2[k]),
+                "overshoot_percent": float(overshoot[k]),
+                "margin": float(margin[k]),
+                "efficiency": efficiency,
+                "circuit_efficiency": circuit_eff,
+                "charging_voltage_kv": charging_kv,
+                "energy_required_kj": energy_required_kj,
+                "energy_available_kj": energy_kj,
+                "zeta": float(zeta[k]),
+                "is_oscillatory": bool(zeta[k] < 1.0),
+            }
+        )
+    return n_evaluated, int(idx_i.size), results
+
+
+def search_generator_configurations(
+    impulse_type: str,
+    test_voltage_kv: float,
+    c_dut_pf: float,
+    c_stray_pf: float = 0.0,
+    l_extra_h: float = 0.0,
+    l_transformer_h: float = 0.0,
+    max_workers: int | None = None,
+    max_results: int | None = 20,
+) -> dict:
+    """
+    Procura as combinações gerador × Rf × Rt × indutor que produzem forma de onda conforme.
+
+    Os pares (Rf, Rt) passam por uma triagem com os tempos exatos da dupla
+    exponencial (double_exp_waveform_times); os que sobram são simulados com
+    cada indutor no circuito com L (circuit_load_voltage_batch), de onde saem
+    T1/T2 (ou Tp/T2) e o overshoot de cada combinação.
+
+    Cada configuração do gerador é uma tarefa independente. Com max_workers > 1
+    (ou espaços de busca acima de SEARCH_POOL_MIN_COMBINATIONS) as tarefas são
+    distribuídas em um ProcessPoolExecutor; caso contrário rodam no processo atual.
+
+    Args:
+        impulse_type: "lightning", "chopped" ou "switching".
+        test_voltage_kv: Tensão de ensaio (kV).
+        c_dut_pf: Capacitância do objeto sob ensaio (pF).
+        c_stray_pf: Capacitância parasita (pF).
+        l_extra_h: Indutância externa/conexões (H).
+        l_transformer_h: Indutância do transformador em série (H).
+        max_workers: Número de processos; None decide pelo tamanho do espaço.
+        max_results: Limita a lista retornada (None retorna todas as conformes).
+
+    Returns:
+        Dicionário com:
+        - "compliant": combinações conformes (tempos e overshoot com L, tensão de
+          carga e energia), ordenadas por margem de tempo, eficiência e amortecimento.
+        - "n_evaluated": combinações com veredito (triadas ou simuladas).
+        - "n_simulated": combinações simuladas com L.
+        - "n_compliant", "elapsed_s".
+    """
+    if impulse_type not in ("lightning", "chopped", "switching"):
+        raise ValueError(f"Tipo de impulso inválido: {impulse_type}")
+
+    start = time.perf_counter()
+    n_space = count_search_space(impulse_type)
+    args = (
+        impulse_type,
+        float(test_voltage_kv or 0.0),
+        float(c_dut_pf or 0.0),
+        float(c_stray_pf or 0.0),
+        float(l_extra_h or 0.0),
+        float(l_transformer_h or 0.0),
+    )
+    configs = list(constants.GENERATOR_CONFIGURATIONS)
+
+    use_pool = (max_workers or 0) > 1 or (
+        max_workers is None and n_space >= SEARCH_POOL_MIN_COMBINATIONS
+    )
+    if use_pool:
+        log.info(f"Busca de configuração: {n_space} combinações em pool de processos")
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            outcomes = list(pool.map(_evaluate_configuration, configs, *([a] * len(configs) for a in args)))
+    else:
+        log.info(f"Busca de configuração: {n_space} combinações no processo atual")
+        outcomes = [_evaluate_configuration(cfg, *args) for cfg in configs]
+
+    n_evaluated = sum(n for n, _, _ in outcomes)
+    n_simulated = sum(n for _, n, _ in outcomes)
+    compliant = [r for _, _, rows in outcomes for r in rows]
+    compliant.sort(key=lambda r: (-r["margin"], -r["efficiency"], -min(r["zeta"], 1e6)))
+
+    elapsed = time.perf_counter() - start
+    log.info(
+        f"Busca de configuração concluída: {len(compliant)}/{n_evaluated} conformes "
+        f"({n_simulated} simuladas com L) em {elapsed:.2f} s"
+    )
+    return {
+        "compliant": compliant[:max_results] if max_results else compliant,
+        "n_evaluated": n_evaluated,
+        "n_simulated": n_simulated,
+        "n_compliant": len(compliant),
+        "elapsed_s": elapsed,
+    }
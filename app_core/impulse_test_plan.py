@@ -0,0 +1,406 @@
+# app_core/impulse_test_plan.py
+"""
+Plano completo de ensaios de impulso: todos os enrolamentos × LI, LIC e SI.
+
+Na página de impulso cada forma de onda é simulada separadamente e apenas para
+o enrolamento do formulário. compute_test_plan lê os níveis de isolamento do
+transformer-inputs-store (NBI/SIL de AT, BT e terciário) e monta um trabalho
+por enrolamento × tipo de impulso:
+
+- LI na tensão NBI, LIC em TEST_PLAN_CHOPPED_FACTOR·NBI e SI na tensão SIL
+  (enrolamentos sem o nível correspondente ficam fora do plano);
+- circuito: a combinação gerador/Rf/Rt/indutor de search_generator_configurations
+  (tempos, tensão de carga e energia) de maior margem entre as
+  TEST_PLAN_CANDIDATES primeiras cuja onda passa na análise normativa; a busca
+  mede T1 na curva bruta e a análise na curva de ensaio (fator k), que com
+  overshoot dá uma frente mais longa. Se nenhuma passa, fica a primeira, com o
+  veredito da análise. A
+  indutância de curto-circuito do enrolamento fica registrada no trabalho, mas
+  não entra na malha série da busca: no ensaio ela fica sobre o objeto, não
+  entre o gerador e a carga, e em série (dezenas a centenas de mH) nenhuma
+  frente de LI seria possível;
+- forma de onda esperada e conformidade: o mesmo circuito com L da busca
+  (circuit_load_voltage_batch) em grade fina e a análise normativa do tipo.
+  No LIC o gap é escolhido para cortar o mais perto possível da janela de
+  2-6 µs (no modelo o gap rompe no máximo na crista); o undershoot do corte é uma constante do modelo de corte
+  (CHOP_UNDERSHOOT_RATIO), não do circuito, e fica fora do veredito. Um LIC
+  cujo corte fica fora da janela sai com status "model_limited" e
+  conformidade indeterminada (None), não como reprovado. No SI uma onda que
+  não cruza o zero dentro do tempo simulado (≥ o mínimo normativo) atende ao
+  tempo até o zero.
+
+Os trabalhos são independentes e rodam em um ProcessPoolExecutor
+compartilhado (ou no processo atual, para poucos trabalhos ou uma só CPU),
+encerrado na saída do interpretador; o resultado é um único dicionário
+serializável, agrupado por enrolamento.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app_core import calculations
+from app_core.impulse_batch import apply_chop_batch, chop_gap_sweep, circuit_load_voltage_batch
+from app_core.impulse_grid import two_step_time_grid
+from app_core.impulse_optimizer import target_times
+from app_core.impulse_search import search_generator_configurations
+from app_core.progressive_sim import analyze_waveform
+from utils import constants
+
+log = logging.getLogger(__name__)
+
+TEST_PLAN_WINDINGS = (("at", "AT"), ("bt", "BT"), ("terciario", "Terciário"))
+TEST_PLAN_IMPULSE_TYPES = ("lightning", "chopped", "switching")
+TEST_PLAN_CHOPPED_FACTOR = 1.10  # Pico do LIC relativo ao NBI (IEC 60076-3)
+TEST_PLAN_SIM_TAILS = 3.0  # Tempo simulado = TEST_PLAN_SIM_TAILS · T2 nominal
+TEST_PLAN_POINTS_PER_PEAK = 400  # Resolução da grade da forma de onda esperada
+TEST_PLAN_CANDIDATES = 10  # Combinações da busca conferidas pela análise normativa, em ordem de margem
+# Ruptura do gap relativa ao pico (varredura LIC); a última rompe na crista, o corte mais tardio do modelo
+TEST_PLAN_GAP_FRACTIONS = np.append(np.linspace(0.80, 0.995, 40), 1.0 - 1e-9)
+TEST_PLAN_POOL_MIN_JOBS = 4  # Abaixo disso os trabalhos rodam no processo atual
+TEST_PLAN_MAX_WORKERS = None  # Processos do pool; None: CPUs disponíveis, lidas a cada plano
+TEST_PLAN_MAX_JOBS = len(TEST_PLAN_WINDINGS) * len(TEST_PLAN_IMPULSE_TYPES)  # Mais processos que isso ficam ociosos
+
+# Valores padrão da página de impulso para a carga e as conexões
+TEST_PLAN_DEFAULT_C_DUT_PF = 3000.0
+TEST_PLAN_DEFAULT_C_STRAY_PF = 400.0
+TEST_PLAN_DEFAULT_L_EXTRA_H = 10e-6
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _worker_count(max_workers: int | None, n_jobs: int) -> int:
+    """Processos para n_jobs trabalhos: max_workers, TEST_PLAN_MAX_WORKERS ou as CPUs disponíveis agora."""
+    if max_workers is None:
+        max_workers = TEST_PLAN_MAX_WORKERS
+    if max_workers is None:
+        max_workers = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    return max(1, min(int(max_workers), n_jobs, TEST_PLAN_MAX_JOBS))
+
+
+def _get_pool(n_workers: int) -> ProcessPoolExecutor:
+    """
+    Pool de processos compartilhado (workers já importados nos planos seguintes).
+
+    É recriado quando o número de processos pedido muda e encerrado por
+    shutdown_test_plan_pool na saída do interpretador.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers != n_workers:
+            _pool.shutdown(wait=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=n_workers)
+            _pool_workers = n_workers
+            log.debug(f"Plano de ensaios: pool de {n_workers} processos criado")
+        return _pool
+
+
+def shutdown_test_plan_pool() -> None:
+    """Encerra o pool compartilhado (registrado em atexit; um próximo plano cria outro)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool, _pool_workers = None, 0
+
+
+atexit.register(shutdown_test_plan_pool)
+
+
+def _to_float(value) -> float | None:
+    """Converte valores do store (número, texto ou vazio) para float positivo ou None."""
+    try:
+        number = float(str(value).replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def _scalar_fields(results: dict) -> dict:
+    """Campos escalares (JSON) de um dicionário de análise."""
+    out = {}
+    for key, value in results.items():
+        if isinstance(value, (bool, np.bool_)):
+            out[key] = bool(value)
+        elif isinstance(value, (int, float, np.integer, np.floating)):
+            out[key] = float(value) if np.isfinite(value) else None
+        elif isinstance(value, str) or value is None:
+            out[key] = value
+    return out
+
+
+def build_test_plan_jobs(
+    transformer_data: dict,
+    c_dut_pf: float = TEST_PLAN_DEFAULT_C_DUT_PF,
+    c_stray_pf: float = TEST_PLAN_DEFAULT_C_STRAY_PF,
+    l_extra_h: float = TEST_PLAN_DEFAULT_L_EXTRA_H,
+) -> list[dict]:
+    """
+    Trabalhos (enrolamento × tipo de impulso) a partir dos dados do transformador.
+
+    Aceita o conteúdo do transformer-inputs-store com ou sem o aninhamento em
+    "transformer_data".
+    """
+    data = transformer_data or {}
+    if isinstance(data.get("transformer_data"), dict):
+        data = data["transformer_data"]
+
+    power_mva = _to_float(data.get("potencia_mva"))
+    impedance = _to_float(data.get("impedancia"))
+    frequency = _to_float(data.get("frequencia")) or constants.DEFAULT_FREQUENCY
+
+    jobs = []
+    for winding, label in TEST_PLAN_WINDINGS:
+        bil_kv = _to_float(data.get(f"nbi_{winding}"))
+        sil_kv = _to_float(data.get(f"sil_{winding}"))
+        if bil_kv is None and sil_kv is None:
+            continue
+        voltage_kv = _to_float(data.get(f"tensao_{winding}"))
+        l_transformer_h = calculations.calculate_transformer_inductance(voltage_kv, power_mva, impedance, frequency)
+        levels = {
+            "lightning": bil_kv,
+            "chopped": bil_kv * TEST_PLAN_CHOPPED_FACTOR if bil_kv else None,
+            "switching": sil_kv,
+        }
+        for impulse_type in TEST_PLAN_IMPULSE_TYPES:
+            if levels[impulse_type] is None:
+                continue
+            jobs.append(
+                {
+                    "winding": winding,
+                    "winding_label": label,
+                    "impulse_type": impulse_type,
+                    "test_voltage_kv": levels[impulse_type],
+                    "c_dut_pf": float(c_dut_pf),
+                    "c_stray_pf": float(c_stray_pf),
+                    "l_extra_h": float(l_extra_h),
+                    "l_transformer_h": float(l_transformer_h),
+                }
+            )
+    return jobs
+
+
+def _chop_gap_cm(t_sec: np.ndarray, v_full: np.ndarray) -> float | None:
+    """
+    Gap cujo corte (modelo de apply_chop_batch) fica mais perto da janela de corte do LIC.
+
+    No modelo o gap rompe na primeira amostra acima da tensão de ruptura; o gap
+    escolhido é o de corte mais tardio dentro da janela ou, se nenhum chega a
+    ela, o mais próximo. None se nenhum gap corta.
+    """
+    peak_kv = float(np.max(v_full)) / 1000.0
+    sweep = chop_gap_sweep(t_sec, v_full, TEST_PLAN_GAP_FRACTIONS * peak_kv / 30.0)
+    chop_us = sweep["chop_time_us"]
+    if not np.isfinite(chop_us).any():
+        return None
+    distance = np.maximum(constants.CHOPPED_IMPULSE_CHOP_TIME_MIN - chop_us, 0.0) + np.maximum(
+        chop_us - constants.CHOPPED_IMPULSE_CHOP_TIME_MAX, 0.0
+    )
+    best = np.lexsort((-np.nan_to_num(chop_us, nan=-np.inf), np.nan_to_num(distance, nan=np.inf)))[0]
+    return float(sweep["gap_cm"][best])
+
+
+def _expected_waveform(impulse_type: str, best: dict, c_gen: float, c_load: float) -> tuple[dict, float | None]:
+    """
+    Análise normativa da onda do circuito escolhido, com L (o mesmo modelo da busca).
+
+    Returns:
+        (análise do tipo de impulso, gap em cm no LIC ou None). A análise é None
+        no LIC quando nenhum gap da varredura corta a onda.
+    """
+    sim_time_s = TEST_PLAN_SIM_TAILS * target_times(impulse_type)[1] * 1e-6
+    t_sec = two_step_time_grid(sim_time_s, best["t1_us"] * 1e-6, TEST_PLAN_POINTS_PER_PEAK)
+    v = circuit_load_voltage_batch(
+        t_sec, best["charging_voltage_kv"] * 1e3, best["rf_total_ohm"], best["rt_total_ohm"], best["l_total_h"],
+        c_gen, c_load,
+    )
+    gap_cm = chop_us = None
+    if impulse_type == "chopped":
+        gap_cm = _chop_gap_cm(t_sec, v[0])
+        if gap_cm is None:
+            return None, None
+        chop_us = float(apply_chop_batch(t_sec, v, gap_cm)[0]) * 1e6
+    analysis = analyze_waveform(t_sec * 1e6, v[0] / 1000.0, impulse_type, chop_us)
+
+    if impulse_type == "switching" and analysis.get("t_zero_us") is None and not analysis.get("error"):
+        # Sem cruzamento de zero no tempo simulado: o tempo até o zero é maior que ele
+        analysis["conforme_tzero"] = sim_time_s * 1e6 >= constants.SWITCHING_TIME_TO_ZERO_MIN
+        criteria = ("conforme_tp", "conforme_t2", "conforme_td", "conforme_tzero")
+        analysis["status_geral"] = "Conforme" if all(analysis.get(c) for c in criteria) else "Não Conforme"
+    elif impulse_type == "chopped" and not analysis.get("error"):
+        # O undershoot é fixado pelo modelo de corte (CHOP_UNDERSHOOT_RATIO): fica na tabela, fora do veredito
+        analysis["conforme_undershoot"] = None
+        criteria = ("conforme_frente", "conforme_corte")
+        analysis["status_geral"] = "Conforme" if all(analysis.get(c) for c in criteria) else "Não Conforme"
+    return analysis, gap_cm
+
+
+def _passes(impulse_type: str, analysis: dict) -> bool:
+    """Onda conforme pela análise normativa (no LIC, também com corte dentro da janela)."""
+    if analysis.get("status_geral") != "Conforme":
+        return False
+    if impulse_type != "chopped":
+        return True
+    chop_us = analysis.get("chop_time_us")
+    return (
+        chop_us is not None
+        and constants.CHOPPED_IMPULSE_CHOP_TIME_MIN <= chop_us <= constants.CHOPPED_IMPULSE_CHOP_TIME_MAX
+    )
+
+
+def run_test_plan_job(job: dict) -> dict:
+    """
+    Circuito, energia, forma de onda esperada e conformidade de um trabalho do plano.
+
+    Executado nos workers do pool: recebe e devolve apenas tipos serializáveis.
+    Erros ficam registrados no próprio resultado (status "error"). "compliant"
+    é None quando a conformidade não pode ser determinada pelo modelo (status
+    "model_limited": LIC com corte fora da janela de 2-6 µs).
+    """
+    result = {
+        **job, "status": "ok", "message": None, "compliant": False, "circuit": None, "energy": None, "waveform": None,
+    }
+    impulse_type = job["impulse_type"]
+    try:
+        search = search_generator_configurations(
+            impulse_type,
+            job["test_voltage_kv"],
+            job["c_dut_pf"],
+            job["c_stray_pf"],
+            l_extra_h=job["l_extra_h"],
+            l_transformer_h=0.0,  # Indutância do enrolamento: sobre o objeto, fora da malha série (ver módulo)
+            max_workers=1,
+            max_results=TEST_PLAN_CANDIDATES,
+        )
+        if not search["compliant"]:
+            result["status"] = "no_circuit"
+            result["message"] = f"Nenhuma combinação conforme entre {search['n_evaluated']} avaliadas."
+            return result
+
+        chosen = None
+        for best in search["compliant"]:
+            gen_config = next(c for c in constants.GENERATOR_CONFIGURATIONS if c["value"] == best["generator_config"])
+            c_gen, _ = calculations.calculate_effective_gen_params(best["stages"], best["parallel"])
+            c_load = calculations.calculate_total_load_capacitance(
+                job["c_dut_pf"], job["c_stray_pf"], impulse_type, float(gen_config["max_voltage_kv"])
+            )
+            analysis, gap_cm = _expected_waveform(impulse_type, best, c_gen, c_load)
+            candidate = (best, gen_config, c_gen, c_load, analysis, gap_cm)
+            if chosen is None and analysis is not None:
+                chosen = candidate  # Sem combinação aprovada, fica a de maior margem da busca
+            if analysis is not None and _passes(impulse_type, analysis):
+                chosen = candidate
+                break
+        if chosen is None:
+            result["status"] = "no_circuit"
+            result["message"] = "Nenhum gap da varredura corta a onda."
+            return result
+        best, gen_config, c_gen, c_load, analysis, gap_cm = chosen
+        if not _passes(impulse_type, analysis):
+            result["message"] = (
+                f"Nenhuma das {len(search['compliant'])} combinações de maior margem da busca passa na "
+                "análise normativa (curva de ensaio); mostrada a de maior margem."
+            )
+
+        result["circuit"] = {
+            key: best[key]
+            for key in (
+                "generator_config", "front_resistor_expression", "tail_resistor_expression", "inductor_h",
+                "rf_total_ohm", "rt_total_ohm", "l_total_h", "zeta",
+            )
+        }
+        result["circuit"].update({"c_gen_f": c_gen, "c_load_f": c_load, "gap_cm": gap_cm})
+        result["energy"] = {
+            key: best[key]
+            for key in (
+                "efficiency", "charging_voltage_kv", "energy_required_kj", "energy_available_kj",
+            )
+        }
+        result["energy"]["max_voltage_kv"] = float(gen_config["max_voltage_kv"])
+        result["waveform"] = _scalar_fields(analysis)
+        result["compliant"] = result["waveform"].get("status_geral") == "Conforme"
+
+        chop_us = result["waveform"].get("chop_time_us")
+        if impulse_type == "chopped" and not (
+            chop_us is not None
+            and constants.CHOPPED_IMPULSE_CHOP_TIME_MIN <= chop_us <= constants.CHOPPED_IMPULSE_CHOP_TIME_MAX
+        ):
+            # Nenhum gap da varredura corta dentro da janela: o tempo de corte reflete o modelo, não o circuito
+            result["status"] = "model_limited"
+            result["compliant"] = None
+            chop_txt = f"{chop_us:.2f} µs" if chop_us is not None else "indefinido"
+            result["message"] = (
+                f"Corte em {chop_txt}, fora da janela de {constants.CHOPPED_IMPULSE_CHOP_TIME_MIN:g}-"
+                f"{constants.CHOPPED_IMPULSE_CHOP_TIME_MAX:g} µs: nenhum gap do modelo de corte atinge a janela, "
+                "conformidade não determinada."
+            )
+    except Exception as e:
+        log.error(f"Plano de ensaios: falha em {job['winding_label']}/{impulse_type}: {e}")
+        result["status"] = "error"
+        result["message"] = str(e)
+    return result
+
+
+def compute_test_plan(
+    transformer_data: dict,
+    c_dut_pf: float = TEST_PLAN_DEFAULT_C_DUT_PF,
+    c_stray_pf: float = TEST_PLAN_DEFAULT_C_STRAY_PF,
+    l_extra_h: float = TEST_PLAN_DEFAULT_L_EXTRA_H,
+    max_workers: int | None = None,
+) -> dict:
+    """
+    Plano de ensaios de impulso para todos os enrolamentos e tipos de impulso.
+
+    Args:
+        transformer_data: Conteúdo do transformer-inputs-store.
+        c_dut_pf, c_stray_pf: Capacitâncias do objeto e parasita (pF).
+        l_extra_h: Indutância externa/conexões (H).
+        max_workers: Processos do pool; 1 roda no processo atual. None usa
+            TEST_PLAN_MAX_WORKERS (ou as CPUs disponíveis) a partir de
+            TEST_PLAN_POOL_MIN_JOBS trabalhos.
+
+    Returns:
+        Dicionário com:
+        - "jobs": resultados na ordem enrolamento × tipo (ver run_test_plan_job);
+        - "by_winding": {enrolamento: {tipo de impulso: resultado}};
+        - "n_jobs", "n_compliant", "n_model_limited" (conformidade indeterminada),
+          "n_failed" (sem circuito/erro), "elapsed_s".
+    """
+    start = time.perf_counter()
+    jobs = build_test_plan_jobs(transformer_data, c_dut_pf, c_stray_pf, l_extra_h)
+    n_workers = _worker_count(max_workers, len(jobs))
+    if n_workers > 1 and (max_workers is not None or len(jobs) >= TEST_PLAN_POOL_MIN_JOBS):
+        log.info(f"Plano de ensaios: {len(jobs)} trabalhos em pool de {n_workers} processos")
+        results = list(_get_pool(n_workers).map(run_test_plan_job, jobs))
+    else:
+        log.info(f"Plano de ensaios: {len(jobs)} trabalhos no processo atual")
+        results = [run_test_plan_job(job) for job in jobs]
+
+    by_winding: dict[str, dict] = {}
+    for res in results:
+        by_winding.setdefault(res["winding"], {})[res["impulse_type"]] = res
+    elapsed = time.perf_counter() - start
+    n_compliant = sum(r["compliant"] is True for r in results)
+    n_model_limited = sum(r["status"] == "model_limited" for r in results)
+    n_failed = sum(r["status"] in ("no_circuit", "error") for r in results)
+    log.info(
+        f"Plano de ensaios concluído: {n_compliant}/{len(results)} conformes, {n_model_limited} indeterminados "
+        f"pelo modelo, {n_failed} sem circuito/erro em {elapsed:.2f} s"
+    )
+    return {
+        "jobs": results,
+        "by_winding": by_winding,
+        "n_jobs": len(results),
+        "n_compliant": n_compliant,
+        "n_model_limited": n_model_limited,
+        "n_failed": n_failed,
+        "elapsed_s": elapsed,
+    }
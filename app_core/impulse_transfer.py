@@ -0,0 +1,152 @@
+# app_core/impulse_transfer.py
+"""
+Comparação de disparos reduzidos e plenos por função de transferência (IEC 60076-4).
+
+A detecção de falha no ensaio de impulso compara, para cada disparo, a corrente
+de neutro (ou de enrolamento) com a tensão aplicada: com o enrolamento íntegro
+a função de transferência H(f) = I(f) / V(f) é a mesma no nível reduzido e no
+pleno, e desvios indicam descarga parcial ou ruptura entre espiras.
+
+compare_shots recebe disparos simulados ou importados (grades próprias),
+alinha todos pelo cruzamento de 30% da frente, reamostra em uma grade uniforme
+comum e calcula as funções de transferência de todos os disparos com um rfft
+em lote sobre a matriz (disparos, amostras). O eixo de frequências e a máscara
+da faixa de comparação ficam em cache por (tamanho da FFT, passo).
+"""
+import logging
+from functools import lru_cache
+
+import numpy as np
+from scipy.fft import next_fast_len, rfft, rfftfreq
+
+from app_core import impulse_kernels
+
+log = logging.getLogger(__name__)
+
+TRANSFER_MAX_FREQ_MHZ = 2.0  # Faixa de comparação das funções de transferência
+TRANSFER_MIN_INPUT_FRACTION = 0.01  # Frequências com |V(f)| abaixo disso (rel. ao máximo) são ignoradas
+TRANSFER_DEVIATION_LIMIT = 0.05  # Desvio relativo (H ou corrente normalizada) que marca o disparo
+TRANSFER_FFT_CACHE_SIZE = 32
+TRANSFER_MIN_SHOTS = 2
+
+
+@lru_cache(maxsize=TRANSFER_FFT_CACHE_SIZE)
+def _frequency_axis(n_fft: int, dt_s: float, max_freq_mhz: float) -> tuple[np.ndarray, np.ndarray]:
+    """Frequências (MHz) do rfft de n_fft amostras e máscara da faixa até max_freq_mhz (somente leitura)."""
+    f_mhz = rfftfreq(n_fft, dt_s) * 1e-6
+    band = (f_mhz > 0) & (f_mhz <= max_freq_mhz)
+    f_mhz.flags.writeable = False
+    band.flags.writeable = False
+    return f_mhz, band
+
+
+def _aligned_matrices(shots: list[dict]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reamostra tensão e corrente de todos os disparos na grade uniforme comum.
+
+    A grade usa o menor passo e a menor duração entre os disparos (a partir do
+    cruzamento de 30%); cada disparo é deslocado para que seu cruzamento de 30%
+    coincida com o do primeiro, eliminando o jitter do disparo do gerador.
+
+    Returns:
+        (t_us da grade comum, v (n, m), i (n, m), pico de tensão de cada disparo)
+    """
+    t30 = np.empty(len(shots))
+    peaks = np.empty(len(shots))
+    dt_us, span_us = np.inf, np.inf
+    for k, shot in enumerate(shots):
+        t_us = np.asarray(shot["t_us"], dtype=float)
+        timing = impulse_kernels.waveform_timing(t_us, shot["v_kv"])
+        if not np.isfinite(timing["t_30"]) or timing["peak"] <= 0:
+            raise ValueError(f"Disparo {k} sem frente de impulso detectável.")
+        t30[k], peaks[k] = timing["t_30"], timing["peak"]
+        dt_us = min(dt_us, float(np.min(np.diff(t_us))))
+        span_us = min(span_us, t_us[-1] - t30[k])
+
+    lead_us = min(t30[k] - shots[k]["t_us"][0] for k in range(len(shots)))
+    m = int((lead_us + span_us) / dt_us)
+    t_common = t30[0] - lead_us + np.arange(m) * dt_us
+    v = np.empty((len(shots), m))
+    i = np.empty((len(shots), m))
+    for k, shot in enumerate(shots):
+        t_shot = t_common + (t30[k] - t30[0])
+        v[k] = np.interp(t_shot, shot["t_us"], shot["v_kv"])
+        i[k] = np.interp(t_shot, shot["t_us"], shot["i_a"])
+    return t_common, v, i, peaks
+
+
+def compare_shots(
+    shots: list[dict],
+    reference: int | None = None,
+    max_freq_mhz: float = TRANSFER_MAX_FREQ_MHZ,
+    deviation_limit: float = TRANSFER_DEVIATION_LIMIT,
+) -> dict:
+    """
+    Compara as funções de transferência de vários disparos com a de referência.
+
+    Args:
+        shots: Disparos com "t_us", "v_kv" e "i_a" (grades crescentes, não
+            necessariamente iguais nem uniformes).
+        reference: Índice do disparo de referência; None usa o de menor pico
+            (nível reduzido).
+        max_freq_mhz: Limite superior da faixa comparada.
+        deviation_limit: Desvio relativo acima do qual o disparo é marcado.
+
+    Returns:
+        Dicionário com:
+        - "reference": índice usado; "dt_us", "n_samples": grade comum;
+        - "f_mhz": frequências da faixa comparada (k,);
+        - "h_mag": |H(f)| por disparo (n, k), em A/kV, com NaN onde |V(f)| é
+          pequeno demais para a divisão;
+        - "level_percent": pico de cada disparo relativo ao maior (%);
+        - "tf_deviation": max |H - H_ref| / |H_ref| na faixa comum, por disparo;
+        - "current_deviation": max |i/Vp - i_ref/Vp_ref| / max |i_ref/Vp_ref| no tempo;
+        - "flagged": disparos com algum dos dois desvios acima de deviation_limit.
+    """
+    if len(shots) < TRANSFER_MIN_SHOTS:
+        raise ValueError(f"São necessários ao menos {TRANSFER_MIN_SHOTS} disparos para comparar.")
+    t_us, v, i, peaks = _aligned_matrices(shots)
+    if reference is None:
+        reference = int(np.argmin(peaks))
+    elif not 0 <= reference < len(shots):
+        raise ValueError(f"Disparo de referência inválido: {reference}")
+
+    dt_s = (t_us[1] - t_us[0]) * 1e-6
+    n_fft = next_fast_len(2 * t_us.size, real=True)  # Zeros evitam a sobreposição circular
+    f_mhz, band = _frequency_axis(n_fft, dt_s, float(max_freq_mhz))
+    v_spec = rfft(v, n=n_fft, axis=-1)[:, band]
+    i_spec = rfft(i, n=n_fft, axis=-1)[:, band]
+
+    v_abs = np.abs(v_spec)
+    usable = v_abs >= TRANSFER_MIN_INPUT_FRACTION * v_abs.max(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        h = np.where(usable, i_spec / v_spec, np.nan)
+    common = usable.all(axis=0)
+    h_ref = h[reference, common]
+    tf_deviation = np.max(np.abs(h[:, common] - h_ref) / np.abs(h_ref), axis=1, initial=0.0)
+
+    i_norm = i / peaks[:, None]
+    i_ref = i_norm[reference]
+    current_deviation = np.max(np.abs(i_norm - i_ref), axis=1) / np.max(np.abs(i_ref))
+
+    flagged = (tf_deviation > deviation_limit) | (current_deviation > deviation_limit)
+    if flagged.any():
+        log.warning(
+            f"Funções de transferência: disparo(s) {np.flatnonzero(flagged).tolist()} com desvio acima "
+            f"de {deviation_limit:.0%} em relação ao disparo {reference}"
+        )
+    log.info(
+        f"Comparação de {len(shots)} disparos: {t_us.size} amostras, {int(band.sum())} frequências até "
+        f"{max_freq_mhz:g} MHz, desvio máximo {np.max(tf_deviation):.1%}"
+    )
+    return {
+        "reference": reference,
+        "dt_us": float(t_us[1] - t_us[0]),
+        "n_samples": int(t_us.size),
+        "f_mhz": f_mhz[band],
+        "h_mag": np.abs(h),
+        "level_percent": 100.0 * peaks / peaks.max(),
+        "tf_deviation": tf_deviation,
+        "current_deviation": current_deviation,
+        "flagged": flagged,
+    }
@@ -0,0 +1,374 @@
+# app_core/losses_engine.py
+"""
+Motor vetorizado de perdas em vazio e em carga, independente da interface.
+
+Os callbacks de perdas (callbacks/losses.py) calculavam a física junto com a
+montagem dos componentes Dash: tap a tap no ensaio em carga (laço de
+cenários) e nível a nível (1.0/1.1/1.2 pu) no ensaio em vazio, em aritmética
+escalar. LossesEngine recebe entradas tipadas (NoLoadInputs, LoadLossInputs)
+e calcula de uma vez, em arrays NumPy:
+
+- em vazio: material (projeto, aço M4) × nível de tensão (pu), mais a análise
+  dos taps do SUT por nível;
+- em carga: tap do DUT (Nominal, Menor, Maior) × condição de ensaio (25°C,
+  frio, quente e, a partir de 230 kV, sobrecargas de 1.2/1.4 pu), incluindo a
+  seleção de tensão e a potência requerida do banco de capacitores (S/F, C/F)
+  e a corrente no EPS com compensação, para os 5 taps do SUT mais próximos.
+
+O resultado é colunar: dicionário de arrays com os eixos nomeados em "taps",
+"scenarios", "materials" e "pu_levels"; os callbacks só convertem para os
+dicionários do losses-store e renderizam.
+"""
+import logging
+import math
+from functools import lru_cache
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from app_core.core_tables import core_loss_grid, interpolate_core_factors
+from utils import constants
+
+log = logging.getLogger(__name__)
+
+LOSSES_EPSILON = 1e-6  # Tolerância das comparações com zero (a mesma dos callbacks)
+NO_LOAD_MATERIALS = ("projeto", "m4")
+NO_LOAD_PU_LEVELS = (1.0, 1.1, 1.2)
+NO_LOAD_M4_CURRENT_FACTORS = (1.0, 2.0, 4.0)  # Corrente do aço M4 em 1.0/1.1/1.2 pu relativa a 1.0 pu
+NO_LOAD_DEFAULT_FACTOR_TRI = 3.0  # Multiplicador de 1.1 pu sem entrada (trifásico)
+NO_LOAD_DEFAULT_FACTOR_MONO = 5.0  # Multiplicador de 1.1 pu sem entrada (monofásico)
+NO_LOAD_INDUCTION_MARGIN_T = 0.05  # Indução aceita além das bordas da tabela (limitada a elas)
+LOAD_TAPS = ("Nominal", "Menor", "Maior")
+LOAD_BASE_SCENARIOS = ("25°C", "Frio", "Quente")
+LOAD_OVERLOAD_SCENARIOS = ("1.2 pu", "1.4 pu")
+LOAD_OVERLOAD_MIN_KV = 230.0  # Sobrecargas avaliadas a partir desta tensão nominal AT
+LOAD_COLD_REFERENCE_C = 25.0
+LOAD_COPPER_CONSTANT_C = 235.0  # Constante de correção de temperatura do cobre
+SUT_TAPS_PER_ANALYSIS = 5  # Taps do SUT listados por condição
+CAP_BANK_FACTOR_MARGIN = 1.1  # Banco "com fator": tensão de ensaio até 1.1 × nominal
+CAP_BANK_SF_CORRECTION = ((13.8, 0.25), (23.9, 0.25), (41.4, 0.75), (71.7, 0.75))  # Correção S/F do EPS
+
+
+class NoLoadInputs(BaseModel):
+    perdas_vazio_kw: float = Field(description="Perdas em vazio (kW)")
+    peso_nucleo_ton: float = Field(description="Peso do núcleo de projeto (Ton)")
+    corrente_excitacao_percent: float = Field(description="Corrente de excitação de projeto (%)")
+    inducao_t: float = Field(description="Indução nominal do núcleo (T)")
+    frequencia_hz: float = Field(default=60.0, description="Frequência nominal (Hz)")
+    tensao_bt_kv: float = Field(description="Tensão nominal BT (kV)")
+    corrente_nominal_bt_a: float = Field(description="Corrente nominal BT (A)")
+    tipo_transformador: str = Field(default="Trifásico", description="Monofásico ou Trifásico")
+    corrente_exc_1_1_percent: float | None = Field(default=None, description="Corrente em 1.1 pu (%)")
+    corrente_exc_1_2_percent: float | None = Field(default=None, description="Corrente em 1.2 pu (%)")
+
+
+class LoadLossInputs(BaseModel):
+    tensao_kv: tuple[float, float, float] = Field(description="Tensão AT por tap: Nominal, Menor, Maior (kV)")
+    corrente_a: tuple[float, float, float] = Field(description="Corrente AT por tap (A)")
+    impedancia_percent: tuple[float, float, float] = Field(description="Impedância por tap (%)")
+    perdas_totais_kw: tuple[float, float, float] = Field(description="Perdas totais por tap (kW)")
+    perdas_vazio_kw: float = Field(description="Perdas em vazio (kW)")
+    tipo_transformador: str = Field(default="Trifásico", description="Monofásico ou Trifásico")
+    temperatura_referencia_c: float = Field(default=75.0, description="Temperatura de referência (°C)")
+
+
+def core_factors(inducao_t: float, frequencia_hz: float) -> tuple[float, float, float, float]:
+    """
+    Fatores do aço M4 para a indução e frequência dadas.
+
+    Interpolação bilinear nas grades de app_core.core_tables (antes: indução
+    arredondada a 0.1 T e frequência levada à mais próxima da tabela). A
+    frequência é limitada à faixa da tabela; a indução pode ficar até meia casa
+    (0.05 T) fora dela, como o arredondamento anterior admitia.
+
+    Returns:
+        (indução usada, frequência usada, perdas W/kg, potência magnetizante VAR/kg)
+
+    Raises:
+        ValueError: Indução fora da tabela ou fatores não positivos.
+    """
+    b_min, b_max = core_loss_grid().inducao_range
+    if not b_min - NO_LOAD_INDUCTION_MARGIN_T <= inducao_t < b_max + NO_LOAD_INDUCTION_MARGIN_T:
+        raise ValueError(
+            f"Fatores de perdas/potência não encontrados para Indução {inducao_t}T "
+            f"(tabela de {b_min}T a {b_max}T)."
+        )
+    f_min, f_max = core_loss_grid().frequencia_range
+    inducao = min(max(float(inducao_t), b_min), b_max)
+    frequencia = min(max(float(frequencia_hz), f_min), f_max)
+    perdas, potencia = interpolate_core_factors(inducao, frequencia)
+    fator_perdas, fator_potencia = float(perdas), float(potencia)
+    if fator_perdas <= LOSSES_EPSILON or fator_potencia <= LOSSES_EPSILON:
+        raise ValueError(
+            f"Fatores de perdas/potência inválidos ({fator_perdas=}, {fator_potencia=}) para "
+            f"Indução {inducao}T @ {frequencia}Hz."
+        )
+    return inducao, frequencia, fator_perdas, fator_potencia
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class LossesEngine:
+    """Cálculo colunar das perdas em vazio e em carga para um SUT/EPS e banco de capacitores."""
+
+    def __init__(
+        self,
+        sut_bt_voltage_v: float = constants.SUT_BT_VOLTAGE,
+        sut_at_min_v: float = constants.SUT_AT_MIN_VOLTAGE,
+        sut_at_max_v: float = constants.SUT_AT_MAX_VOLTAGE,
+        sut_at_step_v: float = constants.SUT_AT_STEP_VOLTAGE,
+        eps_current_limit_a: float = constants.EPS_CURRENT_LIMIT,
+        cap_bank_voltages_kv=None,
+    ):
+        taps = np.arange(sut_at_min_v, sut_at_max_v + sut_at_step_v, sut_at_step_v)
+        self.sut_taps_v = _readonly(taps[taps > LOSSES_EPSILON])
+        self.sut_bt_voltage_v = float(sut_bt_voltage_v)
+        self.eps_current_limit_a = float(eps_current_limit_a)
+        if cap_bank_voltages_kv is None:
+            cap_bank_voltages_kv = [float(v) for v in constants.CAPACITORS_BY_VOLTAGE]
+        self.cap_bank_voltages_kv = _readonly(np.sort(np.asarray(cap_bank_voltages_kv, dtype=float)))
+        if self.sut_taps_v.size == 0 or self.cap_bank_voltages_kv.size == 0:
+            raise ValueError("Faixa de taps do SUT ou lista de tensões do banco de capacitores vazia.")
+
+    # --- Perdas em vazio ---
+    def no_load(self, inputs: NoLoadInputs) -> dict:
+        """
+        Ensaio em vazio para os materiais (projeto, M4) × níveis (1.0, 1.1, 1.2 pu).
+
+        Returns:
+            Dicionário colunar; arrays (material, pu) "corrente_a" e "potencia_kva"
+            (NaN onde não há dado, p.ex. 1.2 pu de projeto sem corrente informada),
+            arrays por material "fator_perdas_w_kg", "fator_potencia_mag_var_kg",
+            "peso_nucleo_ton", "potencia_mag_kvar", "corrente_excitacao_percent",
+            "tensao_kv" por nível e a análise do SUT em "sut_*" (pu, tap).
+
+        Raises:
+            ValueError: Fatores do aço M4 indisponíveis para a indução/frequência.
+        """
+        inducao, frequencia, fator_perdas, fator_potencia = core_factors(inputs.inducao_t, inputs.frequencia_hz)
+        trifasico = inputs.tipo_transformador == "Trifásico"
+        sqrt_3 = math.sqrt(3) if trifasico else 1.0
+        v_bt = inputs.tensao_bt_kv
+        i_nom = inputs.corrente_nominal_bt_a
+        tensao_kv = v_bt * np.asarray(NO_LOAD_PU_LEVELS)
+
+        # Aço M4: peso e potência magnetizante a partir das tabelas
+        peso_m4 = inputs.perdas_vazio_kw / fator_perdas
+        potencia_mag_m4 = fator_potencia * peso_m4
+        i_m4 = potencia_mag_m4 / (v_bt * sqrt_3) if v_bt * sqrt_3 > LOSSES_EPSILON else 0.0
+
+        # Projeto: correntes informadas em % da nominal BT
+        i_proj = i_nom * inputs.corrente_excitacao_percent / 100.0
+        default_factor = NO_LOAD_DEFAULT_FACTOR_TRI if trifasico else NO_LOAD_DEFAULT_FACTOR_MONO
+        i_proj_1_1 = (
+            i_nom * inputs.corrente_exc_1_1_percent / 100.0
+            if inputs.corrente_exc_1_1_percent is not None
+            else default_factor * i_proj
+        )
+        i_proj_1_2 = (
+            i_nom * inputs.corrente_exc_1_2_percent / 100.0 if inputs.corrente_exc_1_2_percent is not None else np.nan
+        )
+
+        corrente = np.array([[i_proj, i_proj_1_1, i_proj_1_2], i_m4 * np.asarray(NO_LOAD_M4_CURRENT_FACTORS)])
+        potencia_kva = tensao_kv * corrente * sqrt_3
+        peso_proj = inputs.peso_nucleo_ton
+        potencia_mag_proj = potencia_kva[0, 0]  # Aproximada pela potência de ensaio em 1.0 pu
+        result = {
+            "materials": NO_LOAD_MATERIALS,
+            "pu_levels": NO_LOAD_PU_LEVELS,
+            "inducao_t": inducao,
+            "frequencia_tabela_hz": frequencia,
+            "tensao_kv": tensao_kv,
+            "corrente_a": corrente,
+            "potencia_kva": potencia_kva,
+            "fator_perdas_w_kg": np.array(
+                [inputs.perdas_vazio_kw / peso_proj if peso_proj > LOSSES_EPSILON else 0.0, fator_perdas]
+            ),
+            "fator_potencia_mag_var_kg": np.array(
+                [potencia_mag_proj / peso_proj if peso_proj > LOSSES_EPSILON else 0.0, fator_potencia]
+            ),
+            "peso_nucleo_ton": np.array([peso_proj, peso_m4]),
+            "potencia_mag_kvar": np.array([potencia_mag_proj, potencia_mag_m4]),
+            "corrente_excitacao_percent": np.array(
+                [inputs.corrente_excitacao_percent, i_m4 / i_nom * 100 if i_nom > LOSSES_EPSILON else 0.0]
+            ),
+        }
+        result.update(self._sut_no_load(tensao_kv, corrente[0]))
+        return result
+
+    def _sut_no_load(self, tensao_kv: np.ndarray, corrente_a: np.ndarray) -> dict:
+        """Taps do SUT (≥ tensão de ensaio, os mais próximos) e corrente refletida no EPS por nível."""
+        taps = self.sut_taps_v
+        target_v = tensao_kv * 1000
+        has_data = (tensao_kv > LOSSES_EPSILON) & (corrente_a > LOSSES_EPSILON)  # NaN → sem dados
+        first = np.searchsorted(taps, target_v - 1e-6, side="left")
+        cols = first[:, None] + np.arange(SUT_TAPS_PER_ANALYSIS)
+        valid = (cols < taps.size) & has_data[:, None]
+        tap_v = np.where(valid, taps[np.minimum(cols, taps.size - 1)], np.nan)
+        i_eps = corrente_a[:, None] * tap_v / self.sut_bt_voltage_v
+        status = tuple(
+            "Sem dados de corrente/tensão"
+            if not has_data[k]
+            else f"Tensão > {taps[-1] / 1000}kV SUT Max"
+            if first[k] >= taps.size
+            else "OK"
+            for k in range(tensao_kv.size)
+        )
+        return {
+            "sut_status": status,
+            "sut_tap_kv": tap_v / 1000,
+            "sut_corrente_eps_a": i_eps,
+            "sut_percent_limite": i_eps / self.eps_current_limit_a * 100,
+        }
+
+    # --- Perdas em carga ---
+    def load(self, inputs: LoadLossInputs) -> dict:
+        """
+        Ensaio em carga para os taps (Nominal, Menor, Maior) × condições de ensaio.
+
+        Returns:
+            Dicionário colunar com arrays por tap ("vcc_kv", "pnominal_kva",
+            "perdas_carga_kw", "perdas_frio_kw", "valid"), arrays (tap, cenário)
+            "test_*" e "banco_*" (NaN onde o banco não se aplica) e os máximos
+            usados na sugestão geral do banco. "valid" é falso nos taps com perdas
+            em carga ou a frio não positivas; os demais valores desses taps não
+            devem ser usados.
+        """
+        sqrt_3 = math.sqrt(3) if inputs.tipo_transformador == "Trifásico" else 1.0
+        tensao = np.asarray(inputs.tensao_kv, dtype=float)
+        corrente = np.asarray(inputs.corrente_a, dtype=float)
+        perdas_totais = np.asarray(inputs.perdas_totais_kw, dtype=float)
+        vcc = np.where(tensao > 0, tensao / 100.0 * np.asarray(inputs.impedancia_percent, dtype=float), 0.0)
+
+        perdas_carga = perdas_totais - inputs.perdas_vazio_kw
+        temp_den = LOAD_COPPER_CONSTANT_C + inputs.temperatura_referencia_c
+        temp_factor = (LOAD_COPPER_CONSTANT_C + LOAD_COLD_REFERENCE_C) / temp_den if temp_den > LOSSES_EPSILON else 1.0
+        perdas_frio = perdas_carga * temp_factor
+        valid = (perdas_carga > LOSSES_EPSILON) & (perdas_frio > LOSSES_EPSILON)
+
+        overload = inputs.tensao_kv[0] >= LOAD_OVERLOAD_MIN_KV
+        scenarios = LOAD_BASE_SCENARIOS + (LOAD_OVERLOAD_SCENARIOS if overload else ())
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frio_safe = np.where(valid, perdas_frio, np.nan)
+            # Fator de tensão/corrente (tap, cenário) e potência ativa do EPS
+            k = np.stack(
+                [np.ones_like(vcc), np.sqrt(perdas_totais / frio_safe), np.sqrt(perdas_carga / frio_safe)]
+                + ([np.full_like(vcc, 1.2), np.full_like(vcc, 1.4)] if overload else []),
+                axis=1,
+            )
+            p_ativa = np.stack(
+                [perdas_frio, perdas_totais, perdas_carga]
+                + ([perdas_carga * 1.2**2, perdas_carga * 1.4**2] if overload else []),
+                axis=1,
+            )
+        v_test = k * vcc[:, None]
+        i_test = k * corrente[:, None]
+        s_kva = v_test * i_test * sqrt_3
+        q_mvar = np.sqrt(np.maximum(s_kva**2 - p_ativa**2, 0.0)) / 1000.0
+        s_mva = s_kva / 1000.0
+        banks = self._cap_banks(v_test, s_mva)
+        valid_2d = np.broadcast_to(valid[:, None], v_test.shape)
+
+        required = np.concatenate([banks["banco_potencia_cf_mvar"][valid], banks["banco_potencia_sf_mvar"][valid]])
+        required = required[np.isfinite(required)]
+        return {
+            "taps": LOAD_TAPS,
+            "scenarios": scenarios,
+            "overload_applicable": overload,
+            "sqrt_3_factor": sqrt_3,
+            "tensao_kv": tensao,
+            "corrente_a": corrente,
+            "vcc_kv": vcc,
+            "pnominal_kva": tensao * corrente * sqrt_3,
+            "perdas_totais_kw": perdas_totais,
+            "perdas_carga_kw": perdas_carga,
+            "perdas_frio_kw": perdas_frio,
+            "valid": valid,
+            "test_tensao_kv": v_test,
+            "test_corrente_a": i_test,
+            "test_potencia_mva": s_mva,
+            "test_potencia_ativa_kw": p_ativa,
+            "test_potencia_mvar": q_mvar,
+            **banks,
+            "max_tensao_kv": float(np.max(v_test[valid_2d], initial=0.0)),
+            "max_potencia_mva": float(np.max(s_mva[valid_2d], initial=0.0)),
+            "max_potencia_mvar_requerida": float(np.max(required, initial=0.0)),
+        }
+
+    def _cap_banks(self, tensao_kv: np.ndarray, potencia_mva: np.ndarray) -> dict:
+        """
+        Tensão nominal e potência requerida do banco de capacitores, com e sem fator.
+
+        C/F usa o menor banco com tensão de ensaio ≤ 1.1 × nominal, S/F o menor com
+        tensão ≤ nominal (o maior banco quando nenhum atende). A potência requerida
+        é a de ensaio referida à tensão nominal do banco.
+        """
+        banks = self.cap_bank_voltages_kv
+        usable = (tensao_kv > LOSSES_EPSILON) & (potencia_mva > LOSSES_EPSILON)  # NaN → sem banco
+        out = {}
+        for suffix, thresholds in (("cf", banks * CAP_BANK_FACTOR_MARGIN + 1e-6), ("sf", banks + 1e-6)):
+            idx = np.minimum(np.searchsorted(thresholds, np.where(usable, tensao_kv, 0.0), side="left"), banks.size - 1)
+            v_bank = banks[idx]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                den = (tensao_kv / v_bank) ** 2
+                q_bank = np.where(den > LOSSES_EPSILON, potencia_mva / den, np.inf)
+            out[f"banco_tensao_{suffix}_kv"] = np.where(usable, v_bank, np.nan)
+            out[f"banco_potencia_{suffix}_mvar"] = np.where(usable, q_bank, np.nan)
+        return out
+
+    def sut_eps_compensated(self, load_result: dict, q_sf_mvar, q_cf_mvar, tipo_transformador: str) -> dict:
+        """
+        Corrente no EPS com a compensação do banco, para os taps do SUT mais próximos.
+
+        Args:
+            load_result: Resultado de load().
+            q_sf_mvar, q_cf_mvar: Potência fornecida pela configuração S/F e C/F
+                escolhida para cada (tap, cenário); NaN/≤0 sem compensação.
+            tipo_transformador: "Trifásico" ou "Monofásico".
+
+        Returns:
+            Arrays (tap, cenário, SUT_TAPS_PER_ANALYSIS), em ordem crescente de tap
+            do SUT: "tap_sut_kv", "corrente_eps_sf_a", "percent_limite_sf",
+            "corrente_eps_cf_a", "percent_limite_cf" (percentuais negativos
+            indicam corrente líquida capacitiva).
+        """
+        taps = self.sut_taps_v
+        v_kv = load_result["test_tensao_kv"]
+        i_a = load_result["test_corrente_a"]
+        sqrt_3 = math.sqrt(3) if tipo_transformador == "Trifásico" else 1.0
+
+        # Os 5 taps mais próximos (empates para o menor), reordenados por tensão
+        order = np.argsort(np.abs(taps - v_kv[..., None] * 1000), axis=-1, kind="stable")[..., :SUT_TAPS_PER_ANALYSIS]
+        tap_v = taps[np.sort(order, axis=-1)]
+        ratio = tap_v / self.sut_bt_voltage_v
+        i_reflected = i_a[..., None] * ratio
+        base_ok = ((v_kv > LOSSES_EPSILON) & (i_a > LOSSES_EPSILON))[..., None]
+
+        out = {"tap_sut_kv": tap_v / 1000.0}
+        for suffix, q_mvar, v_bank in (
+            ("sf", q_sf_mvar, load_result["banco_tensao_sf_kv"]),
+            ("cf", q_cf_mvar, load_result["banco_tensao_cf_kv"]),
+        ):
+            q_mvar = np.asarray(q_mvar, dtype=float)
+            comp = (q_mvar > LOSSES_EPSILON) & (v_bank > LOSSES_EPSILON)
+            factor = np.ones_like(v_bank)
+            if suffix == "sf":
+                for bank_kv, correction in CAP_BANK_SF_CORRECTION:
+                    factor[v_bank == bank_kv] = correction
+            with np.errstate(divide="ignore", invalid="ignore"):
+                den = (v_kv / v_bank) ** 2 * factor
+                q_corr = np.where(den > LOSSES_EPSILON, q_mvar * den, 0.0)
+                i_cap = np.where(comp, q_corr * 1000.0 / (v_kv * sqrt_3), 0.0)
+            i_net = np.where(base_ok, i_reflected - i_cap[..., None] * ratio, i_reflected)
+            out[f"corrente_eps_{suffix}_a"] = i_net
+            out[f"percent_limite_{suffix}"] = i_net / self.eps_current_limit_a * 100
+        return out
+
+
+@lru_cache(maxsize=1)
+def get_losses_engine() -> LossesEngine:
+    """Motor com o SUT, o EPS e os bancos de capacitores do laboratório (utils.constants)."""
+    return LossesEngine()
@@ -0,0 +1,213 @@
+# app_core/marx_model.py
+"""
+Modelo de espaço de estados do gerador Marx de n estágios.
+
+Após o disparo, os estágios ficam em série. Cada estágio tem capacitor
+(C·P, carregado com V0/N), resistor de cauda em paralelo com o capacitor
+(rt/P), resistor de frente em série (rf/P) e indutância própria (L/P). Cada nó
+intermediário tem capacitância parasita para a terra. O topo do gerador
+alimenta, pela indutância externa (trafo, indutor, cabos) e pela resistência
+parasita, a carga (objeto + divisor + parasitas + gap).
+
+O sistema x' = A·x é linear e autônomo (só condições iniciais), então
+x(t + dt) = expm(A·dt)·x(t): a matriz de transição é calculada uma vez por
+passo distinto e a simulação custa um produto matriz-vetor por amostra.
+"""
+import logging
+
+import numpy as np
+from scipy.linalg import expm
+
+from app_core.impulse_batch import (
+    VALID_IMPULSE_TYPES,
+    apply_chop_batch,
+    circuit_double_exp_constants,
+)
+from utils import constants
+
+log = logging.getLogger(__name__)
+
+STEP_KEY_DIGITS = 9  # Passos iguais até 9 dígitos significativos compartilham expm(A·dt)
+STEP_BLOCK = 64  # Amostras por produto em trechos de passo constante
+
+
+def build_marx_state_space(
+    n_stages: int,
+    n_parallel: int,
+    rf_per_column: float,
+    rt_per_column: float,
+    l_external_h: float,
+    c_load_f: float,
+    c_stray_stage_f: float = constants.C_STRAY_PER_STAGE_F,
+) -> tuple[np.ndarray, dict]:
+    """
+    Monta a matriz A do Marx após o disparo.
+
+    Estados (nesta ordem): tensões dos capacitores de estágio vc[0..N-1], correntes
+    de estágio i[0..N-1], tensões dos nós u[1..N] (u[N] = topo do gerador),
+    corrente externa i_ext e tensão na carga v_load.
+
+    Returns:
+        (A, índices) onde índices mapeia "vc", "i", "u" (slices), "i_ext" e "v_load" (int).
+    """
+    n = int(n_stages)
+    p = int(n_parallel)
+    if n <= 0 or p <= 0 or rf_per_column <= 0 or rt_per_column <= 0 or c_load_f <= 0:
+        raise ValueError(
+            f"Parâmetros inválidos para o modelo Marx: {n}S-{p}P, rf={rf_per_column}, "
+            f"rt={rt_per_column}, C_load={c_load_f}"
+        )
+    c_s = constants.C_PER_STAGE_F * p
+    l_s = constants.L_PER_STAGE_H / p
+    rf_s = rf_per_column / p
+    rt_s = rt_per_column / p
+    # Sem indutância externa o ramo i_ext ficaria singular: usa um mínimo de 10 nH
+    l_ext = max(float(l_external_h), 1e-8)
+    c_node = c_stray_stage_f
+
+    vc = slice(0, n)
+    cur = slice(n, 2 * n)
+    nodes = slice(2 * n, 3 * n)
+    i_ext = 3 * n
+    v_load = 3 * n + 1
+    a = np.zeros((3 * n + 2, 3 * n + 2))
+
+    for k in range(n):
+        vc_k, i_k, u_k = k, n + k, 2 * n + k
+        # Capacitor do estágio: descarrega pela corrente do estágio e pelo resistor de cauda
+        a[vc_k, vc_k] = -1.0 / (rt_s * c_s)
+        a[vc_k, i_k] = -1.0 / c_s
+        # Ramo do estágio (nó k-1 → nó k): L·di/dt = u[k-1] + vc - rf·i - u[k]
+        a[i_k, vc_k] = 1.0 / l_s
+        a[i_k, i_k] = -rf_s / l_s
+        a[i_k, u_k] = -1.0 / l_s
+        if k > 0:
+            a[i_k, u_k - 1] = 1.0 / l_s
+        # Nó k: C_node·du/dt = i_k - (corrente que sai para o próximo estágio ou para a carga)
+        a[u_k, i_k] = 1.0 / c_node
+        if k < n - 1:
+            a[u_k, i_k + 1] = -1.0 / c_node
+        else:
+            a[u_k, i_ext] = -1.0 / c_node
+
+    # Ramo externo (topo → carga) e carga
+    r_ext = constants.R_PARASITIC_OHM
+    a[i_ext, 2 * n + n - 1] = 1.0 / l_ext
+    a[i_ext, i_ext] = -r_ext / l_ext
+    a[i_ext, v_load] = -1.0 / l_ext
+    a[v_load, i_ext] = 1.0 / c_load_f
+    return a, {"vc": vc, "i": cur, "u": nodes, "i_ext": i_ext, "v_load": v_load}
+
+
+def simulate_state_space(a: np.ndarray, x0: np.ndarray, t_sec: np.ndarray) -> np.ndarray:
+    """
+    Integra x' = A·x exatamente nos instantes t_sec (grade uniforme ou não).
+
+    expm(A·dt) é calculada uma vez por passo distinto (a grade adaptativa tem
+    poucos passos distintos) e cada amostra custa um produto matriz-vetor. Em
+    trechos longos de passo constante, STEP_BLOCK amostras saem de um único
+    produto com as potências Φ¹..Φᴮ, para não pagar o laço Python por amostra.
+
+    Returns:
+        Matriz (m, n_estados) com o estado em cada instante.
+    """
+    t_sec = np.asarray(t_sec, dtype=float)
+    dt = np.diff(t_sec)
+    if np.any(dt <= 0):
+        raise ValueError("Vetor de tempo deve ser estritamente crescente.")
+    decimals = STEP_KEY_DIGITS - int(np.floor(np.log10(dt.min())))
+    steps, step_idx = np.unique(np.round(dt, decimals), return_inverse=True)
+    transitions = [expm(a * step) for step in steps]
+
+    # Trechos de passo constante: (índice do passo, início, fim)
+    run_starts = np.flatnonzero(np.diff(step_idx, prepend=-1))
+    run_ends = np.append(run_starts[1:], len(step_idx))
+    powers = {}
+    for s in np.unique(step_idx[run_starts[(run_ends - run_starts) >= STEP_BLOCK]]):
+        stack = [transitions[s]]
+        for _ in range(STEP_BLOCK - 1):
+            stack.append(transitions[s] @ stack[-1])
+        powers[s] = np.stack(stack)
+    log.debug(
+        f"Espaço de estados: {a.shape[0]} estados, {len(steps)} passo(s) distinto(s), "
+        f"{len(powers)} em blocos de {STEP_BLOCK}"
+    )
+
+    x = np.empty((t_sec.size, a.shape[0]))
+    x[0] = expm(a * t_sec[0]) @ x0 if t_sec[0] > 0 else x0
+    for s, start, end in zip(step_idx[run_starts], run_starts, run_ends):
+        k = start
+        if s in powers:
+            while end - k >= STEP_BLOCK:
+                x[k + 1 : k + 1 + STEP_BLOCK] = powers[s] @ x[k]
+                k += STEP_BLOCK
+        for k in range(k, end):
+            np.dot(transitions[s], x[k], out=x[k + 1])
+    return x
+
+
+def simulate_marx_impulse(
+    t_sec: np.ndarray,
+    v0_charge: float,
+    n_stages: int,
+    n_parallel: int,
+    rf_per_column: float,
+    rt_per_column: float,
+    l_external_h: float,
+    c_load: float,
+    impulse_type: str,
+    gap_distance_cm: float | None = None,
+    c_stray_stage_f: float = constants.C_STRAY_PER_STAGE_F,
+) -> tuple:
+    """
+    Simula o impulso com o modelo de espaço de estados do Marx.
+
+    Args:
+        t_sec: Vetor de tempo (s), uniforme ou não (ver impulse_grid).
+        v0_charge: Tensão de carga total (V), dividida igualmente entre os estágios.
+        n_stages, n_parallel: Configuração do gerador.
+        rf_per_column, rt_per_column: Resistores de frente e cauda por coluna (Ohm).
+        l_external_h: Indutância fora do gerador (trafo, indutor, extra) em H.
+        c_load: Capacitância total da carga (F).
+        impulse_type: "lightning", "chopped" ou "switching".
+        gap_distance_cm: Distância do gap (cm), apenas para "chopped".
+        c_stray_stage_f: Capacitância parasita de cada nó para a terra (F).
+
+    Returns:
+        Mesma tupla de simulate_hybrid_impulse: (v_marx, v_final, i_load, alpha, beta,
+        chop_time_sec), onde v_marx é a tensão na carga antes do corte e alpha/beta são
+        as raízes do circuito equivalente (informativas).
+    """
+    t_sec = np.asarray(t_sec, dtype=float)
+    zeros = np.zeros_like(t_sec)
+    if impulse_type not in VALID_IMPULSE_TYPES:
+        log.error(f"Tipo de impulso inválido: {impulse_type}")
+        return zeros, zeros.copy(), zeros.copy(), 0, 0, None
+    try:
+        a, idx = build_marx_state_space(
+            n_stages, n_parallel, rf_per_column, rt_per_column, l_external_h, c_load, c_stray_stage_f
+        )
+        x0 = np.zeros(a.shape[0])
+        x0[idx["vc"]] = v0_charge / n_stages
+        log.info(
+            f"Simulando Marx (espaço de estados): {n_stages}S-{n_parallel}P, "
+            f"V0_carga={v0_charge / 1000:.1f}kV, {t_sec.size} pontos"
+        )
+        x = simulate_state_space(a, x0, t_sec)
+    except (ValueError, np.linalg.LinAlgError) as e:
+        log.error(f"Erro na simulação do modelo Marx: {e}")
+        return zeros, zeros.copy(), zeros.copy(), 0, 0, None
+
+    v_marx = x[:, idx["v_load"]].copy()
+    v_final = v_marx.copy()
+    chop_time_sec = None
+    if impulse_type == "chopped" and gap_distance_cm:
+        chop = apply_chop_batch(t_sec, v_final[None, :], gap_distance_cm)[0]
+        chop_time_sec = None if np.isnan(chop) else float(chop)
+
+    c_gen = constants.C_PER_STAGE_F * n_parallel / n_stages
+    alpha, beta = circuit_double_exp_constants(
+        rf_per_column * n_stages / n_parallel, rt_per_column * n_stages / n_parallel, c_gen, c_load
+    )
+    i_load = c_load * np.gradient(v_final, t_sec)
+    return v_marx, v_final, i_load, float(alpha), float(beta), chop_time_sec
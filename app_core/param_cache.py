@@ -0,0 +1,156 @@
+# app_core/param_cache.py
+"""
+Memoização dos parâmetros de circuito do módulo de impulso.
+
+Os callbacks recalculam parâmetros do gerador, do divisor e da carga a cada
+clique e a cada tick do intervalo, quase sempre com as mesmas entradas. O
+decorador memoized_params guarda os resultados em um LRU limitado, com chaves
+de float quantizadas (dígitos significativos), de modo que valores que diferem
+só por ruído de ponto flutuante compartilham a entrada. Em um acerto a função
+não é executada, então seus logs de depuração também não.
+"""
+import functools
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+PARAM_CACHE_MAXSIZE = 256
+PARAM_CACHE_SIGNIFICANT_DIGITS = 9
+
+_registry: dict[str, "_ParamCache"] = {}
+
+
+def _quantize(value, digits: int):
+    """Arredonda floats a `digits` dígitos significativos; outros valores passam direto."""
+    if isinstance(value, (float, np.floating)):
+        return float(f"{value:.{digits}g}")
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+class _ParamCache:
+    """LRU de uma função, com contagem de acertos e faltas (seguro entre threads)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        # O servidor Dash atende callbacks em várias threads: o OrderedDict e os
+        # contadores só são lidos e alterados com a trava; a função roda fora dela
+        self.lock = threading.Lock()
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        """(True, resultado) em um acerto, (False, None) em uma falta; levanta TypeError se key não for hasheável."""
+        with self.lock:
+            try:
+                result = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return True, result
+
+    def store(self, key, result) -> None:
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self, reset_stats: bool = False) -> None:
+        with self.lock:
+            self.entries.clear()
+            if reset_stats:
+                self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            hits, misses, size = self.hits, self.misses, len(self.entries)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "size": size,
+            "maxsize": self.maxsize,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+
+def memoized_params(maxsize: int = PARAM_CACHE_MAXSIZE, digits: int = PARAM_CACHE_SIGNIFICANT_DIGITS):
+    """
+    Decorador de memoização com chaves quantizadas e descarte LRU.
+
+    Resultados dict são devolvidos como cópia rasa, para que o chamador possa
+    alterá-los sem corromper o cache. Argumentos não hasheáveis desativam o
+    cache naquela chamada.
+    """
+
+    def decorator(func):
+        cache = _ParamCache(maxsize)
+        _registry[f"{func.__module__}.{func.__qualname__}"] = cache
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (
+                tuple(_quantize(a, digits) for a in args),
+                tuple(sorted((k, _quantize(v, digits)) for k, v in kwargs.items())),
+            )
+            try:
+                hit, result = cache.lookup(key)
+            except TypeError:
+                # Argumento não hasheável: calcula sem cache
+                with cache.lock:
+                    cache.misses += 1
+                return func(*args, **kwargs)
+            if not hit:
+                # Duas threads com a mesma falta calculam as duas; o resultado é o mesmo
+                result = func(*args, **kwargs)
+                cache.store(key, result)
+            return dict(result) if isinstance(result, dict) else result
+
+        wrapper.cache_stats = cache.stats
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
+
+
+def input_fingerprint(*values, digits: int = PARAM_CACHE_SIGNIFICANT_DIGITS) -> str:
+    """
+    Impressão digital (hex curto) de um conjunto de entradas de circuito.
+
+    Floats são quantizados como nas chaves do cache, então entradas que diferem
+    só por ruído de ponto flutuante têm a mesma impressão. Estável entre
+    processos (não depende do hash de str do Python).
+    """
+    payload = repr(tuple(_quantize(v, digits) for v in values))
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+
+def param_cache_stats() -> dict[str, dict]:
+    """Estatísticas de acerto/falta de todas as funções memoizadas."""
+    return {name: cache.stats() for name, cache in _registry.items()}
+
+
+def clear_param_caches() -> None:
+    """Esvazia todos os caches e zera as estatísticas."""
+    for cache in _registry.values():
+        cache.clear(reset_stats=True)
+    log.debug("Caches de parâmetros de circuito esvaziados.")
+
+
+def log_param_cache_stats() -> None:
+    """Registra em DEBUG a taxa de acerto de cada função memoizada."""
+    for name, stats in param_cache_stats().items():
+        log.debug(
+            f"Cache {name}: {stats['hits']} acertos, {stats['misses']} faltas "
+            f"({stats['hit_rate']:.0%}), {stats['size']}/{stats['maxsize']} entradas"
+        )
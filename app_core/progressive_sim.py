@@ -0,0 +1,212 @@
+# app_core/progressive_sim.py
+"""
+Simulação progressiva do impulso: resultado grosso imediato, refinamento em segundo plano.
+
+Em resolução fina (SI de milhares de µs), simulate_hybrid_impulse com o ajuste
+K-factor bloqueia o callback por segundos. start_progressive_simulation devolve
+em poucos ms uma versão grossa: grade adaptativa com
+PROGRESSIVE_COARSE_POINTS_PER_PEAK pontos até o pico, alpha/beta analíticos
+das raízes do circuito (simulate_hybrid_impulse_batch, sem ajuste) e a tabela
+de conformidade sobre essa onda. A simulação completa na grade fina pedida
+roda em um ThreadPoolExecutor. O callback consulta o andamento com
+poll_progressive_simulation (intervalo de polling), que entrega a onda
+refinada e a tabela final uma única vez.
+
+Os trabalhos ficam em um registro por sessão (o session_id do
+simulation-status): um novo pedido da mesma sessão substitui o anterior, cujo
+resultado é descartado. Trabalhos já em execução não são interrompidos (a
+thread termina e o resultado é ignorado); os ainda na fila são cancelados.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from app_core import calculations, waveform_library
+from app_core.impulse_batch import simulate_hybrid_impulse_batch
+from app_core.impulse_grid import hybrid_impulse_time_grid
+
+log = logging.getLogger(__name__)
+
+PROGRESSIVE_COARSE_POINTS_PER_PEAK = 50  # Grade grossa: ~1-2 mil pontos no total
+PROGRESSIVE_MAX_WORKERS = 2  # Refinamentos simultâneos (todas as sessões)
+PROGRESSIVE_RESULT_TTL_S = 600  # Resultados não consultados são descartados após esse tempo
+
+_jobs: dict[str, tuple[Future, float]] = {}
+_jobs_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PROGRESSIVE_MAX_WORKERS, thread_name_prefix="impulse-refine")
+        return _executor
+
+
+def analyze_waveform(t_us: np.ndarray, v_kv: np.ndarray, impulse_type: str, chop_time_us: float | None) -> dict:
+    """Tabela de parâmetros e conformidade da onda, pela análise do tipo de impulso."""
+    if impulse_type == "switching":
+        return calculations.analyze_switching_impulse(t_us, v_kv)
+    if impulse_type == "chopped" and chop_time_us is not None:
+        return calculations.analyze_chopped_impulse(t_us, v_kv, chop_time_us)
+    return calculations.analyze_lightning_impulse(t_us, v_kv)
+
+
+def _package(stage: str, t_sec, v_rlc, v_final, i_load, alpha, beta, chop_time_sec, impulse_type) -> dict:
+    chop_time_us = None if chop_time_sec is None or np.isnan(chop_time_sec) else float(chop_time_sec) * 1e6
+    t_us = np.asarray(t_sec) * 1e6
+    v_kv = np.asarray(v_final) / 1000
+    return {
+        "stage": stage,
+        "t_us": t_us,
+        "v_kv": v_kv,
+        "v_rlc_kv": np.asarray(v_rlc) / 1000,
+        "i_load_a": np.asarray(i_load),
+        "alpha": float(alpha),
+        "beta": float(beta),
+        "chop_time_us": chop_time_us,
+        "analysis": analyze_waveform(t_us, v_kv, impulse_type, chop_time_us),
+    }
+
+
+def coarse_impulse_simulation(
+    sim_time_s: float,
+    v0_charge: float,
+    rf: float,
+    rt: float,
+    l_total: float,
+    c_gen: float,
+    c_load: float,
+    impulse_type: str,
+    gap_distance_cm: float | None = None,
+) -> dict:
+    """
+    Simulação grossa: grade adaptativa reduzida e alpha/beta analíticos (sem ajuste K-factor).
+
+    Returns:
+        Dicionário com stage="coarse", t_us, v_kv, v_rlc_kv, i_load_a, alpha, beta,
+        chop_time_us e analysis (resultado de analyze_waveform).
+    """
+    t_sec = hybrid_impulse_time_grid(
+        sim_time_s, rf, rt, c_gen, c_load, v0_charge, gap_distance_cm,
+        points_per_peak=PROGRESSIVE_COARSE_POINTS_PER_PEAK,
+    )
+    v_rlc, v_final, i_load, alpha, beta, chop = simulate_hybrid_impulse_batch(
+        t_sec, v0_charge, rf, rt, l_total, c_gen, c_load, impulse_type, gap_distance_cm
+    )
+    return _package("coarse", t_sec, v_rlc[0], v_final[0], i_load[0], alpha[0], beta[0], chop[0], impulse_type)
+
+
+def fine_impulse_simulation(
+    t_sec: np.ndarray,
+    v0_charge: float,
+    rf: float,
+    rt: float,
+    l_total: float,
+    c_gen: float,
+    c_load: float,
+    impulse_type: str,
+    gap_distance_cm: float | None = None,
+    use_library: bool = False,
+) -> dict:
+    """
+    Simulação completa (simulate_hybrid_impulse com K-factor) na grade fina; stage="fine".
+
+    Com use_library=True a simulação passa pela biblioteca de formas de onda em
+    disco (waveform_library.cached_call): entradas repetidas são lidas do arquivo.
+    """
+    args = (t_sec, v0_charge, rf, rt, l_total, c_gen, c_load, impulse_type, gap_distance_cm)
+    if use_library:
+        # alpha = 0: simulação falhou e não é gravada
+        result = waveform_library.cached_call(
+            calculations.simulate_hybrid_impulse, *args, store_if=lambda res: res[3] != 0
+        )
+    else:
+        result = calculations.simulate_hybrid_impulse(*args)
+    v_rlc, v_final, i_load, alpha, beta, chop = result
+    return _package("fine", t_sec, v_rlc, v_final, i_load, alpha, beta, chop, impulse_type)
+
+
+def _purge_expired() -> None:
+    """Remove trabalhos concluídos que ninguém consultou em PROGRESSIVE_RESULT_TTL_S."""
+    now = time.monotonic()
+    with _jobs_lock:
+        expired = [sid for sid, (fut, t0) in _jobs.items() if fut.done() and now - t0 > PROGRESSIVE_RESULT_TTL_S]
+        for sid in expired:
+            del _jobs[sid]
+    if expired:
+        log.debug(f"Simulação progressiva: {len(expired)} resultado(s) expirado(s) descartado(s)")
+
+
+def start_progressive_simulation(
+    session_id: str,
+    t_sec: np.ndarray,
+    v0_charge: float,
+    rf: float,
+    rt: float,
+    l_total: float,
+    c_gen: float,
+    c_load: float,
+    impulse_type: str,
+    gap_distance_cm: float | None = None,
+    use_library: bool = False,
+) -> dict:
+    """
+    Devolve a simulação grossa e agenda o refinamento na grade t_sec para a sessão.
+
+    Um refinamento anterior da mesma sessão é substituído (cancelado se ainda na fila).
+    use_library passa o refinamento pela biblioteca em disco (ver fine_impulse_simulation).
+    """
+    _purge_expired()
+    params = (v0_charge, rf, rt, l_total, c_gen, c_load, impulse_type, gap_distance_cm)
+    t0 = time.perf_counter()
+    coarse = coarse_impulse_simulation(float(t_sec[-1]), *params)
+    log.debug(f"Simulação grossa: {coarse['t_us'].size} pontos em {(time.perf_counter() - t0) * 1e3:.0f} ms")
+
+    future = _get_executor().submit(fine_impulse_simulation, t_sec, *params, use_library)
+    with _jobs_lock:
+        previous = _jobs.get(session_id)
+        _jobs[session_id] = (future, time.monotonic())
+    if previous is not None:
+        previous[0].cancel()
+    return coarse
+
+
+def poll_progressive_simulation(session_id: str) -> dict:
+    """
+    Andamento do refinamento da sessão.
+
+    Returns:
+        {"status": "idle" | "running" | "done" | "error", "result": dict | None, "error": str | None}.
+        "done" e "error" são entregues uma vez; o trabalho sai do registro.
+    """
+    with _jobs_lock:
+        job = _jobs.get(session_id)
+        if job is None:
+            return {"status": "idle", "result": None, "error": None}
+        future = job[0]
+        if not future.done():
+            return {"status": "running", "result": None, "error": None}
+        del _jobs[session_id]
+    if future.cancelled():
+        return {"status": "idle", "result": None, "error": None}
+    exc = future.exception()
+    if exc is not None:
+        log.error(f"Refinamento da simulação falhou: {exc}")
+        return {"status": "error", "result": None, "error": str(exc)}
+    return {"status": "done", "result": future.result(), "error": None}
+
+
+def cancel_progressive_simulation(session_id: str | None) -> None:
+    """Descarta o refinamento pendente da sessão (p.ex. simulação parada)."""
+    if not session_id:
+        return
+    with _jobs_lock:
+        job = _jobs.pop(session_id, None)
+    if job is not None:
+        job[0].cancel()
+        log.debug(f"Refinamento da sessão {session_id[:8]} descartado")
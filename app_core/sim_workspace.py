@@ -0,0 +1,263 @@
+# app_core/sim_workspace.py
+"""
+Área de trabalho pré-alocada para simulações repetidas do impulso.
+
+Um laço de simulações repetidas com as mesmas dimensões de grade (p.ex. uma
+simulação automática a cada tick) aloca de novo, a cada execução, o vetor de
+tempo, a saída RLC, a dupla exponencial, o gradiente e os temporários de cada
+expressão NumPy.
+
+SimulationWorkspace guarda esses buffers (dimensionados pela grade) e os
+coeficientes do gradiente da grade atual; os kernels escrevem no lugar com
+ufuncs out=. simulate_hybrid_impulse(..., workspace=ws) devolve visões desses
+buffers, válidas até a próxima simulação na mesma área (copie para guardar).
+
+É uma API de biblioteca: quem roda o laço cria a área ou usa uma por sessão com
+get_workspace/release_workspace; o registro é um LRU limitado, então a memória
+por sessão fica constante enquanto a grade não muda e o total não cresce com o
+tempo. O callback update_impulse_waveform (callbacks/impulse.py) usa uma área
+por sessão de simulação automática e a libera quando a simulação é parada.
+
+A área também guarda a impressão digital das entradas da última execução
+concluída e o seu resultado: run_cached devolve esse resultado para as mesmas
+entradas sem recalcular, e só registra uma execução depois que ela termina sem
+erro. É o que evita simular de novo (e reiniciar o refinamento progressivo) a
+cada tick com as mesmas entradas.
+"""
+import logging
+import math
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+WORKSPACE_MAX_SESSIONS = 16  # Áreas mantidas (LRU); a mais antiga é liberada
+WORKSPACE_BUFFERS = ("t", "t_us", "v_rlc", "v_rlc_kv", "v_final", "i_load", "scratch_a", "scratch_b")
+
+_workspaces: OrderedDict[str, "SimulationWorkspace"] = OrderedDict()
+
+
+class SimulationWorkspace:
+    """Buffers float64 reutilizáveis de uma sessão de simulação."""
+
+    def __init__(self, n_points: int = 0):
+        self.n_points = 0
+        self.capacity = 0
+        self.allocations = 0
+        self._storage: dict[str, np.ndarray] = {}
+        self._views: dict[str, np.ndarray] = {}
+        self._grid_key = None
+        self._grid_source = None
+        self._grad_coef = None
+        self.last_fingerprint: str | None = None
+        self.last_result = None
+        if n_points:
+            self.resize(n_points)
+
+    def resize(self, n_points: int) -> None:
+        """Ajusta o tamanho útil; só realoca quando a grade cresce além da capacidade."""
+        if n_points > self.capacity:
+            self._storage = {name: np.empty(n_points) for name in WORKSPACE_BUFFERS}
+            self.capacity = n_points
+            self.allocations += 1
+            log.debug(f"Área de simulação: buffers para {n_points} pontos ({self.nbytes / 1e6:.1f} MB)")
+        if n_points != self.n_points or not self._views:
+            # Visões fixas: o mesmo objeto a cada tick enquanto o tamanho não muda
+            self._views = {name: buf[:n_points] for name, buf in self._storage.items()}
+            self._grid_key = None
+        self.n_points = n_points
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        views = self.__dict__.get("_views", {})
+        if name in views:
+            return views[name]
+        raise AttributeError(name)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buf.nbytes for buf in self._storage.values()) + (
+            sum(c.nbytes for c in self._grad_coef[:3]) if self._grad_coef is not None else 0
+        )
+
+    # --- Última execução ---
+
+    def is_unchanged(self, fingerprint: str) -> bool:
+        """True se as entradas são as da última execução concluída."""
+        return fingerprint == self.last_fingerprint
+
+    def record_run(self, fingerprint: str, result) -> None:
+        """Registra uma execução concluída com sucesso com essas entradas e o seu resultado."""
+        self.last_fingerprint = fingerprint
+        self.last_result = result
+
+    def run_cached(self, fingerprint: str, run, succeeded=lambda result: result is not None):
+        """
+        Resultado de run() para as entradas fingerprint, reaproveitando a última execução.
+
+        Com a mesma impressão digital da última execução registrada, devolve o
+        resultado guardado sem chamar run. Caso contrário chama run() e registra
+        a execução só se ela não levantar exceção e succeeded(resultado) for
+        verdadeiro; uma falha não impede a próxima tentativa com as mesmas entradas.
+        Resultados que são visões dos buffers da área devem ser copiados por run.
+        """
+        if self.is_unchanged(fingerprint):
+            return self.last_result
+        result = run()
+        if succeeded(result):
+            self.record_run(fingerprint, result)
+        return result
+
+    # --- Grade ---
+
+    def uniform_grid(self, sim_time_s: float, dt_s: float) -> np.ndarray:
+        """Grade uniforme 0..sim_time_s no buffer t (reaproveitada se os parâmetros não mudarem)."""
+        n_points = int(round(sim_time_s / dt_s)) + 1
+        key = ("uniform", float(sim_time_s), float(dt_s))
+        if self._grid_key != key or self.n_points != n_points:
+            self.resize(n_points)
+            np.multiply(np.arange(n_points), dt_s, out=self.t)
+            self._set_grid(key, self.t)
+        return self.t
+
+    def bind_grid(self, t_sec: np.ndarray) -> None:
+        """
+        Prepara os buffers e os coeficientes do gradiente para a grade t_sec.
+
+        A grade é reconhecida pela identidade do array (p.ex. a devolvida por
+        uniform_grid); uma grade alterada no lugar deve ser passada de novo como
+        outro array.
+        """
+        t_sec = np.asarray(t_sec, dtype=float)
+        if t_sec is self._grid_source and self._grid_key is not None:
+            return
+        self.resize(t_sec.size)
+        if t_sec is not self.t:
+            self.t[:] = t_sec
+        self._set_grid(("array", id(t_sec)), t_sec)
+
+    def _set_grid(self, key, source: np.ndarray) -> None:
+        t = self.t
+        np.multiply(t, 1e6, out=self.t_us)
+        dx = np.diff(t)
+        dx1, dx2 = dx[:-1], dx[1:]
+        # Coeficientes de np.gradient (2ª ordem no interior, grade não uniforme)
+        a = -dx2 / (dx1 * (dx1 + dx2))
+        b = (dx2 - dx1) / (dx1 * dx2)
+        c = dx1 / (dx2 * (dx1 + dx2))
+        self._grad_coef = (a, b, c, dx[0], dx[-1])
+        self._grid_key = key
+        self._grid_source = source
+
+    # --- Kernels no lugar ---
+
+    def gradient(self, f: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """np.gradient(f, t) na grade atual, escrito em out (out não pode ser f)."""
+        a, b, c, dx_first, dx_last = self._grad_coef
+        tmp = self.scratch_a[1:-1]
+        np.multiply(f[:-2], a, out=out[1:-1])
+        np.multiply(f[1:-1], b, out=tmp)
+        out[1:-1] += tmp
+        np.multiply(f[2:], c, out=tmp)
+        out[1:-1] += tmp
+        out[0] = (f[1] - f[0]) / dx_first
+        out[-1] = (f[-1] - f[-2]) / dx_last
+        return out
+
+    def double_exp(self, v0_norm: float, alpha: float, beta: float, out: np.ndarray) -> np.ndarray | None:
+        """double_exp_func(t, v0_norm, alpha, beta) escrito em out; None nos casos inválidos."""
+        if alpha <= 0 or beta <= 0 or beta <= alpha + 1e-9 * alpha:
+            return None
+        t_peak = math.log(beta / alpha) / (beta - alpha)
+        val_at_peak = math.exp(-alpha * t_peak) - math.exp(-beta * t_peak)
+        if abs(val_at_peak) < 1e-12:
+            return None
+        tmp = self.scratch_b
+        np.maximum(self.t, 0.0, out=tmp)
+        np.multiply(tmp, -beta, out=out)
+        np.exp(out, out=out)
+        np.multiply(tmp, -alpha, out=tmp)
+        np.exp(tmp, out=tmp)
+        np.subtract(tmp, out, out=out)
+        out *= v0_norm / val_at_peak
+        return out
+
+    def rlc(self, v0: float, r_total: float, l_total: float, c_eq: float, out: np.ndarray) -> np.ndarray | None:
+        """
+        rlc_solution nos casos sub e sobreamortecido comuns, escrito em out.
+
+        Returns:
+            out, ou None para casos especiais (crítico, R≈0, raízes instáveis, t < 0),
+            que ficam com rlc_solution.
+        """
+        t = self.t
+        if l_total <= 1e-12 or c_eq <= 1e-15 or r_total < 0 or t[0] < 0:
+            return None
+        omega0_sq = 1.0 / (l_total * c_eq)
+        a = r_total / (2.0 * l_total)
+        delta = a**2 - omega0_sq
+        if abs(delta / omega0_sq) < 1e-6 or a < 1e-9:
+            return None
+        tmp = self.scratch_b
+        if delta < 0:
+            omega_d = math.sqrt(-delta)
+            if omega_d < 1e-6 * a:
+                return None
+            np.multiply(t, omega_d, out=tmp)
+            np.sin(tmp, out=out)
+            out *= a / omega_d
+            np.cos(tmp, out=tmp)
+            out += tmp
+            np.multiply(t, -a, out=tmp)
+            np.exp(tmp, out=tmp)
+            out *= tmp
+            out *= v0
+        else:
+            sqrt_delta = math.sqrt(delta)
+            s1, s2 = -a + sqrt_delta, -a - sqrt_delta
+            if s1 > 1e-9 or s2 > 1e-9 or abs(s1 - s2) < 1e-9 * abs(s1 + s2):
+                return None
+            np.multiply(t, s2, out=out)
+            np.exp(out, out=out)
+            out *= s1
+            np.multiply(t, s1, out=tmp)
+            np.exp(tmp, out=tmp)
+            tmp *= s2
+            out -= tmp
+            out *= v0 / (s1 - s2)
+        np.clip(out, -v0 * 0.3, v0 * 1.1, out=out)
+        return out
+
+
+def new_workspace_id() -> str:
+    """Identificador de uma nova área para o registro por sessão."""
+    return uuid.uuid4().hex
+
+
+def get_workspace(workspace_id: str) -> SimulationWorkspace:
+    """Área de trabalho da sessão (criada no primeiro uso; LRU de WORKSPACE_MAX_SESSIONS)."""
+    ws = _workspaces.get(workspace_id)
+    if ws is None:
+        ws = _workspaces[workspace_id] = SimulationWorkspace()
+        while len(_workspaces) > WORKSPACE_MAX_SESSIONS:
+            old_id, _ = _workspaces.popitem(last=False)
+            log.debug(f"Área de simulação {old_id[:8]} liberada (LRU)")
+    else:
+        _workspaces.move_to_end(workspace_id)
+    return ws
+
+
+def release_workspace(workspace_id: str | None) -> None:
+    """Libera os buffers da sessão (simulação parada)."""
+    if workspace_id and _workspaces.pop(workspace_id, None) is not None:
+        log.debug(f"Área de simulação {workspace_id[:8]} liberada")
+
+
+def workspace_stats() -> dict:
+    """Número de áreas ativas e memória total dos buffers."""
+    return {
+        "sessions": len(_workspaces),
+        "bytes": sum(ws.nbytes for ws in _workspaces.values()),
+        "max_sessions": WORKSPACE_MAX_SESSIONS,
+    }
@@ -6,7 +6,7 @@ import math
 from typing import Dict, Any, List, Optional
 
 from utils.store_diagnostics import convert_numpy_types, is_json_serializable, fix_store_data
-from utils.db_manager import save_test_session, get_test_session_details as db_get_session_details, session_name_exists, delete_test_session as db_delete_session # Alias para evitar conflito
+from utils.db_manager import save_test_session, get_test_session_details as db_get_session_details, parse_store_json, session_name_exists, delete_test_session as db_delete_session # Alias para evitar conflito
 from utils.mcp_disk_persistence import save_mcp_state_to_disk, load_mcp_state_from_disk
 # REMOVIDA A IMPORTAÇÃO CIRCULAR: from .transformer_mcp import STORE_IDS, DEFAULT_TRANSFORMER_INPUTS
 
@@ -423,8 +423,8 @@ class TransformerMCP:
 
             try:
                 if json_data_str:
-                    # Desserializa o JSON string
-                    data_content = json.loads(json_data_str)
+                    # Desserializa o JSON string (arrays codificados voltam a ser ndarrays)
+                    data_content = parse_store_json(json_data_str)
 
                     # Verificar se o store atual já tem dados
                     current_store_data = self.get_data(store_id)
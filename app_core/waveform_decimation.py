@@ -0,0 +1,157 @@
+# app_core/waveform_decimation.py
+"""
+Decimação de formas de onda para os gráficos Plotly.
+
+Cada balde de pixel (fatia do eixo x) mantém as amostras de primeiro, mínimo,
+máximo e último valor, então picos e oscilações continuam visíveis. Amostras
+marcadas (pico, vizinhas dos cruzamentos de 30/90/50% e do corte) são sempre
+mantidas, de modo que a linha desenhada passa exatamente pelos mesmos pontos
+que a análise interpola. A resolução completa fica no servidor para que um zoom
+reenvie apenas a janela visível; ela é guardada por sessão do navegador, para
+que o zoom de um usuário nunca receba a onda simulada por outro.
+"""
+import logging
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_POINTS = 2000
+POINTS_PER_BUCKET = 4  # primeiro, mínimo, máximo e último de cada balde
+FULL_RESOLUTION_CACHE_SIZE = 32  # Pares (sessão, gráfico) mantidos; os mais antigos são descartados
+
+# (id da sessão, id do gráfico) -> lista de traços em resolução completa {"x", "y", "keep"}
+_full_resolution: dict[tuple[str, str], list[dict]] = {}
+
+
+def minmax_bucket_indices(x: np.ndarray, y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    Índices de primeiro, mínimo, máximo e último ponto de cada balde do eixo x.
+
+    Os baldes têm largura igual em x (pixels), não em número de amostras, então
+    grades não uniformes são tratadas corretamente. x deve ser crescente.
+    """
+    n = len(x)
+    if n == 0:
+        return np.array([], dtype=int)
+    edges = np.linspace(x[0], x[-1], n_buckets + 1)
+    starts = np.unique(np.searchsorted(x, edges[:-1], side="left"))
+    starts = starts[starts < n]
+    ends = np.append(starts[1:], n)
+    counts = ends - starts
+
+    bucket_of = np.repeat(np.arange(len(starts)), counts)
+    mins = np.minimum.reduceat(y, starts)
+    maxs = np.maximum.reduceat(y, starts)
+    # Primeira ocorrência do mínimo/máximo dentro de cada balde
+    is_min = np.flatnonzero(y == mins[bucket_of])
+    is_max = np.flatnonzero(y == maxs[bucket_of])
+    argmins = is_min[np.searchsorted(is_min, starts)]
+    argmaxs = is_max[np.searchsorted(is_max, starts)]
+    return np.unique(np.concatenate((starts, ends - 1, argmins, argmaxs)))
+
+
+def waveform_keypoint_indices(
+    t: np.ndarray, v: np.ndarray, chop_time: float | None = None
+) -> np.ndarray:
+    """
+    Amostras que não podem ser descartadas: pico, pares que cercam os cruzamentos
+    de 30% e 90% na frente e de 50% na cauda, e a vizinhança do instante de corte.
+    """
+    n = len(v)
+    if n == 0:
+        return np.array([], dtype=int)
+    peak_idx = int(np.argmax(v))
+    peak = v[peak_idx]
+    keep = [0, n - 1, peak_idx]
+    if peak > 0:
+        front = v[: peak_idx + 1]
+        for level in (0.3, 0.9):
+            above = np.flatnonzero(front >= level * peak)
+            if len(above):
+                keep += [max(above[0] - 1, 0), above[0]]
+        below = np.flatnonzero(v[peak_idx:] < 0.5 * peak)
+        if len(below):
+            i50 = peak_idx + below[0]
+            keep += [i50 - 1, i50]
+    if chop_time is not None:
+        i_chop = int(np.searchsorted(t, chop_time))
+        keep += [i_chop - 1, i_chop, i_chop + 1]
+    keep = np.asarray(keep, dtype=int)
+    return np.unique(keep[(keep >= 0) & (keep < n)])
+
+
+def decimate_waveform(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int = DEFAULT_MAX_POINTS,
+    keep_indices: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduz (x, y) a cerca de max_points amostras preservando extremos e amostras marcadas.
+
+    Returns:
+        (x, y) decimados; as entradas são devolvidas sem cópia se já couberem no orçamento.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= max_points:
+        return x, y
+    n_buckets = max(1, max_points // POINTS_PER_BUCKET)
+    idx = minmax_bucket_indices(x, y, n_buckets)
+    if keep_indices is not None and len(keep_indices):
+        idx = np.union1d(idx, keep_indices)
+    return x[idx], y[idx]
+
+
+def remember_full_resolution(session_id: str, graph_id: str, traces: list[dict]) -> None:
+    """
+    Guarda os traços em resolução completa de um gráfico de uma sessão para reenvio no zoom.
+
+    Args:
+        session_id: Identificador da sessão do navegador dona da figura.
+        graph_id: id do dcc.Graph.
+        traces: Lista na ordem de fig.data, com "x", "y" e opcionalmente "keep" (índices).
+    """
+    key = (session_id, graph_id)
+    _full_resolution.pop(key, None)
+    _full_resolution[key] = traces
+    while len(_full_resolution) > FULL_RESOLUTION_CACHE_SIZE:
+        _full_resolution.pop(next(iter(_full_resolution)))
+
+
+def visible_window_traces(
+    session_id: str | None,
+    graph_id: str,
+    x_range: tuple[float, float] | None,
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> list[tuple[np.ndarray, np.ndarray]] | None:
+    """
+    Traços do gráfico da sessão recortados à janela visível e decimados ao orçamento de pontos.
+
+    Args:
+        session_id: Sessão do navegador que registrou a figura (None: nada registrado).
+        graph_id: id do dcc.Graph registrado com remember_full_resolution.
+        x_range: (x_min, x_max) visível, ou None para a onda inteira (autorange).
+
+    Returns:
+        Lista de (x, y) na ordem dos traços, ou None se o gráfico não estiver registrado para a sessão.
+    """
+    if session_id is None:
+        return None
+    traces = _full_resolution.get((session_id, graph_id))
+    if traces is None:
+        return None
+    result = []
+    for trace in traces:
+        x, y = trace["x"], trace["y"]
+        keep = trace.get("keep")
+        if x_range is not None:
+            # Uma amostra extra de cada lado para a linha cruzar as bordas da janela
+            lo = max(int(np.searchsorted(x, x_range[0], side="left")) - 1, 0)
+            hi = min(int(np.searchsorted(x, x_range[1], side="right")) + 1, len(x))
+            x, y = x[lo:hi], y[lo:hi]
+            if keep is not None:
+                keep = keep[(keep >= lo) & (keep < hi)] - lo
+        result.append(decimate_waveform(x, y, max_points, keep))
+    return result
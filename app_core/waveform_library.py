@@ -0,0 +1,280 @@
+# app_core/waveform_library.py
+"""
+Biblioteca persistente de formas de onda simuladas (cache em disco).
+
+Operadores simulam repetidamente os mesmos arranjos padrão por configuração de
+gerador e capacitância do objeto. cached_call(func, *args) grava o resultado de
+uma simulação em data/waveform_library/<hash>.npz, com chave pelo hash dos
+parâmetros canonizados (floats com WAVEFORM_LIBRARY_KEY_DIGITS dígitos
+significativos) e dos bytes da grade de tempo; numa nova chamada com as mesmas
+entradas o arquivo é lido em vez de simular. A biblioteca só é usada por quem
+chama cached_call explicitamente (o refinamento progressivo, com
+config.WAVEFORM_LIBRARY_ENABLED); as funções de simulação não gravam nada.
+
+Tamanho e LRU: um índice em memória (arquivo → último uso, bytes) mantém o
+total sem listar o diretório a cada gravação. O diretório só é relido na
+primeira gravação, a cada WAVEFORM_LIBRARY_RESCAN_S (arquivos de outros
+processos) e antes de um descarte, para decidir com o conteúdo real.
+
+Segurança entre processos (vários workers do servidor no mesmo diretório):
+- gravação em arquivo temporário no mesmo diretório + os.replace (atômico):
+  um leitor vê o arquivo completo ou nenhum;
+- arquivo ilegível é tratado como falta e removido;
+- o LRU usa o mtime (atualizado a cada acerto) na releitura e tolera arquivos
+  já removidos por outro processo, então não há trava entre processos.
+
+Mudanças no modelo de simulação devem incrementar WAVEFORM_LIBRARY_VERSION,
+que entra na chave e invalida os arquivos antigos.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from utils.paths import get_data_dir
+
+log = logging.getLogger(__name__)
+
+WAVEFORM_LIBRARY_VERSION = 1  # Incrementar quando o modelo de simulação mudar
+WAVEFORM_LIBRARY_SUBDIR = "waveform_library"
+WAVEFORM_LIBRARY_MAX_BYTES = 512 * 1024 * 1024  # Tamanho total antes do descarte LRU
+WAVEFORM_LIBRARY_EVICT_TARGET = 0.9  # Fração do limite mantida após o descarte
+WAVEFORM_LIBRARY_KEY_DIGITS = 12  # Dígitos significativos dos parâmetros na chave
+WAVEFORM_LIBRARY_STALE_TMP_S = 3600  # Temporários mais antigos são de gravações interrompidas
+WAVEFORM_LIBRARY_RESCAN_S = 300  # Releitura do diretório no índice (arquivos de outros processos)
+
+_settings = {
+    "enabled": True,
+    "directory": None,  # None: data/waveform_library
+    "max_bytes": WAVEFORM_LIBRARY_MAX_BYTES,
+}
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0, "scans": 0}
+
+# Índice do diretório: arquivo → [último uso, bytes]; o total evita somar tudo a cada gravação
+_index: dict[Path, list] = {}
+_index_state = {"directory": None, "total": 0, "scanned_at": None}
+_index_lock = threading.Lock()
+
+
+def configure_waveform_library(
+    enabled: bool | None = None, directory: str | Path | None = None, max_bytes: int | None = None
+) -> None:
+    """Ativa/desativa a biblioteca, troca o diretório ou o limite de tamanho."""
+    if enabled is not None:
+        _settings["enabled"] = bool(enabled)
+    if directory is not None:
+        _settings["directory"] = Path(directory)
+    if max_bytes is not None:
+        _settings["max_bytes"] = int(max_bytes)
+
+
+def library_dir() -> Path:
+    """Diretório da biblioteca (criado se necessário)."""
+    directory = _settings["directory"] or get_data_dir() / WAVEFORM_LIBRARY_SUBDIR
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _canonical(value):
+    """Forma canônica (hasheável em JSON) de um argumento; TypeError se não suportado."""
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return f"{float(value):.{WAVEFORM_LIBRARY_KEY_DIGITS}g}"
+    if isinstance(value, np.ndarray):
+        arr = np.ascontiguousarray(value, dtype=float)
+        digest = hashlib.blake2b(arr.tobytes(), digest_size=16).hexdigest()
+        return {"shape": list(arr.shape), "blake2b": digest}
+    raise TypeError(f"Argumento não suportado na chave da biblioteca: {type(value).__name__}")
+
+
+def waveform_key(name: str, *args, **kwargs) -> str:
+    """Hash (hex) das entradas canonizadas de uma simulação."""
+    payload = {
+        "fn": name,
+        "version": WAVEFORM_LIBRARY_VERSION,
+        "args": [_canonical(a) for a in args],
+        "kwargs": {k: _canonical(v) for k, v in sorted(kwargs.items())},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _load(path: Path) -> tuple | None:
+    """Lê um resultado gravado por _store; None (e remove o arquivo) se estiver corrompido."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            result = tuple(data[f"a{i}"] if kind == "array" else kind["value"] for i, kind in enumerate(meta))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        log.warning(f"[WAVEFORM LIBRARY] Arquivo ilegível {path.name}, descartando: {e}")
+        path.unlink(missing_ok=True)
+        return None
+    try:
+        os.utime(path)  # Marca o uso para o LRU
+    except OSError:
+        pass
+    return result
+
+
+def _store(path: Path, result: tuple) -> None:
+    """Grava o resultado de forma atômica (temporário + os.replace)."""
+    arrays, meta = {}, []
+    for i, item in enumerate(result):
+        if isinstance(item, np.ndarray):
+            arrays[f"a{i}"] = item
+            meta.append("array")
+        else:
+            meta.append({"value": item.item() if isinstance(item, np.generic) else item})
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def _scan(directory: Path) -> None:
+    """Relê o diretório no índice (com _index_lock) e remove temporários abandonados."""
+    now = time.time()
+    for tmp in directory.glob(".*.npz.tmp"):
+        try:
+            if now - tmp.stat().st_mtime > WAVEFORM_LIBRARY_STALE_TMP_S:
+                tmp.unlink()
+        except FileNotFoundError:
+            continue
+    _index.clear()
+    for path in directory.glob("*.npz"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:  # Removido por outro processo
+            continue
+        _index[path] = [st.st_mtime, st.st_size]
+    _index_state.update(directory=directory, total=sum(size for _, size in _index.values()), scanned_at=now)
+    _stats["scans"] += 1
+
+
+def _ensure_index(directory: Path) -> None:
+    """Índice do diretório atual, relido se for outro diretório ou se estiver velho (com _index_lock)."""
+    scanned_at = _index_state["scanned_at"]
+    if (
+        _index_state["directory"] != directory
+        or scanned_at is None
+        or time.time() - scanned_at > WAVEFORM_LIBRARY_RESCAN_S
+    ):
+        _scan(directory)
+
+
+def _record_use(path: Path, size: int | None = None) -> None:
+    """Marca o uso de um arquivo no índice; size (bytes) registra uma gravação nova."""
+    with _index_lock:
+        if _index_state["directory"] != path.parent:
+            return
+        entry = _index.get(path)
+        if size is None:
+            if entry is not None:
+                entry[0] = time.time()
+            return
+        _index_state["total"] += size - (entry[1] if entry else 0)
+        _index[path] = [time.time(), size]
+
+
+def _evict(directory: Path, keep: Path) -> None:
+    """Remove os arquivos menos usados (exceto keep) até caber em WAVEFORM_LIBRARY_EVICT_TARGET do limite."""
+    with _index_lock:
+        _ensure_index(directory)
+        if _index_state["total"] <= _settings["max_bytes"]:
+            return
+        _scan(directory)  # Decide com o conteúdo real (outros processos também gravam)
+        total = _index_state["total"]
+        if total <= _settings["max_bytes"]:
+            return
+        target = _settings["max_bytes"] * WAVEFORM_LIBRARY_EVICT_TARGET
+        removed = 0
+        for path, (_, size) in sorted(_index.items(), key=lambda item: item[1][0]):
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            del _index[path]
+            total -= size
+            removed += 1
+        _index_state["total"] = total
+    _stats["evicted"] += removed
+    log.debug(f"[WAVEFORM LIBRARY] {removed} forma(s) de onda descartada(s) (LRU), {total / 1e6:.1f} MB")
+
+
+def cached_call(func, *args, store_if=None, ignore: tuple[str, ...] = (), **kwargs):
+    """
+    Resultado de func(*args, **kwargs) (tupla de arrays e escalares) pela biblioteca em disco.
+
+    Lê o arquivo das mesmas entradas, se houver; senão chama func e grava o
+    resultado. Com a biblioteca desativada (configure_waveform_library) ou
+    argumentos sem forma canônica, apenas chama func.
+
+    Args:
+        store_if: Predicado sobre o resultado; resultados rejeitados (p.ex. simulação
+            que falhou) não são gravados.
+        ignore: Argumentos nomeados que não afetam o resultado e ficam fora da chave.
+    """
+    if not _settings["enabled"]:
+        return func(*args, **kwargs)
+    name = f"{func.__module__}.{func.__qualname__}"
+    try:
+        key_kwargs = {k: v for k, v in kwargs.items() if k not in ignore}
+        key = waveform_key(name, *args, **key_kwargs)
+    except TypeError:
+        return func(*args, **kwargs)
+
+    directory = library_dir()
+    path = directory / f"{key}.npz"
+    result = _load(path)
+    if result is not None:
+        _stats["hits"] += 1
+        _record_use(path)
+        log.debug(f"[WAVEFORM LIBRARY] Acerto {key[:12]} ({func.__name__})")
+        return result
+
+    _stats["misses"] += 1
+    result = func(*args, **kwargs)
+    if store_if is None or store_if(result):
+        try:
+            _store(path, result)
+            _stats["stores"] += 1
+            _record_use(path, path.stat().st_size)
+            _evict(directory, path)
+        except (OSError, TypeError, ValueError) as e:
+            log.warning(f"[WAVEFORM LIBRARY] Falha ao gravar {key[:12]}: {e}")
+    return result
+
+
+def waveform_library_stats() -> dict:
+    """Acertos, faltas, gravações, descartes e releituras deste processo, mais o conteúdo do diretório."""
+    with _index_lock:
+        _scan(library_dir())
+        files, total = len(_index), _index_state["total"]
+    return {**_stats, "files": files, "bytes": total, "max_bytes": _settings["max_bytes"]}
+
+
+def clear_waveform_library() -> None:
+    """Remove todas as formas de onda gravadas e zera as estatísticas."""
+    with _index_lock:
+        for path in library_dir().glob("*.npz"):
+            path.unlink(missing_ok=True)
+        _index.clear()
+        _index_state.update(directory=None, total=0, scanned_at=None)
+    for key in _stats:
+        _stats[key] = 0
+    log.debug("Biblioteca de formas de onda esvaziada.")
@@ -2,19 +2,42 @@
 import logging
 import math
 import re
+import uuid
 import warnings
 
 import dash
 import dash_bootstrap_components as dbc
 import numpy as np
 import plotly.graph_objects as go
-from dash import Input, Output, State, html, ctx
+from dash import Input, Output, Patch, State, html, ctx
 from dash.exceptions import PreventUpdate
-from scipy.fftpack import fft, fftfreq, ifft
-from scipy.optimize import OptimizeWarning, curve_fit
+from scipy.optimize import OptimizeWarning
 
 # Import app instance and constants/utils
 from app import app  # Import app instance correctly
+from app_core import calculations
+from app_core.calculations import generator_energy_table
+from app_core.impulse_fit import filter_residual_on_grid, fit_double_exp_base
+from app_core.impulse_grid import GRID_POINTS_PER_PEAK, adaptive_time_grid, hybrid_impulse_time_grid
+from app_core.impulse_optimizer import optimize_resistors, target_times
+from app_core.impulse_test_plan import compute_test_plan
+from app_core.impulse_search import search_generator_configurations
+from app_core.marx_model import simulate_marx_impulse
+from app_core.param_cache import input_fingerprint, log_param_cache_stats, memoized_params
+from app_core.progressive_sim import (
+    cancel_progressive_simulation,
+    poll_progressive_simulation,
+    start_progressive_simulation,
+)
+from app_core.sim_workspace import get_workspace, release_workspace
+from app_core.waveform_decimation import (
+    decimate_waveform,
+    remember_full_resolution,
+    visible_window_traces,
+    waveform_keypoint_indices,
+)
+from config import WAVEFORM_LIBRARY_ENABLED, WAVEFORM_MAX_POINTS
+from layouts import COLORS
 from utils import constants as const  # Assuming constants are in utils.constants
 from utils.routes import ROUTE_IMPULSE, normalize_pathname
 from utils.store_diagnostics import convert_numpy_types, is_json_serializable
@@ -81,6 +104,8 @@ RF_REFERENCE_DATA_SI = [
     (32, 400),
 ]
 RT_DEFAULT_PER_COLUMN = {"lightning": 100, "switching": 2500, "chopped": 120}
+SIMULATION_TAILS = 2.0  # Janela simulada = 2x o T2 nominal do tipo de impulso
+SIMULATION_MODEL_LABELS = {"hybrid": "RLC+K", "rlc": "RLC", "marx": "Marx"}  # Opções de simulation-model-type
 
 # --- Funções Auxiliares (Copied from user feedback) ---
 
@@ -225,6 +250,7 @@ def calculate_effective_gen_params(n_stages, n_parallel):
     return c_gen_effective
 
 
+@memoized_params()
 def calculate_transformer_inductance(voltage_kv, power_mva, impedance_percent, freq_hz=60):
     """Calcula a indutância do transformador a partir de seus parâmetros nominais."""
     if voltage_kv is None or power_mva is None or impedance_percent is None or freq_hz is None:
@@ -477,91 +503,22 @@ def calculate_k_factor_transform(v, t, return_params=False):
             else (v_test, v_base, v_residual_filtered, overshoot_rel)
         )
 
-    def double_exp_func_fit(t_fit, A_norm, alpha, beta):
-        if alpha <= 1e-12 or beta <= 1e-12 or beta <= alpha + 1e-9:
-            return np.full_like(t_fit, 1e12)
-        try:
-            t_peak = math.log(beta / alpha) / (beta - alpha) if beta > alpha else 0
-            norm_factor = math.exp(-alpha * t_peak) - math.exp(-beta * t_peak) if t_peak >= 0 else 0
-            if abs(norm_factor) < 1e-12:
-                return np.zeros_like(t_fit)
-            k_norm = A_norm / norm_factor
-            t_safe = np.maximum(t_fit, 0)
-            result = k_norm * (np.exp(-alpha * t_safe) - np.exp(-beta * t_safe))
-            return result
-        except (ValueError, OverflowError, ZeroDivisionError) as e:
-            logger.error(f"Erro interno dupla exp ajuste: {e}")
-            return np.full_like(t_fit, 1e12)
-
-    try:
-        t_sec = t * 1e-6
-        peak_idx = np.argmax(v)
-        t_half_idx = (
-            np.argmin(np.abs(v[peak_idx:] - 0.5 * peak_value_orig)) + peak_idx
-            if peak_idx < len(v) - 1
-            else len(v) - 1
-        )
-        T2_approx_sec = max(1e-7, t_sec[t_half_idx])
-        t_30_idx = (
-            np.argmin(np.abs(v[: peak_idx + 1] - 0.3 * peak_value_orig)) if peak_idx > 0 else 0
-        )
-        t_90_idx = (
-            np.argmin(np.abs(v[: peak_idx + 1] - 0.9 * peak_value_orig))
-            if peak_idx > 0
-            else peak_idx
-        )
-        T1_approx_sec = (
-            (1.67 / 1e6) * max(1e-3, (t[t_90_idx] - t[t_30_idx]))
-            if t_90_idx > t_30_idx
-            else (LIGHTNING_IMPULSE_FRONT_TIME_NOM * 1e-6)
-        )
-        T1_approx_sec = max(0.1e-6, T1_approx_sec)
-        alpha_est = 0.7 / T2_approx_sec if T2_approx_sec > 1e-9 else 1e7
-        beta_est = 2.5 / T1_approx_sec if T1_approx_sec > 1e-9 else 1e8
-        if beta_est <= alpha_est:
-            beta_est = alpha_est * 5
-        A_est = peak_value_orig
-        lower_bounds = [peak_value_orig * 0.5, alpha_est * 0.1, beta_est * 0.5]
-        upper_bounds = [peak_value_orig * 1.5, alpha_est * 10, beta_est * 10]
-        popt, pcov = curve_fit(
-            double_exp_func_fit,
-            t_sec,
-            v,
-            p0=[A_est, alpha_est, beta_est],
-            bounds=(lower_bounds, upper_bounds),
-            maxfev=5000,
-            method="trf",
-        )
-        A_fit, alpha_fit, beta_fit = popt
+    fit = fit_double_exp_base(t, v)
+    if fit is not None:
+        v_base = fit["v_base"]
+        alpha_fit, beta_fit = fit["alpha"], fit["beta"]
+        v_base_success = True
         logger.debug(
-            f"Ajuste curva base: A={A_fit:.2f}, alpha={alpha_fit:.2e}, beta={beta_fit:.2e}"
+            f"Ajuste curva base: A={fit['amplitude']:.2f}, alpha={alpha_fit:.2e}, beta={beta_fit:.2e}"
         )
-        v_base = double_exp_func_fit(t_sec, A_fit, alpha_fit, beta_fit)
-        v_base_success = True
-    except (RuntimeError, ValueError, Exception) as e:
-        logger.warning(f"Ajuste curva base K-Factor falhou: {e}. Usando onda original.")
-        v_base = np.copy(v)
-        v_base_success = False
-        alpha_fit, beta_fit = None, None
+    else:
+        logger.warning("Ajuste curva base K-Factor falhou. Usando onda original.")
     v_base = np.maximum(v_base, 0)
     v_residual = v - v_base
     v_residual_filtered = np.zeros_like(v_residual)
-    if len(t) > 1 and abs(t[1] - t[0]) > 1e-12 and v_base_success:
+    if len(t) > 1 and np.min(np.diff(t)) > 1e-12 and v_base_success:
         try:
-            dt_fft = (t[1] - t[0]) * 1e-6
-            frequencies = fftfreq(len(t), dt_fft)
-            v_residual_fft = fft(v_residual)
-            k_factor_filter = np.ones_like(frequencies, dtype=complex)
-            f_MHz = np.abs(frequencies) * 1e-6
-            f_MHz_sq = f_MHz**2
-            non_zero_freq_mask = f_MHz_sq > 1e-12
-            denominator = 1.0 + 2.2 * f_MHz_sq[non_zero_freq_mask]
-            filter_values = np.divide(
-                1.0, denominator, where=denominator > 1e-12, out=np.zeros_like(denominator)
-            )
-            k_factor_filter[non_zero_freq_mask] = filter_values
-            v_residual_filtered_fft = v_residual_fft * k_factor_filter
-            v_residual_filtered = np.real(ifft(v_residual_filtered_fft))
+            v_residual_filtered = filter_residual_on_grid(t, v_residual, kind="iec")
         except Exception as e_fft:
             logger.error(f"Erro FFT/IFFT K-factor: {e_fft}.")
             v_residual_filtered = np.zeros_like(v_residual)
@@ -1325,6 +1282,136 @@ def create_energy_details_table(energy_required_kj, max_energy_kj, generator_con
         )
 
 
+def create_generator_energy_table(table, selected_config=None):
+    """Cria a tabela de todas as configurações do gerador (viáveis primeiro) a partir de generator_energy_table."""
+    if table is None or len(table) == 0:
+        return dbc.Alert("Dados de energia indisponíveis.", color="warning", style={"fontSize": "0.7rem"})
+    header = html.Thead(
+        html.Tr(
+            [
+                html.Th("Configuração"),
+                html.Th("η"),
+                html.Th("V Carga"),
+                html.Th("V Máx. Ensaio"),
+                html.Th("Energia Req. / Disp."),
+                html.Th("Status"),
+            ]
+        )
+    )
+    rows = []
+    for row in table[np.argsort(~table["feasible"], kind="stable")]:
+        status = "Viável" if row["feasible"] else ("Energia" if row["voltage_ok"] else "Tensão")
+        rows.append(
+            html.Tr(
+                [
+                    html.Td(str(row["config"])),
+                    html.Td(f"{row['efficiency'] * 100:.1f}%"),
+                    html.Td(
+                        format_parameter_value(row["charging_voltage_kv"], 0, "kV"),
+                        className="" if row["voltage_ok"] else "text-danger",
+                    ),
+                    html.Td(format_parameter_value(row["max_test_voltage_kv"], 0, "kV")),
+                    html.Td(
+                        f"{row['energy_required_kj']:.1f} / {row['energy_available_kj']:.0f} kJ",
+                        className="" if row["energy_ok"] else "text-danger",
+                    ),
+                    html.Td(status, className="text-success" if row["feasible"] else "text-danger"),
+                ],
+                style={"fontWeight": "bold"} if row["config"] == selected_config else None,
+            )
+        )
+    summary = html.Small(
+        f"{int(table['feasible'].sum())} de {len(table)} configurações viáveis "
+        f"(tensão de carga ≤ Vmáx e energia requerida ≤ disponível).",
+        className="text-muted",
+    )
+    return [
+        summary,
+        dbc.Table(
+            [header, html.Tbody(rows)], bordered=True, hover=True, striped=True, size="sm", className="mb-0"
+        ),
+    ]
+
+
+def create_test_plan_table(plan):
+    """Cria a tabela do plano de ensaios (enrolamento × tipo de impulso) a partir de compute_test_plan."""
+    if not plan or not plan.get("jobs"):
+        return dbc.Alert(
+            "Nenhum NBI/SIL informado nos dados do transformador.", color="warning", style={"fontSize": "0.7rem"}
+        )
+    type_labels = {"lightning": "LI", "chopped": "LIC", "switching": "SI"}
+    status_classes = {True: "text-success", None: "text-warning"}  # compliant None: indeterminado pelo modelo
+    header = html.Thead(
+        html.Tr(
+            [
+                html.Th("Enrol."),
+                html.Th("Tipo"),
+                html.Th("Tensão"),
+                html.Th("Circuito"),
+                html.Th("Tempos"),
+                html.Th("Carga / Energia"),
+                html.Th("Status"),
+            ]
+        )
+    )
+    rows = []
+    for job in plan["jobs"]:
+        circuit, energy, wave = job["circuit"], job["energy"], job["waveform"] or {}
+        if job["impulse_type"] == "switching":
+            times = f"Tp={wave.get('t_p_us') or 0:.0f} / T2={wave.get('t_2_us') or 0:.0f} µs"
+        elif job["impulse_type"] == "chopped":
+            times = f"T1={wave.get('t_front_us') or 0:.2f} / Tc={wave.get('chop_time_us') or 0:.2f} µs"
+        else:
+            times = f"T1={wave.get('t_front_us') or 0:.2f} / T2={wave.get('t_tail_us') or 0:.1f} µs"
+        if circuit:
+            circuit_text = (
+                f"{circuit['generator_config']} | Rf: {circuit['front_resistor_expression']} | "
+                f"Rt: {circuit['tail_resistor_expression']}"
+                + (f" | gap {circuit['gap_cm']:.1f} cm" if circuit.get("gap_cm") else "")
+            )
+            energy_text = (
+                f"{energy['charging_voltage_kv']:.0f} kV | "
+                f"{energy['energy_required_kj']:.1f} / {energy['energy_available_kj']:.0f} kJ"
+            )
+            status = wave.get("status_geral", "—")
+            if job["status"] == "model_limited":
+                status = "Indeterminado (modelo)"
+            if job["message"]:
+                times = html.Span(times, title=job["message"])
+        else:
+            circuit_text, energy_text, times = job["message"] or "—", "—", "—"
+            status = "Sem circuito" if job["status"] == "no_circuit" else "Erro"
+        rows.append(
+            html.Tr(
+                [
+                    html.Td(job["winding_label"]),
+                    html.Td(type_labels.get(job["impulse_type"], job["impulse_type"])),
+                    html.Td(format_parameter_value(job["test_voltage_kv"], 0, "kV")),
+                    html.Td(circuit_text),
+                    html.Td(times),
+                    html.Td(energy_text),
+                    html.Td(status, className=status_classes.get(job["compliant"], "text-danger")),
+                ]
+            )
+        )
+    summary = html.Small(
+        f"{plan['n_compliant']} de {plan['n_jobs']} ensaios conformes"
+        + (
+            f", {plan['n_model_limited']} indeterminado(s) pelo modelo de corte (LIC)"
+            if plan.get("n_model_limited")
+            else ""
+        )
+        + f" ({plan['elapsed_s']:.1f} s).",
+        className="text-muted",
+    )
+    return [
+        summary,
+        dbc.Table(
+            [header, html.Tbody(rows)], bordered=True, hover=True, striped=True, size="sm", className="mb-0"
+        ),
+    ]
+
+
 # Moved definition before usage in run_simulation
 def create_waveform_analysis_table(
     analysis_results, impulse_type, v_test_kv_input=None, gap_distance_cm=None
@@ -1632,23 +1719,37 @@ def toggle_simulation(n_clicks, n_intervals, status_data):
     running = (
         status_data.get("running", False) if status_data else False
     )  # Default to False if None
+    # Identificador da sessão da simulação automática (chave dos trabalhos de progressive_sim)
+    session_id = status_data.get("session_id") if status_data else None
 
     if trigger_id == "simulate-button" and n_clicks:
         # Alternar estado
         new_running = not running
+        if new_running:
+            session_id = session_id or uuid.uuid4().hex
+        else:
+            log_param_cache_stats()
+            # A sessão continua: os gráficos da última simulação seguem com zoom em resolução completa
+            cancel_progressive_simulation(session_id)
+            # Sem área, o próximo início simula de novo mesmo com as entradas inalteradas
+            release_workspace(session_id)
         return (
             "Parar Simulação" if new_running else "Simular Forma de Onda",
             "ms-2" if new_running else "ms-2 d-none",
             not new_running,  # Intervalo ativo quando running=True
-            {"running": new_running},
+            {"running": new_running, "session_id": session_id},
         )
 
+    if trigger_id == "auto-simulate-interval" and running:
+        # Tick: nada é recalculado aqui, então o estado publicado não muda
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+
     # Manter estado atual
     return (
         "Parar Simulação" if running else "Simular Forma de Onda",
         "ms-2" if running else "ms-2 d-none",
         not running,
-        {"running": running},
+        {"running": running, "session_id": session_id},
     )
 
 
@@ -1746,6 +1847,151 @@ def update_rt_value(up_clicks, down_clicks, current_value):
     return current_value
 
 
+# Callback para sugerir configuração do gerador e resistores (busca no inventário)
+@app.callback(
+    Output("suggested-resistors-output", "children"),
+    Input("suggest-resistors-btn", "n_clicks"),
+    [
+        State("impulse-type", "value"),
+        State("test-voltage", "value"),
+        State("test-object-capacitance", "value"),
+        State("stray-capacitance", "value"),
+        State("external-inductance", "value"),
+        State("transformer-inductance", "value"),
+        State("generator-config", "value"),
+    ],
+    prevent_initial_call=True,
+)
+def suggest_resistors(
+    n_clicks, impulse_type, test_voltage, c_dut_pf, c_stray_pf, l_ext_uh, l_trafo_h, generator_config
+):
+    """Dimensiona Rf/Rt para a configuração atual e busca as combinações conformes de gerador/Rf/Rt/indutor."""
+    if not n_clicks:
+        raise PreventUpdate
+    if not test_voltage or not c_dut_pf:
+        return html.Span("Informe tensão e capacitância do objeto.", className="text-warning")
+
+    try:
+        search = search_generator_configurations(
+            impulse_type or "lightning",
+            float(test_voltage),
+            float(c_dut_pf),
+            float(c_stray_pf or 0.0),
+            l_extra_h=float(l_ext_uh or 0.0) * 1e-6,
+            l_transformer_h=float(l_trafo_h or 0.0),
+            max_results=5,
+        )
+    except Exception as e:
+        logger.error(f"Erro na busca de configuração do gerador: {e}")
+        return html.Span(f"Erro na busca: {e}", className="text-danger")
+
+    if not search["compliant"]:
+        return html.Span(
+            f"Nenhuma combinação conforme entre {search['n_evaluated']} avaliadas.",
+            className="text-warning",
+        )
+
+    t1_label = "Tp" if impulse_type == "switching" else "T1"
+    items = []
+    if generator_config:
+        try:
+            opt = optimize_resistors(
+                generator_config,
+                impulse_type or "lightning",
+                float(c_dut_pf),
+                float(c_stray_pf or 0.0),
+                l_extra_h=float(l_ext_uh or 0.0) * 1e-6,
+                l_transformer_h=float(l_trafo_h or 0.0),
+            )
+            items.append(
+                html.Div(
+                    f"{generator_config} (contínuo): Rf={opt['rf_total_continuous']:.1f} Ω, "
+                    f"Rt={opt['rt_total_continuous']:.1f} Ω → Rf: {opt['front_resistor_expression']} | "
+                    f"Rt: {opt['tail_resistor_expression']} | {t1_label}={opt['t1_us']:.2f} µs, "
+                    f"T2={opt['t2_us']:.1f} µs",
+                    className="fw-bold" if opt["compliant"] else "text-warning",
+                )
+            )
+        except ValueError as e:
+            logger.warning(f"Otimizador de resistores sem solução para {generator_config}: {e}")
+    items += [
+        html.Div(
+            f"{c['generator_config']} | Rf: {c['front_resistor_expression']} | "
+            f"Rt: {c['tail_resistor_expression']} | L: {c['inductor_h'] * 1e6:.0f} µH | "
+            f"{t1_label}={c['t1_us']:.2f} µs, T2={c['t2_us']:.1f} µs | η={c['efficiency'] * 100:.0f}%"
+        )
+        for c in search["compliant"]
+    ]
+    items.append(
+        html.Small(
+            f"{search['n_compliant']} conformes de {search['n_evaluated']} ({search['elapsed_s'] * 1000:.0f} ms)",
+            className="text-muted",
+        )
+    )
+    return items
+
+
+# Plano de ensaios de impulso para todos os enrolamentos e tipos de impulso
+@app.callback(
+    Output("impulse-test-plan-output", "children"),
+    Input("impulse-test-plan-btn", "n_clicks"),
+    [
+        State("transformer-inputs-store", "data"),
+        State("test-object-capacitance", "value"),
+        State("stray-capacitance", "value"),
+        State("external-inductance", "value"),
+    ],
+    prevent_initial_call=True,
+)
+def run_impulse_test_plan(n_clicks, transformer_data, c_dut_pf, c_stray_pf, l_ext_uh):
+    """Calcula circuito, energia, forma de onda e conformidade de LI/LIC/SI para AT, BT e terciário."""
+    if not n_clicks:
+        raise PreventUpdate
+    if not transformer_data:
+        return html.Span("Preencha os dados do transformador.", className="text-warning")
+    try:
+        plan = compute_test_plan(
+            transformer_data,
+            float(c_dut_pf or 0.0),
+            float(c_stray_pf or 0.0),
+            l_extra_h=float(l_ext_uh or 0.0) * 1e-6,
+        )
+    except Exception as e:
+        logger.error(f"Erro no plano de ensaios de impulso: {e}")
+        return html.Span(f"Erro no plano de ensaios: {e}", className="text-danger")
+    return create_test_plan_table(plan)
+
+
+# Tabela de energia/eficiência de todas as configurações do gerador (atualizada a cada entrada)
+@app.callback(
+    Output("energy-details-table", "children"),
+    [
+        Input("test-voltage", "value"),
+        Input("test-object-capacitance", "value"),
+        Input("stray-capacitance", "value"),
+        Input("impulse-type", "value"),
+        Input("generator-config", "value"),
+    ],
+)
+def update_generator_energy_table(test_voltage, c_dut_pf, c_stray_pf, impulse_type, generator_config):
+    """Mostra, para a tensão e a carga atuais, quais configurações do gerador atendem tensão e energia."""
+    if not test_voltage:
+        return dbc.Alert(
+            "Informe a tensão de ensaio para avaliar as configurações.",
+            color="info",
+            className="m-2",
+            style={"fontSize": "0.7rem"},
+        )
+    try:
+        table = generator_energy_table(
+            float(test_voltage), float(c_dut_pf or 0.0), float(c_stray_pf or 0.0), impulse_type or "lightning"
+        )
+    except (ValueError, TypeError) as e:
+        logger.error(f"Erro na tabela de energia das configurações: {e}")
+        return dbc.Alert(f"Erro ao avaliar configurações: {e}", color="danger", style={"fontSize": "0.7rem"})
+    return create_generator_energy_table(table, generator_config)
+
+
 # --- Callback para exibir informações do transformador na página ---
 # Este callback foi removido pois o painel agora é criado diretamente no layout
 # @app.callback(
@@ -1974,6 +2220,8 @@ def update_impulse_simulation(
                 "tail_time": tail_time,
                 "waveform_type": f"{rise_time:.1f}/{tail_time:.1f} µs",
             },
+            # Forma de onda em resolução completa (codificada em binário por convert_numpy_types)
+            "waveform": {"t_us": t * 1e6, "v_pu": v},
             "timestamp": datetime.datetime.now().isoformat(),
         }
 
@@ -2022,14 +2270,16 @@ def simulate_impulse_circuit(
 ):
     """Simula o circuito de impulso e retorna os vetores de tempo e tensão"""
     # Implementação simplificada - em um sistema real, usaríamos uma biblioteca de simulação de circuitos
-    num_points = int(sim_time / time_step) + 1
-    t = np.linspace(0, sim_time, num_points)
-
     # Cálculo da forma de onda de impulso usando a equação padrão
     alpha = 1 / (r_tail * capacitance)
     beta = 1 / (r_front * capacitance)
     v0 = 1.0  # Tensão normalizada
 
+    # Grade adaptativa: passo pedido na frente/pico, crescimento geométrico na cauda
+    t_peak = math.log(beta / alpha) / (beta - alpha) if beta > alpha else sim_time / 100
+    points_per_peak = max(GRID_POINTS_PER_PEAK, int(t_peak / time_step))
+    t = adaptive_time_grid(sim_time, t_peak, points_per_peak=points_per_peak)
+
     v = v0 * (np.exp(-alpha * t) - np.exp(-beta * t))
 
     # Normalizar para tensão de pico = 1.0
@@ -2050,16 +2300,24 @@ def analyze_impulse_waveform(t, v):
 
     # Encontrar tempo de frente (T1)
     # Tempo entre 30% e 90% da tensão de pico, multiplicado por 1.67
-    idx_30 = np.where(v >= 0.3 * peak_voltage)[0][0]
-    idx_90 = np.where(v >= 0.9 * peak_voltage)[0][0]
-    rise_time = 1.67 * (t_us[idx_90] - t_us[idx_30])
+    # (interpolação linear: a grade de tempo pode ser não uniforme)
+    t_front_us, v_front = t_us[: peak_idx + 1], v[: peak_idx + 1]
+    t_30 = np.interp(0.3 * peak_voltage, v_front, t_front_us)
+    t_90 = np.interp(0.9 * peak_voltage, v_front, t_front_us)
+    rise_time = 1.67 * (t_90 - t_30)
 
     # Encontrar tempo de cauda (T2)
     # Tempo do início até 50% da tensão de pico na cauda
     idx_50_tail = np.where(v[peak_idx:] <= 0.5 * peak_voltage)[0]
     if len(idx_50_tail) > 0:
         idx_50_tail = idx_50_tail[0] + peak_idx
-        tail_time = t_us[idx_50_tail] - t_us[0]
+        # Cauda descendente: inverte o trecho para np.interp
+        t_50 = np.interp(
+            0.5 * peak_voltage,
+            v[idx_50_tail : idx_50_tail - 2 : -1],
+            t_us[idx_50_tail : idx_50_tail - 2 : -1],
+        )
+        tail_time = t_50 - t_us[0]
     else:
         # Se não encontrar o ponto de 50%, estimar
         tail_time = 50.0  # valor padrão
@@ -2120,6 +2378,329 @@ def create_impulse_graph(t, v, peak_voltage, rise_time, tail_time):
     return fig
 
 
+@memoized_params()
+def impulse_circuit_from_inputs(
+    test_voltage_kv,
+    generator_config,
+    c_dut_pf,
+    c_stray_pf,
+    rf_expression,
+    rt_expression,
+    inductance_factor,
+    tail_resistance_factor,
+    l_ext_uh,
+    l_trafo_h,
+    l_inductor_h,
+    impulse_type,
+    gap_distance_cm,
+):
+    """
+    Parâmetros de simulate_hybrid_impulse a partir das entradas da tela de impulso.
+
+    Returns:
+        Dicionário com v0_charge (V), rf, rt (Ohm), l_total (H), c_gen, c_load (F),
+        gap_distance_cm e efficiency, mais stages, parallel, rf_per_column,
+        rt_per_column e l_external (fora do gerador) para o modelo Marx; None se
+        alguma entrada for inválida.
+    """
+    stages, parallel, max_voltage_kv, _ = calculations.get_generator_params(generator_config)
+    rf_per_column, _ = calculations.parse_resistor_expression(rf_expression)
+    rt_per_column, _ = calculations.parse_resistor_expression(rt_expression)
+    if not test_voltage_kv or not math.isfinite(rf_per_column) or not math.isfinite(rt_per_column):
+        return None
+    c_load = calculations.calculate_total_load_capacitance(c_dut_pf, c_stray_pf, impulse_type, max_voltage_kv)
+    l_ext_h = float(l_ext_uh or 0.0) * 1e-6
+    l_trafo_h = float(l_trafo_h or 0.0)
+    l_inductor_h = float(l_inductor_h or 0.0) if impulse_type != "switching" else 0.0
+    inductance_factor = float(inductance_factor or 1.0)
+    tail_resistance_factor = float(tail_resistance_factor or 1.0)
+    params = calculations.calculate_rlc_equivalent_params(
+        stages,
+        parallel,
+        rf_per_column,
+        rt_per_column,
+        c_load,
+        l_ext_h,
+        l_trafo_h,
+        l_inductor_h,
+        inductance_factor,
+        tail_resistance_factor,
+    )
+    if params is None:
+        return None
+    efficiency, _, _ = calculations.calculate_circuit_efficiency(params["c_gen_effective_f"], c_load, impulse_type)
+    if efficiency <= 0:
+        return None
+    return {
+        "v0_charge": float(test_voltage_kv) / efficiency * 1e3,
+        "rf": params["rf_total_ohm"],
+        "rt": params["rt_total_ohm"],
+        "l_total": params["l_total_h"],
+        "c_gen": params["c_gen_effective_f"],
+        "c_load": c_load,
+        "gap_distance_cm": float(gap_distance_cm) if impulse_type == "chopped" and gap_distance_cm else None,
+        "efficiency": efficiency,
+        "stages": stages,
+        "parallel": parallel,
+        "rf_per_column": rf_per_column,
+        "rt_per_column": rt_per_column * tail_resistance_factor,
+        "l_external": (l_ext_h + l_trafo_h + l_inductor_h) * inductance_factor,
+    }
+
+
+def _waveform_figure(x, y, graph_id, session_id, y_title, color, height):
+    """Figura de um traço decimado; a resolução completa fica no servidor para o zoom (graph_id, sessão)."""
+    keep = waveform_keypoint_indices(x, y)
+    remember_full_resolution(session_id, graph_id, [{"x": x, "y": y, "keep": keep}])
+    x_plot, y_plot = decimate_waveform(x, y, WAVEFORM_MAX_POINTS, keep)
+    fig = go.Figure(go.Scatter(x=x_plot, y=y_plot, mode="lines", line=dict(color=color, width=1.5)))
+    fig.update_layout(
+        height=height,
+        margin=dict(t=10, b=30, l=40, r=10),
+        xaxis_title="Tempo (µs)",
+        yaxis_title=y_title,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor=COLORS["background_card"],
+        font={"size": 10, "color": COLORS["text_light"]},
+        xaxis={"gridcolor": COLORS["border"]},
+        yaxis={"gridcolor": COLORS["border"]},
+        showlegend=False,
+    )
+    return fig
+
+
+def create_waveform_figures(t_us, v_kv, i_load_a, session_id):
+    """Gráficos de tensão (impulse-waveform) e corrente (impulse-current) decimados para o navegador."""
+    fig_v = _waveform_figure(t_us, v_kv, "impulse-waveform", session_id, "Tensão (kV)", "#007bff", 300)
+    fig_i = _waveform_figure(t_us, i_load_a, "impulse-current", session_id, "Corrente (A)", "#fd7e14", 250)
+    return fig_v, fig_i
+
+
+def simulate_impulse_model(model_type, t_sec, circuit, impulse_type):
+    """
+    Tensão na carga (V) e corrente (A) pelo modelo escolhido em simulation-model-type.
+
+    "hybrid": RLC + K-factor + dupla exponencial (simulate_hybrid_impulse);
+    "rlc": só a solução RLC dessa mesma simulação, sem o ajuste;
+    "marx": espaço de estados do gerador Marx estágio a estágio (simulate_marx_impulse).
+    """
+    if model_type == "marx":
+        _, v_final, i_load, _, _, _ = simulate_marx_impulse(
+            t_sec,
+            circuit["v0_charge"],
+            circuit["stages"],
+            circuit["parallel"],
+            circuit["rf_per_column"],
+            circuit["rt_per_column"],
+            circuit["l_external"],
+            circuit["c_load"],
+            impulse_type,
+            circuit["gap_distance_cm"],
+        )
+        return v_final, i_load
+    if model_type not in SIMULATION_MODEL_LABELS:
+        raise ValueError(f"Modelo de simulação inválido: {model_type}")
+    v_rlc, v_final, i_load, _, _, _ = calculations.simulate_hybrid_impulse(
+        t_sec,
+        circuit["v0_charge"],
+        circuit["rf"],
+        circuit["rt"],
+        circuit["l_total"],
+        circuit["c_gen"],
+        circuit["c_load"],
+        impulse_type,
+        circuit["gap_distance_cm"],
+    )
+    if model_type == "rlc":
+        return v_rlc, circuit["c_load"] * np.gradient(v_rlc, t_sec)
+    return v_final, i_load
+
+
+# Simulação da forma de onda com as entradas atuais (clique em Simular e ticks da simulação automática)
+@app.callback(
+    [
+        Output("impulse-waveform", "figure"),
+        Output("impulse-current", "figure"),
+        Output("waveform-title-display", "children"),
+        Output("progressive-poll-interval", "disabled"),
+    ],
+    [Input("simulation-status", "data"), Input("auto-simulate-interval", "n_intervals")],
+    [
+        State("simulation-model-type", "value"),
+        State("test-voltage", "value"),
+        State("generator-config", "value"),
+        State("test-object-capacitance", "value"),
+        State("stray-capacitance", "value"),
+        State("front-resistor-expression", "value"),
+        State("tail-resistor-expression", "value"),
+        State("inductance-adjustment-factor", "value"),
+        State("tail-resistance-adjustment-factor", "value"),
+        State("external-inductance", "value"),
+        State("transformer-inductance", "value"),
+        State("inductor", "value"),
+        State("impulse-type", "value"),
+        State("gap-distance", "value"),
+    ],
+    prevent_initial_call=True,
+)
+def update_impulse_waveform(status_data, n_intervals, model_type, *inputs):
+    """
+    Simula o circuito de impulso e desenha tensão e corrente (o zoom reenvia a janela em resolução completa).
+
+    No modelo RLC+K a resposta é a simulação grossa de start_progressive_simulation
+    e o intervalo progressive-poll-interval é ativado para buscar o refinamento.
+    Cada sessão tem uma SimulationWorkspace: um tick com as mesmas entradas da
+    última simulação concluída (run_cached) não simula nem reinicia o refinamento.
+    """
+    if not status_data or not status_data.get("running"):
+        raise PreventUpdate
+    session_id = status_data.get("session_id")
+    impulse_type = inputs[-2] or "lightning"
+    model_type = model_type or "hybrid"
+    workspace = get_workspace(session_id)
+    previous = workspace.last_result
+    try:
+        result = workspace.run_cached(
+            input_fingerprint(model_type, *inputs),
+            lambda: run_waveform_simulation(session_id, model_type, inputs),
+        )
+    except Exception as e:
+        logger.error(f"Erro na simulação da forma de onda de impulso: {e}")
+        return dash.no_update, dash.no_update, f"Erro na simulação: {e}", True
+    if result is None:
+        return dash.no_update, dash.no_update, "Entradas inválidas para a simulação", True
+    if result is previous:
+        # Entradas inalteradas: os gráficos (já refinados, se for o caso) ficam como estão
+        raise PreventUpdate
+
+    fig_v, fig_i = create_waveform_figures(result["t_us"], result["v_kv"], result["i_load_a"], session_id)
+    title = _waveform_title(impulse_type, model_type, result["v_kv"].max(), result["stage"])
+    return fig_v, fig_i, title, result["stage"] != "coarse"
+
+
+def run_waveform_simulation(session_id, model_type, inputs):
+    """
+    Simula o modelo escolhido com as entradas do layout (na ordem dos States de update_impulse_waveform).
+
+    Returns:
+        {"stage", "t_us", "v_kv", "i_load_a"}, com stage="coarse" no RLC+K (refinamento
+        agendado para a sessão) e "fine" nos demais; None se as entradas forem inválidas.
+    """
+    impulse_type = inputs[-2] or "lightning"
+    circuit = impulse_circuit_from_inputs(*inputs)
+    if circuit is None:
+        return None
+    sim_time_s = SIMULATION_TAILS * target_times(impulse_type)[1] * 1e-6
+    gap_cm = circuit["gap_distance_cm"]
+    t_sec = hybrid_impulse_time_grid(
+        sim_time_s, circuit["rf"], circuit["rt"], circuit["c_gen"], circuit["c_load"], circuit["v0_charge"], gap_cm
+    )
+    if model_type == "hybrid":
+        coarse = start_progressive_simulation(
+            session_id,
+            t_sec,
+            circuit["v0_charge"],
+            circuit["rf"],
+            circuit["rt"],
+            circuit["l_total"],
+            circuit["c_gen"],
+            circuit["c_load"],
+            impulse_type,
+            gap_cm,
+            use_library=WAVEFORM_LIBRARY_ENABLED,
+        )
+        return {key: coarse[key] for key in ("stage", "t_us", "v_kv", "i_load_a")}
+    v_final, i_load = simulate_impulse_model(model_type, t_sec, circuit, impulse_type)
+    return {"stage": "fine", "t_us": t_sec * 1e6, "v_kv": v_final / 1000, "i_load_a": i_load}
+
+
+def _waveform_title(impulse_type, model_type, peak_kv, stage=None):
+    """Título do gráfico: tipo, modelo, pico e, na simulação progressiva, a etapa."""
+    suffix = " - prévia, refinando..." if stage == "coarse" else ""
+    return (
+        f"Forma de Onda de Tensão e Corrente ({impulse_type}, "
+        f"{SIMULATION_MODEL_LABELS.get(model_type, model_type)}): pico {peak_kv:.0f} kV{suffix}"
+    )
+
+
+def _progressive_outputs(result, session_id, impulse_type):
+    """Figuras e título de um resultado de progressive_sim (etapa grossa ou refinada)."""
+    fig_v, fig_i = create_waveform_figures(result["t_us"], result["v_kv"], result["i_load_a"], session_id)
+    title = _waveform_title(impulse_type, "hybrid", result["v_kv"].max(), result["stage"])
+    return fig_v, fig_i, title
+
+
+# Refinamento da simulação progressiva: substitui a prévia grossa quando a simulação completa termina
+@app.callback(
+    [
+        Output("impulse-waveform", "figure", allow_duplicate=True),
+        Output("impulse-current", "figure", allow_duplicate=True),
+        Output("waveform-title-display", "children", allow_duplicate=True),
+        Output("progressive-poll-interval", "disabled", allow_duplicate=True),
+    ],
+    Input("progressive-poll-interval", "n_intervals"),
+    [State("simulation-status", "data"), State("impulse-type", "value")],
+    prevent_initial_call=True,
+)
+def poll_impulse_refinement(n_intervals, status_data, impulse_type):
+    """Consulta o refinamento da sessão; desenha a onda refinada uma vez e desliga a consulta."""
+    session_id = (status_data or {}).get("session_id")
+    if not session_id:
+        return dash.no_update, dash.no_update, dash.no_update, True
+    poll = poll_progressive_simulation(session_id)
+    if poll["status"] == "running":
+        raise PreventUpdate
+    if poll["status"] == "done":
+        return (*_progressive_outputs(poll["result"], session_id, impulse_type or "lightning"), True)
+    if poll["status"] == "error":
+        return dash.no_update, dash.no_update, f"Erro no refinamento da simulação: {poll['error']}", True
+    return dash.no_update, dash.no_update, dash.no_update, True
+
+
+def _relayout_x_range(relayout_data):
+    """Extrai a janela do eixo x de um relayoutData; None = onda inteira; False = sem mudança em x."""
+    if not relayout_data:
+        return False
+    if relayout_data.get("xaxis.autorange"):
+        return None
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        return float(relayout_data["xaxis.range[0]"]), float(relayout_data["xaxis.range[1]"])
+    if "xaxis.range" in relayout_data:
+        x0, x1 = relayout_data["xaxis.range"]
+        return float(x0), float(x1)
+    return False
+
+
+def _zoom_to_full_resolution(graph_id):
+    """Cria o callback que reenvia, em resolução completa decimada, só a janela visível do gráfico."""
+
+    def zoom(relayout_data, status_data):
+        x_range = _relayout_x_range(relayout_data)
+        if x_range is False:
+            raise PreventUpdate
+        session_id = (status_data or {}).get("session_id")
+        traces = visible_window_traces(session_id, graph_id, x_range, WAVEFORM_MAX_POINTS)
+        if traces is None:
+            raise PreventUpdate
+        patched = Patch()
+        for i, (x, y) in enumerate(traces):
+            patched["data"][i]["x"] = x
+            patched["data"][i]["y"] = y
+        log.debug(f"[IMPULSE] Zoom em {graph_id}: janela {x_range}, {sum(len(x) for x, _ in traces)} pontos")
+        return patched
+
+    app.callback(
+        Output(graph_id, "figure", allow_duplicate=True),
+        Input(graph_id, "relayoutData"),
+        State("simulation-status", "data"),
+        prevent_initial_call=True,
+    )(zoom)
+
+
+_zoom_to_full_resolution("impulse-waveform")
+_zoom_to_full_resolution("impulse-current")
+
+
 # --- Callback para exibir informações do transformador removido ---
 # Este callback foi removido pois a atualização é feita pelo callback global em global_updates.py
 
@@ -11,12 +11,12 @@ import math
 
 import dash_bootstrap_components as dbc
 import numpy as np
-import pandas as pd
 from dash import Input, Output, State, dcc, html, no_update
 from dash.exceptions import PreventUpdate
 from plotly import graph_objects as go
 
 # Importações da aplicação
+from app_core.core_tables import interpolate_core_factors
 from components.formatters import format_parameter_value
 
 # Configurar logger
@@ -34,211 +34,6 @@ def safe_float(value, default=None):
         return default
 
 
-# Tabelas de potência magnética e perdas do núcleo
-potencia_magnet = {
-    (0.5, 50): 0.10,
-    (0.5, 60): 0.15,
-    (0.5, 100): 0.35,
-    (0.5, 120): 0.45,
-    (0.5, 150): 0.70,
-    (0.5, 200): 1.00,
-    (0.5, 240): 1.30,
-    (0.6, 50): 0.15,
-    (0.6, 60): 0.20,
-    (0.6, 100): 0.45,
-    (0.6, 120): 0.60,
-    (0.6, 150): 0.90,
-    (0.6, 200): 1.40,
-    (0.6, 240): 1.80,
-    (0.7, 50): 0.23,
-    (0.7, 60): 0.28,
-    (0.7, 100): 0.60,
-    (0.7, 120): 0.80,
-    (0.7, 150): 1.10,
-    (0.7, 200): 1.70,
-    (0.7, 240): 2.30,
-    (0.8, 50): 0.30,
-    (0.8, 60): 0.35,
-    (0.8, 100): 0.80,
-    (0.8, 120): 1.00,
-    (0.8, 150): 1.40,
-    (0.8, 200): 2.20,
-    (0.8, 240): 3.00,
-    (0.9, 50): 0.38,
-    (0.9, 60): 0.45,
-    (0.9, 100): 0.95,
-    (0.9, 120): 1.30,
-    (0.9, 150): 1.70,
-    (0.9, 200): 2.80,
-    (0.9, 240): 3.80,
-    (1.0, 50): 0.45,
-    (1.0, 60): 0.55,
-    (1.0, 100): 1.10,
-    (1.0, 120): 1.60,
-    (1.0, 150): 2.20,
-    (1.0, 200): 3.50,
-    (1.0, 240): 4.50,
-    (1.1, 50): 0.55,
-    (1.1, 60): 0.70,
-    (1.1, 100): 1.50,
-    (1.1, 120): 2.00,
-    (1.1, 150): 2.80,
-    (1.1, 200): 4.10,
-    (1.1, 240): 5.50,
-    (1.2, 50): 0.65,
-    (1.2, 60): 0.85,
-    (1.2, 100): 2.00,
-    (1.2, 120): 2.40,
-    (1.2, 150): 3.30,
-    (1.2, 200): 5.00,
-    (1.2, 240): 6.50,
-    (1.3, 50): 0.80,
-    (1.3, 60): 1.00,
-    (1.3, 100): 2.20,
-    (1.3, 120): 2.85,
-    (1.3, 150): 3.80,
-    (1.3, 200): 6.00,
-    (1.3, 240): 7.50,
-    (1.4, 50): 0.95,
-    (1.4, 60): 1.20,
-    (1.4, 100): 2.50,
-    (1.4, 120): 3.30,
-    (1.4, 150): 4.50,
-    (1.4, 200): 7.00,
-    (1.4, 240): 9.00,  # <-- Relevant for Mag interpolation
-    (1.5, 50): 1.10,
-    (1.5, 60): 1.40,
-    (1.5, 100): 3.00,
-    (1.5, 120): 4.00,
-    (1.5, 150): 5.50,
-    (1.5, 200): 9.00,
-    (1.5, 240): 11.00,  # <-- Relevant for Mag interpolation
-    (1.6, 50): 1.30,
-    (1.6, 60): 1.60,
-    (1.6, 100): 3.50,
-    (1.6, 120): 4.80,
-    (1.6, 150): 6.50,
-    (1.6, 200): 12.00,
-    (1.6, 240): 14.00,
-    (1.7, 50): 1.60,
-    (1.7, 60): 2.00,
-    (1.7, 100): 4.00,
-    (1.7, 120): 5.50,
-    (1.7, 150): 7.00,
-    (1.7, 200): 15.00,
-    (1.7, 240): 17.00,
-}
-
-perdas_nucleo = {
-    (0.5, 50): 0.10,
-    (0.5, 60): 0.13,
-    (0.5, 100): 0.25,
-    (0.5, 120): 0.35,
-    (0.5, 150): 0.50,
-    (0.5, 200): 0.80,
-    (0.5, 240): 1.10,
-    (0.6, 50): 0.12,
-    (0.6, 60): 0.18,
-    (0.6, 100): 0.38,
-    (0.6, 120): 0.48,
-    (0.6, 150): 0.70,
-    (0.6, 200): 1.10,
-    (0.6, 240): 1.50,
-    (0.7, 50): 0.15,
-    (0.7, 60): 0.23,
-    (0.7, 100): 0.50,
-    (0.7, 120): 0.62,
-    (0.7, 150): 0.95,
-    (0.7, 200): 1.55,
-    (0.7, 240): 2.10,
-    (0.8, 50): 0.20,
-    (0.8, 60): 0.30,
-    (0.8, 100): 0.65,
-    (0.8, 120): 0.80,
-    (0.8, 150): 1.20,
-    (0.8, 200): 2.00,
-    (0.8, 240): 2.80,
-    (0.9, 50): 0.25,
-    (0.9, 60): 0.37,
-    (0.9, 100): 0.82,
-    (0.9, 120): 1.00,
-    (0.9, 150): 1.50,
-    (0.9, 200): 2.50,
-    (0.9, 240): 3.50,
-    (1.0, 50): 0.32,
-    (1.0, 60): 0.46,
-    (1.0, 100): 1.00,
-    (1.0, 120): 1.25,
-    (1.0, 150): 1.85,
-    (1.0, 200): 3.10,
-    (1.0, 240): 4.20,
-    (1.1, 50): 0.41,
-    (1.1, 60): 0.55,
-    (1.1, 100): 1.21,
-    (1.1, 120): 1.55,
-    (1.1, 150): 2.20,
-    (1.1, 200): 3.70,
-    (1.1, 240): 5.00,
-    (1.2, 50): 0.50,
-    (1.2, 60): 0.65,
-    (1.2, 100): 1.41,
-    (1.2, 120): 1.90,
-    (1.2, 150): 2.70,
-    (1.2, 200): 4.50,
-    (1.2, 240): 6.00,
-    (1.3, 50): 0.60,
-    (1.3, 60): 0.80,
-    (1.3, 100): 1.65,
-    (1.3, 120): 2.30,
-    (1.3, 150): 3.20,
-    (1.3, 200): 5.20,
-    (1.3, 240): 7.00,
-    (1.4, 50): 0.71,
-    (1.4, 60): 0.95,
-    (1.4, 100): 1.95,
-    (1.4, 120): 2.80,
-    (1.4, 150): 3.80,
-    (1.4, 200): 6.00,
-    (1.4, 240): 8.50,  # <-- Relevant for Perdas interpolation
-    (1.5, 50): 0.85,
-    (1.5, 60): 1.10,
-    (1.5, 100): 2.30,
-    (1.5, 120): 3.30,
-    (1.5, 150): 4.50,
-    (1.5, 200): 7.00,
-    (1.5, 240): 10.00,  # <-- Relevant for Perdas interpolation
-    (1.6, 50): 1.00,
-    (1.6, 60): 1.30,
-    (1.6, 100): 2.80,
-    (1.6, 120): 3.80,
-    (1.6, 150): 5.30,
-    (1.6, 200): 8.00,
-    (1.6, 240): 12.00,
-    (1.7, 50): 1.20,
-    (1.7, 60): 1.55,
-    (1.7, 100): 3.50,
-    (1.7, 120): 4.40,
-    (1.7, 150): 6.00,
-    (1.7, 200): 9.00,
-    (1.7, 240): 15.00,
-}
-
-# Converter as tabelas para DataFrames para facilitar a interpolação
-df_potencia_magnet = pd.DataFrame(list(potencia_magnet.items()), columns=["key", "potencia_magnet"])
-df_potencia_magnet[["inducao_nominal", "frequencia_nominal"]] = pd.DataFrame(
-    df_potencia_magnet["key"].tolist(), index=df_potencia_magnet.index
-)
-df_potencia_magnet.drop("key", axis=1, inplace=True)
-df_potencia_magnet.set_index(["inducao_nominal", "frequencia_nominal"], inplace=True)
-
-df_perdas_nucleo = pd.DataFrame(list(perdas_nucleo.items()), columns=["key", "perdas_nucleo"])
-df_perdas_nucleo[["inducao_nominal", "frequencia_nominal"]] = pd.DataFrame(
-    df_perdas_nucleo["key"].tolist(), index=df_perdas_nucleo.index
-)
-df_perdas_nucleo.drop("key", axis=1, inplace=True)
-df_perdas_nucleo.set_index(["inducao_nominal", "frequencia_nominal"], inplace=True)
-
-
 def register_induced_voltage_callbacks(app_instance):
     """
     Registra todos os callbacks para a seção de Tensão Induzida.
@@ -600,71 +395,13 @@ def register_induced_voltage_callbacks(app_instance):
                 f"[Induced Voltage] Tensão aplicada BT calculada: {tensao_aplicada_bt:.2f} kV"
             )
 
-            # --- Função de Interpolação (já existente e verificada) ---
-            def buscar_valores_tabela(inducao_teste, frequencia_teste, df):
-                """Busca valores nas tabelas usando interpolação bilinear."""
-                inducoes = sorted(df.index.get_level_values("inducao_nominal").unique())
-                frequencias = sorted(df.index.get_level_values("frequencia_nominal").unique())
-
-                inducao_teste_clipped = max(min(inducao_teste, max(inducoes)), min(inducoes))
-                frequencia_teste_clipped = max(
-                    min(frequencia_teste, max(frequencias)), min(frequencias)
-                )
-                if inducao_teste != inducao_teste_clipped:
-                    log.warning(
-                        f"Indução de teste {inducao_teste:.3f}T fora do range da tabela [{min(inducoes)}, {max(inducoes)}], usando {inducao_teste_clipped:.3f}T."
-                    )
-                if frequencia_teste != frequencia_teste_clipped:
-                    log.warning(
-                        f"Frequência de teste {frequencia_teste:.1f}Hz fora do range da tabela [{min(frequencias)}, {max(frequencias)}], usando {frequencia_teste_clipped:.1f}Hz."
-                    )
-
-                inducao_teste = inducao_teste_clipped
-                frequencia_teste = frequencia_teste_clipped
-
-                ind_idx = np.searchsorted(inducoes, inducao_teste)
-                freq_idx = np.searchsorted(frequencias, frequencia_teste)
-
-                ind_idx = min(max(ind_idx, 1), len(inducoes) - 1)
-                freq_idx = min(max(freq_idx, 1), len(frequencias) - 1)
-
-                ind_low, ind_high = inducoes[ind_idx - 1], inducoes[ind_idx]
-                freq_low, freq_high = frequencias[freq_idx - 1], frequencias[freq_idx]
-
-                q11 = df.loc[(ind_low, freq_low)].iloc[0]
-                q12 = df.loc[(ind_low, freq_high)].iloc[0]
-                q21 = df.loc[(ind_high, freq_low)].iloc[0]
-                q22 = df.loc[(ind_high, freq_high)].iloc[0]
-
-                # Handle cases where indices might be the same (value is exactly on grid boundary)
-                if ind_high == ind_low:
-                    x = 0.0
-                else:
-                    x = (inducao_teste - ind_low) / (ind_high - ind_low)
-
-                if freq_high == freq_low:
-                    y = 0.0
-                else:
-                    y = (frequencia_teste - freq_low) / (freq_high - freq_low)
-
-                # Bilinear interpolation formula
-                valor_interpolado = (
-                    (1 - x) * (1 - y) * q11 + x * (1 - y) * q21 + (1 - x) * y * q12 + x * y * q22
-                )
-
-                log.debug(
-                    f"Interpolação para B={inducao_teste:.3f}, f={frequencia_teste:.1f}: Pontos ({ind_low},{freq_low})={q11}, ({ind_low},{freq_high})={q12}, ({ind_high},{freq_low})={q21}, ({ind_high},{freq_high})={q22}. Pesos x={x:.3f}, y={y:.3f}. Resultado={valor_interpolado:.4f}"
-                )
-                return valor_interpolado
-
             # --- Obtenção dos Fatores das Tabelas ---
             log.debug(
                 f"[Induced Voltage] Buscando valores nas tabelas para beta_teste={beta_teste:.4f} T e freq_teste={freq_teste:.1f} Hz"
             )
-            fator_potencia_mag = buscar_valores_tabela(
-                beta_teste, freq_teste, df_potencia_magnet
-            )  # VAr/kg
-            fator_perdas = buscar_valores_tabela(beta_teste, freq_teste, df_perdas_nucleo)  # W/kg
+            fator_perdas, fator_potencia_mag = (
+                float(v) for v in interpolate_core_factors(beta_teste, freq_teste)
+            )  # W/kg, VAr/kg
             log.debug(
                 f"[Induced Voltage] Valores interpolados: fator_potencia_mag={fator_potencia_mag:.2f} VAr/kg, fator_perdas={fator_perdas:.2f} W/kg"
             )
@@ -1729,87 +1466,21 @@ def register_induced_voltage_callbacks(app_instance):
             # Preparar dados para a tabela
             table_data = []
 
-            for freq_teste in frequencias:
-                # Calcular parâmetros para esta frequência
-                fp_fn = freq_teste / freq_nominal
-                up_un = tensao_prova / tensao_at
-
-                # Calcular indução de teste
-                beta_teste = inducao_nominal * (up_un / fp_fn)
-
-                # Garantir que a indução de teste não seja maior que 1.9T (limite físico típico)
-                if beta_teste > 1.9:
-                    beta_teste = 1.9
-                    log.warning(
-                        f"[Induced Voltage] Indução no teste limitada a 1.9T para frequência {freq_teste} Hz"
-                    )
-
-                # Função de interpolação (copiada da função principal)
-                def buscar_valores_tabela(inducao_teste, frequencia_teste, df):
-                    """Busca valores nas tabelas usando interpolação bilinear."""
-                    inducoes = sorted(df.index.get_level_values("inducao_nominal").unique())
-                    frequencias = sorted(df.index.get_level_values("frequencia_nominal").unique())
-
-                    inducao_teste_clipped = max(min(inducao_teste, max(inducoes)), min(inducoes))
-                    frequencia_teste_clipped = max(
-                        min(frequencia_teste, max(frequencias)), min(frequencias)
-                    )
-                    if inducao_teste != inducao_teste_clipped:
-                        log.warning(
-                            f"Indução de teste {inducao_teste:.3f}T fora do range da tabela [{min(inducoes)}, {max(inducoes)}], usando {inducao_teste_clipped:.3f}T."
-                        )
-                    if frequencia_teste != frequencia_teste_clipped:
-                        log.warning(
-                            f"Frequência de teste {frequencia_teste:.1f}Hz fora do range da tabela [{min(frequencias)}, {max(frequencias)}], usando {frequencia_teste_clipped:.1f}Hz."
-                        )
-
-                    inducao_teste = inducao_teste_clipped
-                    frequencia_teste = frequencia_teste_clipped
-
-                    ind_idx = np.searchsorted(inducoes, inducao_teste)
-                    freq_idx = np.searchsorted(frequencias, frequencia_teste)
-
-                    ind_idx = min(max(ind_idx, 1), len(inducoes) - 1)
-                    freq_idx = min(max(freq_idx, 1), len(frequencias) - 1)
-
-                    ind_low, ind_high = inducoes[ind_idx - 1], inducoes[ind_idx]
-                    freq_low, freq_high = frequencias[freq_idx - 1], frequencias[freq_idx]
-
-                    q11 = df.loc[(ind_low, freq_low)].iloc[0]
-                    q12 = df.loc[(ind_low, freq_high)].iloc[0]
-                    q21 = df.loc[(ind_high, freq_low)].iloc[0]
-                    q22 = df.loc[(ind_high, freq_high)].iloc[0]
-
-                    # Handle cases where indices might be the same (value is exactly on grid boundary)
-                    if ind_high == ind_low:
-                        x = 0.0
-                    else:
-                        x = (inducao_teste - ind_low) / (ind_high - ind_low)
-
-                    if freq_high == freq_low:
-                        y = 0.0
-                    else:
-                        y = (frequencia_teste - freq_low) / (freq_high - freq_low)
-
-                    # Bilinear interpolation formula
-                    valor_interpolado = (
-                        (1 - x) * (1 - y) * q11
-                        + x * (1 - y) * q21
-                        + (1 - x) * y * q12
-                        + x * y * q22
-                    )
-
-                    log.debug(
-                        f"Interpolação para B={inducao_teste:.3f}, f={frequencia_teste:.1f}: Pontos ({ind_low},{freq_low})={q11}, ({ind_low},{freq_high})={q12}, ({ind_high},{freq_low})={q21}, ({ind_high},{freq_high})={q22}. Pesos x={x:.3f}, y={y:.3f}. Resultado={valor_interpolado:.4f}"
-                    )
-                    return valor_interpolado
-
-                # Calcular fatores específicos para esta frequência e indução usando a função de interpolação
-                fator_potencia_mag = buscar_valores_tabela(
-                    beta_teste, freq_teste, df_potencia_magnet
+            # Indução de teste e fatores das tabelas para todas as frequências de uma vez
+            freqs = np.asarray(frequencias, dtype=float)
+            up_un = tensao_prova / tensao_at
+            betas = inducao_nominal * (up_un / (freqs / freq_nominal))
+            # Garantir que a indução de teste não seja maior que 1.9T (limite físico típico)
+            for freq_teste in freqs[betas > 1.9]:
+                log.warning(
+                    f"[Induced Voltage] Indução no teste limitada a 1.9T para frequência {freq_teste:g} Hz"
                 )
-                fator_perdas = buscar_valores_tabela(beta_teste, freq_teste, df_perdas_nucleo)
+            betas = np.minimum(betas, 1.9)
+            fatores_perdas, fatores_potencia_mag = interpolate_core_factors(betas, freqs)
 
+            for freq_teste, beta_teste, fator_perdas, fator_potencia_mag in zip(
+                frequencias, betas.tolist(), fatores_perdas.tolist(), fatores_potencia_mag.tolist()
+            ):
                 log.debug(
                     f"[Induced Voltage] Frequência {freq_teste} Hz: beta_teste={beta_teste:.4f} T, fator_potencia_mag={fator_potencia_mag:.2f} VAr/kg, fator_perdas={fator_perdas:.2f} W/kg"
                 )
@@ -1,17 +1,26 @@
 # callbacks/losses.py
 import datetime
-import itertools
 import logging
 import math
 
 import dash
 import dash_bootstrap_components as dbc
 import numpy as np
-import pandas as pd
 from dash import Input, Output, State, html, no_update, ctx
 from dash.exceptions import PreventUpdate
 
 from app import app
+from app_core.capacitor_bank import (
+    select_target_bank_voltage,
+    suggest_bank_configs,
+    suggest_capacitor_bank_config,
+)
+from app_core.losses_engine import (
+    LOAD_OVERLOAD_SCENARIOS,
+    LoadLossInputs,
+    NoLoadInputs,
+    get_losses_engine,
+)
 from config import (
     CARD_HEADER_STYLE,
     ERROR_STYLE,
@@ -28,17 +37,8 @@ from config import (
 from config import colors as CONFIG_COLORS
 from utils.constants import (
     CAPACITORS_BY_VOLTAGE,
-    CS_SWITCHES_BY_VOLTAGE_MONO,
-    CS_SWITCHES_BY_VOLTAGE_TRI,
     DUT_POWER_LIMIT,
     EPS_CURRENT_LIMIT,
-    Q_SWITCH_POWERS,
-    SUT_AT_MAX_VOLTAGE,
-    SUT_AT_MIN_VOLTAGE,
-    SUT_AT_STEP_VOLTAGE,
-    SUT_BT_VOLTAGE,
-    perdas_nucleo_data,
-    potencia_magnet_data,
 )
 
 # Importar funções de utilidade para stores
@@ -52,33 +52,43 @@ from components.validators import validate_dict_inputs
 
 log = logging.getLogger(__name__)
 
-# Data Definitions (No-Load Losses)
-potencia_magnet = potencia_magnet_data
-perdas_nucleo = perdas_nucleo_data
-
 # Tolerance for floating point comparisons
 epsilon = 1e-6
 
-# DataFrame Creation (No-Load Losses)
-try:
-    df_potencia_magnet = pd.DataFrame(
-        list(potencia_magnet.items()), columns=["key", "potencia_magnet"]
-    )
-    df_potencia_magnet[["inducao_nominal", "frequencia_nominal"]] = pd.DataFrame(
-        df_potencia_magnet["key"].tolist(), index=df_potencia_magnet.index
-    )
-    df_potencia_magnet.drop("key", axis=1, inplace=True)
-    df_potencia_magnet.set_index(["inducao_nominal", "frequencia_nominal"], inplace=True)
-
-    df_perdas_nucleo = pd.DataFrame(list(perdas_nucleo.items()), columns=["key", "perdas_nucleo"])
-    df_perdas_nucleo[["inducao_nominal", "frequencia_nominal"]] = pd.DataFrame(
-        df_perdas_nucleo["key"].tolist(), index=df_perdas_nucleo.index
-    )
-    df_perdas_nucleo.drop("key", axis=1, inplace=True)
-    df_perdas_nucleo.set_index(["inducao_nominal", "frequencia_nominal"], inplace=True)
-except Exception as e:
-    log.error(f"Erro criando DataFrames: {e}")
-    df_potencia_magnet, df_perdas_nucleo = pd.DataFrame(), pd.DataFrame()
+# Chaves do losses-store para as grandezas de ensaio de cada condição do LossesEngine
+LOAD_SCENARIO_KEYS = {
+    "25°C": {
+        "tensao": "Tensão 25°C (kV)",
+        "corrente": "Corrente 25°C (A)",
+        "potencia_mva": "Pteste 25°C (MVA)",
+        "potencia_ativa": "Potencia Ativa 25°C (kW)",
+        "potencia_mvar": "Pteste 25°C (MVAr)",
+    },
+    "Frio": {
+        "tensao": "Tensão frio (kV)",
+        "corrente": "Corrente frio (A)",
+        "potencia_mva": "Pteste frio (MVA)",
+        "potencia_ativa": "Potencia Ativa EPS Frio (kW)",
+        "potencia_mvar": "Pteste frio (MVAr)",
+    },
+    "Quente": {
+        "tensao": "Tensão quente (kV)",
+        "corrente": "Corrente quente (A)",
+        "potencia_mva": "Pteste quente (MVA)",
+        "potencia_ativa": "Potencia Ativa Quente (kW)",
+        "potencia_mvar": "Pteste quente (MVAr)",
+    },
+    **{
+        pu: {
+            "tensao": f"Tensão {pu} (kV)",
+            "corrente": f"Corrente {pu} (A)",
+            "potencia_mva": f"Pteste {pu} (MVA)",
+            "potencia_ativa": f"Potencia Ativa {pu} (kW)",
+            "potencia_mvar": f"Pteste {pu} (MVAr)",
+        }
+        for pu in LOAD_OVERLOAD_SCENARIOS
+    },
+}
 
 
 # Helpers
@@ -421,10 +431,6 @@ def losses_handle_perdas_vazio(
 
     try:
         # --- Constants & Helpers ---
-        tensao_sut_bt = SUT_BT_VOLTAGE
-        tensao_sut_at_min = SUT_AT_MIN_VOLTAGE
-        tensao_sut_at_max = SUT_AT_MAX_VOLTAGE
-        step_sut_at = SUT_AT_STEP_VOLTAGE
         limite_corrente_eps = EPS_CURRENT_LIMIT
         limite_potencia_dut = DUT_POWER_LIMIT
         # Small number for safe division is now epsilon (defined at module level)
@@ -491,225 +497,86 @@ def losses_handle_perdas_vazio(
             )
             return error_div, initial_dut_volt, initial_sut, initial_legend_obs, no_update
 
-        sqrt_3 = math.sqrt(3) if tipo_transformador == "Trifásico" else 1.0
-        inducao_arredondada = round(inducao * 10) / 10
-        frequencias_validas = [50, 60, 100, 120, 150, 200, 240, 250, 300, 350, 400, 500]
-        frequencia_arredondada = min(frequencias_validas, key=lambda x: abs(x - frequencia))
-
-        # --- Factor Lookup ---
-        lookup_key = (inducao_arredondada, frequencia_arredondada)
+        # --- Cálculo (projeto × aço M4 × nível pu) no motor de perdas ---
         try:
-            # Use .get with a default to handle potential missing keys more gracefully
-            fator_perdas = (
-                df_perdas_nucleo.loc[lookup_key, "perdas_nucleo"]
-                if lookup_key in df_perdas_nucleo.index
-                else None
-            )
-            fator_potencia_mag = (
-                df_potencia_magnet.loc[lookup_key, "potencia_magnet"]
-                if lookup_key in df_potencia_magnet.index
-                else None
-            )
-            # More specific error if lookup worked but value is missing/None
-            if fator_perdas is None or fator_potencia_mag is None:
-                raise KeyError(f"Valor não encontrado para {lookup_key} em um dos DataFrames.")
-        except KeyError:
-            error_div = html.Div(
-                f"Fatores de perdas/potência não encontrados para Indução {inducao_arredondada}T @ {frequencia_arredondada}Hz.",
-                style=ERROR_STYLE,
-            )
-            return error_div, initial_dut_volt, initial_sut, initial_legend_obs, no_update
-        except Exception as e:
-            log.error(f"Erro ao buscar fatores no DataFrame: {e}")
-            error_div = html.Div(f"Erro ao buscar fatores: {e}", style=ERROR_STYLE)
-            return error_div, initial_dut_volt, initial_sut, initial_legend_obs, no_update
-
-        if (
-            fator_perdas is None
-            or fator_perdas <= epsilon
-            or fator_potencia_mag is None
-            or fator_potencia_mag <= epsilon
-        ):
-            error_div = html.Div(
-                f"Fatores de perdas/potência inválidos ({fator_perdas=}, {fator_potencia_mag=}) para Indução {inducao_arredondada}T @ {frequencia_arredondada}Hz.",
-                style=ERROR_STYLE,
+            vazio = get_losses_engine().no_load(
+                NoLoadInputs(
+                    perdas_vazio_kw=perdas_vazio,
+                    peso_nucleo_ton=peso_nucleo,
+                    corrente_excitacao_percent=corrente_excitacao_percentual,
+                    inducao_t=inducao,
+                    frequencia_hz=frequencia,
+                    tensao_bt_kv=tensao_bt_kv,
+                    corrente_nominal_bt_a=corrente_nominal_bt,
+                    tipo_transformador=tipo_transformador,
+                    corrente_exc_1_1_percent=corrente_exc_1_1_input,
+                    corrente_exc_1_2_percent=corrente_exc_1_2_input,
+                )
             )
+        except ValueError as e:
+            error_div = html.Div(str(e), style=ERROR_STYLE)
             return error_div, initial_dut_volt, initial_sut, initial_legend_obs, no_update
 
-        # --- Core & Excitation Calculations ---
-        peso_nucleo_calc = perdas_vazio / fator_perdas if fator_perdas > epsilon else 0
-        potencia_mag = fator_potencia_mag * peso_nucleo_calc  # kVAR
-        corrente_excitacao_calc = (
-            potencia_mag / (tensao_bt_kv * sqrt_3) if (tensao_bt_kv * sqrt_3) > epsilon else 0
-        )  # A
-        corrente_excitacao_percentual_calc = (
-            (corrente_excitacao_calc / corrente_nominal_bt) * 100
-            if corrente_nominal_bt > epsilon
-            else 0
-        )
-
-        tensao_teste_1_1_kv = tensao_bt_kv * 1.1
-        tensao_teste_1_2_kv = tensao_bt_kv * 1.2
-
-        # Calculated 1.1pu / 1.2pu currents (based on M4 assumption)
-        corrente_excitacao_1_1_calc = 2 * corrente_excitacao_calc
-        corrente_excitacao_1_2_calc = 4 * corrente_excitacao_calc
-
-        # Project currents (from % input)
-        corrente_excitacao_projeto = corrente_nominal_bt * (corrente_excitacao_percentual / 100.0)
-        fator_excitacao_default = (
-            3 if tipo_transformador == "Trifásico" else 5
-        )  # Default multiplier if inputs are missing
-
-        if corrente_exc_1_1_input is not None:
-            corrente_excitacao_1_1 = corrente_nominal_bt * (corrente_exc_1_1_input / 100.0)
-        else:
-            corrente_excitacao_1_1 = fator_excitacao_default * corrente_excitacao_projeto
-
-        if corrente_exc_1_2_input is not None:
-            corrente_excitacao_1_2 = corrente_nominal_bt * (corrente_exc_1_2_input / 100.0)
-        else:
-            corrente_excitacao_1_2 = None  # No default assumption for 1.2pu
-
-        # Test Powers (kVA)
-        potencia_ensaio_1pu_calc_kva = tensao_bt_kv * corrente_excitacao_calc * sqrt_3
-        potencia_ensaio_1_1pu_calc_kva = tensao_teste_1_1_kv * corrente_excitacao_1_1_calc * sqrt_3
-        potencia_ensaio_1_2pu_calc_kva = tensao_teste_1_2_kv * corrente_excitacao_1_2_calc * sqrt_3
-
-        potencia_ensaio_1pu_projeto_kva = tensao_bt_kv * corrente_excitacao_projeto * sqrt_3
-        potencia_ensaio_1_1pu_projeto_kva = tensao_teste_1_1_kv * corrente_excitacao_1_1 * sqrt_3
-        potencia_ensaio_1_2pu_projeto_kva = (
-            (tensao_teste_1_2_kv * corrente_excitacao_1_2 * sqrt_3)
-            if corrente_excitacao_1_2 is not None
-            else None
-        )
-
-        # Project Factors
-        fator_perdas_projeto = (
-            perdas_vazio / peso_nucleo if peso_nucleo > epsilon else 0
-        )  # W/kg (assuming peso is Ton -> *1000) -> Actually kW/Ton
-        potencia_mag_projeto_kvar = (
-            potencia_ensaio_1pu_projeto_kva  # Approximated as test power at 1pu
-        )
-        # fator_potencia_mag_projeto = potencia_mag_projeto_kvar / peso_nucleo if peso_nucleo > epsilon else 0 # kVAR / Ton
-        # Match units with M4 factor (VAR/kg)
-        fator_potencia_mag_projeto = (
-            (potencia_mag_projeto_kvar * 1000) / (peso_nucleo * 1000)
-            if peso_nucleo > epsilon
-            else 0
-        )  # VAR/kg
+        tensao_teste_1_1_kv, tensao_teste_1_2_kv = (float(v) for v in vazio["tensao_kv"][1:])
+        (i_proj, i_proj_1_1, i_proj_1_2), (i_m4, i_m4_1_1, i_m4_1_2) = vazio["corrente_a"].tolist()
+        (p_proj, p_proj_1_1, p_proj_1_2), (p_m4, p_m4_1_1, p_m4_1_2) = vazio["potencia_kva"].tolist()
+        fator_perdas_projeto, fator_perdas = vazio["fator_perdas_w_kg"].tolist()
+        fator_potencia_mag_projeto, fator_potencia_mag = vazio["fator_potencia_mag_var_kg"].tolist()
+        potencia_mag_projeto_kvar, potencia_mag = vazio["potencia_mag_kvar"].tolist()
 
         # --- Result Dictionaries ---
         resultados_aco_m4 = {
             "Perdas em Vazio (kW)": perdas_vazio,
             "Tensão nominal teste 1.0 pu (kV)": tensao_bt_kv,
-            "Corrente de excitação calculada (A)": corrente_excitacao_calc,
-            "Corrente de excitação percentual (%)": corrente_excitacao_percentual_calc,
+            "Corrente de excitação calculada (A)": i_m4,
+            "Corrente de excitação percentual (%)": float(vazio["corrente_excitacao_percent"][1]),
             "Tensão de teste 1.1 pu (kV)": tensao_teste_1_1_kv,
             "Tensão de teste 1.2 pu (kV)": tensao_teste_1_2_kv,
-            "Corrente de excitação 1.1 pu (A)": corrente_excitacao_1_1_calc,
-            "Corrente de excitação 1.2 pu (A)": corrente_excitacao_1_2_calc,
+            "Corrente de excitação 1.1 pu (A)": i_m4_1_1,
+            "Corrente de excitação 1.2 pu (A)": i_m4_1_2,
             "Frequência (Hz)": frequencia,
             "Potência Mag. (kVAR)": potencia_mag,
             "Fator de perdas Mag. (VAR/kg)": fator_potencia_mag,
-            "Fator de perdas (W/kg)": fator_perdas,  # Assuming input fator_perdas is W/kg
-            "Peso do núcleo Calculado(Ton)": peso_nucleo_calc,
-            "Potência de Ensaio (1 pu) (kVA)": potencia_ensaio_1pu_calc_kva,
-            "Potência de Ensaio (1.1 pu) (kVA)": potencia_ensaio_1_1pu_calc_kva,
-            "Potência de Ensaio (1.2 pu) (kVA)": potencia_ensaio_1_2pu_calc_kva,
+            "Fator de perdas (W/kg)": fator_perdas,
+            "Peso do núcleo Calculado(Ton)": float(vazio["peso_nucleo_ton"][1]),
+            "Potência de Ensaio (1 pu) (kVA)": p_m4,
+            "Potência de Ensaio (1.1 pu) (kVA)": p_m4_1_1,
+            "Potência de Ensaio (1.2 pu) (kVA)": p_m4_1_2,
         }
         resultados_projeto = {
             "Perdas em Vazio (kW)": perdas_vazio,
             "Tensão nominal teste 1.0 pu (kV)": tensao_bt_kv,
             "Corrente Nominal BT (A)": corrente_nominal_bt,
-            "Corrente de excitação (A)": corrente_excitacao_projeto,
+            "Corrente de excitação (A)": i_proj,
             "Tensão de teste 1.1 pu (kV)": tensao_teste_1_1_kv,
-            "Corrente de excitação 1.1 pu (A)": corrente_excitacao_1_1,
+            "Corrente de excitação 1.1 pu (A)": i_proj_1_1,
             "Frequência (Hz)": frequencia,
             "Potência Mag. (kVAR)": potencia_mag_projeto_kvar,
             "Fator de perdas Mag. (VAR/kg)": fator_potencia_mag_projeto,
-            "Fator de perdas (W/kg)": fator_perdas_projeto
-            * 1000
-            / 1000,  # kW/Ton -> W/kg? Assuming input perdas_vazio is kW, peso_nucleo is Ton. Then perdas_vazio / peso_nucleo = kW/Ton. Need W/kg. (kW/Ton) * (1000 W/kW) / (1000 kg/Ton) = W/kg
-            "Potência de Ensaio (1 pu) (kVA)": potencia_ensaio_1pu_projeto_kva,
-            "Potência de Ensaio (1.1 pu) (kVA)": potencia_ensaio_1_1pu_projeto_kva,
+            "Fator de perdas (W/kg)": fator_perdas_projeto,  # kW/Ton = W/kg
+            "Potência de Ensaio (1 pu) (kVA)": p_proj,
+            "Potência de Ensaio (1.1 pu) (kVA)": p_proj_1_1,
         }
-        if corrente_excitacao_1_2 is not None:
+        if corrente_exc_1_2_input is not None:
             resultados_projeto["Tensão de teste 1.2 pu (kV)"] = tensao_teste_1_2_kv
-            resultados_projeto["Corrente de excitação 1.2 pu (A)"] = corrente_excitacao_1_2
-            resultados_projeto[
-                "Potência de Ensaio (1.2 pu) (kVA)"
-            ] = potencia_ensaio_1_2pu_projeto_kva
+            resultados_projeto["Corrente de excitação 1.2 pu (A)"] = i_proj_1_2
+            resultados_projeto["Potência de Ensaio (1.2 pu) (kVA)"] = p_proj_1_2
 
         # --- SUT/EPS Analysis (Vazio - Simple Reflection) ---
-        sut_analysis_data = {"1.0": None, "1.1": None, "1.2": None}
-        for pu_level in ["1.0", "1.1", "1.2"]:
-            V_teste_dut_lv_kv, I_exc_dut_lv = (None, None)
-            if pu_level == "1.0":
-                V_teste_dut_lv_kv, I_exc_dut_lv = tensao_bt_kv, corrente_excitacao_projeto
-            elif pu_level == "1.1":
-                V_teste_dut_lv_kv, I_exc_dut_lv = tensao_teste_1_1_kv, corrente_excitacao_1_1
-            elif pu_level == "1.2" and corrente_excitacao_1_2 is not None:
-                V_teste_dut_lv_kv, I_exc_dut_lv = tensao_teste_1_2_kv, corrente_excitacao_1_2
-
-            if (
-                V_teste_dut_lv_kv is None
-                or V_teste_dut_lv_kv <= epsilon
-                or I_exc_dut_lv is None
-                or I_exc_dut_lv <= epsilon
-            ):
-                sut_analysis_data[pu_level] = {
-                    "status": "Sem dados de corrente/tensão",
-                    "taps_info": [],
-                }
-                continue
-
-            V_target_sut_hv = V_teste_dut_lv_kv * 1000  # Target in Volts
-            taps_sut_hv = np.arange(tensao_sut_at_min, tensao_sut_at_max + step_sut_at, step_sut_at)
-            taps_sut_hv = taps_sut_hv[taps_sut_hv > epsilon]
-            if len(taps_sut_hv) == 0:
-                sut_analysis_data[pu_level] = {"status": "Faixa SUT inválida", "taps_info": []}
-                continue
-
-            taps_adequados = [
-                tap for tap in taps_sut_hv if tap >= V_target_sut_hv - 1e-6
-            ]  # Tolerance
-
-            if not taps_adequados:
-                highest_sut_tap_kv = taps_sut_hv[-1] / 1000 if len(taps_sut_hv) > 0 else "N/A"
-                sut_analysis_data[pu_level] = {
-                    "status": f"Tensão > {highest_sut_tap_kv}kV SUT Max",
-                    "taps_info": [],
-                }
-                continue
-
-            diffs = {tap: abs(tap - V_target_sut_hv) for tap in taps_adequados}
-            taps_ordenados = sorted(taps_adequados, key=lambda tap: diffs[tap])
-            # Select top 5 closest ADEQUATE taps
-            top_taps = taps_ordenados[:5]
-
-            taps_info_list = []
-            for V_sut_hv_tap in top_taps:
-                if tensao_sut_bt <= epsilon:
-                    continue  # Avoid division by zero
-                ratio_sut = V_sut_hv_tap / tensao_sut_bt
-                I_sut_lv = I_exc_dut_lv * ratio_sut  # Simple reflection for vazio
-                percent_limite = (
-                    (I_sut_lv / limite_corrente_eps) * 100
-                    if limite_corrente_eps > epsilon
-                    else float("inf")
-                )
-                taps_info_list.append(
-                    {
-                        "tap_sut_kv": V_sut_hv_tap / 1000,
-                        "corrente_eps_a": I_sut_lv,
-                        "percent_limite": percent_limite,
-                    }
-                )
-
-            # Sort final list by voltage
-            taps_info_list.sort(key=lambda x: x["tap_sut_kv"])
-            sut_analysis_data[pu_level] = {"status": "OK", "taps_info": taps_info_list}
+        sut_analysis_data = {}
+        for k, pu_level in enumerate(["1.0", "1.1", "1.2"]):
+            valid_taps = np.isfinite(vazio["sut_tap_kv"][k])
+            sut_analysis_data[pu_level] = {
+                "status": vazio["sut_status"][k],
+                "taps_info": [
+                    {"tap_sut_kv": tap_kv, "corrente_eps_a": i_eps, "percent_limite": percent}
+                    for tap_kv, i_eps, percent in zip(
+                        vazio["sut_tap_kv"][k][valid_taps].tolist(),
+                        vazio["sut_corrente_eps_a"][k][valid_taps].tolist(),
+                        vazio["sut_percent_limite"][k][valid_taps].tolist(),
+                    )
+                ],
+            }
 
         # --- Layout Helper Functions (Vazio - Unchanged) ---
         def create_general_parameters_table(res_proj, res_m4):
@@ -1427,408 +1294,6 @@ def losses_handle_perdas_vazio(
         return error_div, initial_dut_volt, initial_sut, initial_legend_obs, no_update
 
 
-# --- Capacitor Bank Suggestion Helper Functions (Unchanged from previous version) ---
-def generate_q_combinations(num_switches=5):
-    """Generates all non-empty combinations of Q switch indices (1-based)."""
-    q_indices = list(range(1, num_switches + 1))
-    combinations = []
-    for i in range(1, num_switches + 1):
-        combinations.extend(itertools.combinations(q_indices, i))
-    return [list(comb) for comb in combinations]
-
-
-def calculate_q_combination_power(q_combination, available_caps):
-    """Calculates the total MVAr for a given Q combination across available capacitors."""
-    total_power = 0
-    # Assuming Q_SWITCH_POWERS["generic_cp"] holds the power steps [Q1, Q2, Q3, Q4, Q5] in MVAr
-    power_steps = Q_SWITCH_POWERS.get("generic_cp")
-    if not power_steps or len(power_steps) != 5:
-        log.error("Generic Q switch power profile is missing or invalid.")
-        return 0
-
-    power_per_cap = sum(power_steps[q - 1] for q in q_combination)
-    total_power = power_per_cap * len(available_caps)  # Sum power across all available units
-    return total_power
-
-
-def select_target_bank_voltage(max_test_voltage_kv):
-    """Selects the target capacitor bank voltage level based on max test voltage."""
-    # Use voltages where caps exist
-    cap_bank_voltages_num = sorted([float(v) for v in CAPACITORS_BY_VOLTAGE.keys()])
-    target_v_cf = None
-    target_v_sf = None
-
-    # Selection COM FATOR (V_test > V_bank * 1.1)
-    for v_bank in cap_bank_voltages_num:
-        if max_test_voltage_kv <= (v_bank * 1.1) + epsilon:
-            target_v_cf = v_bank
-            break
-    # If no suitable voltage found, use the highest available
-    if target_v_cf is None and cap_bank_voltages_num:
-        target_v_cf = cap_bank_voltages_num[-1]
-        log.warning(
-            f"Max test voltage {max_test_voltage_kv:.2f}kV exceeds 110% of highest bank ({cap_bank_voltages_num[-1]}kV). Using highest bank."
-        )
-
-    # Selection SEM FATOR (V_test <= V_bank)
-    for v_bank in cap_bank_voltages_num:
-        if max_test_voltage_kv <= v_bank + epsilon:
-            target_v_sf = v_bank
-            break
-    if target_v_sf is None and cap_bank_voltages_num:
-        target_v_sf = cap_bank_voltages_num[-1]
-        log.warning(
-            f"Max test voltage {max_test_voltage_kv:.2f}kV exceeds highest bank ({cap_bank_voltages_num[-1]}kV). Using highest bank for S/F."
-        )
-
-    # Return as strings for dictionary keys
-    target_v_cf_str = str(target_v_cf) if target_v_cf is not None else None
-    target_v_sf_str = str(target_v_sf) if target_v_sf is not None else None
-
-    return target_v_cf_str, target_v_sf_str
-
-
-def get_cs_configuration(target_bank_voltage_key, use_group1_only, circuit_type):
-    """Determines the CS switch configuration string."""
-    if target_bank_voltage_key is None:
-        return "N/A (Tensão alvo inválida)"
-
-    cs_switch_dict = (
-        CS_SWITCHES_BY_VOLTAGE_TRI if circuit_type == "Trifásico" else CS_SWITCHES_BY_VOLTAGE_MONO
-    )
-    # Ensure lookup key exactly matches the dictionary keys
-    available_switches = cs_switch_dict.get(str(target_bank_voltage_key))  # Ensure string key
-
-    if not available_switches:
-        log.warning(
-            f"No CS switches found for key '{target_bank_voltage_key}' (Type: {circuit_type}). Available keys: {list(cs_switch_dict.keys())}"
-        )
-        return f"N/A (Sem chaves CS para {target_bank_voltage_key}kV)"
-
-    cs_config_list = []
-    for switch_name in available_switches:
-        # Logic from C# GetCsConfiguration: Skip group 2 switches if use_group1_only is True for Trifásico
-        # Assuming Group 1 switches end in '1' (CSxA1 etc.) and Group 2 switches end in '2' (CSxA2 etc.)
-        is_group_2_switch = len(switch_name) > 4 and switch_name.endswith("2")  # e.g., CS1A2, CS2B2
-
-        if use_group1_only and circuit_type == "Trifásico" and is_group_2_switch:
-            log.debug(
-                f"Skipping Group 2 CS switch {switch_name} because use_group1_only is True (Trifásico)."
-            )
-            continue
-
-        # Monophase CS selection is simpler here, include all listed switches.
-        cs_config_list.append(switch_name)
-
-    return ", ".join(sorted(cs_config_list)) if cs_config_list else "N/A"  # Sort for consistency
-
-
-def find_best_q_configuration(target_bank_voltage_key, required_power_mvar, use_group1_only):
-    """Finds the best Q switch combination."""
-    if (
-        target_bank_voltage_key is None
-        or required_power_mvar is None
-        or required_power_mvar <= epsilon
-    ):
-        return "N/A", 0.0
-
-    # Ensure lookup key exactly matches the dictionary keys
-    all_available_caps = CAPACITORS_BY_VOLTAGE.get(
-        str(target_bank_voltage_key), []
-    )  # Ensure string key
-    if not all_available_caps:
-        log.warning(
-            f"No capacitors found for key '{target_bank_voltage_key}'. Available keys: {list(CAPACITORS_BY_VOLTAGE.keys())}"
-        )
-        return f"N/A (Sem capacitores para {target_bank_voltage_key}kV)", 0.0
-
-    # Corrected Group Logic: Group 1 ends with '1', Group 2 ends with '2' based on CAPACITORS_BY_VOLTAGE
-    if use_group1_only:
-        available_caps = [cap for cap in all_available_caps if len(cap) > 4 and cap.endswith("1")]
-        log.debug(f"Using Group 1 capacitors only ({target_bank_voltage_key}kV): {available_caps}")
-        if not available_caps:
-            log.warning(
-                f"No Group 1 (ending in '1') capacitors found for {target_bank_voltage_key}kV, trying all."
-            )
-            available_caps = all_available_caps  # Fallback to all
-    else:
-        available_caps = all_available_caps
-        log.debug(f"Using Group 1+2 capacitors ({target_bank_voltage_key}kV): {available_caps}")
-
-    if not available_caps:
-        return f"N/A (Sem capacitores selecionados para {target_bank_voltage_key}kV)", 0.0
-
-    q_combinations = generate_q_combinations()
-    best_combination = None
-    min_power_above_req = float("inf")
-
-    for q_comb in q_combinations:
-        current_power = calculate_q_combination_power(q_comb, available_caps)
-        # Need power slightly above or equal to required
-        if current_power >= required_power_mvar - epsilon:  # Add tolerance
-            if current_power < min_power_above_req - epsilon:  # Found a better (lower) power
-                min_power_above_req = current_power
-                best_combination = q_comb
-            # If powers are equal (within tolerance), prefer the one with fewer switches (simpler combo)
-            elif (
-                abs(current_power - min_power_above_req) < epsilon
-                and best_combination
-                and len(q_comb) < len(best_combination)
-            ):
-                min_power_above_req = (
-                    current_power  # Update power in case it's slightly different but within epsilon
-                )
-                best_combination = q_comb
-
-    if best_combination:
-        q_config_str = ", ".join(
-            [f"Q{q}" for q in sorted(best_combination)]
-        )  # Sort for consistency
-        return (
-            q_config_str,
-            min_power_above_req,
-        )  # Return the actual power provided by this combination
-    else:
-        # Calculate max possible power with all Q switches on all available caps
-        max_possible_power = calculate_q_combination_power([1, 2, 3, 4, 5], available_caps)
-        required_str = f"{required_power_mvar:.1f}" if required_power_mvar else "?"
-        max_str = f"{max_possible_power:.1f}" if max_possible_power is not None else "?"
-        log.warning(
-            f"Could not find suitable Q config for {target_bank_voltage_key}kV, {required_power_mvar:.2f} MVAr. Max possible: {max_possible_power:.2f} MVAr"
-        )
-        return f"N/A (Req: {required_str} MVAr > Max: {max_str} MVAr)", max_possible_power
-
-
-def suggest_capacitor_bank_config(max_voltage_kv, max_power_mvar, circuit_type):
-    """Suggests CS and Q configuration based on max requirements."""
-    log.info(
-        f"Suggesting config for Max V: {max_voltage_kv:.2f} kV, Max Q Req: {max_power_mvar:.2f} MVAr, Type: {circuit_type}"
-    )
-
-    if (
-        max_voltage_kv is None
-        or max_voltage_kv <= epsilon
-        or max_power_mvar is None
-        or max_power_mvar <= epsilon
-    ):
-        return "N/A (Dados insuficientes)", "N/A", 0.0
-
-    # 1. Select Target Bank Voltage (use Com Fator for lookups)
-    target_v_cf_key, _ = select_target_bank_voltage(max_voltage_kv)
-    if target_v_cf_key is None:
-        log.error("Could not determine target bank voltage.")
-        return "N/A (Erro Tensão)", "N/A", 0.0
-
-    # 2. Determine if Group 1 is sufficient for Com Fator
-    # Corrected Group Logic: Group 1 ends with '1', Group 2 ends with '2'
-    group1_caps = [
-        cap
-        for cap in CAPACITORS_BY_VOLTAGE.get(target_v_cf_key, [])
-        if len(cap) > 4 and cap.endswith("1")
-    ]
-    max_power_group1 = (
-        calculate_q_combination_power([1, 2, 3, 4, 5], group1_caps) if group1_caps else 0
-    )
-    # Use tolerance when comparing power requirements
-    use_group1_only = max_power_mvar <= max_power_group1 + epsilon
-    log.debug(
-        f"Target Voltage Key: {target_v_cf_key}, Max Power Group 1: {max_power_group1:.2f} MVAr, Required Power: {max_power_mvar:.2f} MVAr -> Use Group 1 Only: {use_group1_only}"
-    )
-
-    # 3. Get CS Configuration for Com Fator
-    cs_config_str = get_cs_configuration(target_v_cf_key, use_group1_only, circuit_type)
-
-    # 4. Get Q Configuration for Com Fator (using max_power_mvar directly)
-    q_config_str, q_power_mvar_provided = find_best_q_configuration(
-        target_v_cf_key, max_power_mvar, use_group1_only
-    )
-
-    return cs_config_str, q_config_str, q_power_mvar_provided
-
-
-# --- *** NEW: Helper Function for Compensated SUT/EPS Current Calculation *** ---
-def calculate_sut_eps_current_compensated(
-    tensao_ref_dut_kv,
-    corrente_ref_dut_a,
-    q_power_scenario_sf_mvar,
-    cap_bank_voltage_scenario_sf_kv,
-    q_power_scenario_cf_mvar,
-    cap_bank_voltage_scenario_cf_kv,
-    transformer_type,
-    V_sut_hv_tap_v,
-    tensao_sut_bt_v,
-    limite_corrente_eps_a,
-):
-    """
-    Calculates the net EPS current demanded from the SUT LV side,
-    considering reactive compensation from a capacitor bank for both S/F and C/F cases.
-
-    Args:
-        tensao_ref_dut_kv: DUT test voltage (kV) for the scenario.
-        corrente_ref_dut_a: DUT test current (A) for the scenario.
-        q_power_scenario_sf_mvar: Reactive power PROVIDED by the S/F configured cap bank (MVAr).
-        cap_bank_voltage_scenario_sf_kv: NOMINAL voltage of the S/F configured cap bank (kV).
-        q_power_scenario_cf_mvar: Reactive power PROVIDED by the C/F configured cap bank (MVAr).
-        cap_bank_voltage_scenario_cf_kv: NOMINAL voltage of the C/F configured cap bank (kV).
-        transformer_type: 'Trifásico' or 'Monofásico'.
-        V_sut_hv_tap_v: SUT HV tap voltage being analyzed (Volts).
-        tensao_sut_bt_v: SUT nominal LV voltage (Volts).
-        limite_corrente_eps_a: EPS current limit (Amps).
-
-    Returns:
-        dict: {'corrente_eps_sf_a': sf_net_current, 'percent_limite_sf': sf_percentage,
-               'corrente_eps_cf_a': cf_net_current, 'percent_limite_cf': cf_percentage}
-    """
-
-    # Basic validation
-    if any(
-        v is None or v <= epsilon
-        for v in [tensao_ref_dut_kv, corrente_ref_dut_a, V_sut_hv_tap_v, tensao_sut_bt_v]
-    ):
-        log.warning(
-            "Compensated current calc: Invalid base inputs (Vref, Iref, Vsut_hv, Vsut_bt). Returning uncompensated."
-        )
-        # Calculate uncompensated as fallback
-        ratio_sut = V_sut_hv_tap_v / tensao_sut_bt_v if tensao_sut_bt_v > epsilon else 0
-        I_dut_reflected = corrente_ref_dut_a * ratio_sut
-        percent_limite = (
-            (I_dut_reflected / limite_corrente_eps_a) * 100
-            if limite_corrente_eps_a > epsilon
-            else float("inf")
-        )
-        return {
-            "corrente_eps_sf_a": I_dut_reflected,
-            "percent_limite_sf": percent_limite,
-            "corrente_eps_cf_a": I_dut_reflected,
-            "percent_limite_cf": percent_limite,
-        }
-
-    # 1. Calculate SUT Ratio
-    ratio_sut = V_sut_hv_tap_v / tensao_sut_bt_v  # V/V
-
-    # 2. Calculate Initial Reflected Current (DUT demand on SUT LV side)
-    I_dut_reflected = corrente_ref_dut_a * ratio_sut  # Amps
-
-    # 3. Calculate Sqrt(3) Factor
-    sqrt_3_factor = math.sqrt(3) if transformer_type == "Trifásico" else 1.0
-
-    # 4. Initialize results with uncompensated values
-    I_eps_sf_net = I_dut_reflected
-    I_eps_cf_net = I_dut_reflected
-
-    # 5. Calculate S/F compensation
-    sf_compensation_valid = (
-        q_power_scenario_sf_mvar is not None
-        and q_power_scenario_sf_mvar > epsilon
-        and cap_bank_voltage_scenario_sf_kv is not None
-        and cap_bank_voltage_scenario_sf_kv > epsilon
-    )
-
-    if sf_compensation_valid:
-        try:
-            # Calculate Corrected Reactive Power for S/F
-            Cap_Correct_factor_sf = (
-                0.25
-                if cap_bank_voltage_scenario_sf_kv in [13.8, 23.9]
-                else 0.75
-                if cap_bank_voltage_scenario_sf_kv in [41.4, 71.7]
-                else 1.0
-            )
-            q_denominator_sf = (
-                tensao_ref_dut_kv / cap_bank_voltage_scenario_sf_kv
-            ) ** 2 * Cap_Correct_factor_sf
-            pteste_mvar_corrected_sf = (
-                q_power_scenario_sf_mvar * q_denominator_sf if q_denominator_sf > epsilon else 0
-            )
-
-            # Calculate Capacitive Current for S/F
-            I_cap_base_sf = (pteste_mvar_corrected_sf * 1000.0) / (
-                tensao_ref_dut_kv * sqrt_3_factor
-            )
-            I_cap_adjustment_sf = I_cap_base_sf * ratio_sut
-
-            # Calculate Net EPS Current for S/F
-            I_eps_sf_net = I_dut_reflected - I_cap_adjustment_sf
-
-            log.debug(
-                f"S/F Calc: Tap={V_sut_hv_tap_v/1000:.1f}kV, Q_prov={q_power_scenario_sf_mvar:.2f}MVAr @ {cap_bank_voltage_scenario_sf_kv:.1f}kV"
-            )
-            log.debug(
-                f"  S/F: Factor={Cap_Correct_factor_sf}, Q_corr={pteste_mvar_corrected_sf:.2f}MVAr, I_cap_adj={I_cap_adjustment_sf:.1f}A, I_net={I_eps_sf_net:.1f}A"
-            )
-        except Exception as e:
-            log.error(f"S/F current calc error: {e}")
-            # Keep default uncompensated value
-
-    # 6. Calculate C/F compensation
-    cf_compensation_valid = (
-        q_power_scenario_cf_mvar is not None
-        and q_power_scenario_cf_mvar > epsilon
-        and cap_bank_voltage_scenario_cf_kv is not None
-        and cap_bank_voltage_scenario_cf_kv > epsilon
-    )
-
-    if cf_compensation_valid:
-        try:
-            # Calculate Corrected Reactive Power for C/F
-            Cap_Correct_factor_cf = (
-                1.0
-                if cap_bank_voltage_scenario_cf_kv in [13.8, 23.9]
-                else 1.0
-                if cap_bank_voltage_scenario_cf_kv in [41.4, 71.7]
-                else 1.0
-            )
-            q_denominator_cf = (
-                tensao_ref_dut_kv / cap_bank_voltage_scenario_cf_kv
-            ) ** 2 * Cap_Correct_factor_cf
-            pteste_mvar_corrected_cf = (
-                q_power_scenario_cf_mvar * q_denominator_cf if q_denominator_cf > epsilon else 0
-            )
-
-            # Calculate Capacitive Current for C/F
-            I_cap_base_cf = (pteste_mvar_corrected_cf * 1000.0) / (
-                tensao_ref_dut_kv * sqrt_3_factor
-            )
-            I_cap_adjustment_cf = I_cap_base_cf * ratio_sut
-
-            # Calculate Net EPS Current for C/F
-            I_eps_cf_net = I_dut_reflected - I_cap_adjustment_cf
-
-            log.debug(
-                f"C/F Calc: Tap={V_sut_hv_tap_v/1000:.1f}kV, Q_prov={q_power_scenario_cf_mvar:.2f}MVAr @ {cap_bank_voltage_scenario_cf_kv:.1f}kV"
-            )
-            log.debug(
-                f"  C/F: Factor={Cap_Correct_factor_cf}, Q_corr={pteste_mvar_corrected_cf:.2f}MVAr, I_cap_adj={I_cap_adjustment_cf:.1f}A, I_net={I_eps_cf_net:.1f}A"
-            )
-        except Exception as e:
-            log.error(f"C/F current calc error: {e}")
-            # Keep default uncompensated value
-
-    # 7. Calculate % Limit for both S/F and C/F
-    percent_limite_sf = (
-        (abs(I_eps_sf_net) / limite_corrente_eps_a) * 100
-        if limite_corrente_eps_a > epsilon
-        else float("inf")
-    )
-    if I_eps_sf_net < 0:
-        percent_limite_sf = -percent_limite_sf
-
-    percent_limite_cf = (
-        (abs(I_eps_cf_net) / limite_corrente_eps_a) * 100
-        if limite_corrente_eps_a > epsilon
-        else float("inf")
-    )
-    if I_eps_cf_net < 0:
-        percent_limite_cf = -percent_limite_cf
-
-    return {
-        "corrente_eps_sf_a": I_eps_sf_net,
-        "percent_limite_sf": percent_limite_sf,
-        "corrente_eps_cf_a": I_eps_cf_net,
-        "percent_limite_cf": percent_limite_cf,
-    }
-
-
 # --- MODIFIED Callback Perdas em Carga ---
 @dash.callback(
     [
@@ -2015,8 +1480,6 @@ def losses_handle_perdas_carga(
             return "-"  # Return hyphen if key missing or value is None
 
         temperatura_ref = int(temperatura_referencia_ui) if temperatura_referencia_ui is not None else 75
-        # Use voltage keys from CAPACITORS_BY_VOLTAGE for consistency
-        cap_bank_voltages = sorted([float(v) for v in CAPACITORS_BY_VOLTAGE.keys()])
         sqrt_3 = math.sqrt(3)
 
         # --- Input Processing ---
@@ -2160,560 +1623,87 @@ def losses_handle_perdas_carga(
             )
             return initial_detailed_content, error_div, no_update
 
-        # --- Capacitor Bank Calculation Function (For individual scenarios) ---
-        def calculate_cap_bank(voltage, power):
-            """Calculates capacitor bank voltage and power requirements.
-            Returns tuple: (V_bank_cf, Q_bank_cf, V_bank_sf, Q_bank_sf)
-            cf = Com Fator (selected based on V_test > V_bank * 1.1)
-            sf = Sem Fator (selected based on V_test <= V_bank)
-            """
-            if voltage is None or power is None or voltage <= epsilon or power <= epsilon:
-                return None, None, None, None
-            try:
-                voltage_f = float(voltage)
-                power_f = float(power)  # Power is expected in MVA for this calc
-
-                local_cap_bank_voltages = cap_bank_voltages  # Use globally defined sorted list
-
-                if not local_cap_bank_voltages:  # Check if list is empty
-                    log.error("Lista de tensões de banco de capacitores está vazia.")
-                    return None, None, None, None
-
-                # Selection COM FATOR (Find smallest bank V where V_test > V_bank * 1.1)
-                cap_bank_voltage_com_fator = next(
-                    (v for v in local_cap_bank_voltages if voltage_f <= (v * 1.1) + 1e-6),
-                    local_cap_bank_voltages[-1],
-                )
-
-                # Selection SEM FATOR (Find smallest bank V where V_test <= V_bank)
-                cap_bank_voltage_sem_fator = next(
-                    (v for v in local_cap_bank_voltages if voltage_f <= v + 1e-6),
-                    local_cap_bank_voltages[-1],
-                )
-
-                # Definir o fator de correção com base na tensão do banco
-                def get_cap_correct_factor(bank_voltage):
-                    # Alterado para sempre retornar 1.0, independentemente da tensão do banco
-                    return 1.0
-
-                pot_cap_bank_com_fator = None
-                if cap_bank_voltage_com_fator is not None and cap_bank_voltage_com_fator > epsilon:
-                    # Aplicar o mesmo fator de correção para C/F
-                    Cap_Correct_factor_cf = get_cap_correct_factor(cap_bank_voltage_com_fator)
-                    q_denominator_cf = (
-                        voltage_f / cap_bank_voltage_com_fator
-                    ) ** 2 * Cap_Correct_factor_cf
-                    pot_cap_bank_com_fator = (
-                        power_f / q_denominator_cf if q_denominator_cf > epsilon else float("inf")
-                    )
-
-                pot_cap_bank_sem_fator = None
-                if cap_bank_voltage_sem_fator is not None and cap_bank_voltage_sem_fator > epsilon:
-                    Cap_Correct_factor_sf = get_cap_correct_factor(cap_bank_voltage_sem_fator)
-                    q_denominator_sf = (
-                        voltage_f / cap_bank_voltage_sem_fator
-                    ) ** 2 * Cap_Correct_factor_sf
-                    pot_cap_bank_sem_fator = (
-                        power_f / q_denominator_sf if q_denominator_sf > epsilon else float("inf")
-                    )
-
-                return (
-                    cap_bank_voltage_com_fator,
-                    pot_cap_bank_com_fator,
-                    cap_bank_voltage_sem_fator,
-                    pot_cap_bank_sem_fator,
-                )
-            except (ValueError, TypeError, ZeroDivisionError) as e:
-                log.error(f"Error in calculate_cap_bank(V={voltage}, P={power}): {e}")
-                return None, None, None, None
-
-        # --- Main Calculation Loop ---
-        cenarios = [
-            (tensao_nominal_at, corrente_at_nom, impedancia, perdas_totais_nom_input, "Nominal"),
-            (
-                tensao_at_tap_menor,
-                corrente_at_min,
-                impedancia_tap_menor,
-                perdas_totais_min_input,
-                "Menor",
-            ),
-            (
-                tensao_at_tap_maior,
-                corrente_at_max,
-                impedancia_tap_maior,
-                perdas_totais_max_input,
-                "Maior",
-            ),
-        ]
-        resultados = []
-        calculation_error = False
-
-        # Variables to track maximums for overall config suggestion
-        max_test_voltage_kv_overall = 0.0
-        max_test_power_mva_overall = 0.0
-        max_test_power_mvar_overall_required = 0.0  # Track max *required* reactive power
-
-        for i, (tensao, corrente, imp, perdas_totais, tap_label) in enumerate(cenarios):
-            res_dict = {"Tap": tap_label, "Tensão": tensao, "Corrente": corrente, "Vcc (%)": imp}
-
-            vcc_percent = imp
-            # Calculate Vcc in kV
-            vcc = (tensao / 100.0) * vcc_percent if tensao > 0 else 0.0
-            res_dict["Vcc (kV)"] = vcc
-
-            pnominal = tensao * corrente * sqrt_3_factor  # kVA
-            res_dict["Pnominal (kVA)"] = pnominal
-
-            res_dict["Perdas totais (kW)"] = perdas_totais
-            perdas_carga_sem_vazio = perdas_totais - perdas_vazio_nom
-            if perdas_carga_sem_vazio <= epsilon:
-                error_msg = f"Perdas em carga ({perdas_carga_sem_vazio:.2f} kW) no Tap {tap_label} são inválidas (não positivas). Verifique as perdas totais ({perdas_totais:.2f}) e em vazio ({perdas_vazio_nom:.2f})."
-                log.error(error_msg)
-                error_div = html.Div(error_msg, style=ERROR_STYLE)
-                calculation_error = True
-                break  # Stop calculation loop
-
-            res_dict["Perdas Carga Sem Vazio (kW)"] = perdas_carga_sem_vazio
-
-            # Calculate cold losses (at 25°C) from reference temperature
-            temp_factor = (
-                (235.0 + 25.0) / (235.0 + float(temperatura_ref))
-                if (235.0 + float(temperatura_ref)) > epsilon
-                else 1.0
-            )
-            perdas_cc_a_frio = perdas_carga_sem_vazio * temp_factor
-            if perdas_cc_a_frio <= epsilon:
-                error_msg = f"Cálculo de Perdas CC a frio ({perdas_cc_a_frio:.2f} kW) no Tap {tap_label} resultou em valor inválido."
-                log.error(error_msg)
-                error_div = html.Div(error_msg, style=ERROR_STYLE)
-                calculation_error = True
-                break
-            res_dict["Perdas a Frio (25°C) (kW)"] = perdas_cc_a_frio
-
-            # Calculate "Frio" (Cold Energization - Total Losses) test parameters
-            frio_ratio_sqrt = (
-                np.sqrt(perdas_totais / perdas_cc_a_frio) if perdas_cc_a_frio > epsilon else 0
-            )
-            tensao_frio = frio_ratio_sqrt * vcc
-            corrente_frio = frio_ratio_sqrt * corrente
-            pteste_frio_kva = tensao_frio * corrente_frio * sqrt_3_factor  # kVA
-            pteste_frio_mva = pteste_frio_kva / 1000.0  # MVA
-            potencia_ativa_eps_frio_kw = perdas_totais  # Total losses for cold energization
-            # Calculate reactive power Q = sqrt(S^2 - P^2)
-            pteste_frio_mvar = (
-                math.sqrt(max(0, pteste_frio_kva**2 - potencia_ativa_eps_frio_kw**2)) / 1000.0
-                if pteste_frio_kva >= potencia_ativa_eps_frio_kw
-                else 0
-            )
-
-            res_dict.update(
-                {
-                    "Tensão frio (kV)": tensao_frio,
-                    "Corrente frio (A)": corrente_frio,
-                    "Pteste frio (MVA)": pteste_frio_mva,
-                    "Potencia Ativa EPS Frio (kW)": potencia_ativa_eps_frio_kw,
-                    "Pteste frio (MVAr)": pteste_frio_mvar,  # Store reactive power test requirement
-                }
-            )
-            cap_bank_frio = calculate_cap_bank(tensao_frio, pteste_frio_mva)
-            res_dict.update(
-                {
-                    "Cap Bank Voltage Frio Com Fator (kV)": cap_bank_frio[0],
-                    "Cap Bank Power Frio Com Fator (MVAr)": cap_bank_frio[1],  # Required C/F
-                    "Cap Bank Voltage Frio Sem Fator (kV)": cap_bank_frio[2],
-                    "Cap Bank Power Frio Sem Fator (MVAr)": cap_bank_frio[3],  # Required S/F
-                }
-            )
-            # Update overall maximums based on test conditions and required bank power
-            max_test_voltage_kv_overall = max(max_test_voltage_kv_overall, tensao_frio or 0)
-            max_test_power_mva_overall = max(max_test_power_mva_overall, pteste_frio_mva or 0)
-            if cap_bank_frio[1] is not None and not math.isinf(cap_bank_frio[1]):  # Required C/F
-                max_test_power_mvar_overall_required = max(
-                    max_test_power_mvar_overall_required, cap_bank_frio[1]
-                )
-            if cap_bank_frio[3] is not None and not math.isinf(cap_bank_frio[3]):  # Required S/F
-                max_test_power_mvar_overall_required = max(
-                    max_test_power_mvar_overall_required, cap_bank_frio[3]
-                )
-
-            # Calculate "Quente" (Hot Condition - Load Losses at Tref) test parameters
-            quente_ratio_sqrt = (
-                np.sqrt(perdas_carga_sem_vazio / perdas_cc_a_frio)
-                if perdas_cc_a_frio > epsilon
-                else 0
-            )
-            tensao_quente = quente_ratio_sqrt * vcc
-            corrente_quente = quente_ratio_sqrt * corrente
-            pteste_quente_kva = tensao_quente * corrente_quente * sqrt_3_factor  # kVA
-            pteste_quente_mva = pteste_quente_kva / 1000.0  # MVA
-            potencia_ativa_eps_quente_kw = (
-                perdas_carga_sem_vazio  # Just the load losses at Tref for this test's active power
-            )
-            pteste_quente_mvar = (
-                math.sqrt(max(0, pteste_quente_kva**2 - potencia_ativa_eps_quente_kw**2))
-                / 1000.0
-                if pteste_quente_kva >= potencia_ativa_eps_quente_kw
-                else 0
-            )
-
-            res_dict.update(
-                {
-                    "Tensão quente (kV)": tensao_quente,
-                    "Corrente quente (A)": corrente_quente,
-                    "Pteste quente (MVA)": pteste_quente_mva,
-                    "Potencia Ativa Quente (kW)": potencia_ativa_eps_quente_kw,  # Corrected active power
-                    "Pteste quente (MVAr)": pteste_quente_mvar,  # Store reactive power test requirement
-                }
-            )
-            cap_bank_quente = calculate_cap_bank(tensao_quente, pteste_quente_mva)
-            res_dict.update(
-                {
-                    "Cap Bank Voltage Quente Com Fator (kV)": cap_bank_quente[0],
-                    "Cap Bank Power Quente Com Fator (MVAr)": cap_bank_quente[1],  # Required C/F
-                    "Cap Bank Voltage Quente Sem Fator (kV)": cap_bank_quente[2],
-                    "Cap Bank Power Quente Sem Fator (MVAr)": cap_bank_quente[3],  # Required S/F
-                }
-            )
-            # Update overall maximums
-            max_test_voltage_kv_overall = max(max_test_voltage_kv_overall, tensao_quente or 0)
-            max_test_power_mva_overall = max(max_test_power_mva_overall, pteste_quente_mva or 0)
-            if cap_bank_quente[1] is not None and not math.isinf(
-                cap_bank_quente[1]
-            ):  # Required C/F
-                max_test_power_mvar_overall_required = max(
-                    max_test_power_mvar_overall_required, cap_bank_quente[1]
-                )
-            if cap_bank_quente[3] is not None and not math.isinf(
-                cap_bank_quente[3]
-            ):  # Required S/F
-                max_test_power_mvar_overall_required = max(
-                    max_test_power_mvar_overall_required, cap_bank_quente[3]
-                )
-
-            # Calculate 25°C condition test parameters (using Vcc and I nominal for this tap)
-            tensao_25c = vcc  # Vcc is the test voltage
-            corrente_25c = corrente  # Nominal current for this tap
-            pteste_25c_kva = tensao_25c * corrente_25c * sqrt_3_factor  # kVA
-            pteste_25c_mva = pteste_25c_kva / 1000.0  # MVA
-            potencia_ativa_eps_25c_kw = perdas_cc_a_frio  # Just the cold losses
-            pteste_25c_mvar = (
-                math.sqrt(max(0, pteste_25c_kva**2 - potencia_ativa_eps_25c_kw**2)) / 1000.0
-                if pteste_25c_kva >= potencia_ativa_eps_25c_kw
-                else 0
+        # --- Cálculo (tap × condição de ensaio) no motor de perdas ---
+        carga = get_losses_engine().load(
+            LoadLossInputs(
+                tensao_kv=(tensao_nominal_at, tensao_at_tap_menor, tensao_at_tap_maior),
+                corrente_a=(corrente_at_nom, corrente_at_min, corrente_at_max),
+                impedancia_percent=(impedancia, impedancia_tap_menor, impedancia_tap_maior),
+                perdas_totais_kw=(perdas_totais_nom_input, perdas_totais_min_input, perdas_totais_max_input),
+                perdas_vazio_kw=perdas_vazio_nom,
+                tipo_transformador=tipo_transformador,
+                temperatura_referencia_c=temperatura_ref,
             )
+        )
+        for i, tap_label in enumerate(carga["taps"]):
+            perdas_carga_sem_vazio = float(carga["perdas_carga_kw"][i])
+            if perdas_carga_sem_vazio <= epsilon:
+                error_msg = f"Perdas em carga ({perdas_carga_sem_vazio:.2f} kW) no Tap {tap_label} são inválidas (não positivas). Verifique as perdas totais ({carga['perdas_totais_kw'][i]:.2f}) e em vazio ({perdas_vazio_nom:.2f})."
+            elif not carga["valid"][i]:
+                error_msg = f"Cálculo de Perdas CC a frio ({carga['perdas_frio_kw'][i]:.2f} kW) no Tap {tap_label} resultou em valor inválido."
+            else:
+                continue
+            log.error(error_msg)
+            return initial_detailed_content, html.Div(error_msg, style=ERROR_STYLE), no_update
 
-            res_dict.update(
-                {
-                    "Tensão 25°C (kV)": tensao_25c,
-                    "Corrente 25°C (A)": corrente_25c,
-                    "Pteste 25°C (MVA)": pteste_25c_mva,
-                    "Potencia Ativa 25°C (kW)": potencia_ativa_eps_25c_kw,
-                    "Pteste 25°C (MVAr)": pteste_25c_mvar,  # Store reactive power test requirement
-                }
-            )
-            cap_bank_25c = calculate_cap_bank(tensao_25c, pteste_25c_mva)
-            res_dict.update(
-                {
-                    "Cap Bank Voltage 25°C Com Fator (kV)": cap_bank_25c[0],
-                    "Cap Bank Power 25°C Com Fator (MVAr)": cap_bank_25c[1],  # Required C/F
-                    "Cap Bank Voltage 25°C Sem Fator (kV)": cap_bank_25c[2],
-                    "Cap Bank Power 25°C Sem Fator (MVAr)": cap_bank_25c[3],  # Required S/F
-                }
-            )
-            # Update overall maximums
-            max_test_voltage_kv_overall = max(max_test_voltage_kv_overall, tensao_25c or 0)
-            max_test_power_mva_overall = max(max_test_power_mva_overall, pteste_25c_mva or 0)
-            if cap_bank_25c[1] is not None and not math.isinf(cap_bank_25c[1]):  # Required C/F
-                max_test_power_mvar_overall_required = max(
-                    max_test_power_mvar_overall_required, cap_bank_25c[1]
-                )
-            if cap_bank_25c[3] is not None and not math.isinf(cap_bank_25c[3]):  # Required S/F
-                max_test_power_mvar_overall_required = max(
-                    max_test_power_mvar_overall_required, cap_bank_25c[3]
-                )
+        def optional(value):
+            value = float(value)
+            return None if math.isnan(value) else value
 
+        overload_applicable = carga["overload_applicable"]
+        resultados = []
+        for i, tap_label in enumerate(carga["taps"]):
+            res_dict = {
+                "Tap": tap_label,
+                "Tensão": float(carga["tensao_kv"][i]),
+                "Corrente": float(carga["corrente_a"][i]),
+                "Vcc (%)": (impedancia, impedancia_tap_menor, impedancia_tap_maior)[i],
+                "Vcc (kV)": float(carga["vcc_kv"][i]),
+                "Pnominal (kVA)": float(carga["pnominal_kva"][i]),
+                "Perdas totais (kW)": float(carga["perdas_totais_kw"][i]),
+                "Perdas Carga Sem Vazio (kW)": float(carga["perdas_carga_kw"][i]),
+                "Perdas a Frio (25°C) (kW)": float(carga["perdas_frio_kw"][i]),
+            }
+            scenario_order = ("Frio", "Quente", "25°C") + (LOAD_OVERLOAD_SCENARIOS if overload_applicable else ())
+            for scenario in scenario_order:
+                j = carga["scenarios"].index(scenario)
+                keys = LOAD_SCENARIO_KEYS[scenario]
+                res_dict[keys["tensao"]] = float(carga["test_tensao_kv"][i, j])
+                res_dict[keys["corrente"]] = float(carga["test_corrente_a"][i, j])
+                res_dict[keys["potencia_mva"]] = float(carga["test_potencia_mva"][i, j])
+                if scenario in LOAD_OVERLOAD_SCENARIOS:
+                    res_dict[f"Perdas {scenario} (kW)"] = float(carga["test_potencia_ativa_kw"][i, j])
+                res_dict[keys["potencia_ativa"]] = float(carga["test_potencia_ativa_kw"][i, j])
+                res_dict[keys["potencia_mvar"]] = float(carga["test_potencia_mvar"][i, j])
+                res_dict[f"Cap Bank Voltage {scenario} Com Fator (kV)"] = optional(carga["banco_tensao_cf_kv"][i, j])
+                res_dict[f"Cap Bank Power {scenario} Com Fator (MVAr)"] = optional(carga["banco_potencia_cf_mvar"][i, j])
+                res_dict[f"Cap Bank Voltage {scenario} Sem Fator (kV)"] = optional(carga["banco_tensao_sf_kv"][i, j])
+                res_dict[f"Cap Bank Power {scenario} Sem Fator (MVAr)"] = optional(carga["banco_potencia_sf_mvar"][i, j])
             resultados.append(res_dict)
-        # End of main calculation loop
 
-        if calculation_error:
-            # If an error occurred inside the loop, return the error message
-            return initial_detailed_content, error_div, no_update
-
-        # --- Overload Calculations (if applicable) ---
-        overload_applicable = tensao_nominal_at >= 230
-        if overload_applicable:
-            # Iterate through results again to add overload calcs
-            for resultado in resultados:
-                vcc = resultado.get("Vcc (kV)")
-                corrente = resultado.get("Corrente")
-                perdas_carga = resultado.get("Perdas Carga Sem Vazio (kW)")  # Base losses at Tref
-
-                if vcc is None or corrente is None or perdas_carga is None:
-                    log.warning(
-                        f"Skipping overload calculation for Tap {resultado.get('Tap')} due to missing base data."
-                    )
-                    continue
-
-                # --- 1.2 PU ---
-                corrente_1_2 = corrente * 1.2
-                tensao_1_2 = vcc * 1.2  # Simple scaling
-                pteste_1_2_kva = tensao_1_2 * corrente_1_2 * sqrt_3_factor  # kVA
-                pteste_1_2_mva = pteste_1_2_kva / 1000.0  # MVA
-                perdas_1_2_kw = perdas_carga * (1.2**2)  # Scale base load losses (I^2R)
-                potencia_ativa_eps_1_2_kw = (
-                    perdas_1_2_kw  # Active power for overload is the scaled losses
-                )
-                pteste_1_2_mvar = (
-                    math.sqrt(max(0, pteste_1_2_kva**2 - potencia_ativa_eps_1_2_kw**2)) / 1000.0
-                    if pteste_1_2_kva >= potencia_ativa_eps_1_2_kw
-                    else 0
-                )
-
-                resultado.update(
-                    {
-                        "Tensão 1.2 pu (kV)": tensao_1_2,
-                        "Corrente 1.2 pu (A)": corrente_1_2,
-                        "Pteste 1.2 pu (MVA)": pteste_1_2_mva,
-                        "Perdas 1.2 pu (kW)": perdas_1_2_kw,
-                        "Potencia Ativa 1.2 pu (kW)": potencia_ativa_eps_1_2_kw,
-                        "Pteste 1.2 pu (MVAr)": pteste_1_2_mvar,  # Store reactive power test requirement
-                    }
-                )
-                cap_bank_1_2 = calculate_cap_bank(tensao_1_2, pteste_1_2_mva)
-                resultado.update(
-                    {
-                        "Cap Bank Voltage 1.2 pu Com Fator (kV)": cap_bank_1_2[0],
-                        "Cap Bank Power 1.2 pu Com Fator (MVAr)": cap_bank_1_2[1],  # Required C/F
-                        "Cap Bank Voltage 1.2 pu Sem Fator (kV)": cap_bank_1_2[2],
-                        "Cap Bank Power 1.2 pu Sem Fator (MVAr)": cap_bank_1_2[3],  # Required S/F
-                    }
-                )
-                # Update overall maximums
-                max_test_voltage_kv_overall = max(max_test_voltage_kv_overall, tensao_1_2 or 0)
-                max_test_power_mva_overall = max(max_test_power_mva_overall, pteste_1_2_mva or 0)
-                if cap_bank_1_2[1] is not None and not math.isinf(cap_bank_1_2[1]):  # Required C/F
-                    max_test_power_mvar_overall_required = max(
-                        max_test_power_mvar_overall_required, cap_bank_1_2[1]
-                    )
-                if cap_bank_1_2[3] is not None and not math.isinf(cap_bank_1_2[3]):  # Required S/F
-                    max_test_power_mvar_overall_required = max(
-                        max_test_power_mvar_overall_required, cap_bank_1_2[3]
-                    )
-
-                # --- 1.4 PU ---
-                corrente_1_4 = corrente * 1.4
-                tensao_1_4 = vcc * 1.4  # Simple scaling
-                pteste_1_4_kva = tensao_1_4 * corrente_1_4 * sqrt_3_factor  # kVA
-                pteste_1_4_mva = pteste_1_4_kva / 1000.0  # MVA
-                perdas_1_4_kw = perdas_carga * (1.4**2)  # Scale base load losses (I^2R)
-                potencia_ativa_eps_1_4_kw = (
-                    perdas_1_4_kw  # Active power for overload is the scaled losses
-                )
-                pteste_1_4_mvar = (
-                    math.sqrt(max(0, pteste_1_4_kva**2 - potencia_ativa_eps_1_4_kw**2)) / 1000.0
-                    if pteste_1_4_kva >= potencia_ativa_eps_1_4_kw
-                    else 0
-                )
-
-                resultado.update(
-                    {
-                        "Tensão 1.4 pu (kV)": tensao_1_4,
-                        "Corrente 1.4 pu (A)": corrente_1_4,
-                        "Pteste 1.4 pu (MVA)": pteste_1_4_mva,
-                        "Perdas 1.4 pu (kW)": perdas_1_4_kw,
-                        "Potencia Ativa 1.4 pu (kW)": potencia_ativa_eps_1_4_kw,
-                        "Pteste 1.4 pu (MVAr)": pteste_1_4_mvar,  # Store reactive power test requirement
-                    }
-                )
-                cap_bank_1_4 = calculate_cap_bank(tensao_1_4, pteste_1_4_mva)
-                resultado.update(
-                    {
-                        "Cap Bank Voltage 1.4 pu Com Fator (kV)": cap_bank_1_4[0],
-                        "Cap Bank Power 1.4 pu Com Fator (MVAr)": cap_bank_1_4[1],  # Required C/F
-                        "Cap Bank Voltage 1.4 pu Sem Fator (kV)": cap_bank_1_4[2],
-                        "Cap Bank Power 1.4 pu Sem Fator (MVAr)": cap_bank_1_4[3],  # Required S/F
-                    }
-                )
-                # Update overall maximums
-                max_test_voltage_kv_overall = max(max_test_voltage_kv_overall, tensao_1_4 or 0)
-                max_test_power_mva_overall = max(max_test_power_mva_overall, pteste_1_4_mva or 0)
-                if cap_bank_1_4[1] is not None and not math.isinf(cap_bank_1_4[1]):  # Required C/F
-                    max_test_power_mvar_overall_required = max(
-                        max_test_power_mvar_overall_required, cap_bank_1_4[1]
-                    )
-                if cap_bank_1_4[3] is not None and not math.isinf(cap_bank_1_4[3]):  # Required S/F
-                    max_test_power_mvar_overall_required = max(
-                        max_test_power_mvar_overall_required, cap_bank_1_4[3]
-                    )
-        # End of overload calculations
+        # Maximums for the overall config suggestion
+        max_test_voltage_kv_overall = carga["max_tensao_kv"]
+        max_test_power_mva_overall = carga["max_potencia_mva"]
+        max_test_power_mvar_overall_required = carga["max_potencia_mvar_requerida"]  # Max *required* reactive power
 
         # --- *** Calculate Capacitor Bank Configuration for Each Scenario *** ---
-        # Helper function to calculate and store capacitor bank configuration for each scenario
-        def calculate_and_store_cap_bank_config(res_dict, scenario_suffix):
-            """Calculate and store CS/Q config and PROVIDED power in the results dictionary."""
-            # Get the S/F and C/F *required* bank voltage and power values
-            cap_bank_voltage_cf_key = f"Cap Bank Voltage {scenario_suffix} Com Fator (kV)"
-            cap_bank_power_cf_key = f"Cap Bank Power {scenario_suffix} Com Fator (MVAr)"
-            cap_bank_voltage_sf_key = f"Cap Bank Voltage {scenario_suffix} Sem Fator (kV)"
-            cap_bank_power_sf_key = f"Cap Bank Power {scenario_suffix} Sem Fator (MVAr)"
-
-            cap_bank_voltage_cf = res_dict.get(cap_bank_voltage_cf_key)
-            cap_bank_power_cf_required = res_dict.get(cap_bank_power_cf_key)  # Required power C/F
-            cap_bank_voltage_sf = res_dict.get(cap_bank_voltage_sf_key)
-            cap_bank_power_sf_required = res_dict.get(cap_bank_power_sf_key)  # Required power S/F
-
-            # Initialize outputs
-            config_results = {
-                f"CS Config {scenario_suffix}": "N/A",
-                f"CS Config {scenario_suffix} S/F": "N/A",
-                f"Q Config {scenario_suffix}": "N/A",
-                f"Q Config {scenario_suffix} S/F": "N/A",
-                f"Q Power Provided {scenario_suffix} (MVAr)": 0.0,  # Store the PROVIDED power (C/F)
-                f"Q Power Provided {scenario_suffix} S/F (MVAr)": 0.0,  # Store the PROVIDED power (S/F)
-            }
-
-            # Get available voltage keys for lookup
-            available_voltages_str = list(CAPACITORS_BY_VOLTAGE.keys())
-            available_voltages_flt = [float(v) for v in available_voltages_str]
-
-            # --- Calculate C/F configuration ---
-            if (
-                cap_bank_voltage_cf is not None
-                and cap_bank_power_cf_required is not None
-                and not math.isinf(cap_bank_power_cf_required)
-                and cap_bank_power_cf_required > 0
-            ):
-                target_v_cf_key = None
-                try:
-                    # Find the index of the closest float voltage
-                    closest_voltage_idx_cf = min(
-                        range(len(available_voltages_flt)),
-                        key=lambda i: abs(available_voltages_flt[i] - cap_bank_voltage_cf),
-                    )
-                    target_v_cf_key = available_voltages_str[
-                        closest_voltage_idx_cf
-                    ]  # Get the corresponding string key
-                    log.debug(
-                        f"Tap {res_dict.get('Tap')}, Scen {scenario_suffix} C/F: Target V float = {cap_bank_voltage_cf:.2f}, Closest Key = {target_v_cf_key}"
-                    )
-                except ValueError:
-                    log.error(f"Could not find closest voltage key for C/F {cap_bank_voltage_cf}")
-
-                if target_v_cf_key:
-                    # Determine if Group 1 is sufficient for C/F
-                    group1_caps_cf = [
-                        cap
-                        for cap in CAPACITORS_BY_VOLTAGE.get(target_v_cf_key, [])
-                        if len(cap) > 4 and cap.endswith("1")
-                    ]
-                    max_power_group1_cf = (
-                        calculate_q_combination_power([1, 2, 3, 4, 5], group1_caps_cf)
-                        if group1_caps_cf
-                        else 0
-                    )
-                    use_group1_only_cf = (
-                        cap_bank_power_cf_required <= max_power_group1_cf + 1e-6
-                    )  # Add tolerance
-
-                    # Get CS Configuration for C/F
-                    config_results[f"CS Config {scenario_suffix}"] = get_cs_configuration(
-                        target_v_cf_key, use_group1_only_cf, tipo_transformador
-                    )
-
-                    # Get Q Configuration and PROVIDED power for C/F (using the required power)
-                    q_config_cf, q_power_cf_provided = find_best_q_configuration(
-                        target_v_cf_key, cap_bank_power_cf_required, use_group1_only_cf
-                    )
-                    config_results[f"Q Config {scenario_suffix}"] = q_config_cf
-                    config_results[
-                        f"Q Power Provided {scenario_suffix} (MVAr)"
-                    ] = q_power_cf_provided
-                else:
-                    config_results[f"CS Config {scenario_suffix}"] = "N/A (Erro Chave V C/F)"
-                    config_results[f"Q Config {scenario_suffix}"] = "N/A"
-                    config_results[f"Q Power Provided {scenario_suffix} (MVAr)"] = 0.0
-            else:
-                log.warning(
-                    f"Dados C/F insuficientes ou inválidos para config {scenario_suffix} no Tap {res_dict.get('Tap')}. V: {cap_bank_voltage_cf}, Req P: {cap_bank_power_cf_required}"
-                )
-                config_results[f"CS Config {scenario_suffix}"] = "N/A (Dados C/F Insuf.)"
-                config_results[f"Q Config {scenario_suffix}"] = "N/A"
-                config_results[f"Q Power Provided {scenario_suffix} (MVAr)"] = 0.0
-
-            # --- Calculate S/F configuration ---
-            if (
-                cap_bank_voltage_sf is not None
-                and cap_bank_power_sf_required is not None
-                and not math.isinf(cap_bank_power_sf_required)
-                and cap_bank_power_sf_required > 0
-            ):
-                target_v_sf_key = None
-                try:
-                    # Find the index of the closest float voltage
-                    closest_voltage_idx_sf = min(
-                        range(len(available_voltages_flt)),
-                        key=lambda i: abs(available_voltages_flt[i] - cap_bank_voltage_sf),
-                    )
-                    target_v_sf_key = available_voltages_str[
-                        closest_voltage_idx_sf
-                    ]  # Get the corresponding string key
-                    log.debug(
-                        f"Tap {res_dict.get('Tap')}, Scen {scenario_suffix} S/F: Target V float = {cap_bank_voltage_sf:.2f}, Closest Key = {target_v_sf_key}"
-                    )
-                except ValueError:
-                    log.error(f"Could not find closest voltage key for S/F {cap_bank_voltage_sf}")
-
-                if target_v_sf_key:
-                    # Determine if Group 1 is sufficient for S/F
-                    group1_caps_sf = [
-                        cap
-                        for cap in CAPACITORS_BY_VOLTAGE.get(target_v_sf_key, [])
-                        if len(cap) > 4 and cap.endswith("1")
-                    ]
-                    max_power_group1_sf = (
-                        calculate_q_combination_power([1, 2, 3, 4, 5], group1_caps_sf)
-                        if group1_caps_sf
-                        else 0
-                    )
-                    use_group1_only_sf = (
-                        cap_bank_power_sf_required <= max_power_group1_sf + 1e-6
-                    )  # Add tolerance
-
-                    # Get CS Configuration for S/F
-                    config_results[f"CS Config {scenario_suffix} S/F"] = get_cs_configuration(
-                        target_v_sf_key, use_group1_only_sf, tipo_transformador
-                    )
-
-                    # Get Q Configuration and PROVIDED power for S/F (using the required power)
-                    q_config_sf, q_power_sf_provided = find_best_q_configuration(
-                        target_v_sf_key, cap_bank_power_sf_required, use_group1_only_sf
-                    )
-                    config_results[f"Q Config {scenario_suffix} S/F"] = q_config_sf
-                    config_results[
-                        f"Q Power Provided {scenario_suffix} S/F (MVAr)"
-                    ] = q_power_sf_provided
-                else:
-                    config_results[f"CS Config {scenario_suffix} S/F"] = "N/A (Erro Chave V S/F)"
-                    config_results[f"Q Config {scenario_suffix} S/F"] = "N/A"
-                    config_results[f"Q Power Provided {scenario_suffix} S/F (MVAr)"] = 0.0
-            else:
-                log.warning(
-                    f"Dados S/F insuficientes ou inválidos para config {scenario_suffix} no Tap {res_dict.get('Tap')}. V: {cap_bank_voltage_sf}, Req P: {cap_bank_power_sf_required}"
-                )
-                config_results[f"CS Config {scenario_suffix} S/F"] = "N/A (Dados S/F Insuf.)"
-                config_results[f"Q Config {scenario_suffix} S/F"] = "N/A"
-                config_results[f"Q Power Provided {scenario_suffix} S/F (MVAr)"] = 0.0
-
-            res_dict.update(config_results)
-
-        # Calculate configurations for each scenario and add to results
-        for res in resultados:
-            calculate_and_store_cap_bank_config(res, "25°C")
-            calculate_and_store_cap_bank_config(res, "Frio")
-            calculate_and_store_cap_bank_config(res, "Quente")
-            if overload_applicable:
-                calculate_and_store_cap_bank_config(res, "1.2 pu")
-                calculate_and_store_cap_bank_config(res, "1.4 pu")
+        # Todas as condições (tap × cenário) de uma vez, com e sem fator, pelo índice de potências do banco
+        for suffix, fator_label in (("cf", "C/F"), ("sf", "S/F")):
+            configs = suggest_bank_configs(
+                carga[f"banco_tensao_{suffix}_kv"], carga[f"banco_potencia_{suffix}_mvar"], tipo_transformador
+            )
+            key_suffix = "" if suffix == "cf" else " S/F"
+            for i, res in enumerate(resultados):
+                for j, scenario_suffix in enumerate(carga["scenarios"]):
+                    if configs["valid"][i, j]:
+                        res[f"CS Config {scenario_suffix}{key_suffix}"] = configs["cs_config"][i, j]
+                    else:
+                        log.warning(
+                            f"Dados {fator_label} insuficientes ou inválidos para config {scenario_suffix} no Tap {res.get('Tap')}. V: {carga[f'banco_tensao_{suffix}_kv'][i, j]}, Req P: {carga[f'banco_potencia_{suffix}_mvar'][i, j]}"
+                        )
+                        res[f"CS Config {scenario_suffix}{key_suffix}"] = f"N/A (Dados {fator_label} Insuf.)"
+                    res[f"Q Config {scenario_suffix}{key_suffix}"] = configs["q_config"][i, j]
+                    res[f"Q Power Provided {scenario_suffix}{key_suffix} (MVAr)"] = float(configs["q_power_mvar"][i, j])
 
         # --- *** Suggest Overall Capacitor Bank Configuration *** ---
         cs_config_str, q_config_str, q_power_mvar_provided_overall = suggest_capacitor_bank_config(
@@ -4622,12 +3612,6 @@ def losses_handle_perdas_carga(
         )
 
         # --- SUT/EPS Analysis (Load Losses - WITH COMPENSATION) ---
-        tensao_sut_bt_v = SUT_BT_VOLTAGE  # Voltage (e.g., 600V)
-        tensao_sut_at_min_v = SUT_AT_MIN_VOLTAGE
-        tensao_sut_at_max_v = SUT_AT_MAX_VOLTAGE
-        step_sut_at_v = SUT_AT_STEP_VOLTAGE
-        limite_corrente_eps_a = EPS_CURRENT_LIMIT  # Amps
-
         # Function to create the small SUT/EPS table (used below)
         def create_sut_eps_analysis_table_component_compensated(analysis_results):
             """Creates the dbc.Table component for COMPENSATED SUT/EPS analysis."""
@@ -4889,6 +3873,16 @@ def losses_handle_perdas_carga(
                 "title": "ANÁLISE SUT/EPS: SOBRECARGA 1.4 PU",
             }
 
+        # Corrente no EPS com a potência fornecida pelas configurações escolhidas, todas as condições de uma vez
+        q_provided_shape = carga["test_tensao_kv"].shape
+        q_provided_sf = np.full(q_provided_shape, np.nan)
+        q_provided_cf = np.full(q_provided_shape, np.nan)
+        for i, res in enumerate(resultados):
+            for j, scen_key in enumerate(carga["scenarios"]):
+                q_provided_sf[i, j] = res.get(f"Q Power Provided {scen_key} S/F (MVAr)") or np.nan
+                q_provided_cf[i, j] = res.get(f"Q Power Provided {scen_key} (MVAr)") or np.nan
+        sut_eps = get_losses_engine().sut_eps_compensated(carga, q_provided_sf, q_provided_cf, tipo_transformador)
+
         sut_analysis_cards = {}
         for scen_key, scen_info in sut_scenarios_info.items():
             sut_cols = []
@@ -4898,81 +3892,15 @@ def losses_handle_perdas_carga(
                 if tap_label not in ["Nominal", "Menor", "Maior"]:
                     continue
 
-                tensao_ref_dut_kv = res.get(scen_info["tensao_key"])
-                corrente_ref_dut_a = res.get(scen_info["corrente_key"])
-                # --- Scenario-specific compensation parameters are now obtained directly in the calculation loop ---
-
-                analysis_result = {
-                    "status": "Erro nos dados de entrada SUT",
-                    "taps_info": [],
-                }  # Default
-                if tensao_ref_dut_kv is not None and corrente_ref_dut_a is not None:
-                    V_target_sut_hv_v = tensao_ref_dut_kv * 1000  # Target in Volts
-                    taps_sut_hv_v = np.arange(
-                        tensao_sut_at_min_v, tensao_sut_at_max_v + step_sut_at_v, step_sut_at_v
-                    )
-                    taps_sut_hv_v = taps_sut_hv_v[taps_sut_hv_v > epsilon]
-
-                    if len(taps_sut_hv_v) == 0:
-                        analysis_result = {"status": "Faixa SUT AT inválida", "taps_info": []}
-                    else:
-                        # Find top 5 taps closest to the target voltage
-                        diffs = {tap: abs(tap - V_target_sut_hv_v) for tap in taps_sut_hv_v}
-                        taps_ordenados = sorted(taps_sut_hv_v, key=lambda tap: diffs[tap])
-                        top_5_taps_v = taps_ordenados[:5]
-
-                        taps_info_list_compensated = []
-                        for V_sut_hv_tap_v in top_5_taps_v:
-                            # Get S/F and C/F values for compensation
-                            q_power_scenario_sf_mvar = res.get(
-                                f"Q Power Provided {scen_key} S/F (MVAr)"
-                            )
-                            cap_bank_voltage_scenario_sf_kv = res.get(
-                                f"Cap Bank Voltage {scen_key} Sem Fator (kV)"
-                            )
-                            q_power_scenario_cf_mvar = res.get(
-                                f"Q Power Provided {scen_key} (MVAr)"
-                            )  # C/F
-                            cap_bank_voltage_scenario_cf_kv = res.get(
-                                f"Cap Bank Voltage {scen_key} Com Fator (kV)"
-                            )
-
-                            # Call the updated compensated calculation function with separate S/F and C/F values
-                            comp_result = calculate_sut_eps_current_compensated(
-                                tensao_ref_dut_kv=tensao_ref_dut_kv,
-                                corrente_ref_dut_a=corrente_ref_dut_a,
-                                q_power_scenario_sf_mvar=q_power_scenario_sf_mvar,
-                                cap_bank_voltage_scenario_sf_kv=cap_bank_voltage_scenario_sf_kv,
-                                q_power_scenario_cf_mvar=q_power_scenario_cf_mvar,
-                                cap_bank_voltage_scenario_cf_kv=cap_bank_voltage_scenario_cf_kv,
-                                transformer_type=tipo_transformador,
-                                V_sut_hv_tap_v=V_sut_hv_tap_v,
-                                tensao_sut_bt_v=tensao_sut_bt_v,
-                                limite_corrente_eps_a=limite_corrente_eps_a,
-                            )
-                            taps_info_list_compensated.append(
-                                {
-                                    "tap_sut_kv": V_sut_hv_tap_v / 1000.0,
-                                    "corrente_eps_sf_a": comp_result[
-                                        "corrente_eps_sf_a"
-                                    ],  # S/F current
-                                    "percent_limite_sf": comp_result[
-                                        "percent_limite_sf"
-                                    ],  # S/F percentage
-                                    "corrente_eps_cf_a": comp_result[
-                                        "corrente_eps_cf_a"
-                                    ],  # C/F current
-                                    "percent_limite_cf": comp_result[
-                                        "percent_limite_cf"
-                                    ],  # C/F percentage
-                                }
-                            )
-
-                        # Sort the final list by voltage ascending
-                        taps_info_list_compensated.sort(key=lambda x: x["tap_sut_kv"])
-                        analysis_result = {"status": "OK", "taps_info": taps_info_list_compensated}
-                        if taps_info_list_compensated:
-                            has_valid_sut_data = True
+                i, j = carga["taps"].index(tap_label), carga["scenarios"].index(scen_key)
+                sut_keys = list(sut_eps)
+                taps_info_list_compensated = [
+                    dict(zip(sut_keys, values))
+                    for values in zip(*(sut_eps[key][i, j].tolist() for key in sut_keys))
+                ]
+                analysis_result = {"status": "OK", "taps_info": taps_info_list_compensated}
+                if taps_info_list_compensated:
+                    has_valid_sut_data = True
 
                 # Create the column for this DUT tap (Nominal, Menor, Maior)
                 num_display_taps = len(
@@ -21,6 +21,7 @@ from components.formatters import (
     formatar_tensao_aplicada,
     formatar_tensao_induzida,
 )
+from utils.array_codec import decode_arrays
 from utils.pdf_generator import generate_pdf
 
 log = logging.getLogger(__name__)
@@ -90,6 +91,8 @@ def report_generation_generate_pdf(
         "short_circuit": short_circuit_data or {},
         "temp_rise": temp_rise_data or {},
     }
+    # Formas de onda chegam dos stores em binário compacto; os formatadores recebem ndarrays
+    all_data = {section: decode_arrays(data) for section, data in all_data.items()}
 
     report_data_formatted = {}
     format_errors = []
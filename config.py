@@ -47,6 +47,12 @@ DEFAULT_THEME_URL = getattr(dbc.themes, DEFAULT_THEME_NAME, dbc.themes.DARKLY)
 PDF_AUTHOR = "Simulador de Testes"
 PDF_CREATOR = "Transformer Test Simulation Tool"
 
+# Configurações de gráficos
+# Máximo de pontos por traço enviados ao navegador (formas de onda são decimadas)
+WAVEFORM_MAX_POINTS = 2000
+# Biblioteca de formas de onda em disco (data/waveform_library) para o refinamento progressivo
+WAVEFORM_LIBRARY_ENABLED = False
+
 # -----------------------------------------------------------------------------
 # Configurações de Logging
 # -----------------------------------------------------------------------------
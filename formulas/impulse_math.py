@@ -537,21 +537,17 @@ def parallel_resistors(resistor_values: list) -> float:
         return float("inf")
 
 
-def calculate_gap_chopping(
-    tensao_kV: float, polaridade: str = "positiva", tempo_corte_desejado: float = 4.0
-) -> float:
+def gap_chopping_distance_cm(tensao_kV, polaridade: str = "positiva", tempo_corte_desejado=4.0):
     """
-    Calcula a distância do gap de corte para obter um tempo de corte específico,
-    baseado na norma IEC 60060-1 e manual do equipamento CDYH-2400kV.
+    Núcleo vetorizado de calculate_gap_chopping (sem arredondamento nem log).
 
-    Args:
-        tensao_kV: Tensão de teste em kV
-        polaridade: Polaridade do impulso ("positiva" ou "negativa")
-        tempo_corte_desejado: Tempo de corte desejado em μs (entre 2-6 μs)
+    Aceita escalares ou arrays em tensao_kV e tempo_corte_desejado (broadcast),
+    para conferir varreduras de gap inteiras de uma vez.
 
     Returns:
-        Distância do gap em cm
+        Distância do gap em cm (float ou array).
     """
+    tensao_kV = np.asarray(tensao_kV, dtype=float)
     # Constantes baseadas na norma IEC 60060-1
     E_atm = 30.0  # kV/cm em condições atmosféricas padrão
 
@@ -560,20 +556,13 @@ def calculate_gap_chopping(
         E_atm *= 0.85  # Campo de ruptura menor para polaridade negativa
 
     # Limitar o tempo de corte desejado à faixa válida (2-6 μs)
-    tempo_corte_desejado = max(2, min(6, tempo_corte_desejado))
-
-    # Fator de segurança baseado no tempo de corte
-    # Para tempos menores, precisamos de gaps menores (mais próximos)
-    safety_factor = 1.05  # Fator base
+    tempo = np.clip(np.asarray(tempo_corte_desejado, dtype=float), 2.0, 6.0)
 
-    # Ajuste do fator de segurança com base no tempo de corte
-    # Normalizado para 4 μs como ponto central
-    if tempo_corte_desejado < 4.0:
-        # Para tempos menores, reduzimos o gap (aumentamos o fator)
-        safety_factor += 0.05 * (4.0 - tempo_corte_desejado) / 2.0
-    else:
-        # Para tempos maiores, aumentamos o gap (reduzimos o fator)
-        safety_factor -= 0.03 * (tempo_corte_desejado - 4.0) / 2.0
+    # Fator de segurança baseado no tempo de corte (normalizado para 4 μs como ponto central):
+    # para tempos menores reduzimos o gap (aumentamos o fator), para maiores o contrário
+    safety_factor = np.where(
+        tempo < 4.0, 1.05 + 0.05 * (4.0 - tempo) / 2.0, 1.05 - 0.03 * (tempo - 4.0) / 2.0
+    )
 
     # Cálculo do gap usando a fórmula da tensão de centelhamento
     # V_gap = d_gap × E_atm
@@ -581,10 +570,27 @@ def calculate_gap_chopping(
     gap_cm = tensao_kV / (E_atm * safety_factor)
 
     # Ajuste adicional para tensões muito altas ou muito baixas
-    if tensao_kV < 200:
-        gap_cm *= 0.95  # Redução de 5% para compensar não-linearidades em baixas tensões
-    elif tensao_kV > 1000:
-        gap_cm *= 1.05  # Aumento de 5% para compensar não-linearidades em altas tensões
+    gap_cm = np.where(tensao_kV < 200, gap_cm * 0.95, np.where(tensao_kV > 1000, gap_cm * 1.05, gap_cm))
+    return gap_cm if gap_cm.ndim else float(gap_cm)
+
+
+def calculate_gap_chopping(
+    tensao_kV: float, polaridade: str = "positiva", tempo_corte_desejado: float = 4.0
+) -> float:
+    """
+    Calcula a distância do gap de corte para obter um tempo de corte específico,
+    baseado na norma IEC 60060-1 e manual do equipamento CDYH-2400kV.
+
+    Args:
+        tensao_kV: Tensão de teste em kV
+        polaridade: Polaridade do impulso ("positiva" ou "negativa")
+        tempo_corte_desejado: Tempo de corte desejado em μs (entre 2-6 μs)
+
+    Returns:
+        Distância do gap em cm
+    """
+    tempo_corte_desejado = max(2, min(6, tempo_corte_desejado))
+    gap_cm = gap_chopping_distance_cm(tensao_kV, polaridade, tempo_corte_desejado)
 
     # Arredondamento para precisão prática
     gap_cm = round(gap_cm, 1)
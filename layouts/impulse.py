@@ -242,6 +242,7 @@ def create_impulse_layout():
                                     options=[
                                         {"label": "RLC+K", "value": "hybrid"},
                                         {"label": "RLC", "value": "rlc"},
+                                        {"label": "Marx", "value": "marx"},
                                     ],
                                     value="hybrid",
                                     clearable=False,
@@ -435,6 +436,23 @@ def create_impulse_layout():
                                        style={"fontSize": "0.7rem", "maxHeight": "60px", "overflowY": "auto", "border": f"1px solid {COLORS['border']}", "padding": "3px", "marginTop": "3px", "backgroundColor": COLORS['background_card'], "color": COLORS['text_light']}) # Estilo melhorado
                             ], width=12)
                         ], className="mb-1"),
+
+                        # Plano de ensaios (todos os enrolamentos × LI/LIC/SI)
+                        dbc.Row([
+                            dbc.Col(
+                                dbc.Button("Plano de Ensaios (Todos os Enrolamentos)", id="impulse-test-plan-btn", color="secondary", outline=True, size="sm", className="w-100"),
+                                width=12
+                            )
+                        ], className="mb-1"),
+                        dbc.Row([
+                            dbc.Col([
+                                dcc.Loading(
+                                    html.Div(id="impulse-test-plan-output",
+                                           style={"fontSize": "0.7rem", "maxHeight": "220px", "overflowY": "auto", "marginTop": "3px", "color": COLORS['text_light']}),
+                                    type="dot",
+                                )
+                            ], width=12)
+                        ], className="mb-1"),
                     ], style=COMPONENTS['card_body'])
                 ], style=COMPONENTS['card'], className="mb-1"), # Reduzido margin bottom ainda mais
 
@@ -788,6 +806,8 @@ def create_impulse_layout():
 
         # Intervalo para auto-simulação (mantido)
         dcc.Interval(id='auto-simulate-interval', interval=1*1000, n_intervals=0, disabled=True), # Intervalo ajustado para 1s
+        # Consulta do refinamento da simulação progressiva (ativado só enquanto há refinamento pendente)
+        dcc.Interval(id='progressive-poll-interval', interval=250, n_intervals=0, disabled=True),
             ]), # Fechamento do CardBody
         ]), # Fechamento do Card
 
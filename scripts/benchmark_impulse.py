@@ -0,0 +1,909 @@
+#!/usr/bin/env python
+"""
+Benchmarks dos motores de cálculo do módulo de impulso.
+
+Uso:
+    python scripts/benchmark_impulse.py              # executa todos
+    python scripts/benchmark_impulse.py --only batch # executa apenas um
+"""
+import argparse
+import csv
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# Adicionar o diretório raiz ao path para importar módulos do projeto
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from scipy.fftpack import fft, fftfreq, ifft  # noqa: E402
+from scipy.optimize import curve_fit  # noqa: E402
+
+import plotly.graph_objects as go  # noqa: E402
+
+from app_core import (  # noqa: E402
+    calculations,
+    impulse_batch,
+    impulse_fit,
+    impulse_grid,
+    impulse_kernels,
+    impulse_montecarlo,
+    impulse_optimizer,
+    impulse_record,
+    impulse_search,
+    impulse_test_plan,
+    impulse_transfer,
+    marx_model,
+    param_cache,
+    progressive_sim,
+    sim_workspace,
+    waveform_decimation,
+    waveform_library,
+)
+
+logger = logging.getLogger("benchmark_impulse")
+
+# Circuito de referência: gerador 6S-1P com objeto de 3000 pF
+REF_C_GEN_F = 0.25e-6
+REF_C_LOAD_F = 4.6e-9
+REF_L_TOTAL_H = 50e-6
+REF_V0_V = 1.2e6
+
+BATCH_SPEEDUP_TARGET = 20.0  # Ganho mínimo do lote sobre o laço Python de simulate_hybrid_impulse
+
+
+def _timeit(func, repeat: int = 3) -> float:
+    """Retorna o menor tempo (s) entre `repeat` execuções de func()."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_batch(n_candidates: int = 500, sim_time_s: float = 100e-6) -> dict:
+    """Lote vetorizado vs. laço Python de simulate_hybrid_impulse; falha abaixo de BATCH_SPEEDUP_TARGET."""
+    rng = np.random.default_rng(0)
+    rf = rng.uniform(100, 600, n_candidates)
+    rt = rng.uniform(400, 1500, n_candidates)
+    # Grade de dois passos, como nos consumidores do lote (otimizador, Monte Carlo)
+    alpha, beta = impulse_batch.circuit_double_exp_constants(np.median(rf), np.median(rt), REF_C_GEN_F, REF_C_LOAD_F)
+    t_peak_s = float(np.log(beta / alpha) / (beta - alpha))
+    t_sec = impulse_grid.two_step_time_grid(sim_time_s, t_peak_s)
+
+    def loop():
+        for i in range(n_candidates):
+            calculations.simulate_hybrid_impulse(
+                t_sec, REF_V0_V, rf[i], rt[i], REF_L_TOTAL_H, REF_C_GEN_F, REF_C_LOAD_F, "lightning"
+            )
+
+    def batch():
+        impulse_batch.simulate_hybrid_impulse_batch(
+            t_sec, REF_V0_V, rf, rt, REF_L_TOTAL_H, REF_C_GEN_F, REF_C_LOAD_F, "lightning"
+        )
+
+    t_loop = _timeit(loop, repeat=1)
+    t_batch = _timeit(batch, repeat=5)
+    speedup = t_loop / t_batch
+    if speedup < BATCH_SPEEDUP_TARGET:
+        raise AssertionError(
+            f"Lote {speedup:.1f}x mais rápido que o laço ({n_candidates} candidatos x {t_sec.size} pontos); "
+            f"meta de {BATCH_SPEEDUP_TARGET:.0f}x"
+        )
+    return {
+        "candidatos": n_candidates,
+        "pontos": t_sec.size,
+        "laco_s": t_loop,
+        "lote_s": t_batch,
+        "speedup": speedup,
+    }
+
+
+def bench_search() -> dict:
+    """Busca completa de gerador/Rf/Rt/indutor para o caso de referência (LI 1050 kV, 3000 pF)."""
+    result = {}
+
+    def run():
+        result.update(impulse_search.search_generator_configurations("lightning", 1050.0, 3000.0, 400.0))
+
+    t_search = _timeit(run)
+    return {
+        "combinacoes": result["n_evaluated"],
+        "simuladas_com_l": result["n_simulated"],
+        "conformes": result["n_compliant"],
+        "busca_s": t_search,
+        "combinacoes_por_s": result["n_evaluated"] / t_search,
+    }
+
+
+def _legacy_base_fit(t_us: np.ndarray, v: np.ndarray) -> float | None:
+    """Ajuste da curva base anterior (curve_fit com chute heurístico); alpha (1/s) ou None se falhou."""
+    t_sec = t_us * 1e-6
+    peak = np.max(v)
+    peak_idx = np.argmax(v)
+    after = v[peak_idx:]
+    below = np.nonzero(after < 0.5 * peak)[0]
+    t_half = t_sec[peak_idx + below[0]] if len(below) else t_sec[-1]
+    alpha_est = 1.0 / max(1.4 * t_half, 5e-6)
+    beta_est = 2.0 / max(t_sec[peak_idx], 0.5e-6)
+    if beta_est <= alpha_est:
+        beta_est = alpha_est * 5
+
+    def func(t, a_norm, alpha, beta):
+        if alpha <= 0 or beta <= alpha * (1 + 1e-9):
+            return np.full_like(t, 1e12)
+        t_peak = np.log(beta / alpha) / (beta - alpha)
+        return a_norm / (np.exp(-alpha * t_peak) - np.exp(-beta * t_peak)) * (np.exp(-alpha * t) - np.exp(-beta * t))
+
+    try:
+        popt, _ = curve_fit(
+            func,
+            t_sec,
+            v,
+            p0=[peak, alpha_est, beta_est],
+            bounds=([peak * 0.5, alpha_est * 0.1, beta_est * 0.1], [peak * 1.5, alpha_est * 10, beta_est * 10]),
+            maxfev=5000,
+            method="trf",
+        )
+        return popt[1]
+    except Exception:
+        return None
+
+
+def bench_kfit(n_waves: int = 200, n_points: int = 5000) -> dict:
+    """Ajuste da curva base K-factor: curve_fit anterior vs. estimativa analítica + least_squares."""
+    t_us = np.linspace(0, 100, n_points)
+    rng = np.random.default_rng(0)
+    rf = rng.uniform(100, 600, n_waves)
+    rt = rng.uniform(400, 1500, n_waves)
+    alpha, beta = impulse_batch.circuit_double_exp_constants(rf, rt, REF_C_GEN_F, REF_C_LOAD_F)
+    waves = impulse_batch.double_exp_batch(t_us * 1e-6, REF_V0_V / 1000, alpha, beta)
+    # Oscilação amortecida na crista e ruído de medição
+    waves += 0.03 * waves.max(axis=1, keepdims=True) * np.sin(2 * np.pi * 1.5 * t_us) * np.exp(-t_us / 3)
+    waves += rng.normal(0, 1.0, waves.shape)
+
+    legacy = []
+    t_legacy = _timeit(lambda: legacy.extend(_legacy_base_fit(t_us, w) for w in waves), repeat=1)
+
+    def run_new(use_cache):
+        return [impulse_fit.fit_double_exp_base(t_us, w, use_cache=use_cache) for w in waves]
+
+    cold = []
+    t_cold = _timeit(lambda: cold.extend(run_new(False)), repeat=1)
+    # Re-simulação dos mesmos circuitos (ex.: intervalo de auto-simulação): parte do cache
+    impulse_fit.clear_warm_start_cache()
+    run_new(True)
+    warm = []
+    t_warm = _timeit(lambda: warm.extend(run_new(True)), repeat=1)
+    alpha_err = max(abs(r["alpha"] / a - 1) for r, a in zip(cold, alpha) if r is not None)
+    return {
+        "ondas": n_waves,
+        "anterior_ajustes_por_s": n_waves / t_legacy,
+        "anterior_falhas_pct": 100.0 * legacy.count(None) / n_waves,
+        "anterior_erro_alpha_max": max(abs(r / a - 1) for r, a in zip(legacy, alpha) if r is not None),
+        "novo_ajustes_por_s": n_waves / t_cold,
+        "novo_falhas_pct": 100.0 * sum(r is None or not r["converged"] for r in cold) / n_waves,
+        "novo_cache_ajustes_por_s": n_waves / t_warm,
+        "novo_cache_partidas_quentes": sum(r is not None and r["warm_start"] for r in warm),
+        "novo_erro_alpha_max": alpha_err,
+    }
+
+
+def _peak_memory(func) -> int:
+    """Pico de memória alocada (bytes) durante func()."""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def _legacy_k_filter(residual: np.ndarray, dt_s: float) -> np.ndarray:
+    """Filtro K anterior: fftpack complexo, eixo de frequências e k(f) refeitos a cada chamada."""
+    frequencies = fftfreq(len(residual), dt_s)
+    f_mhz = np.abs(frequencies) * 1e-6
+    k_filter = np.ones_like(frequencies, dtype=complex)
+    mask = f_mhz > 1e-12
+    k_filter[mask] = 1.0 / (1.0 + 2.2 * f_mhz[mask] ** 2)
+    return np.real(ifft(fft(residual) * k_filter))
+
+
+def bench_kfilter(n_points: int = 100_000) -> dict:
+    """Filtro K do resíduo: fftpack complexo vs. rfft com kernel em cache."""
+    dt_s = 100e-6 / n_points
+    t_us = np.arange(n_points) * dt_s * 1e6
+    residual = 20 * np.sin(2 * np.pi * 1.5 * t_us) * np.exp(-t_us / 3)
+    residual += np.random.default_rng(0).normal(0, 1.0, n_points)
+
+    impulse_fit.apply_k_factor_filter(residual, dt_s)  # aquece o cache do kernel
+    t_legacy = _timeit(lambda: _legacy_k_filter(residual, dt_s), repeat=5)
+    t_new = _timeit(lambda: impulse_fit.apply_k_factor_filter(residual, dt_s), repeat=5)
+    diff = np.max(np.abs(_legacy_k_filter(residual, dt_s) - impulse_fit.apply_k_factor_filter(residual, dt_s)))
+    return {
+        "amostras": n_points,
+        "anterior_s": t_legacy,
+        "rfft_cache_s": t_new,
+        "speedup": t_legacy / t_new,
+        "anterior_pico_mem_mb": _peak_memory(lambda: _legacy_k_filter(residual, dt_s)) / 1e6,
+        "rfft_pico_mem_mb": _peak_memory(lambda: impulse_fit.apply_k_factor_filter(residual, dt_s)) / 1e6,
+        "diferenca_max": diff,
+    }
+
+
+def bench_grid() -> dict:
+    """Grade adaptativa vs. grade uniforme fina: amostras e erro de T1/T2 (LI), Tp/T2 (SI) e corte (LIC)."""
+    result = {}
+    # LI 1.2/50 em 100 µs e SI 250/2500 em 5000 µs: referência uniforme com passo de 1 ns / 0.1 µs
+    cases = {
+        "li": (60.0, 400.0, 100e-6, 1e-9, "lightning", calculations.analyze_lightning_impulse, ("t_front_us", "t_tail_us")),
+        "si": (2500.0, 10500.0, 5000e-6, 0.1e-6, "switching", calculations.analyze_switching_impulse, ("t_p_us", "t_2_us")),
+    }
+    for name, (rf, rt, sim_time, dt_ref, impulse_type, analyze, keys) in cases.items():
+        t_ref = np.arange(0.0, sim_time + dt_ref / 2, dt_ref)
+        t_adapt = impulse_grid.hybrid_impulse_time_grid(sim_time, rf, rt, REF_C_GEN_F, REF_C_LOAD_F)
+        measured = []
+        for t_sec in (t_ref, t_adapt):
+            _, v_final, *_ = calculations.simulate_hybrid_impulse(
+                t_sec, REF_V0_V, rf, rt, REF_L_TOTAL_H, REF_C_GEN_F, REF_C_LOAD_F, impulse_type
+            )
+            analysis = analyze(t_sec * 1e6, v_final / 1000)
+            measured.append([analysis[k] for k in keys])
+        result[f"{name}_amostras_uniforme"] = len(t_ref)
+        result[f"{name}_amostras_adaptativa"] = len(t_adapt)
+        for key, ref, adapt in zip(keys, *measured):
+            result[f"{name}_erro_{key}_pct"] = 100.0 * abs(adapt / ref - 1)
+
+    gap_cm = 35.0
+    t_ref = np.arange(0.0, 100e-6 + 0.5e-9, 1e-9)
+    t_adapt = impulse_grid.hybrid_impulse_time_grid(100e-6, 60.0, 400.0, REF_C_GEN_F, REF_C_LOAD_F, REF_V0_V, gap_cm)
+    chops = []
+    for t_sec in (t_ref, t_adapt):
+        chops.append(
+            calculations.simulate_hybrid_impulse(
+                t_sec, REF_V0_V, 60.0, 400.0, REF_L_TOTAL_H, REF_C_GEN_F, REF_C_LOAD_F, "chopped", gap_cm
+            )[5]
+        )
+    result["lic_amostras_uniforme"] = len(t_ref)
+    result["lic_amostras_adaptativa"] = len(t_adapt)
+    result["lic_erro_corte_ns"] = abs(chops[1] - chops[0]) * 1e9
+    return result
+
+
+def bench_decimation(n_points: int = 1_000_000, max_points: int = 2000) -> dict:
+    """Tamanho do JSON da figura com e sem decimação, e tempo de decimação."""
+    t_us = np.linspace(0, 200, n_points)
+    v = 1000 * (np.exp(-t_us / 68.2) - np.exp(-t_us / 0.405))
+    v += 20 * np.sin(2 * np.pi * 2 * t_us) * np.exp(-t_us / 3)
+    keep = waveform_decimation.waveform_keypoint_indices(t_us, v)
+    decimated = {}
+    t_dec = _timeit(
+        lambda: decimated.update(xy=waveform_decimation.decimate_waveform(t_us, v, max_points, keep))
+    )
+    x_d, y_d = decimated["xy"]
+    full_json = go.Figure(go.Scatter(x=t_us, y=v)).to_json()
+    dec_json = go.Figure(go.Scatter(x=x_d, y=y_d)).to_json()
+    return {
+        "amostras": n_points,
+        "pontos_enviados": len(x_d),
+        "json_completo_mb": len(full_json) / 1e6,
+        "json_decimado_mb": len(dec_json) / 1e6,
+        "decimacao_s": t_dec,
+        "pico_preservado": bool(np.max(y_d) == np.max(v)),
+    }
+
+
+def bench_params(n_ticks: int = 2000) -> dict:
+    """Derivação de parâmetros do circuito a cada tick (logs DEBUG ativos): sem cache vs. memoizada."""
+    args = (6, 1, 50.0, 300.0, REF_C_LOAD_F, 0.0, 0.05, 0.0)
+
+    # Mesmas funções de calculations que impulse_circuit_from_inputs (callbacks/impulse.py) chama a cada simulação
+    def tick(unwrap):
+        _, _, max_voltage_kv, _ = unwrap(calculations.get_generator_params)("6S-1P")
+        c_load = unwrap(calculations.calculate_total_load_capacitance)(3000.0, 400.0, "lightning", max_voltage_kv)
+        params = unwrap(calculations.calculate_rlc_equivalent_params)(*args)
+        unwrap(calculations.calculate_circuit_efficiency)(params["c_gen_effective_f"], c_load, "lightning")
+
+    def uncached():
+        for _ in range(n_ticks):
+            tick(lambda func: func.__wrapped__)
+
+    def cached():
+        for _ in range(n_ticks):
+            tick(lambda func: func)
+
+    # O app roda com DEBUG_MODE (nível DEBUG): mede com os logs de depuração ativos, descartados
+    handler = logging.FileHandler(os.devnull)
+    app_core_log = logging.getLogger("app_core")
+    previous_level = app_core_log.level
+    logging.disable(logging.NOTSET)
+    app_core_log.addHandler(handler)
+    app_core_log.setLevel(logging.DEBUG)
+    app_core_log.propagate = False
+    try:
+        param_cache.clear_param_caches()
+        t_uncached = _timeit(uncached)
+        t_cached = _timeit(cached)
+    finally:
+        app_core_log.removeHandler(handler)
+        app_core_log.setLevel(previous_level)
+        app_core_log.propagate = True
+        logging.disable(logging.WARNING)
+    stats = param_cache.param_cache_stats()["app_core.calculations.calculate_rlc_equivalent_params"]
+    return {
+        "ticks": n_ticks,
+        "sem_cache_s": t_uncached,
+        "com_cache_s": t_cached,
+        "speedup": t_uncached / t_cached,
+        "taxa_acerto_rlc": stats["hit_rate"],
+    }
+
+
+def bench_marx(sim_time: float = 100e-6, dt: float = 5e-9) -> dict:
+    """Modelo Marx (espaço de estados) vs. híbrido RLC+K: tempo e T1/T2 do LI de referência."""
+    n_stages, rf_col, rt_col = 6, 10.0, 70.0
+    rf, rt = rf_col * n_stages, rt_col * n_stages
+    # Mesma indutância total: a do Marx inclui a indutância própria dos estágios
+    l_external = REF_L_TOTAL_H - n_stages * marx_model.constants.L_PER_STAGE_H
+    t_uniform = np.arange(0.0, sim_time + dt / 2, dt)
+    t_adapt = impulse_grid.hybrid_impulse_time_grid(sim_time, rf, rt, REF_C_GEN_F, REF_C_LOAD_F)
+
+    def hybrid(t_sec):
+        return calculations.simulate_hybrid_impulse(
+            t_sec, REF_V0_V, rf, rt, REF_L_TOTAL_H, REF_C_GEN_F, REF_C_LOAD_F, "lightning"
+        )
+
+    def marx(t_sec):
+        return marx_model.simulate_marx_impulse(
+            t_sec, REF_V0_V, n_stages, 1, rf_col, rt_col, l_external, REF_C_LOAD_F, "lightning"
+        )
+
+    result = {"amostras_uniforme": len(t_uniform), "amostras_adaptativa": len(t_adapt)}
+    for name, func in (("hibrido", hybrid), ("marx", marx)):
+        result[f"{name}_uniforme_ms"] = _timeit(lambda: func(t_uniform)) * 1e3
+        result[f"{name}_adaptativa_ms"] = _timeit(lambda: func(t_adapt)) * 1e3
+        for grid_name, t_sec in (("uniforme", t_uniform), ("adaptativa", t_adapt)):
+            v_final = func(t_sec)[1]
+            analysis = calculations.analyze_lightning_impulse(t_sec * 1e6, v_final / 1000)
+            result[f"{name}_{grid_name}_T1_us"] = analysis["t_front_us"]
+            result[f"{name}_{grid_name}_T2_us"] = analysis["t_tail_us"]
+        result[f"{name}_pico_pu"] = float(np.max(v_final)) / REF_V0_V
+
+    # Referência ideal: dupla exponencial exata do circuito sem indutância
+    alpha, beta = impulse_batch.circuit_double_exp_constants(rf, rt, REF_C_GEN_F, REF_C_LOAD_F)
+    times = impulse_batch.double_exp_waveform_times(alpha, beta)
+    result["dupla_exp_ideal_T1_us"] = float(times["t_front_us"])
+    result["dupla_exp_ideal_T2_us"] = float(times["t_tail_us"])
+    return result
+
+
+def bench_record(n_samples: int = 10_000_000, fs_hz: float = 100e6, n_csv_rows: int = 1_000_000) -> dict:
+    """Registro medido de 4 disparos (2 reduzidos + 2 plenos, int16): análise, memória e leitura de CSV."""
+    rng = np.random.default_rng(3)
+    alpha, beta = impulse_batch.circuit_double_exp_constants(60.0, 400.0, REF_C_GEN_F, REF_C_LOAD_F)
+    exact = impulse_batch.double_exp_waveform_times(alpha, beta)
+    t_shot = np.arange(int(300e-6 * fs_hz)) / fs_hz
+    shape = np.exp(-alpha * t_shot) - np.exp(-beta * t_shot)
+    shape /= shape.max()
+    counts = 12.0 + rng.normal(0.0, 2.0, n_samples)  # offset e ruído do digitalizador
+    for k, level in enumerate((0.5, 0.75, 1.0, 1.0)):
+        start = int((5e-3 + 25e-3 * k) * fs_hz)
+        counts[start : start + len(shape)] -= level * 20000 * shape  # polaridade negativa
+
+    result = {"amostras": n_samples}
+    with tempfile.TemporaryDirectory() as tmp:
+        bin_path = os.path.join(tmp, "registro.bin")
+        counts.astype("<i2").tofile(bin_path)
+        del counts
+
+        def analyze(workers):
+            return impulse_record.analyze_record(
+                bin_path, "lightning", max_workers=workers, sample_rate_hz=fs_hz, kv_per_unit=0.1
+            )
+
+        result["serial_s"] = _timeit(lambda: analyze(1), repeat=1)
+        # Pool forçado (abaixo de RECORD_POOL_MIN_SAMPLES): mostra o custo que o padrão serial evita
+        min_samples = impulse_record.RECORD_POOL_MIN_SAMPLES
+        impulse_record.RECORD_POOL_MIN_SAMPLES = 0
+        try:
+            result["pool_4_processos_s"] = _timeit(lambda: analyze(4), repeat=1)
+        finally:
+            impulse_record.RECORD_POOL_MIN_SAMPLES = min_samples
+        result["pico_mem_mb"] = _peak_memory(lambda: analyze(1)) / 1e6
+        shots = analyze(1)["shots"]
+        result["disparos"] = len(shots)
+        result["reduzidos"] = sum(s["kind"] == "reduzido" for s in shots)
+        result["erro_T1_max_pct"] = max(
+            100 * abs(s["analysis"]["t_front_us"] / float(exact["t_front_us"]) - 1) for s in shots
+        )
+        result["erro_T2_max_pct"] = max(
+            100 * abs(s["analysis"]["t_tail_us"] / float(exact["t_tail_us"]) - 1) for s in shots
+        )
+
+        csv_path = os.path.join(tmp, "registro.csv")
+        t_csv = np.arange(n_csv_rows) / fs_hz
+        np.savetxt(csv_path, np.c_[t_csv, np.interp(t_csv, t_shot, shape)], delimiter=";", fmt="%.9e")
+
+        def csv_module():
+            with open(csv_path, newline="") as f:
+                return np.array([float(row[1]) for row in csv.reader(f, delimiter=";")])
+
+        result["csv_linhas"] = n_csv_rows
+        result["csv_modulo_csv_s"] = _timeit(csv_module, repeat=1)
+        result["csv_blocos_pandas_s"] = _timeit(lambda: impulse_record.open_record(csv_path), repeat=1)
+    return result
+
+
+def bench_montecarlo(n_samples: int = 10_000) -> dict:
+    """Monte Carlo de tolerâncias (LI, 6S-2P): tempo total e probabilidade de conformidade."""
+    nominal = impulse_montecarlo.nominal_circuit_parameters(6, 2, 70.0, 48.0, "lightning", 2400, 1000, 200)
+    distributions = {
+        "rf": {"dist": "normal", "rel": 0.05},
+        "rt": {"dist": "uniform", "rel": 0.05},
+        "l_transformer": {"dist": "lognormal", "rel": 0.3},
+        "c_stray": {"dist": "triangular", "rel": 0.5},
+        "r_parasitic": {"dist": "uniform", "rel": 0.8},
+    }
+    result = impulse_montecarlo.run_monte_carlo(nominal, distributions, n_samples=n_samples, seed=1)
+
+    # Referência: uma amostra pela análise escalar (K-factor com least_squares) para conferir a vetorizada
+    single = impulse_montecarlo.run_monte_carlo(nominal, {}, n_samples=2, seed=1, return_samples=True)
+    c_load = nominal["c_load"] + nominal["c_stray"]
+    rf = nominal["rf"] + nominal["r_parasitic"]
+    alpha, beta = impulse_batch.circuit_double_exp_constants(rf, nominal["rt"], nominal["c_gen"], c_load)
+    t_peak_s = float(impulse_batch.double_exp_waveform_times(alpha, beta)["t_peak_us"]) * 1e-6
+    t_sec = impulse_grid.two_step_time_grid(150e-6, t_peak_s, 100, 4.0)
+    v = impulse_batch.circuit_load_voltage_batch(
+        t_sec, 1.0, nominal["rf"], nominal["rt"], nominal["l_gen"], nominal["c_gen"], c_load
+    )[0]
+    scalar = calculations.analyze_lightning_impulse(t_sec * 1e6, v)
+    return {
+        "amostras": n_samples,
+        "tempo_s": result["elapsed_s"],
+        "p_conforme": result["p_pass"],
+        "p_conforme_erro_padrao": result["p_pass_stderr"],
+        **{f"p_{name}": p for name, p in result["criteria"].items()},
+        "ranking": ", ".join(f"{name}={rho:.2f}" for name, rho in result["ranking"]),
+        "nominal_T1_us_lote": float(single["metrics"]["t_front_us"][0]),
+        "nominal_T1_us_escalar": scalar["t_front_us"],
+        "nominal_overshoot_lote": float(single["metrics"]["overshoot_percent"][0]),
+        "nominal_overshoot_escalar": scalar["overshoot_percent"],
+    }
+
+
+def bench_gap_sweep(n_gaps: int = 200, sim_time: float = 20e-6, dt: float = 5e-9) -> dict:
+    """Varredura de gap do LIC: uma simulação + chop_gap_sweep vs. uma simulação "chopped" por gap."""
+    rf, rt = 60.0, 420.0
+    t_sec = np.arange(0.0, sim_time, dt)
+    args = (t_sec, REF_V0_V, rf, rt, REF_L_TOTAL_H, REF_C_GEN_F, REF_C_LOAD_F)
+    v_full = calculations.simulate_hybrid_impulse(*args, "lightning")[1]
+    gaps = np.linspace(5.0, float(np.max(v_full)) / 30e3, n_gaps)
+
+    def loop():
+        return [calculations.simulate_hybrid_impulse(*args, "chopped", g)[5] for g in gaps]
+
+    def sweep():
+        return impulse_batch.chop_gap_sweep(t_sec, calculations.simulate_hybrid_impulse(*args, "lightning")[1], gaps)
+
+    level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.ERROR)  # a simulação escalar registra cada corte em INFO
+    try:
+        loop_s = _timeit(loop, repeat=1)
+        sweep_s = _timeit(sweep)
+        chop_loop = np.array([np.nan if c is None else c * 1e6 for c in loop()])
+    finally:
+        logging.getLogger().setLevel(level)
+    result = sweep()
+    return {
+        "gaps": n_gaps,
+        "laco_por_gap_s": loop_s,
+        "varredura_ms": sweep_s * 1e3,
+        "aceleracao": loop_s / sweep_s,
+        "diferenca_max_tempo_corte_us": float(np.nanmax(np.abs(chop_loop - result["chop_time_us"]))),
+        "tempo_corte_us_faixa": f"{np.nanmin(result['chop_time_us']):.3f} – {np.nanmax(result['chop_time_us']):.3f}",
+        "undershoot_pct_max": float(np.nanmax(result["undershoot_percent"])),
+    }
+
+
+def _legacy_timing(t: np.ndarray, v: np.ndarray) -> dict:
+    """Instantes com máscaras booleanas e np.interp, como a análise LI/SI fazia antes dos kernels."""
+    peak_idx = np.argmax(v)
+    peak, t_peak = v[peak_idx], t[peak_idx]
+    before = t <= t_peak
+    t_b, v_b = t[before], v[before]
+    t_30 = np.interp(0.3 * peak, v_b, t_b, left=np.nan, right=np.nan)
+    t_90 = np.interp(0.9 * peak, v_b, t_b, left=np.nan, right=np.nan)
+    after = t >= t_peak
+    t_a, v_a = t[after], v[after]
+    below = np.where(v_a <= 0.5 * peak)[0]
+    i2 = below[0]
+    i1 = max(0, i2 - 1)
+    t_50 = t_a[i1] + (0.5 * peak - v_a[i1]) * (t_a[i2] - t_a[i1]) / (v_a[i2] - v_a[i1])
+    above = np.where(v >= 0.9 * peak)[0]
+    f, last = above[0], above[-1]
+    t_first = np.interp(0.9 * peak, v[f - 1 : f + 1], t[f - 1 : f + 1])
+    t_last = np.interp(0.9 * peak, v[last + 1 : last - 1 : -1], t[last + 1 : last - 1 : -1])
+    return {"t_30": t_30, "t_90": t_90, "t_50": t_50, "t_90_first": t_first, "t_90_last": t_last}
+
+
+def bench_kernels(n_samples: int = 1_000_000) -> dict:
+    """Instantes de LI/SI em registros de 1M amostras: máscaras vs. kernel (NumPy e, se houver, Numba)."""
+    records = {
+        "li": (60.0, 400.0, 100e-6, "lightning"),
+        "si": (2500.0, 10500.0, 5000e-6, "switching"),
+    }
+    result = {"numba": impulse_kernels.NUMBA_AVAILABLE, "amostras": n_samples}
+    for name, (rf, rt, sim_time, impulse_type) in records.items():
+        t_sec = np.linspace(0.0, sim_time, n_samples)
+        v = calculations.simulate_hybrid_impulse(
+            t_sec, REF_V0_V, rf, rt, REF_L_TOTAL_H, REF_C_GEN_F, REF_C_LOAD_F, impulse_type
+        )[1] / 1000
+        t_us = t_sec * 1e6
+        legacy = _legacy_timing(t_us, v)
+        new = impulse_kernels.waveform_timing(t_us, v, use_jit=False)
+        result[f"{name}_mascaras_ms"] = _timeit(lambda: _legacy_timing(t_us, v)) * 1e3
+        result[f"{name}_kernel_numpy_ms"] = _timeit(
+            lambda: impulse_kernels.waveform_timing(t_us, v, use_jit=False)
+        ) * 1e3
+        result[f"{name}_diferenca_max_us"] = max(abs(legacy[k] - new[k]) for k in legacy)
+        if impulse_kernels.NUMBA_AVAILABLE:
+            impulse_kernels.waveform_timing(t_us, v, use_jit=True)  # compilação
+            result[f"{name}_kernel_numba_ms"] = _timeit(
+                lambda: impulse_kernels.waveform_timing(t_us, v, use_jit=True)
+            ) * 1e3
+            jit = impulse_kernels.waveform_timing(t_us, v, use_jit=True)
+            result[f"{name}_numba_vs_numpy_iguais"] = all(
+                jit[k] == new[k] or (np.isnan(jit[k]) and np.isnan(new[k])) for k in new
+            )
+        else:
+            # Sem Numba, confere o laço do kernel (Python puro) contra o caminho NumPy
+            v_dec = np.ascontiguousarray(v[::50])
+            peak_idx = int(np.argmax(v_dec))
+            result[f"{name}_laco_vs_numpy_iguais"] = tuple(
+                impulse_kernels._scan_loop(v_dec, peak_idx)
+            ) == tuple(impulse_kernels._scan_numpy(v_dec, peak_idx))
+        analyze = calculations.analyze_lightning_impulse if name == "li" else calculations.analyze_switching_impulse
+        result[f"{name}_analise_completa_ms"] = _timeit(lambda: analyze(t_us, v), repeat=1) * 1e3
+    return result
+
+
+def bench_library(n_setups: int = 20, n_points: int = 20_000) -> dict:
+    """Biblioteca de formas de onda em disco: simulação (falta) vs. leitura do .npz (acerto)."""
+    t_sec = np.linspace(0.0, 100e-6, n_points)
+    setups = [(REF_V0_V, 40.0 + 5.0 * k, 400.0, REF_L_TOTAL_H, REF_C_GEN_F, REF_C_LOAD_F) for k in range(n_setups)]
+
+    def run_all():
+        return [
+            waveform_library.cached_call(calculations.simulate_hybrid_impulse, t_sec, *setup, "lightning")
+            for setup in setups
+        ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        waveform_library.configure_waveform_library(enabled=True, directory=tmp)
+        try:
+            miss_s = _timeit(run_all, repeat=1)
+            hit_s = _timeit(run_all)
+            fresh = [calculations.simulate_hybrid_impulse(t_sec, *s, "lightning") for s in setups]
+            identical = all(
+                np.array_equal(a[1], b[1]) and a[3:] == b[3:] for a, b in zip(run_all(), fresh)
+            )
+            stats = waveform_library.waveform_library_stats()
+        finally:
+            waveform_library.configure_waveform_library(enabled=False)
+    return {
+        "setups": n_setups,
+        "falta_ms_por_sim": miss_s / n_setups * 1e3,
+        "acerto_ms_por_sim": hit_s / n_setups * 1e3,
+        "aceleracao": miss_s / hit_s,
+        "resultados_identicos": identical,
+        "arquivos": stats["files"],
+        "mb_em_disco": stats["bytes"] / 1e6,
+    }
+
+
+def bench_batch_analysis(n_shots: int = 1000, n_points: int = 5000, n_scalar: int = 50) -> dict:
+    """analyze_lightning_impulse_batch sobre (n_shots x n_points) vs. laço da análise escalar (amostra de n_scalar)."""
+    rng = np.random.default_rng(0)
+    cases = {
+        "li": (60.0, 400.0, 100e-6, calculations.analyze_lightning_impulse, calculations.analyze_lightning_impulse_batch,
+               ("t_front_us", "t_tail_us", "overshoot_percent"), ("conforme_frente", "conforme_cauda", "conforme_overshoot")),
+    }
+    result = {"disparos": n_shots, "amostras": n_points}
+    for name, (rf, rt, sim_time, scalar, batch, keys, flags) in cases.items():
+        t_sec = np.linspace(0.0, sim_time, n_points)
+        ones = np.ones(n_shots)
+        v = impulse_batch.circuit_load_voltage_batch(
+            t_sec, REF_V0_V * ones, rf * rng.uniform(0.8, 1.2, n_shots), rt * rng.uniform(0.8, 1.2, n_shots),
+            REF_L_TOTAL_H * ones, REF_C_GEN_F * ones, REF_C_LOAD_F * ones,
+        ) / 1000
+        v += 0.002 * v.max() * rng.standard_normal(v.shape)  # Ruído de medição
+        t_us = t_sec * 1e6
+        batch_s = _timeit(lambda: batch(t_us, v), repeat=1)
+        table = batch(t_us, v)
+        loop_s = _timeit(lambda: [scalar(t_us, v[i]) for i in range(n_scalar)], repeat=1) * n_shots / n_scalar
+        singles = [scalar(t_us, v[i]) for i in range(n_scalar)]
+        result[f"{name}_lote_s"] = batch_s
+        result[f"{name}_laco_estimado_s"] = loop_s
+        for key in keys:
+            ref = np.array([np.nan if r[key] is None else r[key] for r in singles], dtype=float)
+            result[f"{name}_{key}_dif_rel_max"] = float(np.nanmax(np.abs(table[key][:n_scalar] - ref) / np.abs(ref)))
+        result[f"{name}_flags_iguais"] = float(
+            np.mean([table[f][:n_scalar] == np.array([r[f] for r in singles]) for f in flags])
+        )
+    return result
+
+
+def bench_workspace(n_ticks: int = 200, sim_time: float = 100e-6, dt: float = 5e-9) -> dict:
+    """Ticks do auto-simulate: simulate_hybrid_impulse alocando tudo vs. com SimulationWorkspace."""
+    setup = (REF_V0_V, 60.0, 400.0, REF_L_TOTAL_H, REF_C_GEN_F, REF_C_LOAD_F, "lightning")
+    ws = sim_workspace.SimulationWorkspace()
+
+    def tick_alloc():
+        t_sec = np.arange(int(round(sim_time / dt)) + 1) * dt
+        return calculations.simulate_hybrid_impulse(t_sec, *setup)
+
+    def tick_ws():
+        return calculations.simulate_hybrid_impulse(ws.uniform_grid(sim_time, dt), *setup, workspace=ws)
+
+    def growth(tick) -> int:
+        """Memória retida (bytes) entre o 10º e o último tick."""
+        tracemalloc.start()
+        results = []
+        for k in range(n_ticks):
+            results = [tick()]  # O callback guarda só o resultado do último tick
+            if k == 9:
+                base = tracemalloc.get_traced_memory()[0]
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del results
+        return current - base
+
+    ref, got = tick_alloc(), tick_ws()
+    max_rel = max(float(np.max(np.abs(a - b)) / np.max(np.abs(a))) for a, b in zip(ref[:3], got[:3]))
+    alloc_s = _timeit(lambda: [tick_alloc() for _ in range(n_ticks)], repeat=1) / n_ticks
+    ws_s = _timeit(lambda: [tick_ws() for _ in range(n_ticks)], repeat=1) / n_ticks
+    return {
+        "ticks": n_ticks,
+        "amostras": ws.n_points,
+        "alocando_ms_por_tick": alloc_s * 1e3,
+        "workspace_ms_por_tick": ws_s * 1e3,
+        "pico_mb_alocando": _peak_memory(tick_alloc) / 1e6,
+        "pico_mb_workspace": _peak_memory(tick_ws) / 1e6,
+        "crescimento_kb_alocando": growth(tick_alloc) / 1e3,
+        "crescimento_kb_workspace": growth(tick_ws) / 1e3,
+        "realocacoes_workspace": ws.allocations,
+        "mb_buffers": ws.nbytes / 1e6,
+        "dif_rel_max": max_rel,
+        "alpha_beta_iguais": ref[3:5] == got[3:5],
+    }
+
+
+def bench_idle_ticks(n_ticks: int = 10_000, sim_time: float = 100e-6, dt: float = 5e-9) -> dict:
+    """Simulação repetida com entradas inalteradas: run_cached (impressão digital) vs. simular de novo."""
+    inputs = ("lightning", 1050, "6S-1P", "hybrid", 3000, 0.01, 400, "60/6", "400/6", 1.0, 1.0, 0, 0.05, "none", None, None)
+    ws = sim_workspace.SimulationWorkspace()
+    setup = (REF_V0_V, 60.0, 400.0, REF_L_TOTAL_H, REF_C_GEN_F, REF_C_LOAD_F, "lightning")
+    runs = []
+
+    def simulate():
+        runs.append(1)
+        v_rlc, v_final, i_load, alpha, beta, chop = calculations.simulate_hybrid_impulse(
+            ws.uniform_grid(sim_time, dt), *setup, workspace=ws
+        )
+        return (v_final.copy(), alpha, beta) if alpha else None
+
+    def failing():
+        runs.append(1)
+        return None
+
+    def cached_tick(values):
+        return ws.run_cached(param_cache.input_fingerprint(*values), simulate)
+
+    first = cached_tick(inputs)
+    skip_s = _timeit(lambda: [cached_tick(inputs) for _ in range(n_ticks)], repeat=1) / n_ticks
+    sim_s = _timeit(lambda: [simulate() for _ in range(100)], repeat=1) / 100
+    n_sim_runs = len(runs) - 100
+
+    changed = list(inputs)
+    changed[6] = 401
+    fingerprint_changed = param_cache.input_fingerprint(*changed)
+    runs.clear()
+    ws.run_cached(fingerprint_changed, failing)
+    ws.run_cached(fingerprint_changed, failing)
+    return {
+        "ticks": n_ticks,
+        "verificacao_us_por_tick": skip_s * 1e6,
+        "simulacao_us_por_tick": sim_s * 1e6,
+        "razao": sim_s / skip_s,
+        "simulacoes_com_entradas_iguais": n_sim_runs,
+        "resultado_guardado_devolvido": cached_tick(inputs) is first,
+        "falha_nao_registrada": len(runs) == 2 and not ws.is_unchanged(fingerprint_changed),
+    }
+
+
+def bench_progressive(n_points: int = 2_000_000, sim_time: float = 5000e-6) -> dict:
+    """SI em grade fina: latência do resultado grosso vs. simulação completa (refinamento em segundo plano)."""
+    t_sec = np.linspace(0.0, sim_time, n_points)
+    params = (REF_V0_V, 2500.0, 10500.0, REF_L_TOTAL_H, REF_C_GEN_F, REF_C_LOAD_F, "switching")
+    t0 = time.perf_counter()
+    coarse = progressive_sim.start_progressive_simulation("bench", t_sec, *params)
+    coarse_s = time.perf_counter() - t0
+    while (poll := progressive_sim.poll_progressive_simulation("bench"))["status"] == "running":
+        time.sleep(0.005)
+    fine_s = time.perf_counter() - t0
+    fine = poll["result"]
+    return {
+        "amostras_finas": n_points,
+        "amostras_grossas": coarse["t_us"].size,
+        "grosso_ms": coarse_s * 1e3,
+        "refinado_ms": fine_s * 1e3,
+        "status": poll["status"],
+        **{
+            f"{key}_dif_rel": abs(coarse["analysis"][key] - fine["analysis"][key]) / fine["analysis"][key]
+            for key in ("t_p_us", "t_2_us", "td_us")
+        },
+        "conformidade_igual": all(
+            coarse["analysis"][flag] == fine["analysis"][flag] for flag in ("conforme_tp", "conforme_t2", "conforme_td")
+        ),
+    }
+
+
+def bench_transfer(n_shots: int = 20, n_points: int = 50_001, fault_shot: int = 12) -> dict:
+    """Funções de transferência de n_shots disparos (4 reduzidos, jitter, ruído, falha injetada em um pleno)."""
+    rng = np.random.default_rng(0)
+    t_sec = np.linspace(0.0, 100e-6, n_points)
+    levels = np.r_[np.full(4, 0.6), np.ones(n_shots - 4)]
+    v = impulse_batch.circuit_load_voltage_batch(
+        t_sec, REF_V0_V * levels, 60.0, 400.0, REF_L_TOTAL_H, REF_C_GEN_F, REF_C_LOAD_F
+    )
+    i = REF_C_LOAD_F * np.gradient(v, t_sec, axis=1)
+    shots = []
+    for k in range(n_shots):
+        i_k = i[k] + 0.002 * np.abs(i[k]).max() * rng.standard_normal(n_points)
+        if k == fault_shot:  # Oscilação de 1 MHz a partir de 20 µs (ruptura parcial)
+            tau = np.maximum(t_sec - 20e-6, 0.0)
+            i_k += 0.1 * np.abs(i[k]).max() * np.exp(-tau / 5e-6) * np.sin(2 * np.pi * 1e6 * tau)
+        shots.append({
+            "t_us": t_sec * 1e6 + rng.uniform(-0.05, 0.05),  # Jitter do disparo
+            "v_kv": v[k] / 1000 + 0.002 * REF_V0_V / 1000 * rng.standard_normal(n_points),
+            "i_a": i_k,
+        })
+    elapsed = _timeit(lambda: impulse_transfer.compare_shots(shots))
+    result = impulse_transfer.compare_shots(shots)
+    healthy = np.delete(np.arange(n_shots), [result["reference"], fault_shot])
+    return {
+        "disparos": n_shots,
+        "amostras": result["n_samples"],
+        "frequencias": result["f_mhz"].size,
+        "tempo_s": elapsed,
+        "marcados": np.flatnonzero(result["flagged"]).tolist(),
+        "desvio_tf_max_saudaveis": float(result["tf_deviation"][healthy].max()),
+        "desvio_corrente_max_saudaveis": float(result["current_deviation"][healthy].max()),
+        "desvio_tf_falha": float(result["tf_deviation"][fault_shot]),
+        "desvio_corrente_falha": float(result["current_deviation"][fault_shot]),
+    }
+
+
+def _energy_table_loop(test_voltage_kv: float, c_dut_pf: float, c_stray_pf: float, impulse_type: str) -> list:
+    """Tabela de energia como antes: funções escalares para cada configuração, uma a uma."""
+    rows = []
+    for config in calculations.constants.GENERATOR_CONFIGURATIONS:
+        stages, parallel, vmax_kv, energy_kj = calculations.get_generator_params(config["value"])
+        c_gen, _ = calculations.calculate_effective_gen_params(stages, parallel)
+        c_load = calculations.calculate_total_load_capacitance(c_dut_pf, c_stray_pf, impulse_type, vmax_kv)
+        efficiency = calculations.calculate_circuit_efficiency(c_gen, c_load, impulse_type)[0]
+        energy_req = calculations.calculate_energy_requirements(test_voltage_kv, c_load)
+        rows.append((efficiency, energy_req, test_voltage_kv / efficiency <= vmax_kv and energy_req <= energy_kj))
+    return rows
+
+
+def bench_energy_table(n_calls: int = 200) -> dict:
+    """Energia/eficiência de todas as configurações: laço das funções escalares vs. generator_energy_table."""
+    args = (1050.0, 3000.0, 500.0, "lightning")
+    param_cache.clear_param_caches()
+    loop_s = _timeit(lambda: [_energy_table_loop(*args) for _ in range(n_calls)], repeat=1) / n_calls
+    table_s = _timeit(lambda: [calculations.generator_energy_table(*args) for _ in range(n_calls)], repeat=1) / n_calls
+    table = calculations.generator_energy_table(*args)
+    loop = _energy_table_loop(*args)
+    return {
+        "configuracoes": len(table),
+        "laco_ms": loop_s * 1e3,
+        "vetorizado_ms": table_s * 1e3,
+        "aceleracao": loop_s / table_s,
+        "viaveis": int(table["feasible"].sum()),
+        "eficiencia_dif_max": float(np.max(np.abs(table["efficiency"] - [r[0] for r in loop]))),
+        "viabilidade_igual": bool(np.array_equal(table["feasible"], [r[2] for r in loop])),
+    }
+
+
+def bench_optimizer() -> dict:
+    """Rf/Rt contínuos + ajuste ao inventário (6S-1P) para capacitâncias de 500 pF a 20 nF, LI e SI."""
+    capacitances_pf = (500.0, 1000.0, 2000.0, 5000.0, 10000.0, 20000.0)
+    results = []
+
+    def run():
+        results.clear()
+        for impulse_type in ("lightning", "switching"):
+            for c_dut_pf in capacitances_pf:
+                results.append(impulse_optimizer.optimize_resistors("6S-1P", impulse_type, c_dut_pf, 400.0))
+
+    t_total = _timeit(run)
+    return {
+        "casos": len(results),
+        "total_s": t_total,
+        "pior_caso_ms": max(r["elapsed_s"] for r in results) * 1e3,
+        "convergidos": sum(r["converged"] for r in results),
+        "simulacoes_max": max(r["iterations"] for r in results),
+        "conformes_inventario": sum(r["compliant"] for r in results),
+    }
+
+
+def bench_test_plan() -> dict:
+    """Plano de ensaios (AT 950/750 kV, BT 350 kV, terciário 110 kV): processo atual vs. pool."""
+    data = {
+        "tensao_at": 230, "tensao_bt": 69, "tensao_terciario": 13.8, "potencia_mva": 100, "impedancia": 12,
+        "nbi_at": 950, "sil_at": 750, "nbi_bt": 350, "nbi_terciario": 110,
+    }
+    serial = impulse_test_plan.compute_test_plan(data, max_workers=1)
+    impulse_test_plan.compute_test_plan(data)  # Aquece o pool compartilhado
+    pooled = impulse_test_plan.compute_test_plan(data)
+    return {
+        "trabalhos": serial["n_jobs"],
+        "conformes": serial["n_compliant"],
+        "indeterminados_modelo": serial["n_model_limited"],
+        "processos": impulse_test_plan._worker_count(None, serial["n_jobs"]),
+        "serial_s": serial["elapsed_s"],
+        "pool_s": pooled["elapsed_s"],
+        # O ajuste da curva base parte do último ajuste do processo: os tempos diferem em ~1e-5, os vereditos não
+        "vereditos_iguais": [j["compliant"] for j in serial["jobs"]] == [j["compliant"] for j in pooled["jobs"]],
+    }
+
+
+BENCHMARKS = {
+    "batch": bench_batch,
+    "search": bench_search,
+    "kfit": bench_kfit,
+    "kfilter": bench_kfilter,
+    "grid": bench_grid,
+    "decimation": bench_decimation,
+    "params": bench_params,
+    "marx": bench_marx,
+    "record": bench_record,
+    "montecarlo": bench_montecarlo,
+    "gapsweep": bench_gap_sweep,
+    "kernels": bench_kernels,
+    "library": bench_library,
+    "batchanalysis": bench_batch_analysis,
+    "workspace": bench_workspace,
+    "idle": bench_idle_ticks,
+    "progressive": bench_progressive,
+    "transfer": bench_transfer,
+    "energytable": bench_energy_table,
+    "optimizer": bench_optimizer,
+    "testplan": bench_test_plan,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do módulo de impulso.")
+    parser.add_argument("--only", choices=sorted(BENCHMARKS), help="Executa apenas um benchmark.")
+    args = parser.parse_args()
+
+    # Os motores registram muito em DEBUG/INFO; o benchmark mede só o cálculo
+    logging.disable(logging.WARNING)
+
+    names = [args.only] if args.only else list(BENCHMARKS)
+    for name in names:
+        result = BENCHMARKS[name]()
+        print(f"[{name}]")
+        for key, value in result.items():
+            print(f"  {key:>20}: {value:.4g}" if isinstance(value, float) else f"  {key:>20}: {value}")
+
+
+if __name__ == "__main__":
+    main()
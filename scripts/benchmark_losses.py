@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+"""
+Benchmarks dos motores de perdas, banco de capacitores e tabelas do núcleo.
+
+Uso:
+    python scripts/benchmark_losses.py                 # executa todos
+    python scripts/benchmark_losses.py --only capbank  # executa apenas um
+"""
+import argparse
+import itertools
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+# Adicionar o diretório raiz ao path para importar módulos do projeto
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from app_core import capacitor_bank, core_tables, losses_engine  # noqa: E402
+
+logger = logging.getLogger("benchmark_losses")
+
+
+def _timeit(func, repeat: int = 3) -> float:
+    """Retorna o menor tempo (s) entre `repeat` execuções de func()."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_losses_engine(n_calls: int = 2000) -> dict:
+    """LossesEngine: vazio (material × pu) + carga (tap × condição) + EPS compensado, chamadas por segundo."""
+    engine = losses_engine.get_losses_engine()
+    tensao = (230.0, 207.0, 253.0)
+    corrente = tuple(100e3 / (v * np.sqrt(3)) for v in tensao)
+
+    def run():
+        vazio = engine.no_load(
+            losses_engine.NoLoadInputs(
+                perdas_vazio_kw=45.0, peso_nucleo_ton=35.0, corrente_excitacao_percent=0.25, inducao_t=1.62,
+                frequencia_hz=60.0, tensao_bt_kv=69.0, corrente_nominal_bt_a=836.7,
+            )
+        )
+        carga = engine.load(
+            losses_engine.LoadLossInputs(
+                tensao_kv=tensao, corrente_a=corrente, impedancia_percent=(12.0, 11.5, 12.6),
+                perdas_totais_kw=(320.0, 335.0, 310.0), perdas_vazio_kw=45.0,
+            )
+        )
+        q = carga["banco_potencia_sf_mvar"]
+        return vazio, carga, engine.sut_eps_compensated(carga, q, q, "Trifásico")
+
+    _, carga, sut = run()
+    call_s = _timeit(lambda: [run() for _ in range(n_calls)], repeat=1) / n_calls
+    return {
+        "cenarios_carga": carga["test_tensao_kv"].size,
+        "taps_sut": sut["tap_sut_kv"].size,
+        "chamada_ms": call_s * 1e3,
+        "chamadas_por_s": 1.0 / call_s,
+    }
+
+
+def _q_config_loop(voltage_key: str, required_mvar: float, use_group1_only: bool) -> tuple[str, float]:
+    """Busca das chaves Q como antes: todas as combinações de 5 chaves enumeradas a cada chamada."""
+    steps = capacitor_bank.constants.Q_SWITCH_POWERS["generic_cp"]
+    caps = capacitor_bank.constants.CAPACITORS_BY_VOLTAGE[voltage_key]
+    if use_group1_only:
+        caps = [c for c in caps if len(c) > 4 and c.endswith("1")] or caps
+    best, best_power = None, float("inf")
+    for size in range(1, len(steps) + 1):
+        for combination in itertools.combinations(range(1, len(steps) + 1), size):
+            power = sum(steps[q - 1] for q in combination) * len(caps)
+            if power >= required_mvar - 1e-6 and power < best_power - 1e-6:
+                best, best_power = combination, power
+    if best is None:
+        max_power = sum(steps) * len(caps)
+        return f"N/A (Req: {required_mvar:.1f} MVAr > Max: {max_power:.1f} MVAr)", max_power
+    return ", ".join(f"Q{q}" for q in best), best_power
+
+
+def bench_capacitor_bank(n_calls: int = 2000) -> dict:
+    """Configurações CS/Q de todas as condições (3 taps × 5, C/F e S/F): laço itertools vs. índice."""
+    engine = losses_engine.get_losses_engine()
+    tensao = (230.0, 207.0, 253.0)
+    carga = engine.load(
+        losses_engine.LoadLossInputs(
+            tensao_kv=tensao, corrente_a=tuple(100e3 / (v * np.sqrt(3)) for v in tensao),
+            impedancia_percent=(12.0, 11.5, 12.6), perdas_totais_kw=(320.0, 335.0, 310.0), perdas_vazio_kw=45.0,
+        )
+    )
+    keys = capacitor_bank.CAP_BANK_VOLTAGE_KEYS
+    cases = []
+    for suffix in ("cf", "sf"):
+        for v, q in zip(carga[f"banco_tensao_{suffix}_kv"].ravel(), carga[f"banco_potencia_{suffix}_mvar"].ravel()):
+            key = keys[int(np.argmin(np.abs(capacitor_bank.CAP_BANK_VOLTAGES_KV - v)))]
+            cases.append((key, float(q), q <= capacitor_bank.group1_max_power(key) + 1e-6))
+
+    def indexed():
+        return [
+            capacitor_bank.suggest_bank_configs(
+                carga[f"banco_tensao_{suffix}_kv"], carga[f"banco_potencia_{suffix}_mvar"], "Trifásico"
+            )
+            for suffix in ("cf", "sf")
+        ]
+
+    loop_s = _timeit(lambda: [_q_config_loop(*case) for case in cases], repeat=5)
+    configs = indexed()
+    index_s = _timeit(lambda: [indexed() for _ in range(n_calls)], repeat=1) / n_calls
+    overall_s = _timeit(
+        lambda: [
+            capacitor_bank.suggest_capacitor_bank_config(carga["max_tensao_kv"], carga["max_potencia_mvar_requerida"], "Trifásico")
+            for _ in range(n_calls)
+        ],
+        repeat=1,
+    ) / n_calls
+    indexed_flat = [(c, float(p)) for cfg in configs for c, p in zip(cfg["q_config"].ravel(), cfg["q_power_mvar"].ravel())]
+    return {
+        "condicoes": len(cases),
+        "laco_us": loop_s * 1e6,
+        "indice_us": index_s * 1e6,
+        "indice_por_condicao_us": index_s * 1e6 / len(cases),
+        "aceleracao": loop_s / index_s,
+        "sugestao_geral_us": overall_s * 1e6,
+        "configuracoes_iguais": indexed_flat == [_q_config_loop(*case) for case in cases],
+    }
+
+
+def _loc_bilinear(inducao: float, frequencia: float, df) -> float:
+    """Interpolação como antes (callbacks/induced_voltage.py): quatro .loc em DataFrame com MultiIndex."""
+    inducoes = sorted(df.index.get_level_values("inducao_nominal").unique())
+    frequencias = sorted(df.index.get_level_values("frequencia_nominal").unique())
+    inducao = max(min(inducao, max(inducoes)), min(inducoes))
+    frequencia = max(min(frequencia, max(frequencias)), min(frequencias))
+    i = min(max(int(np.searchsorted(inducoes, inducao)), 1), len(inducoes) - 1)
+    j = min(max(int(np.searchsorted(frequencias, frequencia)), 1), len(frequencias) - 1)
+    b_low, b_high = inducoes[i - 1], inducoes[i]
+    f_low, f_high = frequencias[j - 1], frequencias[j]
+    q11 = df.loc[(b_low, f_low)].iloc[0]
+    q12 = df.loc[(b_low, f_high)].iloc[0]
+    q21 = df.loc[(b_high, f_low)].iloc[0]
+    q22 = df.loc[(b_high, f_high)].iloc[0]
+    x = (inducao - b_low) / (b_high - b_low)
+    y = (frequencia - f_low) / (f_high - f_low)
+    return (1 - x) * (1 - y) * q11 + x * (1 - y) * q21 + (1 - x) * y * q12 + x * y * q22
+
+
+def bench_core_tables(n_points: int = 200, n_sweep: int = 100_000) -> dict:
+    """Tabelas do aço M4: bilinear com .loc ponto a ponto vs. grade NumPy (escalar e varredura vetorizada)."""
+    import pandas as pd
+
+    from utils import constants
+
+    index = pd.MultiIndex.from_tuples(list(constants.perdas_nucleo_data), names=["inducao_nominal", "frequencia_nominal"])
+    df = pd.DataFrame({"perdas_nucleo": list(constants.perdas_nucleo_data.values())}, index=index)
+    grid = core_tables.core_loss_grid()
+
+    rng = np.random.default_rng(0)
+    b = rng.uniform(0.5, 1.7, n_points)
+    f = rng.uniform(50.0, 500.0, n_points)
+    loc_s = _timeit(lambda: [_loc_bilinear(bi, fi, df) for bi, fi in zip(b, f)], repeat=3) / n_points
+    scalar_s = _timeit(lambda: [grid.interpolate(bi, fi) for bi, fi in zip(b, f)], repeat=3) / n_points
+    referencia = np.array([_loc_bilinear(bi, fi, df) for bi, fi in zip(b, f)])
+
+    b_sweep = rng.uniform(0.5, 1.7, n_sweep)
+    f_sweep = rng.uniform(50.0, 500.0, n_sweep)
+    sweep_s = _timeit(lambda: core_tables.interpolate_core_factors(b_sweep, f_sweep), repeat=5) / n_sweep
+    cubic_s = _timeit(lambda: grid.interpolate(b_sweep, f_sweep, method="bicubic"), repeat=5) / n_sweep
+    return {
+        "loc_us": loc_s * 1e6,
+        "grade_escalar_us": scalar_s * 1e6,
+        "grade_varredura_ns_por_ponto": sweep_s * 1e9,
+        "bicubica_ns_por_ponto": cubic_s * 1e9,
+        "aceleracao_escalar": loc_s / scalar_s,
+        "aceleracao_varredura": loc_s / sweep_s,
+        "max_diff_w_kg": float(np.max(np.abs(grid.interpolate(b, f) - referencia))),
+    }
+
+
+BENCHMARKS = {
+    "losses": bench_losses_engine,
+    "capbank": bench_capacitor_bank,
+    "coretables": bench_core_tables,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de perdas, banco de capacitores e tabelas do núcleo.")
+    parser.add_argument("--only", choices=sorted(BENCHMARKS), help="Executa apenas um benchmark.")
+    args = parser.parse_args()
+
+    # Os motores registram muito em DEBUG/INFO; o benchmark mede só o cálculo
+    logging.disable(logging.WARNING)
+
+    names = [args.only] if args.only else list(BENCHMARKS)
+    for name in names:
+        result = BENCHMARKS[name]()
+        print(f"[{name}]")
+        for key, value in result.items():
+            print(f"  {key:>20}: {value:.4g}" if isinstance(value, float) else f"  {key:>20}: {value}")
+
+
+if __name__ == "__main__":
+    main()
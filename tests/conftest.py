@@ -0,0 +1,8 @@
+# tests/conftest.py
+"""Configuração comum dos testes: raiz do projeto no path, como em scripts/."""
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
@@ -0,0 +1,115 @@
+# tests/test_array_codec.py
+"""
+Codificação binária de arrays (utils.array_codec) nas camadas de persistência.
+
+- encode_array/decode_array preservam dtype, forma e valores (float32 só com
+  downcast_float=True);
+- convert_numpy_types codifica em float32 apenas os arrays abaixo das chaves de
+  ARRAY_ENCODED_KEYS; os demais viram listas float64 sem perda;
+- o estado do MCP em disco, os backups e o histórico em SQLite devolvem as
+  formas de onda como ndarrays e os demais arrays como listas exatas;
+- um array codificado corrompido é mantido como está.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from utils import array_codec, db_manager, mcp_disk_persistence
+from utils.store_diagnostics import convert_numpy_types
+
+RNG = np.random.default_rng(7)
+WAVE = RNG.normal(0.0, 1e3, 5000)  # kV
+SMALL = RNG.normal(0.0, 1.0, array_codec.ARRAY_ENCODING_MIN_SIZE - 1)
+TABLE = RNG.normal(0.0, 1.0, 500)  # Array fora de ARRAY_ENCODED_KEYS
+
+
+def _stores():
+    """Stores como o MCP os prepara para persistir (convert_numpy_types)."""
+    return convert_numpy_types(
+        {
+            "impulse-store": {
+                "waveform": {"t_us": np.linspace(0.0, 100.0, 5000), "v_kv": WAVE},
+                "peak_kv": np.float64(1.5),
+            },
+            "losses-store": {"table": TABLE, "small": SMALL},
+        }
+    )
+
+
+def _assert_loaded(stores):
+    waveform = stores["impulse-store"]["waveform"]
+    assert isinstance(waveform["v_kv"], np.ndarray)
+    assert waveform["v_kv"].dtype == np.float32
+    np.testing.assert_array_equal(waveform["v_kv"], WAVE.astype(np.float32))
+    np.testing.assert_array_equal(waveform["t_us"], np.linspace(0.0, 100.0, 5000).astype(np.float32))
+    assert stores["impulse-store"]["peak_kv"] == 1.5
+    assert stores["losses-store"]["table"] == TABLE.tolist()
+    assert stores["losses-store"]["small"] == SMALL.tolist()
+
+
+@pytest.mark.parametrize(
+    "arr",
+    [
+        RNG.normal(size=(40, 25)),
+        RNG.integers(-1000, 1000, 300).astype(">i4"),
+        RNG.integers(0, 2, 100).astype(bool),
+        np.zeros(1000),
+    ],
+    ids=["float64_2d", "int32_big_endian", "bool", "zeros_zlib"],
+)
+def test_encode_decode_round_trip(arr):
+    encoded = json.loads(json.dumps(array_codec.encode_array(arr)))
+    decoded = array_codec.decode_array(encoded)
+    assert decoded.shape == arr.shape
+    assert decoded.dtype == arr.dtype.newbyteorder("<")
+    np.testing.assert_array_equal(decoded, arr)
+    decoded[...] = 0  # gravável
+
+
+def test_downcast_only_for_encoded_keys():
+    stores = _stores()
+    wave = stores["impulse-store"]["waveform"]["v_kv"]
+    assert array_codec.is_encoded_array(wave) and wave["dtype"] == array_codec.ARRAY_ENCODING_FLOAT_DTYPE
+    assert stores["losses-store"]["table"] == TABLE.tolist()
+    assert stores["losses-store"]["small"] == SMALL.tolist()
+    # ndarrays que escapam até o json.dump são codificados sem perda
+    stray = json.loads(json.dumps({"x": TABLE}, default=array_codec.json_default))
+    np.testing.assert_array_equal(array_codec.decode_arrays(stray)["x"], TABLE)
+
+
+def test_disk_state_and_backup_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(mcp_disk_persistence, "MCP_DATA_DIR", tmp_path)
+    monkeypatch.setattr(mcp_disk_persistence, "MCP_DATA_FILE", tmp_path / "mcp_state.json")
+    monkeypatch.setattr(mcp_disk_persistence, "MCP_BACKUP_DIR", tmp_path / "backups")
+
+    assert mcp_disk_persistence.save_mcp_state_to_disk(_stores())
+    stores, ok = mcp_disk_persistence.load_mcp_state_from_disk()
+    assert ok
+    _assert_loaded(stores)
+
+    backup = mcp_disk_persistence.create_mcp_backup()
+    assert backup is not None
+    # Fora de backups/: restore_from_backup cria outro backup com o mesmo nome no mesmo segundo
+    backup_copy = tmp_path / "restaurar.json"
+    backup_copy.write_text(backup.read_text(encoding="utf-8"), encoding="utf-8")
+    mcp_disk_persistence.save_mcp_state_to_disk({}, create_backup=False)
+    restored, ok = mcp_disk_persistence.restore_from_backup(str(backup_copy))
+    assert ok
+    _assert_loaded(restored)
+
+
+def test_history_session_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DB_PATH", str(tmp_path / "history.db"))
+    session_id = db_manager.save_test_session(_stores(), "sessao-codec")
+    assert session_id > 0
+    details = db_manager.get_test_session_details(session_id)
+    raw = details["mcp_stores_raw_json"]
+    stores = {store_id: db_manager.parse_store_json(raw[store_id]) for store_id in ("impulse-store", "losses-store")}
+    _assert_loaded(stores)
+
+
+def test_corrupted_array_kept_as_is():
+    corrupted = dict(array_codec.encode_array(WAVE), zlib=True)
+    corrupted[array_codec.ARRAY_CODEC_KEY] = corrupted[array_codec.ARRAY_CODEC_KEY][:-8]
+    assert array_codec.decode_arrays({"waveform": corrupted}) == {"waveform": corrupted}
@@ -0,0 +1,137 @@
+# tests/test_capacitor_bank.py
+"""
+Índice de potências do banco de capacitores (app_core.capacitor_bank).
+
+- solve_q_switches dá todas as potências das combinações de chaves, cada uma
+  com a combinação de menos chaves (e, no empate, a primeira em ordem
+  lexicográfica), para 5 chaves ou outro número e perfis por unidade;
+- find_best_q_configuration, select_target_bank_voltage e
+  suggest_capacitor_bank_config reproduzem a busca exaustiva com itertools que
+  os callbacks de perdas faziam, em todas as tensões de banco;
+- suggest_bank_configs resolve um array de condições igual à consulta escalar.
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from app_core import capacitor_bank
+from utils import constants
+
+EPS = 1e-6  # epsilon dos callbacks
+VOLTAGE_KEYS = list(constants.CAPACITORS_BY_VOLTAGE)
+
+
+def _reference_best(units, required_mvar):
+    """Busca exaustiva dos callbacks: menor potência ≥ requerida, depois menos chaves."""
+    steps = constants.Q_SWITCH_POWERS["generic_cp"]
+    best, best_power = None, float("inf")
+    for size in range(1, len(steps) + 1):
+        for comb in itertools.combinations(range(1, len(steps) + 1), size):
+            power = sum(steps[q - 1] for q in comb) * len(units)
+            if power >= required_mvar - EPS:
+                if power < best_power - EPS:
+                    best, best_power = comb, power
+                elif abs(power - best_power) < EPS and best and len(comb) < len(best):
+                    best, best_power = comb, power
+    if best is None:
+        return None, sum(steps) * len(units)
+    return ", ".join(f"Q{q}" for q in best), best_power
+
+
+def _units(voltage_key, use_group1_only):
+    units = constants.CAPACITORS_BY_VOLTAGE[voltage_key]
+    group1 = [u for u in units if len(u) > 4 and u.endswith("1")]
+    return (group1 or units) if use_group1_only else units
+
+
+@pytest.mark.parametrize(
+    "profiles",
+    [
+        [constants.Q_SWITCH_POWERS["generic_cp"]] * 6,
+        [[0.1, 0.2, 0.8, 1.2, 1.6]] * 2 + [[0.3, 0.3, 0.6, 1.2, 2.4]] * 3,
+        [[1.0, 1.0, 2.0, 3.0, 0.5, 0.5, 4.0]],  # 7 chaves, com potências repetidas
+    ],
+    ids=["generico", "perfis_por_unidade", "sete_chaves"],
+)
+def test_solve_q_switches_matches_enumeration(profiles):
+    powers, combinations = capacitor_bank.solve_q_switches(profiles)
+    n_switches = len(profiles[0])
+    decimals = capacitor_bank.CAP_BANK_POWER_DECIMALS
+    expected = {}
+    for size in range(1, n_switches + 1):
+        for comb in itertools.combinations(range(1, n_switches + 1), size):
+            power = round(sum(sum(p[q - 1] for q in comb) for p in profiles), decimals)
+            if power > 0 and (power not in expected or (len(comb), comb) < (len(expected[power]), expected[power])):
+                expected[power] = comb
+    assert np.all(np.diff(powers) > 0)
+    assert {round(p, decimals): c for p, c in zip(powers.tolist(), combinations)} == expected
+
+
+def test_solve_q_switches_rejects_mixed_switch_counts():
+    with pytest.raises(ValueError):
+        capacitor_bank.solve_q_switches([[0.1, 0.2], [0.1, 0.2, 0.3]])
+
+
+@pytest.mark.parametrize("voltage_key", VOLTAGE_KEYS)
+@pytest.mark.parametrize("use_group1_only", [True, False])
+def test_best_q_configuration_matches_exhaustive_search(voltage_key, use_group1_only):
+    units = _units(voltage_key, use_group1_only)
+    max_power = sum(constants.Q_SWITCH_POWERS["generic_cp"]) * len(units)
+    for required in np.linspace(0.05, 1.1 * max_power, 97):
+        label, power = capacitor_bank.find_best_q_configuration(voltage_key, required, use_group1_only)
+        ref_label, ref_power = _reference_best(units, required)
+        if ref_label is None:
+            assert label.startswith("N/A (Req:")
+        else:
+            assert label == ref_label
+        assert power == pytest.approx(ref_power, rel=1e-12)
+    assert capacitor_bank.find_best_q_configuration(voltage_key, 0.0, use_group1_only) == ("N/A", 0.0)
+
+
+def test_target_voltage_and_overall_suggestion_match_callback():
+    banks = sorted(float(v) for v in constants.CAPACITORS_BY_VOLTAGE)
+    for v_test in np.linspace(1.0, 120.0, 239).tolist() + [b * 1.1 for b in banks] + banks:
+        v_cf = next((b for b in banks if v_test <= b * 1.1 + EPS), banks[-1])
+        v_sf = next((b for b in banks if v_test <= b + EPS), banks[-1])
+        assert capacitor_bank.select_target_bank_voltage(v_test) == (str(v_cf), str(v_sf))
+
+        for required, circuit in ((3.0, "Trifásico"), (25.0, "Monofásico"), (500.0, "Trifásico")):
+            units1 = _units(str(v_cf), True)
+            group1_max = sum(constants.Q_SWITCH_POWERS["generic_cp"]) * len(units1)
+            use_group1 = required <= group1_max + EPS
+            cs, q, power = capacitor_bank.suggest_capacitor_bank_config(v_test, required, circuit)
+            assert cs == capacitor_bank.get_cs_configuration(str(v_cf), use_group1, circuit)
+            ref_label, ref_power = _reference_best(_units(str(v_cf), use_group1), required)
+            assert q == ref_label if ref_label is not None else q.startswith("N/A")
+            assert power == pytest.approx(ref_power, rel=1e-12)
+
+
+def test_cs_configuration_drops_group2_only_for_three_phase():
+    tri = capacitor_bank.get_cs_configuration("27.6", True, "Trifásico").split(", ")
+    assert tri and not any(len(s) > 4 and s.endswith("2") for s in tri)
+    mono = capacitor_bank.get_cs_configuration("27.6", True, "Monofásico").split(", ")
+    assert mono == sorted(constants.CS_SWITCHES_BY_VOLTAGE_MONO["27.6"])
+    assert capacitor_bank.get_cs_configuration(None, True, "Trifásico").startswith("N/A")
+
+
+@pytest.mark.parametrize("circuit", ["Trifásico", "Monofásico"])
+def test_suggest_bank_configs_matches_scalar(circuit):
+    rng = np.random.default_rng(5)
+    voltages = rng.choice(capacitor_bank.CAP_BANK_VOLTAGES_KV, size=(3, 5))
+    required = rng.uniform(0.0, 60.0, size=(3, 5))
+    voltages[0, 1] = np.nan
+    required[1, 2] = np.inf
+    required[2, 3] = 0.0
+    required[2, 4] = 1e4  # Acima da potência máxima
+    result = capacitor_bank.suggest_bank_configs(voltages, required, circuit)
+    for idx in np.ndindex(voltages.shape):
+        if not result["valid"][idx]:
+            assert (result["cs_config"][idx], result["q_config"][idx], result["q_power_mvar"][idx]) == ("N/A", "N/A", 0)
+            continue
+        key = str(voltages[idx])
+        use_group1 = required[idx] <= capacitor_bank.group1_max_power(key) + EPS
+        index = capacitor_bank.q_switch_index(key, use_group1, circuit)
+        assert result["cs_config"][idx] == index.cs_config
+        assert (result["q_config"][idx], result["q_power_mvar"][idx]) == index.best(float(required[idx]))
+    assert result["valid"].sum() == voltages.size - 3
@@ -0,0 +1,91 @@
+# tests/test_core_tables.py
+"""
+Tabelas do aço M4 compiladas em grade (app_core.core_tables).
+
+- a grade guarda exatamente os valores de constants.perdas_nucleo_data e
+  constants.potencia_magnet_data, e a interpolação devolve esses valores sobre
+  os pontos da tabela (bilinear e bicúbica);
+- a interpolação bilinear, escalar ou em array com broadcasting, reproduz a
+  busca da tensão induzida (quatro .loc por ponto), com limitação à faixa da
+  tabela;
+- tabelas incompletas e métodos desconhecidos são rejeitados.
+"""
+from bisect import bisect_left
+
+import numpy as np
+import pytest
+
+from app_core import core_tables
+from utils import constants
+
+TABLES = {
+    "perdas": (core_tables.core_loss_grid, constants.perdas_nucleo_data),
+    "potencia": (core_tables.magnetizing_power_grid, constants.potencia_magnet_data),
+}
+
+
+def _reference_bilinear(table, inducao, frequencia):
+    """buscar_valores_tabela da tensão induzida, com o dicionário no lugar do DataFrame."""
+    inducoes = sorted({b for b, _ in table})
+    frequencias = sorted({f for _, f in table})
+    b = max(min(inducao, inducoes[-1]), inducoes[0])
+    f = max(min(frequencia, frequencias[-1]), frequencias[0])
+    i = min(max(bisect_left(inducoes, b), 1), len(inducoes) - 1)
+    j = min(max(bisect_left(frequencias, f), 1), len(frequencias) - 1)
+    b_low, b_high = inducoes[i - 1], inducoes[i]
+    f_low, f_high = frequencias[j - 1], frequencias[j]
+    x = (b - b_low) / (b_high - b_low)
+    y = (f - f_low) / (f_high - f_low)
+    return (
+        (1 - x) * (1 - y) * table[(b_low, f_low)]
+        + x * (1 - y) * table[(b_high, f_low)]
+        + (1 - x) * y * table[(b_low, f_high)]
+        + x * y * table[(b_high, f_high)]
+    )
+
+
+@pytest.mark.parametrize("name", TABLES)
+@pytest.mark.parametrize("method", core_tables.CORE_TABLE_METHODS)
+def test_grid_points_return_table_values(name, method):
+    grid_func, table = TABLES[name]
+    grid = grid_func()
+    keys = list(table)
+    b = np.array([k[0] for k in keys], dtype=float)
+    f = np.array([k[1] for k in keys], dtype=float)
+    expected = np.array([table[k] for k in keys])
+    np.testing.assert_allclose(grid.interpolate(b, f, method), expected, rtol=1e-12, atol=1e-12)
+    if method == "bilinear":
+        assert [float(grid.interpolate(*k)) for k in keys] == pytest.approx(expected.tolist(), rel=1e-12)
+
+
+@pytest.mark.parametrize("name", TABLES)
+def test_bilinear_matches_induced_voltage_lookup(name):
+    grid_func, table = TABLES[name]
+    grid = grid_func()
+    rng = np.random.default_rng(11)
+    (b_min, b_max), (f_min, f_max) = grid.inducao_range, grid.frequencia_range
+    # Inclui pontos fora da tabela, que são limitados às bordas
+    b = rng.uniform(b_min - 0.2, b_max + 0.2, 500)
+    f = rng.uniform(f_min - 20.0, f_max + 50.0, 500)
+    expected = np.array([_reference_bilinear(table, bi, fi) for bi, fi in zip(b, f)])
+    np.testing.assert_allclose(grid.interpolate(b, f), expected, rtol=1e-12)
+    np.testing.assert_allclose([grid.interpolate(float(bi), float(fi)) for bi, fi in zip(b, f)], expected, rtol=1e-12)
+
+
+def test_interpolate_core_factors_broadcasts():
+    b = np.linspace(0.6, 1.7, 12)[:, None]
+    f = np.array([50.0, 60.0, 75.0, 400.0])[None, :]
+    perdas, potencia = core_tables.interpolate_core_factors(b, f)
+    assert perdas.shape == potencia.shape == (12, 4)
+    np.testing.assert_allclose(
+        perdas[3], [_reference_bilinear(constants.perdas_nucleo_data, float(b[3, 0]), fi) for fi in f[0]], rtol=1e-12
+    )
+
+
+def test_invalid_tables_and_method_rejected():
+    with pytest.raises(ValueError):
+        core_tables.CoreTableGrid({(1.0, 50): 1.0, (1.0, 60): 1.2, (1.1, 50): 1.3})  # (1.1, 60) ausente
+    with pytest.raises(ValueError):
+        core_tables.CoreTableGrid({(1.0, 50): 1.0, (1.0, 60): 1.2})  # uma só indução
+    with pytest.raises(ValueError):
+        core_tables.core_loss_grid().interpolate(1.5, 60.0, method="nearest")
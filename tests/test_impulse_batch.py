@@ -0,0 +1,104 @@
+# tests/test_impulse_batch.py
+"""
+Paridade da simulação em lote (app_core.impulse_batch) com a versão escalar.
+
+- rlc_solution_batch reproduz calculations.rlc_solution nos regimes sub, super e
+  criticamente amortecido (e R = 0) em grades uniforme, de dois passos,
+  adaptativa e com instantes negativos;
+- double_exp_batch reproduz calculations.double_exp_func e, com gradient=True,
+  a derivada por np.gradient usada para a corrente na versão escalar;
+- simulate_hybrid_impulse_batch dá v_rlc igual ao escalar e i_load igual a
+  C_load·np.gradient(v_final), com e sem corte.
+"""
+import numpy as np
+import pytest
+
+from app_core import calculations, impulse_batch, impulse_grid
+
+RTOL = 1e-9
+
+C_GEN = 2e-6  # F
+C_LOAD = 1.5e-9  # F
+C_EQ = C_GEN * C_LOAD / (C_GEN + C_LOAD)
+
+
+def _grids():
+    return {
+        "uniforme": np.linspace(0.0, 100e-6, 2001),
+        "dois_passos": impulse_grid.two_step_time_grid(100e-6, 1.5e-6),
+        "adaptativa": impulse_grid.adaptive_time_grid(100e-6, 1.5e-6, chop_time_s=4e-6),
+        "t_negativo": np.linspace(-5e-6, 60e-6, 1301),
+    }
+
+
+GRIDS = _grids()
+
+# Resistências (Ohm) e indutâncias (H) cobrindo os regimes do circuito RLC
+RLC_CASES = [
+    (0.0, 40e-6),  # R = 0: oscilação pura
+    (50.0, 40e-6),  # subamortecido
+    (2.0 * np.sqrt(40e-6 / C_EQ), 40e-6),  # crítico
+    (2.0 * np.sqrt(40e-6 / C_EQ) * (1 + 1e-7), 40e-6),  # quase crítico
+    (900.0, 20e-6),  # superamortecido
+]
+
+
+def _assert_rows_close(actual, expected):
+    """Erro máximo de cada linha relativo ao maior valor absoluto da linha."""
+    scale = np.maximum(np.max(np.abs(expected), axis=-1), 1e-300)
+    error = np.max(np.abs(actual - expected), axis=-1) / scale
+    assert np.all(error < RTOL), error
+
+
+@pytest.mark.parametrize("grid", GRIDS)
+def test_rlc_batch_matches_scalar(grid):
+    t = GRIDS[grid]
+    r = np.array([c[0] for c in RLC_CASES])
+    l_total = np.array([c[1] for c in RLC_CASES])
+    batch = impulse_batch.rlc_solution_batch(t, 1e5, r, l_total, C_EQ)
+    expected = np.array([calculations.rlc_solution(t, 1e5, ri, li, C_EQ) for ri, li in RLC_CASES])
+    _assert_rows_close(batch, expected)
+
+
+def test_rlc_batch_invalid_rows_are_zero():
+    t = GRIDS["uniforme"]
+    batch = impulse_batch.rlc_solution_batch(t, 1e5, [50.0, 50.0], [40e-6, 0.0], C_EQ)
+    assert np.any(batch[0])
+    assert not np.any(batch[1])
+
+
+@pytest.mark.parametrize("grid", GRIDS)
+def test_double_exp_batch_matches_scalar(grid):
+    t = GRIDS[grid]
+    alpha = np.array([1.4e4, 1.5e4, 2.0e3])
+    beta = np.array([2.4e6, 3.0e6, 1.0e5])
+    scale = np.array([1.0, 2e-9, 3.0])
+    v, dv = impulse_batch.double_exp_batch(t, 1e5, alpha, beta, gradient=True, gradient_scale=scale)
+    expected = np.array([calculations.double_exp_func(t, 1e5, a, b) for a, b in zip(alpha, beta)])
+    _assert_rows_close(v, expected)
+    _assert_rows_close(dv, scale[:, None] * np.gradient(expected, t, axis=1))
+
+
+@pytest.mark.parametrize("impulse_type", ["lightning", "chopped"])
+def test_simulate_batch_matches_scalar(impulse_type):
+    t = impulse_grid.two_step_time_grid(100e-6, 1.5e-6)
+    rf = np.array([30.0, 45.0, 60.0])
+    rt = np.array([60.0, 75.0, 90.0])
+    l_total = np.array([5e-6, 20e-6, 60e-6])
+    gap = 3.0 if impulse_type == "chopped" else None
+    v_rlc, v_final, i_load, alpha, beta, chop = impulse_batch.simulate_hybrid_impulse_batch(
+        t, 1e5, rf, rt, l_total, C_GEN, C_LOAD, impulse_type, gap_distance_cm=gap
+    )
+    r_rlc = rf + calculations.constants.R_PARASITIC_OHM
+    expected_rlc = np.array([calculations.rlc_solution(t, 1e5, r, li, C_EQ) for r, li in zip(r_rlc, l_total)])
+    _assert_rows_close(v_rlc, expected_rlc)
+    _assert_rows_close(i_load, C_LOAD * np.gradient(v_final, t, axis=1))
+
+    v_clean = np.array([calculations.double_exp_func(t, 1e5, a, b) for a, b in zip(alpha, beta)])
+    if impulse_type == "chopped":
+        assert np.all(np.isfinite(chop))
+        before = t[None, :] < chop[:, None]
+        np.testing.assert_allclose(v_final[before], v_clean[before], rtol=RTOL, atol=RTOL * 1e5)
+    else:
+        assert np.all(np.isnan(chop))
+        _assert_rows_close(v_final, v_clean)
@@ -0,0 +1,144 @@
+# tests/test_impulse_kernels.py
+"""
+Paridade dos kernels de instantes da forma de onda (app_core.impulse_kernels).
+
+- _scan_loop (o laço que o Numba compila) e _scan_numpy dão os mesmos índices;
+- waveform_timing reproduz as definições com máscaras e np.interp usadas antes
+  dos kernels, e o caminho JIT (se houver Numba) é igual ao NumPy;
+- T1/T2 (LI) e Tp/T2/Td (SI) de registros sintéticos fixos ficam nos valores
+  das análises anteriores aos kernels.
+"""
+import numpy as np
+import pytest
+
+from app_core import calculations, impulse_kernels
+
+
+def _double_exp(t, tau_tail, tau_front, peak):
+    v = np.exp(-t / tau_tail) - np.exp(-t / tau_front)
+    return v / v.max() * peak
+
+
+def _li_record():
+    """LI 1.2/50 µs limpo, 1000 kV."""
+    t = np.linspace(0.0, 100.0, 20001)
+    return t, _double_exp(t, 68.2, 0.405, 1000.0)
+
+
+def _li_overshoot_record():
+    """LI 1050 kV com oscilação amortecida no pico (passa pelo K-factor)."""
+    t = np.linspace(0.0, 100.0, 20001)
+    v = _double_exp(t, 68.2, 0.405, 1.0)
+    v = v + 0.08 * np.exp(-t / 1.5) * np.sin(2 * np.pi * t / 0.6) * (1 - np.exp(-t / 0.2))
+    return t, 1050.0 * v
+
+
+def _si_record():
+    """SI 850 kV, frente ~250 µs, cauda longa."""
+    t = np.linspace(0.0, 10000.0, 20001)
+    return t, _double_exp(t, 3500.0, 62.0, 850.0)
+
+
+def _timing_records():
+    """Registros variados: ondas normais, ruído, cauda com inversão, platô e casos de borda."""
+    rng = np.random.default_rng(7)
+    t_li, v_li = _li_record()
+    t_si, v_si = _si_record()
+    t_os, v_os = _li_overshoot_record()
+    records = {
+        "li": (t_li, v_li),
+        "si": (t_si, v_si),
+        "li_oscilacao": (t_os, v_os),
+        "li_ruido": (t_li, v_li + rng.normal(0.0, 5.0, v_li.size)),
+        "cauda_inverte": (t_li, v_li - 0.6 * v_li.max() * (t_li / t_li[-1])),
+        "plato": (t_li, np.minimum(v_li, 0.95 * v_li.max())),
+        "sem_cauda": (t_li[:400], v_li[:400]),
+        "pico_na_origem": (t_li, v_li.max() * np.exp(-t_li / 50.0)),
+        "grade_nao_uniforme": (np.sort(rng.uniform(0.0, 100.0, 5000)), None),
+    }
+    t_nu = records["grade_nao_uniforme"][0]
+    records["grade_nao_uniforme"] = (t_nu, _double_exp(t_nu, 68.2, 0.405, 1.0))
+    for i in range(5):
+        records[f"aleatorio_{i}"] = (np.arange(300.0), rng.normal(0.0, 1.0, 300).cumsum())
+    return records
+
+
+TIMING_RECORDS = _timing_records()
+
+
+def _mask_reference(t, v):
+    """Instantes pelas definições com máscaras usadas antes de impulse_kernels."""
+    peak_idx = int(np.argmax(v))
+    peak = v[peak_idx]
+    ref = {"peak_idx": peak_idx, "peak": peak, "t_peak": t[peak_idx]}
+    front_t, front_v = t[: peak_idx + 1], v[: peak_idx + 1]
+    for key, level in (("t_30", 0.3), ("t_90", 0.9)):
+        ref[key] = np.interp(level * peak, front_v, front_t) if front_v[0] < level * peak else np.nan
+    below = np.flatnonzero(v[peak_idx:] <= 0.5 * peak)
+    if below.size:
+        i50 = peak_idx + below[0]
+        i0 = max(i50 - 1, peak_idx)
+        ref["t_50"] = t[i0] + (0.5 * peak - v[i0]) * (t[i50] - t[i0]) / (v[i50] - v[i0])
+    else:
+        ref["t_50"] = np.nan
+    return ref
+
+
+@pytest.mark.parametrize("name", sorted(TIMING_RECORDS))
+def test_scan_loop_matches_scan_numpy(name):
+    _, v = TIMING_RECORDS[name]
+    v = np.ascontiguousarray(v, dtype=float)
+    peak_idx = int(np.argmax(v))
+    assert impulse_kernels._scan_loop(v, peak_idx) == impulse_kernels._scan_numpy(v, peak_idx)
+
+
+@pytest.mark.parametrize("name", ["li", "si", "grade_nao_uniforme", "pico_na_origem", "sem_cauda"])
+def test_waveform_timing_matches_mask_reference(name):
+    """Frentes monótonas: os cruzamentos são os de np.interp sobre a frente e da cauda interpolada."""
+    t, v = TIMING_RECORDS[name]
+    timing = impulse_kernels.waveform_timing(t, v, use_jit=False)
+    ref = _mask_reference(t, v)
+    assert timing["peak_idx"] == ref["peak_idx"]
+    assert timing["peak"] == ref["peak"]
+    assert timing["t_peak"] == ref["t_peak"]
+    for key in ("t_30", "t_90", "t_50"):
+        np.testing.assert_allclose(timing[key], ref[key], rtol=1e-12, atol=1e-12, err_msg=key)
+
+
+@pytest.mark.skipif(not impulse_kernels.NUMBA_AVAILABLE, reason="Numba não instalado")
+@pytest.mark.parametrize("name", sorted(TIMING_RECORDS))
+def test_waveform_timing_jit_matches_numpy(name):
+    t, v = TIMING_RECORDS[name]
+    jit = impulse_kernels.waveform_timing(t, v, use_jit=True)
+    numpy_path = impulse_kernels.waveform_timing(t, v, use_jit=False)
+    for key in impulse_kernels.TIMING_KEYS:
+        np.testing.assert_equal(jit[key], numpy_path[key], err_msg=key)
+
+
+@pytest.mark.parametrize(
+    ("record", "expected"),
+    [
+        (_li_record, {"peak_time_test_us": 2.09, "t_front_us": 1.2022859203716751, "t_tail_us": 49.98793803840976}),
+        (
+            _li_overshoot_record,
+            {"peak_time_test_us": 2.045, "t_front_us": 1.2024589046904168, "t_tail_us": 49.974685705953966},
+        ),
+    ],
+)
+def test_analyze_lightning_impulse_pinned(record, expected):
+    t, v = record()
+    result = calculations.analyze_lightning_impulse(t, v)
+    assert result["error"] is None
+    assert result["status_geral"] == "Conforme"
+    for key, value in expected.items():
+        assert result[key] == pytest.approx(value, rel=1e-6), key
+
+
+def test_analyze_switching_impulse_pinned():
+    t, v = _si_record()
+    result = calculations.analyze_switching_impulse(t, v)
+    assert result["error"] is None
+    assert result["peak_time_us"] == pytest.approx(254.5, rel=1e-9)
+    assert result["t_p_us"] == pytest.approx(1343.4452615475457, rel=1e-9)
+    assert result["t_2_us"] == pytest.approx(2743.1503991790073, rel=1e-9)
+    assert result["td_us"] == pytest.approx(565.783506605816, rel=1e-9)
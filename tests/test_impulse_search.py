@@ -0,0 +1,80 @@
+# tests/test_impulse_search.py
+"""
+Busca de configuração do gerador (app_core.impulse_search).
+
+- cada combinação conforme, simulada de novo com L em grade fina, tem T1/T2
+  (ou Tp/T2) dentro da tolerância e overshoot dentro do limite (LI/LIC);
+- a triagem pela cauda sem L não descarta combinações que a simulação com L
+  de todo o espaço considera conformes;
+- combinações subamortecidas com tempos conformes são rejeitadas pelo overshoot;
+- a contagem separa as combinações com veredito das simuladas com L.
+"""
+import numpy as np
+import pytest
+
+from app_core import impulse_search
+from app_core.impulse_batch import circuit_load_voltage_batch, front_tail_times_batch
+from app_core.impulse_grid import two_step_time_grid
+from utils import constants
+
+SEARCH_ARGS = (1050.0, 3000.0, 400.0)  # kV, pF (objeto), pF (parasita)
+
+
+def _key(row):
+    return row["generator_config"], row["rf_total_ohm"], row["rt_total_ohm"], row["inductor_h"]
+
+
+@pytest.mark.parametrize("impulse_type", ["lightning", "chopped", "switching"])
+def test_compliant_rows_resimulated_with_inductance(impulse_type):
+    search = impulse_search.search_generator_configurations(impulse_type, *SEARCH_ARGS, max_results=None)
+    assert search["n_compliant"] > 0
+    assert search["n_evaluated"] == impulse_search.count_search_space(impulse_type)
+    assert 0 < search["n_simulated"] < search["n_evaluated"]
+
+    rows = search["compliant"]
+    assert [r["margin"] for r in rows] == sorted((r["margin"] for r in rows), reverse=True)
+    nom_2 = impulse_search._time_limits(impulse_type)[2]
+    for row in rows[:10]:
+        config = next(c for c in constants.GENERATOR_CONFIGURATIONS if c["value"] == row["generator_config"])
+        c_gen, _ = impulse_search.calculations.calculate_effective_gen_params(row["stages"], row["parallel"])
+        c_load = impulse_search.calculations.calculate_total_load_capacitance(
+            SEARCH_ARGS[1], SEARCH_ARGS[2], impulse_type, config["max_voltage_kv"]
+        )
+        t_sec = two_step_time_grid(3.0 * nom_2 * 1e-6, row["t1_us"] * 1e-6, points_per_peak=400)
+        v = circuit_load_voltage_batch(
+            t_sec, 1.0, row["rf_total_ohm"], row["rt_total_ohm"], row["l_total_h"], c_gen, c_load
+        )
+        timing = front_tail_times_batch(t_sec * 1e6, v)
+        if impulse_type == "switching":
+            t_ab = timing["t_90_us"] - timing["t_30_us"]
+            t50 = timing["t_50_us"]
+            t1, t2 = (2.42 - 3.08e-3 * t_ab + 1.51e-6 * t50**2) * t_ab, t50
+        else:
+            t1, t2 = timing["t_front_us"], timing["t_tail_us"]
+            assert row["overshoot_percent"] <= constants.LIGHTNING_OVERSHOOT_MAX * 100.0
+        assert float(t1[0]) == pytest.approx(row["t1_us"], rel=2e-2)
+        assert float(t2[0]) == pytest.approx(row["t2_us"], rel=2e-2)
+        assert impulse_search.time_margins(impulse_type, t1, t2)[0] >= -0.05
+
+
+@pytest.mark.parametrize("impulse_type", ["lightning", "switching"])
+def test_tail_screen_keeps_every_compliant_combination(impulse_type, monkeypatch):
+    screened = impulse_search.search_generator_configurations(impulse_type, *SEARCH_ARGS, max_results=None)
+    monkeypatch.setattr(impulse_search, "SEARCH_TAIL_SCREEN_SLACK", np.inf)
+    full = impulse_search.search_generator_configurations(impulse_type, *SEARCH_ARGS, max_results=None)
+    assert full["n_simulated"] > screened["n_simulated"]
+    assert {_key(r) for r in screened["compliant"]} == {_key(r) for r in full["compliant"]}
+
+
+def test_underdamped_combinations_rejected_by_overshoot(monkeypatch):
+    args = ("lightning", *SEARCH_ARGS)
+    kwargs = {"l_extra_h": 20e-6, "max_results": None}
+    search = impulse_search.search_generator_configurations(*args, **kwargs)
+    limit = constants.LIGHTNING_OVERSHOOT_MAX * 100.0
+    monkeypatch.setattr(constants, "LIGHTNING_OVERSHOOT_MAX", np.inf)
+    unlimited = impulse_search.search_generator_configurations(*args, **kwargs)
+
+    overshooting = {_key(r) for r in unlimited["compliant"] if r["overshoot_percent"] > limit}
+    assert overshooting, "cenário sem combinações oscilatórias com tempos conformes"
+    assert all(r["is_oscillatory"] for r in unlimited["compliant"] if _key(r) in overshooting)
+    assert {_key(r) for r in search["compliant"]} == {_key(r) for r in unlimited["compliant"]} - overshooting
@@ -0,0 +1,62 @@
+# tests/test_impulse_test_plan.py
+"""
+Plano de ensaios de impulso (app_core.impulse_test_plan).
+
+- o veredito de cada trabalho é o da análise normativa da onda com L do
+  circuito escolhido (a mesma que a tabela mostra), e o LIC só é indeterminado
+  quando o corte fica fora da janela;
+- o pool de processos dá o mesmo plano que o processo atual, é recriado quando
+  o número de processos muda e é encerrado por shutdown_test_plan_pool.
+"""
+import pytest
+
+from app_core import impulse_test_plan
+from utils import constants
+
+TRANSFORMER_DATA = {
+    "tensao_at": 230, "tensao_bt": 69, "tensao_terciario": 13.8, "potencia_mva": 100, "impedancia": 12,
+    "nbi_at": 950, "sil_at": 750, "nbi_bt": 350, "nbi_terciario": 110,
+}
+
+
+@pytest.fixture(scope="module")
+def serial_plan():
+    return impulse_test_plan.compute_test_plan(TRANSFORMER_DATA, max_workers=1)
+
+
+def test_verdicts_follow_normative_analysis(serial_plan):
+    assert serial_plan["n_jobs"] == 7
+    assert serial_plan["n_failed"] == 0
+    verdicts = set()
+    for job in serial_plan["jobs"]:
+        wave = job["waveform"]
+        chop_us = wave.get("chop_time_us")
+        in_window = (
+            chop_us is not None
+            and constants.CHOPPED_IMPULSE_CHOP_TIME_MIN <= chop_us <= constants.CHOPPED_IMPULSE_CHOP_TIME_MAX
+        )
+        if job["impulse_type"] == "chopped" and not in_window:
+            assert job["status"] == "model_limited" and job["compliant"] is None
+        else:
+            assert job["status"] == "ok"
+            assert job["compliant"] == (wave["status_geral"] == "Conforme")
+        verdicts.add(job["compliant"])
+        # A indutância do enrolamento fica registrada, fora da malha série da busca
+        assert job["l_transformer_h"] > 0
+        assert job["circuit"]["l_total_h"] < 1e-3
+    assert True in verdicts, "nenhum ensaio conforme no plano de referência"
+
+
+def test_pool_matches_serial_and_shuts_down(serial_plan):
+    try:
+        pooled = impulse_test_plan.compute_test_plan(TRANSFORMER_DATA, max_workers=2)
+        assert impulse_test_plan._pool_workers == 2
+        for job, ref in zip(pooled["jobs"], serial_plan["jobs"]):
+            assert (job["status"], job["compliant"], job["circuit"]) == (ref["status"], ref["compliant"], ref["circuit"])
+            # O ajuste da curva base parte do último ajuste do processo (warm start): diferenças de ~1e-5
+            assert job["waveform"] == pytest.approx(ref["waveform"], rel=1e-3)
+        impulse_test_plan.compute_test_plan(TRANSFORMER_DATA, max_workers=3)
+        assert impulse_test_plan._pool_workers == 3
+    finally:
+        impulse_test_plan.shutdown_test_plan_pool()
+    assert impulse_test_plan._pool is None
@@ -0,0 +1,229 @@
+# tests/test_losses_engine.py
+"""
+Paridade do LossesEngine (app_core.losses_engine) com os antigos callbacks de perdas.
+
+As referências são as contas escalares que callbacks/losses.py fazia antes da
+extração do motor (laço por tap/cenário e calculate_sut_eps_current_compensated):
+
+- em vazio, nos pontos da tabela do aço M4: correntes, potências, pesos e
+  fatores por material e nível, e os taps do SUT (≥ tensão de ensaio) com a
+  corrente refletida no EPS e o status de cada nível;
+- em carga: tensão, corrente e potências de ensaio por tap × condição (com as
+  sobrecargas só a partir de 230 kV) e a tensão/potência requerida do banco de
+  capacitores com e sem fator;
+- a corrente no EPS com compensação S/F e C/F nos 5 taps do SUT mais próximos.
+"""
+import math
+
+import numpy as np
+import pytest
+
+from app_core.losses_engine import LoadLossInputs, LossesEngine, NoLoadInputs, core_factors, get_losses_engine
+from utils import constants
+
+RTOL = 1e-12
+EPS = 1e-6  # epsilon dos callbacks
+BANKS_KV = sorted(float(v) for v in constants.CAPACITORS_BY_VOLTAGE)
+
+
+def _sut_taps():
+    taps = np.arange(
+        constants.SUT_AT_MIN_VOLTAGE,
+        constants.SUT_AT_MAX_VOLTAGE + constants.SUT_AT_STEP_VOLTAGE,
+        constants.SUT_AT_STEP_VOLTAGE,
+    )
+    return taps[taps > EPS]
+
+
+def _sut_no_load_reference(v_kv, i_a):
+    """Laço por nível do callback de perdas em vazio: (status, taps V, % do limite)."""
+    if v_kv is None or v_kv <= EPS or i_a is None or i_a <= EPS:
+        return "Sem dados de corrente/tensão", [], []
+    taps = _sut_taps()
+    adequados = [tap for tap in taps if tap >= v_kv * 1000 - 1e-6]
+    if not adequados:
+        return f"Tensão > {taps[-1] / 1000}kV SUT Max", [], []
+    top = sorted(adequados, key=lambda tap: abs(tap - v_kv * 1000))[:5]
+    percent = [i_a * tap / constants.SUT_BT_VOLTAGE / constants.EPS_CURRENT_LIMIT * 100 for tap in top]
+    return "OK", top, percent
+
+
+def _compensated_reference(v_kv, i_a, q_sf, v_sf, q_cf, v_cf, tipo, tap_v):
+    """calculate_sut_eps_current_compensated dos callbacks: (I S/F, % S/F, I C/F, % C/F)."""
+    ratio = tap_v / constants.SUT_BT_VOLTAGE
+    i_reflected = i_a * ratio
+    results = []
+    for q, v_bank, factor in (
+        (q_sf, v_sf, 0.25 if v_sf in (13.8, 23.9) else 0.75 if v_sf in (41.4, 71.7) else 1.0),
+        (q_cf, v_cf, 1.0),
+    ):
+        i_net = i_reflected
+        if v_kv > EPS and i_a > EPS and q > EPS and v_bank > EPS:
+            den = (v_kv / v_bank) ** 2 * factor
+            q_corr = q * den if den > EPS else 0
+            sqrt_3 = math.sqrt(3) if tipo == "Trifásico" else 1.0
+            i_net = i_reflected - q_corr * 1000.0 / (v_kv * sqrt_3) * ratio
+        results += [i_net, i_net / constants.EPS_CURRENT_LIMIT * 100]
+    return results
+
+
+def _load_reference(inputs: LoadLossInputs, tap: int, scenario: str):
+    """Um (tap, cenário) do laço do callback de perdas em carga."""
+    sqrt_3 = math.sqrt(3) if inputs.tipo_transformador == "Trifásico" else 1.0
+    vcc = inputs.tensao_kv[tap] / 100 * inputs.impedancia_percent[tap]
+    p_total = inputs.perdas_totais_kw[tap]
+    p_carga = p_total - inputs.perdas_vazio_kw
+    p_frio = p_carga * (235 + 25) / (235 + inputs.temperatura_referencia_c)
+    k, p_ativa = {
+        "25°C": (1.0, p_frio),
+        "Frio": (math.sqrt(p_total / p_frio), p_total),
+        "Quente": (math.sqrt(p_carga / p_frio), p_carga),
+        "1.2 pu": (1.2, p_carga * 1.2**2),
+        "1.4 pu": (1.4, p_carga * 1.4**2),
+    }[scenario]
+    v_test, i_test = k * vcc, k * inputs.corrente_a[tap]
+    s_kva = v_test * i_test * sqrt_3
+    q_mvar = math.sqrt(s_kva**2 - p_ativa**2) / 1000 if s_kva >= p_ativa else 0.0
+    v_cf = next((v for v in BANKS_KV if v_test <= v * 1.1 + 1e-6), BANKS_KV[-1])
+    v_sf = next((v for v in BANKS_KV if v_test <= v + 1e-6), BANKS_KV[-1])
+    return {
+        "test_tensao_kv": v_test,
+        "test_corrente_a": i_test,
+        "test_potencia_mva": s_kva / 1000,
+        "test_potencia_ativa_kw": p_ativa,
+        "test_potencia_mvar": q_mvar,
+        "banco_tensao_cf_kv": v_cf,
+        "banco_potencia_cf_mvar": s_kva / 1000 / (v_test / v_cf) ** 2,
+        "banco_tensao_sf_kv": v_sf,
+        "banco_potencia_sf_mvar": s_kva / 1000 / (v_test / v_sf) ** 2,
+    }
+
+
+def _random_load_inputs(rng, tipo):
+    tensao = tuple(rng.uniform(50.0, 500.0, 3))
+    sqrt_3 = math.sqrt(3) if tipo == "Trifásico" else 1.0
+    potencia_mva = rng.uniform(10.0, 300.0)
+    perdas_vazio = rng.uniform(10.0, 100.0)
+    return LoadLossInputs(
+        tensao_kv=tensao,
+        corrente_a=tuple(potencia_mva * 1000 / (v * sqrt_3) for v in tensao),
+        impedancia_percent=tuple(rng.uniform(5.0, 20.0, 3)),
+        perdas_totais_kw=tuple(perdas_vazio + rng.uniform(50.0, 500.0, 3)),
+        perdas_vazio_kw=perdas_vazio,
+        tipo_transformador=tipo,
+    )
+
+
+@pytest.mark.parametrize(
+    "tipo, tensao_bt_kv, inducao_t, frequencia_hz, exc_1_1, exc_1_2",
+    [
+        ("Trifásico", 13.8, 1.6, 60.0, None, None),
+        ("Trifásico", 34.5, 1.7, 50.0, 1.2, 3.0),
+        ("Monofásico", 13.8, 1.5, 60.0, None, 2.0),
+        ("Monofásico", 130.0, 1.6, 60.0, None, 2.0),  # 1.1 e 1.2 pu acima do maior tap do SUT
+    ],
+)
+def test_no_load_matches_callback(tipo, tensao_bt_kv, inducao_t, frequencia_hz, exc_1_1, exc_1_2):
+    perdas_vazio, peso, exc_percent, i_nom = 45.0, 35.0, 0.4, 2000.0
+    result = get_losses_engine().no_load(
+        NoLoadInputs(
+            perdas_vazio_kw=perdas_vazio,
+            peso_nucleo_ton=peso,
+            corrente_excitacao_percent=exc_percent,
+            inducao_t=inducao_t,
+            frequencia_hz=frequencia_hz,
+            tensao_bt_kv=tensao_bt_kv,
+            corrente_nominal_bt_a=i_nom,
+            tipo_transformador=tipo,
+            corrente_exc_1_1_percent=exc_1_1,
+            corrente_exc_1_2_percent=exc_1_2,
+        )
+    )
+    sqrt_3 = math.sqrt(3) if tipo == "Trifásico" else 1.0
+    fator_perdas = constants.perdas_nucleo_data[(inducao_t, frequencia_hz)]
+    fator_potencia = constants.potencia_magnet_data[(inducao_t, frequencia_hz)]
+    peso_m4 = perdas_vazio / fator_perdas
+    i_m4 = fator_potencia * peso_m4 / (tensao_bt_kv * sqrt_3)
+    i_proj = i_nom * exc_percent / 100
+    i_proj_1_1 = i_nom * exc_1_1 / 100 if exc_1_1 is not None else (3 if tipo == "Trifásico" else 5) * i_proj
+    i_proj_1_2 = i_nom * exc_1_2 / 100 if exc_1_2 is not None else None
+    tensoes = [tensao_bt_kv, tensao_bt_kv * 1.1, tensao_bt_kv * 1.2]
+
+    corrente = [[i_proj, i_proj_1_1, np.nan if i_proj_1_2 is None else i_proj_1_2], [i_m4, 2 * i_m4, 4 * i_m4]]
+    np.testing.assert_allclose(result["corrente_a"], corrente, rtol=RTOL)
+    np.testing.assert_allclose(result["potencia_kva"], np.array(corrente) * tensoes * sqrt_3, rtol=RTOL)
+    np.testing.assert_allclose(result["peso_nucleo_ton"], [peso, peso_m4], rtol=RTOL)
+    np.testing.assert_allclose(result["fator_perdas_w_kg"], [perdas_vazio / peso, fator_perdas], rtol=RTOL)
+    np.testing.assert_allclose(
+        result["fator_potencia_mag_var_kg"], [tensao_bt_kv * i_proj * sqrt_3 / peso, fator_potencia], rtol=RTOL
+    )
+    np.testing.assert_allclose(result["corrente_excitacao_percent"], [exc_percent, i_m4 / i_nom * 100], rtol=RTOL)
+
+    for k, (v_kv, i_a) in enumerate(zip(tensoes, [i_proj, i_proj_1_1, i_proj_1_2])):
+        status, taps, percent = _sut_no_load_reference(v_kv, i_a)
+        assert result["sut_status"][k] == status
+        n = len(taps)
+        np.testing.assert_allclose(result["sut_tap_kv"][k, :n], np.array(taps) / 1000, rtol=RTOL)
+        np.testing.assert_allclose(result["sut_percent_limite"][k, :n], percent, rtol=RTOL)
+        assert np.all(np.isnan(result["sut_tap_kv"][k, n:]))
+
+
+def test_core_factors_outside_table_rejected():
+    with pytest.raises(ValueError):
+        core_factors(3.0, 60.0)
+
+
+@pytest.mark.parametrize("tipo", ["Trifásico", "Monofásico"])
+def test_load_and_compensation_match_callback(tipo):
+    rng = np.random.default_rng(1 if tipo == "Trifásico" else 2)
+    engine = get_losses_engine()
+    taps = _sut_taps()
+    for _ in range(20):
+        inputs = _random_load_inputs(rng, tipo)
+        result = engine.load(inputs)
+        assert result["overload_applicable"] == (inputs.tensao_kv[0] >= 230.0)
+        assert len(result["scenarios"]) == (5 if result["overload_applicable"] else 3)
+        assert result["valid"].all()
+
+        q_sf = rng.uniform(0.0, 50.0, result["test_tensao_kv"].shape)
+        q_cf = rng.uniform(0.0, 50.0, q_sf.shape)
+        q_sf[0, 0] = np.nan  # Sem configuração S/F: sem compensação
+        eps = engine.sut_eps_compensated(result, q_sf, q_cf, tipo)
+        for tap in range(3):
+            for col, scenario in enumerate(result["scenarios"]):
+                for key, value in _load_reference(inputs, tap, scenario).items():
+                    assert result[key][tap, col] == pytest.approx(value, rel=RTOL), (key, tap, scenario)
+
+                v_kv, i_a = result["test_tensao_kv"][tap, col], result["test_corrente_a"][tap, col]
+                nearest = sorted(sorted(taps, key=lambda t: abs(t - v_kv * 1000))[:5])
+                np.testing.assert_allclose(eps["tap_sut_kv"][tap, col], np.array(nearest) / 1000, rtol=RTOL)
+                for k, tap_v in enumerate(nearest):
+                    reference = _compensated_reference(
+                        v_kv,
+                        i_a,
+                        0.0 if np.isnan(q_sf[tap, col]) else q_sf[tap, col],
+                        result["banco_tensao_sf_kv"][tap, col],
+                        q_cf[tap, col],
+                        result["banco_tensao_cf_kv"][tap, col],
+                        tipo,
+                        tap_v,
+                    )
+                    got = [
+                        eps[key][tap, col, k]
+                        for key in ("corrente_eps_sf_a", "percent_limite_sf", "corrente_eps_cf_a", "percent_limite_cf")
+                    ]
+                    np.testing.assert_allclose(got, reference, rtol=1e-10, atol=1e-9)
+
+
+def test_invalid_tap_excluded_from_maxima():
+    inputs = LoadLossInputs(
+        tensao_kv=(230.0, 207.0, 253.0),
+        corrente_a=(251.0, 278.9, 228.2),
+        impedancia_percent=(12.0, 11.5, 12.5),
+        perdas_totais_kw=(300.0, 40.0, 290.0),  # Tap Menor: perdas totais abaixo das em vazio
+        perdas_vazio_kw=45.0,
+    )
+    result = LossesEngine().load(inputs)
+    assert result["valid"].tolist() == [True, False, True]
+    valid_v = result["test_tensao_kv"][[0, 2]]
+    assert result["max_tensao_kv"] == pytest.approx(float(np.max(valid_v)), rel=RTOL)
@@ -0,0 +1,114 @@
+# utils/array_codec.py
+"""
+Codificação binária compacta de arrays numpy para stores, MCP e histórico.
+
+Um array vira um dicionário JSON com cabeçalho de dtype/forma e os bytes em
+base64 (opcionalmente comprimidos com zlib):
+
+    {"__ndarray__": "<base64>", "dtype": "<f4", "shape": [n], "zlib": true}
+
+A codificação é opcional por chave: convert_numpy_types só codifica arrays
+abaixo das chaves de ARRAY_ENCODED_KEYS (formas de onda), e nelas float64 é
+gravado como float32 (formas de onda não precisam de mais de 7 dígitos
+significativos). Isso evita a conversão elemento a elemento para listas Python
+e reduz o JSON em 5–10x. Os demais arrays continuam como listas float64; os
+ndarrays que escapam até o json.dump das camadas de persistência (json_default)
+são codificados sem perda. Toda camada que lê esses dados (relatório, histórico,
+estado do MCP em disco e backups) usa decode_arrays para recuperar os ndarrays.
+"""
+import base64
+import logging
+import zlib
+from typing import Any
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+ARRAY_CODEC_KEY = "__ndarray__"
+ARRAY_ENCODING_MIN_SIZE = 64  # Arrays menores continuam como listas (legíveis no JSON)
+ARRAY_ENCODING_FLOAT_DTYPE = "<f4"  # Precisão das formas de onda (downcast_float=True)
+ARRAY_ENCODED_KEYS = frozenset({"waveform"})  # Chaves dos stores cujos arrays vão em binário float32
+ARRAY_ENCODING_ZLIB_LEVEL = 6
+ARRAY_ENCODABLE_KINDS = "fiub"  # float, int, uint, bool
+
+
+def should_encode_array(arr: np.ndarray) -> bool:
+    """True se o array for numérico e grande o bastante para a codificação binária."""
+    return arr.dtype.kind in ARRAY_ENCODABLE_KINDS and arr.size >= ARRAY_ENCODING_MIN_SIZE
+
+
+def encode_array(arr: np.ndarray, compress: bool = True, downcast_float: bool = False) -> dict:
+    """
+    Codifica um array numérico como dicionário JSON (base64 + cabeçalho).
+
+    Args:
+        arr: Array numérico; o dtype é mantido (em little-endian).
+        compress: Comprime os bytes com zlib (mantido só se diminuir o tamanho).
+        downcast_float: Grava arrays de ponto flutuante como float32 (formas de onda).
+    """
+    arr = np.asarray(arr)
+    if arr.dtype.kind == "f" and downcast_float:
+        arr = arr.astype(ARRAY_ENCODING_FLOAT_DTYPE, copy=False)
+    else:
+        arr = arr.astype(arr.dtype.newbyteorder("<"), copy=False)
+    raw = np.ascontiguousarray(arr).tobytes()
+    compressed = False
+    if compress:
+        packed = zlib.compress(raw, ARRAY_ENCODING_ZLIB_LEVEL)
+        if len(packed) < len(raw):
+            raw, compressed = packed, True
+    return {
+        ARRAY_CODEC_KEY: base64.b64encode(raw).decode("ascii"),
+        "dtype": arr.dtype.str,
+        "shape": list(arr.shape),
+        "zlib": compressed,
+    }
+
+
+def json_default(obj: Any) -> Any:
+    """
+    Hook `default` de json.dump(s) para as camadas de persistência.
+
+    ndarrays que escaparam de convert_numpy_types são codificados sem perda (em
+    vez de virar o repr truncado de str()); escalares numpy viram tipos Python.
+    """
+    if isinstance(obj, np.ndarray):
+        return encode_array(obj) if should_encode_array(obj) else obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+
+def is_encoded_array(obj: Any) -> bool:
+    """True se obj for um array codificado por encode_array."""
+    return isinstance(obj, dict) and ARRAY_CODEC_KEY in obj
+
+
+def decode_array(obj: dict) -> np.ndarray:
+    """Reconstrói o ndarray de um dicionário produzido por encode_array."""
+    raw = base64.b64decode(obj[ARRAY_CODEC_KEY])
+    if obj.get("zlib"):
+        raw = zlib.decompress(raw)
+    # bytearray: o array resultante é gravável (frombuffer sobre bytes é somente leitura)
+    return np.frombuffer(bytearray(raw), dtype=np.dtype(obj["dtype"])).reshape(obj["shape"])
+
+
+def decode_arrays(obj: Any) -> Any:
+    """
+    Percorre dicionários e listas substituindo arrays codificados por ndarrays.
+
+    Conteúdo inválido é mantido como está (com aviso), para que um registro
+    corrompido do histórico não impeça a leitura do restante da sessão.
+    """
+    if isinstance(obj, dict):
+        if is_encoded_array(obj):
+            try:
+                return decode_array(obj)
+            except (ValueError, TypeError, KeyError, zlib.error) as e:
+                log.warning(f"[ARRAY CODEC] Falha ao decodificar array: {e}")
+                return obj
+        return {k: decode_arrays(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [decode_arrays(item) for item in obj]
+    return obj
@@ -40,12 +40,13 @@ CHOPPED_UNDERSHOOT_MAX = 0.20  # ≤ 20% para Undershoot após colapso
 
 # --- Parâmetros Físicos (Exemplo Gerador Haefely & Componentes) ---
 # (Estes valores são exemplos e DEVEM ser ajustados para o equipamento real)
-L_PER_STAGE_H = 5  # Indutância por estágio (Henry)
+L_PER_STAGE_H = 5e-6  # Indutância por estágio (Henry)
 C_PER_STAGE_F = 1.5e-6  # Capacitância por estágio (Farad)
 C_DIVIDER_HIGH_VOLTAGE_F = 600e-12  # Divisor para Vmax >= 1200kV (Farad)
 C_DIVIDER_LOW_VOLTAGE_F = 1200e-12  # Divisor para Vmax < 1200kV (Farad)
 C_CHOPPING_GAP_F = 600e-12  # Capacitância parasita do gap de corte (Farad)
 R_PARASITIC_OHM = 5.0  # Resistência parasita estimada do circuito (Ohm)
+C_STRAY_PER_STAGE_F = 50e-12  # Capacitância parasita de cada nó do Marx para a terra (Farad)
 
 # --- Componentes Disponíveis (Para Dropdowns na UI) ---
 RESISTORS_LI_FRONT_AVAILABLE = [
@@ -6,6 +6,8 @@ import os
 import sqlite3
 from typing import Any, Dict, List, Optional
 
+from utils.array_codec import decode_arrays, json_default
+
 log = logging.getLogger(__name__)
 
 DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
@@ -124,7 +126,7 @@ def save_test_session(all_mcp_stores_data: Dict[str, Any], session_name: str, no
             # O MCP já deve ter garantido que store_content é serializável
             # ou é um dict de diagnóstico.
             try:
-                json_str = json.dumps(store_content, default=str, ensure_ascii=False)
+                json_str = json.dumps(store_content, default=json_default, ensure_ascii=False)
                 json_values_for_db.append(json_str)
                 log.debug(f"[DB MANAGER - SAVE] Serializado '{store_id}' para '{db_column_name}': {len(json_str)} bytes.")
             except Exception as e_ser:
@@ -164,10 +166,19 @@ def save_test_session(all_mcp_stores_data: Dict[str, Any], session_name: str, no
     finally:
         if conn: conn.close()
 
+def parse_store_json(json_str: str) -> Any:
+    """
+    Desserializa o JSON de um store salvo no histórico.
+
+    Arrays codificados por utils.array_codec (formas de onda) voltam a ser ndarrays.
+    """
+    return decode_arrays(json.loads(json_str))
+
 def get_test_session_details(session_id: int) -> Optional[Dict[str, Any]]:
     """
     Recupera os detalhes COMPLETOS de uma sessão específica, retornando os dados
-    dos stores como strings JSON para serem desserializados pelo MCP.
+    dos stores como strings JSON para serem desserializados pelo MCP (com
+    parse_store_json, que também decodifica os arrays).
     """
     log.info(f"[DB MANAGER - LOAD] Carregando detalhes da sessão ID: {session_id}")
     conn = None
@@ -10,6 +10,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+from utils.array_codec import decode_arrays, json_default
 from utils.paths import get_data_dir
 
 log = logging.getLogger(__name__)
@@ -60,7 +61,7 @@ def save_mcp_state_to_disk(mcp_data: Dict[str, Any], create_backup: bool = True)
 
         # Salvar dados em formato JSON
         with open(MCP_DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(data_with_metadata, f, ensure_ascii=False, indent=2, default=str)
+            json.dump(data_with_metadata, f, ensure_ascii=False, indent=2, default=json_default)
 
         log.info(f"Estado do MCP salvo em disco: {MCP_DATA_FILE}")
         return True
@@ -146,8 +147,8 @@ def load_mcp_state_from_disk() -> Tuple[Dict[str, Any], bool]:
             log.error(f"Formato inválido no arquivo de estado do MCP: {MCP_DATA_FILE}")
             return {}, False
 
-        # Extrair dados dos stores
-        stores_data = data.get("stores", {})
+        # Extrair dados dos stores (arrays codificados voltam a ser ndarrays)
+        stores_data = decode_arrays(data.get("stores", {}))
 
         # Log de diagnóstico
         log.info(f"Estado do MCP carregado do disco: {MCP_DATA_FILE}")
@@ -241,8 +242,8 @@ def restore_from_backup(backup_file: str) -> Tuple[Dict[str, Any], bool]:
             log.error(f"Formato inválido no arquivo de backup: {backup_file}")
             return {}, False
 
-        # Extrair dados dos stores
-        stores_data = data.get("stores", {})
+        # Extrair dados dos stores (arrays codificados voltam a ser ndarrays)
+        stores_data = decode_arrays(data.get("stores", {}))
 
         # Copiar arquivo de backup para o arquivo principal
         with open(MCP_DATA_FILE, "w", encoding="utf-8") as f:
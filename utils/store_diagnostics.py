@@ -14,6 +14,8 @@ from typing import Any, Dict, List
 
 import numpy as np
 
+from utils.array_codec import ARRAY_ENCODED_KEYS, encode_array, should_encode_array
+
 log = logging.getLogger(__name__)
 
 # Lista de todos os stores esperados na aplicação (pode ser importada se definida centralmente)
@@ -58,14 +60,18 @@ def is_json_serializable(obj: Any, attempt_conversion: bool = False) -> bool:
         return False
 
 
-def convert_numpy_types(obj: Any, debug_path: str = "") -> Any:
+def convert_numpy_types(obj: Any, debug_path: str = "", encode_arrays: bool = False) -> Any:
     """
     Converte tipos numpy e outros tipos comuns não serializáveis para JSON.
-    Percorre dicionários, listas e tuplas recursivamente.
+    Percorre dicionários, listas e tuplas recursivamente. Arrays numéricos
+    grandes abaixo das chaves de ARRAY_ENCODED_KEYS (formas de onda) são
+    codificados em binário float32 (ver utils.array_codec.decode_arrays); os
+    demais viram listas sem perda de precisão.
 
     Args:
         obj: Objeto a ser convertido
         debug_path: Caminho atual na estrutura aninhada (para debug)
+        encode_arrays: Codifica os arrays grandes de obj (ativado abaixo de ARRAY_ENCODED_KEYS)
 
     Returns:
         Objeto convertido
@@ -85,17 +91,19 @@ def convert_numpy_types(obj: Any, debug_path: str = "") -> Any:
     # Estruturas de dados aninhadas
     if isinstance(obj, dict):
         return {
-            k: convert_numpy_types(v, f"{debug_path}.{k}" if debug_path else k)
+            k: convert_numpy_types(
+                v, f"{debug_path}.{k}" if debug_path else k, encode_arrays or k in ARRAY_ENCODED_KEYS
+            )
             for k, v in obj.items()
         }
     elif isinstance(obj, list):
         return [
-            convert_numpy_types(item, f"{debug_path}[{i}]" if debug_path else f"[{i}]")
+            convert_numpy_types(item, f"{debug_path}[{i}]" if debug_path else f"[{i}]", encode_arrays)
             for i, item in enumerate(obj)
         ]
     elif isinstance(obj, tuple):
         return tuple(
-            convert_numpy_types(item, f"{debug_path}[{i}]" if debug_path else f"[{i}]")
+            convert_numpy_types(item, f"{debug_path}[{i}]" if debug_path else f"[{i}]", encode_arrays)
             for i, item in enumerate(obj)
         )
 
@@ -109,6 +117,12 @@ def convert_numpy_types(obj: Any, debug_path: str = "") -> Any:
         # Para float e int normais, retorna diretamente sem conversão
         return obj if isinstance(obj, (float, int)) else float(obj)
     elif isinstance(obj, np.ndarray):
+        # Arrays numéricos grandes das formas de onda vão em binário compacto (utils.array_codec)
+        if encode_arrays and should_encode_array(obj):
+            try:
+                return encode_array(obj, downcast_float=True)
+            except Exception as e:
+                debug_log(f"ERRO ao codificar np.ndarray em binário: {e}", "warning")
         # Converte array para lista, aplicando recursivamente a conversão
         try:
             return convert_numpy_types(obj.tolist(), debug_path)